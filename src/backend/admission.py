@@ -0,0 +1,160 @@
+# =============================================================================
+# admission.py — Bounded concurrency and admission control for /ask
+# =============================================================================
+# Instead of handing every request to Starlette's shared threadpool, /ask runs
+# on its own fixed-size executor behind an admission gate:
+#
+#   free slot (in_flight < max_in_flight)      → run now
+#   no slot, wait queue has room (< max_queue) → wait up to queue_timeout
+#   queue full / wait timed out                → AdmissionRejected (503 + Retry-After)
+#
+# Excess load is shed quickly instead of every caller slowing down together
+# while torch and Chroma's SQLite are oversubscribed.
+#
+# All bookkeeping happens on the event loop (no locks). A slot is released
+# only when the worker thread actually finishes, so a client that disconnects
+# mid-request does not let another request start on an already busy CPU.
+#
+# *mll
+# =============================================================================
+
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import REGISTRY
+
+
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "pathfinder_ask_in_flight", "Requests currently running on an executor", ("lane",))
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge(
+    "pathfinder_ask_queue_depth", "Requests waiting for an executor slot", ("lane",))
+ADMISSION_QUEUE_WAIT = REGISTRY.histogram(
+    "pathfinder_ask_queue_wait_seconds", "Time spent waiting for an executor slot", ("lane",))
+ADMISSION_REJECTED = REGISTRY.counter(
+    "pathfinder_ask_rejected_total", "Requests shed by admission control", ("lane", "reason"))
+
+
+class AdmissionRejected(Exception):
+    # Raised when a request is shed; app.py turns it into 503 + Retry-After.
+    def __init__(self, reason, retry_after):
+        super().__init__(f"admission rejected ({reason})")
+        self.reason      = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    # ("ADMISSION CONTROLLER": Dedicated executor + in-flight cap + short wait
+    #  queue. One instance per lane.
+    #  From: app.py lifespan (from_config) → To: ask_endpoint() via run() | *mll)
+
+    def __init__(self, name="ask", workers=4, max_in_flight=None, max_queue=16,
+                 queue_timeout=5.0, retry_after=2):
+        self.name          = name
+        self.workers       = workers
+        self.max_in_flight = max_in_flight or workers
+        self.max_queue     = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after   = retry_after
+        self.executor      = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-lane")
+        self.in_flight     = 0
+        self.waiting       = 0
+        self._slots        = None   # asyncio.Semaphore, created on first use inside the loop
+        self._loop         = None
+
+    @classmethod
+    def from_config(cls, config, name="ask", section="admission"):
+        conf = (config or {}).get('server', {}).get(section, {})
+        return cls(
+            name          = name,
+            workers       = conf.get('workers', 4),
+            max_in_flight = conf.get('max_in_flight'),
+            max_queue     = conf.get('max_queue', 16),
+            queue_timeout = conf.get('queue_timeout_seconds', 5.0),
+            retry_after   = conf.get('retry_after_seconds', 2),
+        )
+
+    def _reject(self, reason):
+        ADMISSION_REJECTED.inc(lane=self.name, reason=reason)
+        raise AdmissionRejected(reason, self.retry_after)
+
+    async def _acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._loop  = asyncio.get_running_loop()
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return
+        if self.waiting >= self.max_queue:
+            self._reject("queue_full")
+
+        self.waiting += 1
+        ADMISSION_QUEUE_DEPTH.set(self.waiting, lane=self.name)
+        waiter = asyncio.ensure_future(self._slots.acquire())
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)     # client went away while queued
+            raise
+        finally:
+            self.waiting -= 1
+            ADMISSION_QUEUE_DEPTH.set(self.waiting, lane=self.name)
+        if not done:
+            self._abandon(waiter)
+            self._reject("queue_timeout")
+
+    def _abandon(self, waiter):
+        # The waiter can be granted a slot in the same loop tick the timeout
+        # fires (or after cancel() is requested); such a slot is handed
+        # straight back instead of leaking a permit.
+        waiter.cancel()
+        waiter.add_done_callback(self._return_unused)
+
+    def _return_unused(self, waiter):
+        if not waiter.cancelled() and waiter.exception() is None:
+            self._slots.release()
+
+    def _release(self, _future=None):
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight, lane=self.name)
+        self._slots.release()
+
+    def _release_threadsafe(self, future):
+        try:
+            self._loop.call_soon_threadsafe(self._release, future)
+        except RuntimeError:
+            pass   # loop already closed (shutdown)
+
+    async def run(self, fn, *args, **kwargs):
+        # ("RUN": Admits the call, then runs fn(*args, **kwargs) on this lane's
+        #  executor with the caller's contextvars.
+        #  From: app.py ask_endpoint() → To: Pipeline.ask() | *mll)
+        queued_at = time.monotonic()
+        await self._acquire()
+        ADMISSION_QUEUE_WAIT.observe(time.monotonic() - queued_at, lane=self.name)
+
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight, lane=self.name)
+        ctx = contextvars.copy_context()
+        try:
+            future = self.executor.submit(functools.partial(ctx.run, fn, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release_threadsafe)
+        return await asyncio.wrap_future(future)
+
+    def stats(self):
+        return {
+            "workers":       self.workers,
+            "max_in_flight": self.max_in_flight,
+            "in_flight":     self.in_flight,
+            "queue_depth":   self.waiting,
+            "max_queue":     self.max_queue,
+            "queue_wait":    ADMISSION_QUEUE_WAIT.snapshot().get(self.name, {}),
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
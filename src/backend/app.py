@@ -1,12 +1,34 @@
 import os
+import json
+import time
+import asyncio
 import uvicorn
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 try:
-    from .pipeline import Pipeline
+    from .push_hub import PushHub, open_push_store
+    from .chroma_store import claim_serving_store
+    from .metrics import REGISTRY
+    from .rate_limit import ClientRateLimiter
+    from .admission import AdmissionController, AdmissionRejected
+    from .log_setup import get_logger, setup_logging
+    from .profiler import RequestProfiler, ProfilerBusy
+    from .startup import StartupReport, LOAD_PHASES
+    from .readiness import Readiness
+    from .tracing import finish_trace, record_pending, start_trace
 except ImportError:
-    from pipeline import Pipeline
+    from push_hub import PushHub, open_push_store
+    from chroma_store import claim_serving_store
+    from metrics import REGISTRY
+    from rate_limit import ClientRateLimiter
+    from admission import AdmissionController, AdmissionRejected
+    from log_setup import get_logger, setup_logging
+    from profiler import RequestProfiler, ProfilerBusy
+    from startup import StartupReport, LOAD_PHASES
+    from readiness import Readiness
+    from tracing import finish_trace, record_pending, start_trace
 from pathlib import Path
 from contextlib import asynccontextmanager
 from fastapi.concurrency import run_in_threadpool
@@ -14,40 +36,123 @@ from fastapi.concurrency import run_in_threadpool
 
 BASE_DIR = Path(__file__).parent
 DATASET = BASE_DIR / "dataset" / "dataset.json"
-CONFIG = BASE_DIR / "config" / "config.yaml"
+# CONFIG_PATH / CHROMA_PATH point a server at another config.yaml and index
+# directory (bench/loadtest.py runs its servers this way).
+CONFIG = Path(os.environ.get("CONFIG_PATH", BASE_DIR / "config" / "config.yaml"))
+CHROMA = os.environ.get("CHROMA_PATH") or None
+
+log = get_logger("api")
 
 
 pipeline = None
+rate_limiter = None
+ask_lane = None
+fast_lane = None
+profiler = RequestProfiler()
 itinerary_list = []
+prefill_run = {"state": "idle"}   # background POST /admin/prefill, reported by /admin/status
+prefill_task = None
+push_hub = PushHub()
+readiness = Readiness()
+PUSH_HEARTBEAT_SECONDS = 15
+PUSH_MAX_WAIT_SECONDS = 180
+
+
+def build_pipeline(startup):
+    # pipeline.py (and with it chromadb, the embedding model, ...) is only
+    # imported here, so importing app.py — and /health — stays light.
+    with startup.phase("imports"):
+        try:
+            from .pipeline import Pipeline
+        except ImportError:
+            from pipeline import Pipeline
+    return Pipeline(dataset_path=str(DATASET), config_path=str(CONFIG), startup=startup,
+                    chroma_path=CHROMA)
+
+
+async def start_pipeline():
+    # ("BACKGROUND STARTUP": loading → indexing → warming → ready, each step
+    #  in the threadpool so /health answers throughout. The pipeline is
+    #  published only once warm, so /ask keeps returning 503 until then.
+    #  From: lifespan() → To: global pipeline + readiness | *mll)
+    global pipeline, rate_limiter, ask_lane, fast_lane, profiler
+
+    def loading_progress(name, done):
+        if readiness.phase == "loading":
+            readiness.progress(done, len(LOAD_PHASES), name)
+
+    startup = StartupReport(listener=loading_progress)
+    try:
+        candidate = await run_in_threadpool(build_pipeline, startup)
+
+        # Per-client throttle for /ask; checked before any pipeline work.
+        rate_limiter = ClientRateLimiter.from_config(candidate.config)
+
+        # /ask runs on bounded executors; excess load gets a fast 503.
+        # Gate checks and cache hits use the fast lane so they never queue
+        # behind cold RAG misses, which are the only work sent to ask_lane.
+        ask_lane  = AdmissionController.from_config(candidate.config)
+        fast_lane = AdmissionController.from_config(candidate.config, name="fast", section="fast_lane")
+
+        # /admin/profile; stays off unless server.profiling.enabled is set.
+        profiler = RequestProfiler.from_config(candidate.config)
+
+        # Enhanced answers are pushed to /ask/{request_id}/events subscribers.
+        push_conf = candidate.config.get('push', {})
+        push_hub.ttl_seconds = push_conf.get('ttl_seconds', push_hub.ttl_seconds)
+        push_hub.bind_loop(asyncio.get_running_loop())
+        push_store = open_push_store(candidate.config, BASE_DIR)   # other workers' results
+        if push_store is not None:
+            push_hub.attach_store(push_store, poll_seconds=push_conf.get('poll_seconds', 0.5))
+        candidate.enhancer.add_listener(push_hub.publish)
+
+        if candidate.collection.count() == 0:
+            log.warning("⚠️ Brain is empty. Rebuilding index...")
+            readiness.enter("indexing", detail="rebuild_index")
+            with startup.phase("rebuild"):
+                await run_in_threadpool(candidate.rebuild_index, readiness.progress)
+            log.info("✅ Rebuild Complete! Loaded %s facts.", candidate.collection.count())
+        else:
+            log.info("🧠 Brain loaded. Contains %s facts.", candidate.collection.count())
 
+        if candidate.config.get('server', {}).get('warmup', {}).get('enabled', True):
+            queries = candidate.warmup_queries()
+            readiness.enter("warming", total=len(queries), detail="warm_up")
+            with startup.phase("warmup"):
+                await run_in_threadpool(candidate.warm_up, queries, readiness.progress)
+        startup.finish()
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    global pipeline
-    print("🚀 Pathfinder API is starting up...")
+        pipeline = candidate
+        readiness.enter("ready")
 
-    try:
+    except Exception as e:
+        log.error("❌ CRITICAL ERROR: Failed to start pipeline: %s", e)
+        readiness.fail(e)
 
-        pipeline = Pipeline(
-            dataset_path=str(DATASET),
-            config_path=str(CONFIG)
-        )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()   # defaults until Pipeline re-applies config.yaml logging.*
+    log.info("🚀 Pathfinder API is starting up...")
 
-        if pipeline.collection.count() == 0:
-            print("⚠️ Brain is empty. Rebuilding index...")
+    # An embedded Chroma store belongs to one serving process; a second
+    # worker fails here instead of serving a diverging cache and index.
+    # Several workers need rag.chroma_server (see chroma_store.py).
+    claim_serving_store(CONFIG, CHROMA)
 
-            await run_in_threadpool(pipeline.rebuild_index)
-            print(f"✅ Rebuild Complete! Loaded {pipeline.collection.count()} facts.")
-        else:
-            print(f"🧠 Brain loaded. Contains {pipeline.collection.count()} facts.")
-
-    except Exception as e:
-        print(f"❌ CRITICAL ERROR: Failed to start pipeline: {e}")
-        pipeline = None
+    # The server starts listening right away; /health and /admin/status
+    # report the startup phase and progress until the pipeline is ready.
+    startup_task = asyncio.create_task(start_pipeline())
 
     yield
-    print("🛑 Pathfinder API is shutting down...")
+    log.info("🛑 Pathfinder API is shutting down...")
+    if not startup_task.done():
+        # The current threadpool step can't be interrupted; don't wait on it.
+        startup_task.cancel()
+        await asyncio.wait({startup_task}, timeout=1)
+    for lane in (fast_lane, ask_lane):
+        if lane is not None:
+            lane.shutdown()
 
 app = FastAPI(title="Pathfinder API", version="1.0.0", lifespan=lifespan)
 
@@ -58,6 +163,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 
@@ -74,6 +180,9 @@ class PlaceInfo(BaseModel):
 class AskResponse(BaseModel):
     answer: str
     locations: list[PlaceInfo]
+    request_id: str | None = None
+    enhancement_pending: bool = False
+    explain: dict | None = None
 
 class ItineraryItem(BaseModel):
     place_name: str
@@ -86,26 +195,85 @@ def home():
 
 @app.get("/health")
 def health_check():
+    state = readiness.snapshot()
     if pipeline:
-        return {"status": "healthy", "facts_loaded": pipeline.collection.count()}
-    return {"status": "starting", "message": "Pipeline initializing"}
+        return {"status": "healthy", "facts_loaded": pipeline.collection.count(), "readiness": state}
+    if state["phase"] == "failed":
+        return {"status": "failed", "message": state["error"], "readiness": state}
+    return {"status": "starting", "message": f"Pipeline {state['phase']}", "readiness": state}
 
 @app.get("/admin/status")
 def admin_status(response: Response):
     """Check the health of the AI pipeline"""
     if pipeline is None:
         response.status_code = 503
-        return {"status": "starting", "ready": False}
+        return {"status": "starting", "ready": False, "readiness": readiness.snapshot()}
     try:
         return {
             "status": "healthy",
+            "readiness": readiness.snapshot(),
             "collection_count": pipeline.collection.count(),
+            "index": pipeline.index.stats(),
+            "embedding": pipeline.embedding_stats(),
+            "startup": pipeline.startup.summary(),
             "internet_available": getattr(pipeline, "internet_status", False),
+            "enhancer": pipeline.enhancer.stats(),
+            "push": push_hub.stats(),
+            "rate_limit": rate_limiter.stats() if rate_limiter else None,
+            "admission": {
+                "fast": fast_lane.stats() if fast_lane else None,
+                "ask":  ask_lane.stats() if ask_lane else None,
+            },
+            "profiling": profiler.stats(),
+            "prefill": prefill_run,
             "message": "Pathfinder is running"
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.get("/admin/enhancer")
+def admin_enhancer(response: Response):
+    """Background enhancer telemetry: queue, waits, providers, cache writes"""
+    if pipeline is None:
+        response.status_code = 503
+        return {"status": "starting", "ready": False}
+    return pipeline.enhancer.telemetry()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of all in-process metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/admin/profile")
+async def admin_profile(mode: str = "sample", seconds: float = 30, requests: int | None = None,
+                        interval_ms: float | None = None, format: str | None = None):
+    """Profile live /ask requests for a window of seconds or N requests"""
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Pipeline not initialized")
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (server.profiling.enabled)")
+    try:
+        session = profiler.start(mode, seconds, requests, interval_ms)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    log.info("🔬 Profiling /ask (%s, up to %ss / %s requests)", mode, session.seconds, requests or "any")
+    try:
+        await run_in_threadpool(session.wait)
+    finally:
+        profiler.finish(session)
+
+    if mode == "cprofile":
+        if format == "pstats":
+            return Response(session.pstats_dump(), media_type="application/octet-stream",
+                            headers={"Content-Disposition": 'attachment; filename="pathfinder.prof"'})
+        return PlainTextResponse(session.pstats_text())
+    if format == "json":
+        return {**session.summary(), "top": session.top_frames()}
+    return PlainTextResponse(session.collapsed())
+
 @app.post("/admin/rebuild")
 async def admin_rebuild():
     """Manually force a brain rebuild"""
@@ -115,17 +283,98 @@ async def admin_rebuild():
         await run_in_threadpool(pipeline.rebuild_index)
         return {
             "message": "Database rebuilt successfully",
-            "new_count": pipeline.collection.count()
+            "new_count": pipeline.collection.count(),
+            "index": pipeline.index.stats()
         }
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        return {"error": f"Rebuild failed: {str(e)}"}
+        return {"error": f"Rebuild failed: {str(e)}", "index": pipeline.index.stats()}
+
+@app.post("/admin/prefill", status_code=202)
+async def admin_prefill(sources: str | None = None, limit: int | None = None,
+                        max_enqueue: int | None = None, fresh: bool = False):
+    """Start a background run of a query list through ask() to fill the semantic cache (resumable)"""
+    global prefill_task
+    if not pipeline:
+        raise HTTPException(status_code=503, detail="Pipeline not initialized")
+    if prefill_run["state"] == "running":
+        raise HTTPException(status_code=409, detail="A prefill is already running")
+    try:
+        from .prefill import load_queries, prefill, DEFAULT_SOURCES
+    except ImportError:
+        from prefill import load_queries, prefill, DEFAULT_SOURCES
+
+    conf = pipeline.config.get('cache', {}).get('prefill', {})
+    try:
+        names   = sources.split(",") if sources else conf.get('sources', DEFAULT_SOURCES)
+        names   = [s.strip() for s in names if s.strip()]
+        queries = load_queries(names)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if limit:
+        queries = queries[:limit]
+
+    loop = asyncio.get_running_loop()
+
+    def admitted_ask(*args, **kwargs):
+        # Prefill queries take ask_lane slots like /ask cache misses, so live
+        # traffic plus prefill never exceeds max_in_flight. Shed ones wait
+        # the lane's Retry-After and try again.
+        while True:
+            try:
+                return asyncio.run_coroutine_threadsafe(
+                    ask_lane.run(pipeline.ask, *args, **kwargs), loop).result()
+            except AdmissionRejected as e:
+                time.sleep(e.retry_after)
+
+    def progress(done, total):
+        prefill_run.update(done=done, total=total)
+
+    async def run():
+        try:
+            result = await run_in_threadpool(
+                prefill, pipeline, queries,
+                batch_size    = conf.get('batch_size', 16),
+                workers       = conf.get('workers', 4),
+                max_enqueue   = conf.get('max_enqueue', 0) if max_enqueue is None else max_enqueue,
+                fresh         = fresh,
+                pause_seconds = conf.get('pause_seconds', 0.0),
+                progress      = progress,
+                ask           = admitted_ask)
+            prefill_run.update(state="done", result=result)
+        except Exception as e:
+            log.error("❌ Prefill failed: %s", e)
+            prefill_run.update(state="failed", error=str(e))
+        prefill_run["finished_at"] = time.time()
+
+    prefill_run.clear()
+    prefill_run.update(state="running", sources=names, queries=len(queries), done=0,
+                       started_at=time.time())
+    prefill_task = asyncio.create_task(run())
+    return {"message": "Prefill started", "queries": len(queries), "status": "/admin/status"}
+
+@app.post("/admin/rollback")
+async def admin_rollback():
+    """Re-activate the index generation replaced by the last rebuild"""
+    if not pipeline:
+        raise HTTPException(status_code=503, detail="Pipeline not initialized")
+    try:
+        await run_in_threadpool(pipeline.rollback_index)
+        return {
+            "message": "Rolled back to previous index",
+            "count": pipeline.collection.count(),
+            "index": pipeline.index.stats()
+        }
+    except Exception as e:
+        return {"error": f"Rollback failed: {str(e)}"}
 
 @app.post("/itinerary_add")
 def itinerary_add(item: ItineraryItem):
     """Add an item to the temporary itinerary list"""
     if item.place_name not in itinerary_list:
         itinerary_list.append(item.place_name)
-        print(f"📝 Added to itinerary: {item.place_name}")
+        log.info("📝 Added to itinerary: %s", item.place_name)
     return {
         "message": f"Added {item.place_name}",
         "total_items": len(itinerary_list)
@@ -141,20 +390,40 @@ def get_all_places():
     return {"places": []}
 
 @app.post("/ask", response_model=AskResponse)
-async def ask_endpoint(request: AskRequest):
+async def ask_endpoint(request: AskRequest, http_request: Request, explain: bool = False):
 
     if pipeline is None:
         raise HTTPException(status_code=503, detail="System is waking up. Please try again in 10 seconds.")
 
+    t0 = time.perf_counter()
+    allowed, retry_after = rate_limiter.check(http_request)
+    record_pending("limiter", time.perf_counter() - t0)   # timed with the query's other stages
+    if not allowed:
+        start_trace()
+        finish_trace("rate_limited")
+        raise HTTPException(status_code=429, detail=f"Please wait {retry_after}s.",
+                            headers={"Retry-After": str(retry_after)})
+
     try:
-        print(f"❓ Processing: {request.question}")
+        log.debug("❓ Processing: %s", request.question)
 
 
-        result = await run_in_threadpool(pipeline.ask, request.question, request.active_pin)
+        ask_front, ask_back = pipeline.ask_front, pipeline.ask_back
+        profile = profiler.join()   # None unless /admin/profile has a window open
+        if profile is not None:
+            ask_front, ask_back = profile.wrap(ask_front), profile.wrap(ask_back)
+        try:
+            result, state = await fast_lane.run(ask_front, request.question,
+                                                request.active_pin, explain)
+            if result is None:
+                result = await ask_lane.run(ask_back, state)
+        finally:
+            if profile is not None:
+                profile.leave()
 
 
         if not isinstance(result, dict):
-            print(f"⚠️ Unexpected result format: {result}")
+            log.warning("⚠️ Unexpected result format: %s", result)
             return {
                 "answer": str(result),
                 "locations": []
@@ -164,23 +433,61 @@ async def ask_endpoint(request: AskRequest):
         answer = result.get('answer', "I found some info but couldn't process the answer properly.")
 
         if len(locations) > 0:
-            print(f"📍 Found {len(locations)} locations.")
+            log.debug("📍 Found %s locations.", len(locations))
         else:
-            print(f"⚠️ No locations found.")
+            log.debug("⚠️ No locations found.")
 
         return {
             "answer": answer,
-            "locations": locations
+            "locations": locations,
+            "request_id": result.get('request_id'),
+            "enhancement_pending": result.get('enhancement_pending', False),
+            "explain": result.get('explain')
         }
 
+    except AdmissionRejected as e:
+        log.warning("🚦 Shedding request (%s)", e.reason)
+        raise HTTPException(status_code=503, detail="Pathfinder is busy. Please try again shortly.",
+                            headers={"Retry-After": str(e.retry_after)})
+
     except Exception as e:
-        print(f"❌ Error processing request: {e}")
+        log.exception("❌ Error processing request: %s", e)
 
         return {
             "answer": "I encountered an error processing that request. Please try asking differently.",
             "locations": []
         }
 
+@app.get("/ask/{request_id}/events")
+async def ask_events(request_id: str, request: Request):
+    """Server-Sent Events stream that delivers the enhanced answer for one /ask call"""
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="System is waking up. Please try again in 10 seconds.")
+
+    push_conf = pipeline.config.get('push', {})
+    heartbeat = push_conf.get('heartbeat_seconds', PUSH_HEARTBEAT_SECONDS)
+    max_wait  = push_conf.get('max_wait_seconds', PUSH_MAX_WAIT_SECONDS)
+
+    async def event_stream():
+        deadline = time.monotonic() + max_wait
+        yield "retry: 5000\n\n"
+        while time.monotonic() < deadline:
+            if await request.is_disconnected():
+                return
+            payload = await push_hub.wait(request_id, min(heartbeat, deadline - time.monotonic()))
+            if payload is not None:
+                event = "enhanced" if payload.get("status") == "enhanced" else "unchanged"
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+                return
+            yield ": keepalive\n\n"
+        yield "event: timeout\ndata: {}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
     print(f"🔌 Server listening on http://0.0.0.0:{port}")
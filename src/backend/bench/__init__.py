@@ -0,0 +1,20 @@
+# =============================================================================
+# bench/ — Offline benchmarking and load-testing tools for the backend
+# =============================================================================
+# Run every tool from src/backend so the flat backend modules import:
+#
+#   python -m bench.stub_llm        → local stand-in for Gemini / Groq
+#   python -m bench.enhancer        → enhancer throughput + backoff benchmark
+#   python -m bench.embedding       → torch vs int8 ONNX parity, latency, RSS
+#   python -m bench.replay          → replay a query log, A/B diff of answers
+#   python -m bench.micro           → per-call timings of the ask() building blocks
+#   python -m bench.ask             → end-to-end ask() over the calibration queries
+#   python -m bench.loadtest        → HTTP load test of a local uvicorn (/ask mix, CPU, RSS)
+#   python -m bench.synth           → synthetic dataset / GeoJSON / config at 10k–1M scale
+#   python -m bench.scale           → ingest, memory and ask() latency as the data grows
+#
+# micro / ask default to the deterministic hashing embedder (hashing_encoder.py)
+# on a scratch index (fixtures.py), so they run offline and compare across CI runs.
+#
+# *mll
+# =============================================================================
@@ -0,0 +1,151 @@
+# =============================================================================
+# bench/ask.py — End-to-end Pipeline.ask() benchmark over calibration queries
+# =============================================================================
+# Runs calibrate.py's TEST_QUERIES through ask() on a bench Pipeline
+# (bench/fixtures.py) in three passes:
+#
+#   cold    first ask(dry_run=True) of each query — first-touch costs
+#   miss    --rounds more dry runs — steady-state RAG path, no cache
+#   hit     ask() once to cache each answer, then --rounds cached asks
+#
+# and reports p50/p95/p99 per pass and per route, plus the mean time of each
+# trace stage on the miss path. Nothing is enqueued for the LLM enhancer.
+# --backend hashing (default) is deterministic and offline, so runs are
+# comparable in CI; --compare fails when a pass/route p50 regressed more
+# than --max-regression.
+#
+# Usage (from src/backend):
+#   python -m bench.ask
+#   python -m bench.ask --backend torch --rounds 5 --workdir /tmp/pf_bench
+#   python -m bench.ask --json ask.json --compare baseline.json
+#
+# *mll
+# =============================================================================
+
+import argparse
+import json
+import platform
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.fixtures import BACKENDS, open_pipeline
+from bench.stats import regressions, summarize
+
+
+def timed_asks(pipeline, queries, rounds, **kwargs):
+    # → [(query, route, seconds, stages)] for `rounds` passes over the queries.
+    samples = []
+    for _ in range(rounds):
+        for query in queries:
+            t0      = time.perf_counter()
+            result  = pipeline.ask(query, explain=True, enqueue=False, log_query=False, **kwargs)
+            elapsed = time.perf_counter() - t0
+            explain = result.get("explain") or {}
+            samples.append((query, explain.get("route") or "unknown", elapsed, explain.get("stages", {})))
+    return samples
+
+
+def by_route(samples):
+    routes = defaultdict(list)
+    for _, route, seconds, _ in samples:
+        routes[route].append(seconds)
+    return {route: summarize(values) for route, values in sorted(routes.items())}
+
+
+def stage_means(samples):
+    totals, calls = defaultdict(float), defaultdict(int)
+    for *_, stages in samples:
+        for name, stat in stages.items():
+            totals[name] += stat["ms"]
+            calls[name]  += 1
+    return {name: round(totals[name] / calls[name], 3)
+            for name in sorted(totals, key=lambda n: -totals[n] / calls[n])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ask() benchmark over calibration queries")
+    parser.add_argument('--backend', choices=BACKENDS, default='hashing',
+                        help='embedding backend; hashing = deterministic, offline')
+    parser.add_argument('--rounds', type=int, default=3, help='passes for the miss and hit phases')
+    parser.add_argument('--workdir', default=None, help='reuse this directory for the bench index')
+    parser.add_argument('--json', default=None, help='write the report here')
+    parser.add_argument('--compare', default=None, help='baseline report (--json of an earlier run)')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='allowed p50 growth over the baseline (0.25 = +25%%)')
+    args = parser.parse_args()
+
+    from calibrate import TEST_QUERIES
+    queries = [q for q, _, _ in TEST_QUERIES]
+
+    print(f"[BENCH] ask | backend={args.backend} | {len(queries)} calibration queries × {args.rounds} rounds")
+    t0 = time.perf_counter()
+    pipeline, workdir = open_pipeline(args.backend, args.workdir)
+    setup_s = time.perf_counter() - t0
+    try:
+        cold = timed_asks(pipeline, queries, 1, dry_run=True)
+        miss = timed_asks(pipeline, queries, args.rounds, dry_run=True)
+        timed_asks(pipeline, queries, 1)                 # cache every cacheable answer
+        hit  = timed_asks(pipeline, queries, args.rounds)
+    finally:
+        pipeline.enhancer.stop()
+
+    passes = {"cold": cold, "miss": miss, "hit": hit}
+    report = {
+        "backend":  args.backend,
+        "rounds":   args.rounds,
+        "python":   platform.python_version(),
+        "machine":  platform.machine(),
+        "setup_s":  round(setup_s, 2),
+        "passes":   {name: summarize([s for _, _, s, _ in samples]) for name, samples in passes.items()},
+        "routes":   {name: by_route(samples) for name, samples in passes.items()},
+        "hit_rate": round(sum(r == "cache_hit" for _, r, _, _ in hit) / len(hit), 3) if hit else 0.0,
+        "miss_stage_mean_ms": stage_means(miss),
+    }
+
+    print("\n" + "=" * 72)
+    print(f"  ASK() BENCHMARK ({args.backend})")
+    print("=" * 72)
+    print(f"  Setup (load + index)  : {report['setup_s']}s  [{workdir}]")
+    for name, s in report["passes"].items():
+        print(f"  {name:<6} ({s['count']:>4} asks) : p50 {s['p50_ms']} / p95 {s['p95_ms']} / "
+              f"p99 {s['p99_ms']} ms (mean {s['mean_ms']})")
+        for route, r in report["routes"][name].items():
+            print(f"      {route:<16} : p50 {r['p50_ms']} / p95 {r['p95_ms']} ms ({r['count']})")
+    print(f"  Cache hit rate (hit)  : {report['hit_rate']:.1%}")
+    print("  Miss-path stages (mean ms): " + ", ".join(
+        f"{name} {ms}" for name, ms in list(report["miss_stage_mean_ms"].items())[:8]))
+    print("=" * 72)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"  Saved → {args.json}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("backend") != args.backend:
+            print(f"  ⚠ Baseline backend is '{baseline.get('backend')}', this run is '{args.backend}'")
+
+        def flatten(r):
+            cases = dict(r["passes"])
+            for name, routes in r["routes"].items():
+                cases.update({f"{name}/{route}": s for route, s in routes.items()})
+            return cases
+
+        worse = regressions(flatten(baseline), flatten(report), "p50_ms", args.max_regression)
+        for name, w in worse.items():
+            print(f"  ❌ {name}: p50 {w['baseline']} → {w['current']} ms (×{w['ratio']})")
+        if worse:
+            sys.exit(1)
+        print(f"  ✅ No pass/route regressed more than {args.max_regression:.0%} vs {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
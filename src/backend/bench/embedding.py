@@ -0,0 +1,157 @@
+# =============================================================================
+# bench/embedding.py — Embedding backend parity, latency and memory benchmark
+# =============================================================================
+# Loads each backend (torch SentenceTransformer, int8 ONNX from export_onnx.py)
+# in its own fresh process, so import + model RSS is measured in isolation,
+# and reports:
+#
+#   load time, RSS after import + load, RSS after the run
+#   single-query encode latency over calibrate.py's TEST_QUERIES
+#   batch throughput (texts/s) at --batch-size
+#   parity: cosine agreement of every other backend with the first one
+#
+# Usage (from src/backend):
+#   python -m bench.embedding
+#   python -m bench.embedding --backends torch,onnx --rounds 5 --threads 2
+#   python -m bench.embedding --min-cosine 0.995      (exit 1 below this)
+#
+# *mll
+# =============================================================================
+
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.stats import summarize
+from export_onnx import cosine_agreement
+from startup import rss_mb
+
+CONFIG_PATH = BACKEND_DIR / "config" / "config.yaml"
+
+
+def run_backend(backend, rag_conf, texts, rounds, batch_size, results):
+    # ("BACKEND RUN": Child-process body — nothing heavy is imported before
+    #  the first RSS reading.
+    #  From: main() (one process per backend) → To: results queue | *mll)
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    os.environ["HF_DATASETS_OFFLINE"]  = "1"
+    os.environ.pop("EMBEDDING_BACKEND", None)
+    from log_setup import setup_logging
+    setup_logging({'logging': {'level': 'WARNING', 'format': 'text'}})
+    from embedding_service import load_local_model
+
+    rss_start  = rss_mb()
+    model_name = "sentence-transformers/" + rag_conf["model_path"]
+    t0         = time.perf_counter()
+    model      = load_local_model(model_name, dict(rag_conf, embedding_backend=backend))
+    load_s     = time.perf_counter() - t0
+    rss_loaded = rss_mb()
+    loaded_as  = "onnx" if type(model).__name__ == "OnnxEncoder" else "torch"
+
+    reference = np.asarray(model.encode(texts), dtype=np.float32)   # also warms up
+
+    single = []
+    for _ in range(rounds):
+        for text in texts:
+            t0 = time.perf_counter()
+            model.encode(text)
+            single.append(time.perf_counter() - t0)
+
+    corpus = (texts * (batch_size // max(len(texts), 1) + 1))[:batch_size]
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        model.encode(corpus, batch_size=batch_size)
+    batch_s = (time.perf_counter() - t0) / rounds
+
+    results.put({
+        "backend":     backend,
+        "loaded_as":   loaded_as,
+        "load_s":      round(load_s, 2),
+        "rss_start":   rss_start,
+        "rss_loaded":  rss_loaded,
+        "rss_end":     rss_mb(),
+        "single":      summarize(single),
+        "batch_tps":   round(len(corpus) / batch_s, 1) if batch_s else None,
+        "embeddings":  reference,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend parity + latency/RSS benchmark")
+    parser.add_argument('--backends', default='torch,onnx', help='first one is the parity reference')
+    parser.add_argument('--rounds', type=int, default=3, help='passes over the query set')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=None, help='onnxruntime intra-op threads')
+    parser.add_argument('--timeout', type=float, default=600, help='give up on a backend after N seconds')
+    parser.add_argument('--min-cosine', type=float, default=0.99,
+                        help='exit 1 if any backend agrees less than this with the reference')
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    rag_conf = config.get('rag', {})
+    if args.threads is not None:
+        rag_conf = dict(rag_conf, onnx=dict(rag_conf.get('onnx', {}), threads=args.threads))
+
+    from calibrate import TEST_QUERIES
+    texts    = [q for q, _, _ in TEST_QUERIES]
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    print(f"[BENCH] backends={backends} | {len(texts)} calibration queries × {args.rounds} rounds | "
+          f"batch={args.batch_size}")
+
+    ctx     = multiprocessing.get_context("spawn")
+    reports = []
+    for backend in backends:
+        results = ctx.Queue()
+        proc    = ctx.Process(target=run_backend,
+                              args=(backend, rag_conf, texts, args.rounds, args.batch_size, results))
+        proc.start()
+        try:
+            report = results.get(timeout=args.timeout)
+        except queue.Empty:
+            proc.kill()
+            raise SystemExit(f"[BENCH] {backend}: no result after {args.timeout}s (exit code {proc.exitcode})")
+        proc.join()
+        reports.append(report)
+
+    reference = reports[0]
+    failed    = False
+    print("\n" + "=" * 60)
+    print("  EMBEDDING BACKEND BENCHMARK")
+    print("=" * 60)
+    for report in reports:
+        print(f"  [{report['backend']}]" + (f"  ⚠ fell back to {report['loaded_as']}"
+                                           if report['loaded_as'] != report['backend'] else ""))
+        print(f"    Load               : {report['load_s']}s")
+        print(f"    RSS (MB)           : start {report['rss_start']} → loaded {report['rss_loaded']} "
+              f"→ end {report['rss_end']}")
+        print(f"    Single query       : {report['single']}")
+        print(f"    Batch throughput   : {report['batch_tps']} texts/s")
+        if report is not reference:
+            if report['embeddings'].shape != reference['embeddings'].shape:
+                print(f"    Parity vs {reference['backend']:<8} : dimension mismatch "
+                      f"{report['embeddings'].shape} vs {reference['embeddings'].shape}")
+                failed = True
+                continue
+            agreement = cosine_agreement(reference['embeddings'], report['embeddings'], texts)
+            print(f"    Parity vs {reference['backend']:<8} : {agreement}")
+            failed |= agreement['min'] < args.min_cosine
+    print("=" * 60)
+    if failed:
+        print(f"  ❌ Parity check failed (--min-cosine {args.min_cosine})")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
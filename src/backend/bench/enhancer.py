@@ -0,0 +1,196 @@
+# =============================================================================
+# bench/enhancer.py — End-to-end BackgroundEnhancer benchmark, fully offline
+# =============================================================================
+# Feeds N synthetic jobs (candidate pools built from dataset.json) through a
+# real BackgroundEnhancer whose providers point at bench/stub_llm.py, then
+# reports throughput, job latency and how 429 backoff affected the run.
+#
+# The semantic cache is replaced by a recorder so the numbers isolate the
+# queue → provider → pin-resolution path (no embedding model needed).
+#
+# Usage (from src/backend):
+#   python -m bench.enhancer --jobs 200 --latency-ms 150
+#   python -m bench.enhancer --jobs 100 --rate-429 0.2 --retry-after 1 --max-backoff 1
+#   python -m bench.enhancer --queue sqlite --providers local
+#   python -m bench.enhancer --stub-url http://127.0.0.1:8090   (external stub)
+#
+# *mll
+# =============================================================================
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import yaml
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench import stub_llm
+from bench.stats import summarize
+from log_setup import setup_logging
+from pipeline import BackgroundEnhancer, CONFIG_PATH, DATASET_PATH, GEOJSON_PATH
+
+
+class RecordingCache:
+    # ("RECORDING CACHE": Stands in for SemanticCache.update() and remembers
+    #  when each query was upgraded.
+    #  From: BackgroundEnhancer._process_job() → To: report | *mll)
+
+    def __init__(self):
+        self.lock    = threading.Lock()
+        self.updates = {}
+
+    def update(self, query, enhanced_answer, places=None):
+        with self.lock:
+            self.updates[query] = (time.time(), enhanced_answer, places or [])
+        return True
+
+
+def load_geo_db(geojson_path):
+    # Same shape as GeoLookup.places_db, without needing the embedding model.
+    with open(geojson_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    geo_db = {}
+    for feature in data.get('features', []):
+        props = feature.get('properties', {})
+        geom  = feature.get('geometry', {})
+        name  = props.get('name', '').strip()
+        if name and geom.get('type') == 'Point':
+            geo_db[name.lower()] = {
+                "name":         name,
+                "coordinates":  geom.get('coordinates'),
+                "type":         props.get('type', 'place'),
+                "municipality": props.get('municipality', 'Catanduanes'),
+            }
+    return geo_db
+
+
+def build_jobs(dataset_path, count, pool_size, seed):
+    # ("JOB BUILDER": One job per sampled dataset question; the candidate pool
+    #  is other records from the same location, like the RAG loop collects.
+    #  From: main() → To: BackgroundEnhancer.enqueue() | *mll)
+    with open(dataset_path, 'r', encoding='utf-8') as f:
+        data = [d for d in json.load(f) if 'input' in d and 'output' in d]
+
+    by_location = {}
+    for item in data:
+        by_location.setdefault(str(item.get('location', '')).upper(), []).append(item)
+
+    rng  = random.Random(seed)
+    jobs = []
+    for n in range(count):
+        item  = rng.choice(data)
+        peers = by_location.get(str(item.get('location', '')).upper(), data)
+        pool  = rng.sample(peers, min(pool_size, len(peers)))
+        jobs.append({
+            'query':      f"{item['input'].strip().lower()} #{n}",
+            'raw_answer': item['output'],
+            'candidates': [{'place': p.get('place_name', ''),
+                            'text':  p.get('summary_offline', p['output']),
+                            'conf':  0.5} for p in pool],
+        })
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline BackgroundEnhancer benchmark")
+    parser.add_argument('--jobs', type=int, default=100)
+    parser.add_argument('--pool-size', type=int, default=8)
+    parser.add_argument('--providers', default='gemini,groq',
+                        help='provider order, e.g. "gemini,groq" or "local"')
+    parser.add_argument('--queue', choices=['memory', 'sqlite'], default='memory')
+    parser.add_argument('--max-backoff', type=float, default=5,
+                        help='cap on 429 waits (enhancer.max_backoff_seconds)')
+    parser.add_argument('--retry-seconds', type=float, default=0.5,
+                        help='first delay before a job no provider answered is retried '
+                             '(enhancer.retry_seconds; capped at --max-backoff)')
+    parser.add_argument('--timeout', type=float, default=600, help='give up after N seconds')
+    parser.add_argument('--stub-url', default=None,
+                        help='use an already running stub instead of starting one')
+    parser.add_argument('--verbose', action='store_true', help='show enhancer logs')
+    stub_llm.add_behaviour_args(parser)
+    args = parser.parse_args()
+
+    server = behaviour = None
+    if args.stub_url:
+        stub_url = args.stub_url.rstrip('/')
+    else:
+        server, behaviour = stub_llm.start_in_thread(**stub_llm.behaviour_kwargs(args))
+        stub_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    tmp_dir = tempfile.mkdtemp(prefix="pf_enhancer_bench_")
+    config.setdefault('enhancer', {}).update({
+        'providers':           [p.strip() for p in args.providers.split(',') if p.strip()],
+        'queue_backend':       args.queue,
+        'queue_path':          str(Path(tmp_dir) / "jobs.db"),
+        'max_backoff_seconds': args.max_backoff,
+        'retry_seconds':       args.retry_seconds,
+        'max_retry_seconds':   args.max_backoff,
+        'local':               {'base_url': f"{stub_url}/v1", 'model_name': 'stub'},
+    })
+    config.setdefault('gemini', {})['base_url'] = f"{stub_url}/v1beta"
+    config.setdefault('groq', {})['base_url']   = f"{stub_url}/v1"
+    for var in ('ENHANCER_PROVIDERS', 'GEMINI_BASE_URL', 'GROQ_BASE_URL', 'LOCAL_BASE_URL'):
+        os.environ.pop(var, None)
+    os.environ['GROQ_API_KEY'] = 'stub'
+
+    setup_logging({'logging': {'level': 'DEBUG' if args.verbose else 'CRITICAL', 'format': 'text'}})
+
+    cache    = RecordingCache()
+    enhancer = BackgroundEnhancer('stub', cache, config, geo_db=load_geo_db(GEOJSON_PATH))
+    jobs     = build_jobs(DATASET_PATH, args.jobs, args.pool_size, args.seed)
+
+    print(f"[BENCH] {len(jobs)} jobs | providers={config['enhancer']['providers']} | "
+          f"queue={args.queue} | stub={stub_url}")
+
+    started = time.time()
+    for job in jobs:
+        enhancer.enqueue(job['query'], job['raw_answer'], job['raw_answer'],
+                         candidates=job['candidates'], rag_tier='ALL')
+    enhancer.start()
+    while enhancer.job_queue.depth() > 0 and time.time() - started < args.timeout:
+        time.sleep(0.05)
+    elapsed = time.time() - started
+    remaining = enhancer.job_queue.depth()
+    enhancer.stop()
+
+    latencies = [t - started for (t, _, _) in cache.updates.values()]
+    pins      = [len(p) for (_, _, p) in cache.updates.values()]
+    done      = len(jobs) - remaining
+
+    print("\n" + "=" * 60)
+    print("  ENHANCER BENCHMARK")
+    print("=" * 60)
+    print(f"  Jobs processed     : {done}/{len(jobs)} in {elapsed:.2f}s "
+          f"({done / elapsed if elapsed else 0:.1f} jobs/s)")
+    print(f"  Cache upgrades     : {len(cache.updates)}")
+    print(f"  Avg pins per job   : {sum(pins) / len(pins) if pins else 0:.1f}")
+    print(f"  Completion latency : {summarize(latencies)}")
+    if behaviour:
+        print(f"  Stub counters      : {behaviour.snapshot()}")
+    telemetry = enhancer.telemetry()
+    print(f"  Job outcomes       : {telemetry['jobs']}")
+    print(f"  Provider calls     : {telemetry['provider_calls']}")
+    print(f"  Provider latency   : {telemetry['provider_latency_seconds']}")
+    print(f"  Job wait           : {telemetry['job_wait_seconds']}")
+    if remaining:
+        print(f"  ⚠ {remaining} jobs still queued after --timeout {args.timeout}s")
+    print("=" * 60)
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
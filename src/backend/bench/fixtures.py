@@ -0,0 +1,84 @@
+# =============================================================================
+# bench/fixtures.py — Self-contained Pipeline for the benchmarks
+# =============================================================================
+# open_pipeline() builds a Pipeline that touches nothing outside its work
+# directory and needs no network when backend="hashing":
+#
+#   <workdir>/<backend>/config.yaml   config.yaml with bench overrides:
+#                                     embedding_backend, no embedding service,
+#                                     no bundle, memory enhancer queue with no
+#                                     LLM providers, no query log, no rebuild
+#                                     pauses, WARNING logs
+#   <workdir>/<backend>/chroma/       knowledge index + semantic cache, built
+#                                     from dataset.json on first use
+#
+# Without --workdir a temp directory is used and the index is rebuilt every
+# run; pass one to reuse it (the rebuild is skipped when it is up to date).
+#
+# *mll
+# =============================================================================
+
+import os
+import tempfile
+from pathlib import Path
+
+import yaml
+
+from pipeline import CONFIG_PATH, DATASET_PATH
+
+BACKENDS = ("hashing", "torch", "onnx")
+
+# libyaml when available: bench/scale.py configs carry up to ~10^5 places.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def bench_config(backend, config_path=CONFIG_PATH):
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.load(f, Loader=YAML_LOADER)
+    rag = config.setdefault('rag', {})
+    rag['embedding_backend'] = backend
+    rag.setdefault('embedding_service', {})['enabled'] = False
+    rag.setdefault('bundle', {})['enabled'] = False
+    rag.setdefault('rebuild', {}).update(pause_seconds=0, nice=0)
+    config.setdefault('enhancer', {}).update(queue_backend='memory', providers=[])
+    config.setdefault('query_log', {})['enabled'] = False
+    config.setdefault('logging', {})['level'] = 'WARNING'
+    return config
+
+
+def index_stale(pipeline):
+    # True when the collection is empty or was built from another dataset.json.
+    manifest = pipeline.index.manifest(pipeline.collection.name)
+    return (pipeline.collection.count() == 0
+            or manifest.get('dataset_hash') != pipeline.dataset_hash(pipeline.dataset_path))
+
+
+def open_pipeline(backend="hashing", workdir=None, dataset_path=DATASET_PATH, geojson_path=None,
+                  config_path=CONFIG_PATH, build=True):
+    # ("BENCH PIPELINE": Pipeline on the chosen embedding backend with its
+    #  own config + Chroma directory; builds the index if it is empty or
+    #  dataset.json changed since it was built (build=False leaves that to
+    #  the caller). dataset / geojson / config default to the real ones.
+    #  From: bench.micro / bench.ask / bench.loadtest / bench.scale
+    #  → To: (pipeline, workdir) | *mll)
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="pf_bench_")) / backend
+    workdir.mkdir(parents=True, exist_ok=True)
+    with open(workdir / "config.yaml", 'w', encoding='utf-8') as f:
+        yaml.dump(bench_config(backend, config_path), f, Dumper=YAML_DUMPER, allow_unicode=True,
+                  sort_keys=False)
+
+    # Env overrides would otherwise win over the bench config.
+    os.environ["EMBEDDING_BACKEND"]  = backend
+    os.environ["QUERY_LOG_ENABLED"]  = "0"
+    os.environ.pop("ENHANCER_PROVIDERS", None)
+    os.environ.pop("ENHANCER_QUEUE_PATH", None)
+
+    from pipeline import Pipeline
+    pipeline = Pipeline(dataset_path=str(dataset_path), config_path=str(workdir / "config.yaml"),
+                        chroma_path=workdir / "chroma", geojson_path=geojson_path)
+    if build and index_stale(pipeline):
+        pipeline.rebuild_index()
+    return pipeline, workdir
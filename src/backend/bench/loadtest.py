@@ -0,0 +1,658 @@
+# =============================================================================
+# bench/loadtest.py — HTTP load test of the FastAPI app (/ask, /health, /itinerary_add)
+# =============================================================================
+# Closed-loop load generator: --concurrency virtual users each send requests
+# back to back (optional --think-ms pause) for --duration seconds, drawing
+# every request from a weighted --mix of traffic classes:
+#
+#   hit        calibrate.py TEST_QUERIES, asked once before the run so they
+#              come back from the semantic cache
+#   miss       generated "activity + town / place" questions, never repeated
+#              within a run, so they take the RAG path
+#   pinned     follow-up questions with an active_pin (a GeoJSON place)
+#   multi      two activities in one question ("beaches and hotels in viga")
+#   browse     "<activity> in <town>" listings (these warm up as they repeat)
+#   health     GET /health
+#   itinerary  POST /itinerary_add with a GeoJSON place
+#
+# /ask is called with ?explain=true so the route (cache_hit / rag / …) of
+# every answer is known. Every request carries the rate limit bypass token
+# (X-RateLimit-Bypass): a spawned server gets a fresh one via
+# RATE_LIMIT_BYPASS_TOKEN, a --url server needs --bypass-token (default: the
+# same env var) or its per-IP limit throttles the run.
+#
+# Reported per concurrency level: throughput, latency p50/p95/p99 overall and
+# per class, error / 503 / 429 rates, observed cache hit rate per /ask class,
+# and the server's CPU (% of one core) and RSS sampled from /proc over the
+# run (uvicorn worker processes included), plus the admission lanes from
+# /admin/status. Requests that finish inside --ramp-seconds are not counted.
+#
+# By default a local uvicorn is spawned on a bench index (bench/fixtures.py)
+# with the chosen embedding backend, an empty semantic cache and --set config
+# overrides, so concurrency and executor tuning can be compared run to run
+# (same --seed = same requests); --url targets a server that is already
+# running (--pid enables resource sampling).
+#
+# Usage (from src/backend):
+#   python -m bench.loadtest --concurrency 1,4,16 --duration 30
+#   python -m bench.loadtest --set server.admission.workers=8 --set server.admission.max_in_flight=8
+#   python -m bench.loadtest --uvicorn-workers 2 --backend torch --json load.json
+#   python -m bench.loadtest --url http://127.0.0.1:8000 --pid 12345 --mix hit=1,miss=1
+#
+# *mll
+# =============================================================================
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import yaml
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.stats import summarize
+
+GEOJSON_PATH = BACKEND_DIR.parent.parent / "public" / "catanduanes_datafile.geojson"
+
+DEFAULT_MIX = "hit=35,miss=15,pinned=10,multi=10,browse=15,health=10,itinerary=5"
+ASK_CLASSES = ("hit", "miss", "pinned", "multi", "browse")
+CLASSES     = ASK_CLASSES + ("health", "itinerary")
+
+ACTIVITIES = ("beaches", "waterfalls", "hotels", "restaurants", "surfing spots", "resorts",
+              "coffee shops", "hiking trails", "churches", "snorkeling spots", "viewpoints", "inns")
+MISS_TEMPLATES = (
+    "are there {activity} in {town}",
+    "recommend {activity} around {town}",
+    "what {activity} can I visit near {place}",
+    "any good {activity} close to {place}",
+    "{activity} worth a day trip from {town}",
+)
+PINNED_QUESTIONS = (
+    "how do I get here?", "what can I do here?", "is there food nearby?",
+    "how much is the entrance fee?", "what time is it open?", "is it good for kids?",
+    "where can I stay near here?",
+)
+BROWSE_TEMPLATES = ("{activity} in {town}", "best {activity} near {town}")
+
+
+def parse_mix(text):
+    # "hit=35,miss=15" → {"hit": 35.0, "miss": 15.0}; classes left out get 0.
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in CLASSES:
+            raise ValueError(f"unknown traffic class '{name}' (choose from {', '.join(CLASSES)})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("--mix needs at least one class with a positive weight")
+    return mix
+
+
+def parse_set(pairs):
+    # ["server.admission.workers=8"] → nested dict, values parsed as YAML scalars.
+    overrides = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"--set expects key.path=value, got '{pair}'")
+        node = overrides
+        *parents, leaf = key.strip().split(".")
+        for name in parents:
+            node = node.setdefault(name, {})
+        node[leaf] = yaml.safe_load(value)
+    return overrides
+
+
+def merge(base, overrides):
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+class Workload:
+    # ("WORKLOAD": Seeded request generator for the traffic classes. Each
+    #  virtual user draws from its own Random; miss questions come from one
+    #  shared shuffled sequence so none repeats within a run.
+    #  From: main() → To: run_level() | *mll)
+
+    def __init__(self, mix, seed=0):
+        from calibrate import TEST_QUERIES
+        with open(GEOJSON_PATH, "r", encoding="utf-8") as f:
+            features = json.load(f).get("features", [])
+        self.places = sorted({(f.get("properties") or {}).get("name", "").strip() for f in features
+                              if (f.get("geometry") or {}).get("type") == "Point"} - {""})
+        self.towns  = sorted({(f.get("properties") or {}).get("municipality", "").strip().title()
+                              for f in features} - {""})
+        self.hits   = [q for q, _, _ in TEST_QUERIES]
+        self.seed   = seed
+        self.names  = [name for name in CLASSES if mix.get(name, 0) > 0]
+        self.weights = [mix[name] for name in self.names]
+
+        misses = [t.format(activity=a, town=town, place=place)
+                  for t in MISS_TEMPLATES for a in ACTIVITIES
+                  for town, place in zip(itertools.cycle(self.towns), self.places)]
+        random.Random(seed).shuffle(misses)
+        self._misses = iter(dict.fromkeys(misses))
+        self._lock   = threading.Lock()
+
+    def rng(self, user):
+        return random.Random(self.seed * 10007 + user)
+
+    def next_miss(self, rng):
+        with self._lock:
+            query = next(self._misses, None)
+        if query is None:   # sequence exhausted on a very long run: fall back to fresh pairs
+            query = f"{rng.choice(ACTIVITIES)} and {rng.choice(ACTIVITIES)} around {rng.choice(self.places)}"
+        return query
+
+    def draw(self, rng):
+        # → (class, method, path, body)
+        name = rng.choices(self.names, self.weights)[0]
+        if name == "health":
+            return name, "GET", "/health", None
+        if name == "itinerary":
+            return name, "POST", "/itinerary_add", {"place_name": rng.choice(self.places)}
+        pin = None
+        if name == "hit":
+            question = rng.choice(self.hits)
+        elif name == "miss":
+            question = self.next_miss(rng)
+        elif name == "pinned":
+            question, pin = rng.choice(PINNED_QUESTIONS), rng.choice(self.places)
+        elif name == "multi":
+            first, second = rng.sample(ACTIVITIES, 2)
+            question = f"{first} and {second} in {rng.choice(self.towns).lower()}"
+        else:
+            question = rng.choice(BROWSE_TEMPLATES).format(activity=rng.choice(ACTIVITIES),
+                                                           town=rng.choice(self.towns).lower())
+        return name, "POST", "/ask?explain=true", {"question": question, "active_pin": pin}
+
+
+class Client:
+    # ("HTTP CLIENT": One keep-alive connection per virtual user; reconnects
+    #  after any transport error.
+    #  From: run_level() → To: the server under test | *mll)
+
+    def __init__(self, url, timeout, bypass_token=None):
+        parts             = urlsplit(url)
+        self.host         = parts.hostname or "127.0.0.1"
+        self.port         = parts.port or 80
+        self.timeout      = timeout
+        self.bypass_token = bypass_token
+        self.conn         = None
+
+    def request(self, method, path, body=None):
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if self.bypass_token:
+            headers["X-RateLimit-Bypass"] = self.bypass_token
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            data     = response.read()
+        except Exception:
+            self.close()
+            raise
+        try:
+            return response.status, json.loads(data) if data else {}
+        except ValueError:
+            return response.status, {}
+
+    def get_json(self, path):
+        # Occasional reads (between levels) outlive uvicorn's keep-alive: reconnect first.
+        self.close()
+        status, body = self.request("GET", path)
+        return body if status == 200 else None
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class ProcSampler:
+    # ("PROC SAMPLER": CPU (% of one core) and RSS of a process and its
+    #  children (uvicorn --workers), read from /proc every `interval` seconds.
+    #  Without /proc (or a pid) it stays empty and the report says so.
+    #  From: run_level() → To: level report "server" | *mll)
+
+    def __init__(self, pid, interval=0.5):
+        self.pid      = pid
+        self.interval = interval
+        self.samples  = []          # (t, cpu_pct, rss_bytes, threads)
+        self._stop    = threading.Event()
+        self._thread  = None
+        self._ticks   = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._page    = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    @property
+    def available(self):
+        return bool(self.pid) and Path(f"/proc/{self.pid}/stat").exists()
+
+    @staticmethod
+    def _stat(pid):
+        # /proc/<pid>/stat fields after the ")" of comm: ppid 4, utime 14,
+        # stime 15, num_threads 20, rss 24 (1-based, as in proc(5)).
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21])
+
+    def _tree(self):
+        stats = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    stats[int(entry)] = self._stat(entry)
+                except (OSError, IndexError, ValueError):
+                    continue
+        members, frontier = {self.pid}, [self.pid]
+        while frontier:
+            parent   = frontier.pop()
+            children = [pid for pid, stat in stats.items() if stat[0] == parent and pid not in members]
+            members.update(children)
+            frontier.extend(children)
+        return [stats[pid] for pid in members if pid in stats]
+
+    def _sample(self):
+        tree = self._tree()
+        return (time.perf_counter(), sum(s[1] for s in tree),
+                sum(s[3] for s in tree) * self._page, sum(s[2] for s in tree))
+
+    def _run(self):
+        previous = self._sample()
+        while not self._stop.wait(self.interval):
+            try:
+                current = self._sample()
+            except OSError:
+                return
+            cpu = 100.0 * (current[1] - previous[1]) / self._ticks / max(current[0] - previous[0], 1e-6)
+            self.samples.append((current[0], cpu, current[2], current[3]))
+            previous = current
+
+    def start(self):
+        if self.available:
+            self._thread = threading.Thread(target=self._run, name="loadtest-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def summary(self):
+        if not self.samples:
+            return None
+        cpu = [s[1] for s in self.samples]
+        rss = [s[2] / (1024 * 1024) for s in self.samples]
+        return {
+            "samples":      len(self.samples),
+            "cpu_pct_mean": round(sum(cpu) / len(cpu), 1),
+            "cpu_pct_max":  round(max(cpu), 1),
+            "rss_mb_start": round(rss[0], 1),
+            "rss_mb_max":   round(max(rss), 1),
+            "rss_mb_end":   round(rss[-1], 1),
+            "threads_max":  max(s[3] for s in self.samples),
+        }
+
+
+def run_level(url, workload, concurrency, duration, ramp, think_ms, timeout, bypass_token, pid):
+    # ("LOAD LEVEL": `concurrency` closed-loop users for ramp + duration
+    #  seconds; only requests finishing after the ramp are counted.
+    #  From: main() → To: level_report() | *mll)
+    results  = []
+    lock     = threading.Lock()
+    start    = time.perf_counter()
+    measured = start + ramp
+    deadline = measured + duration
+    sampler  = None
+
+    def user(index):
+        rng     = workload.rng(index)
+        client  = Client(url, timeout, bypass_token)
+        mine    = []
+        try:
+            while time.perf_counter() < deadline:
+                name, method, path, body = workload.draw(rng)
+                t0 = time.perf_counter()
+                try:
+                    status, payload = client.request(method, path, body)
+                    error = None if 200 <= status < 300 else f"HTTP {status}"
+                except Exception as e:
+                    status, payload, error = None, {}, type(e).__name__
+                t1 = time.perf_counter()
+                if t1 >= measured:
+                    route = (payload.get("explain") or {}).get("route") if name in ASK_CLASSES else None
+                    mine.append((name, status, error, t1 - t0, route))
+                if think_ms:
+                    time.sleep(think_ms / 1000.0)
+        finally:
+            client.close()
+            with lock:
+                results.extend(mine)
+
+    threads = [threading.Thread(target=user, args=(i,), name=f"loadtest-user-{i}", daemon=True)
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    time.sleep(max(0.0, measured - time.perf_counter()))
+    sampler = ProcSampler(pid).start()
+    for thread in threads:
+        thread.join()
+    sampler.stop()
+    elapsed = max(time.perf_counter() - measured, 1e-6)
+    return results, elapsed, sampler.summary()
+
+
+def level_report(concurrency, results, elapsed, server, admission):
+    # ("LEVEL REPORT": Throughput, latency and status rates for one level,
+    #  overall and per traffic class.
+    #  From: main() → To: printed table / --json | *mll)
+    total    = len(results)
+    statuses = Counter(r[1] for r in results)
+    ok       = [r for r in results if not r[2]]
+    classes  = defaultdict(list)
+    for r in results:
+        classes[r[0]].append(r)
+
+    def rate(count, of):
+        return round(count / of, 4) if of else 0.0
+
+    per_class = {}
+    for name in CLASSES:
+        rows = classes.get(name)
+        if not rows:
+            continue
+        good  = [r for r in rows if not r[2]]
+        entry = {"requests": len(rows), "rps": round(len(rows) / elapsed, 2),
+                 "error_rate": rate(len(rows) - len(good), len(rows)),
+                 "latency": summarize([r[3] for r in good])}
+        if name in ASK_CLASSES:
+            entry["cache_hit_rate"] = rate(sum(r[4] == "cache_hit" for r in good), len(good))
+            entry["routes"]         = dict(Counter(r[4] or "unknown" for r in good))
+        per_class[name] = entry
+
+    return {
+        "concurrency":  concurrency,
+        "seconds":      round(elapsed, 2),
+        "requests":     total,
+        "rps":          round(total / elapsed, 2),
+        "ok_rps":       round(len(ok) / elapsed, 2),
+        "error_rate":   rate(total - len(ok), total),
+        "rate_503":     rate(statuses.get(503, 0), total),
+        "rate_429":     rate(statuses.get(429, 0), total),
+        "transport_errors": sum(1 for r in results if r[1] is None),
+        "statuses":     {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+        "latency":      summarize([r[3] for r in ok]),
+        "classes":      per_class,
+        "server":       server,
+        "admission":    admission,
+    }
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(backend, workdir, overrides, uvicorn_workers, port, keep_cache=False):
+    # ("SPAWN SERVER": Builds (or reuses) the bench index for `backend`,
+    #  empties its semantic cache (so every run starts from the same state),
+    #  writes its config plus --set overrides and starts uvicorn on it with
+    #  a fresh rate limit bypass token; several workers share a spawned
+    #  Chroma server instead of the embedded store.
+    #  From: main() (no --url) → To: (process, url, config path, token) | *mll)
+    from bench.fixtures import bench_config, open_pipeline
+
+    pipeline, workdir = open_pipeline(backend, workdir)
+    chroma_path = pipeline.chroma_path
+    if not keep_cache:
+        pipeline.client.delete_collection(name=pipeline.semantic_cache.cache_collection.name)
+    pipeline.enhancer.stop()
+    del pipeline
+
+    config_path = workdir / "server.yaml"
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(merge(bench_config(backend), overrides), f, allow_unicode=True, sort_keys=False)
+
+    token = secrets.token_hex(16)
+    env   = dict(os.environ, CONFIG_PATH=str(config_path), CHROMA_PATH=str(chroma_path),
+                 EMBEDDING_BACKEND=backend, QUERY_LOG_ENABLED="0", LOG_LEVEL="WARNING",
+                 RATE_LIMIT_BYPASS_TOKEN=token)
+    env.pop("ENHANCER_PROVIDERS", None)
+    env.pop("ENHANCER_QUEUE_PATH", None)
+    chroma = None
+    if uvicorn_workers > 1:
+        # Several workers can't share an embedded store (chroma_store.py).
+        from chroma_store import start_server
+        chroma_port = free_port()
+        chroma      = start_server(chroma_path, "127.0.0.1", chroma_port)
+        env["CHROMA_SERVER"] = f"127.0.0.1:{chroma_port}"
+    cmd = [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(uvicorn_workers), "--log-level", "warning", "--no-access-log"]
+    log_file = open(workdir / "server.log", "ab")
+    process  = subprocess.Popen(cmd, cwd=str(BACKEND_DIR), env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    process.log_file = log_file
+    process.chroma   = chroma
+    return process, f"http://127.0.0.1:{port}", config_path, token
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    process.log_file.close()
+    if process.chroma is not None:
+        process.chroma.terminate()
+        process.chroma.wait()
+
+
+def wait_ready(url, timeout, process=None):
+    # Polls /health until the pipeline reports "healthy" (readiness.py phases).
+    client   = Client(url, 5)
+    deadline = time.monotonic() + timeout
+    phase    = None
+    try:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode} during startup")
+            try:
+                status, body = client.request("GET", "/health")
+            except OSError:
+                time.sleep(0.5)
+                continue
+            if status == 200 and body.get("status") == "healthy":
+                return body
+            if body.get("status") == "failed":
+                raise RuntimeError(f"server failed to start: {body.get('message')}")
+            current = (body.get("readiness") or {}).get("phase")
+            if current != phase:
+                phase = current
+                print(f"  … server {phase}")
+            time.sleep(0.5)
+    finally:
+        client.close()
+    raise TimeoutError(f"server not ready after {timeout}s")
+
+
+def prime_hits(url, workload, concurrency, timeout, bypass_token):
+    # Ask every "hit" question once so the measured run reads it from the cache.
+    from concurrent.futures import ThreadPoolExecutor
+    local = threading.local()
+
+    def ask(i):
+        if not hasattr(local, "client"):
+            local.client = Client(url, timeout, bypass_token)
+        try:
+            return local.client.request("POST", "/ask", {"question": workload.hits[i]})[0]
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="loadtest-prime") as pool:
+        statuses = Counter(pool.map(ask, range(len(workload.hits))))
+    return dict(statuses)
+
+
+def print_level(level):
+    print("\n" + "-" * 72)
+    print(f"  concurrency {level['concurrency']}: {level['requests']} requests in {level['seconds']}s "
+          f"→ {level['rps']} req/s ({level['ok_rps']} ok/s)")
+    lat = level["latency"]
+    print(f"  latency  p50 {lat['p50_ms']} / p95 {lat['p95_ms']} / p99 {lat['p99_ms']} ms (max {lat['max_ms']})")
+    print(f"  errors {level['error_rate']:.2%}  503 {level['rate_503']:.2%}  429 {level['rate_429']:.2%}  "
+          f"transport {level['transport_errors']}  statuses {level['statuses']}")
+    print(f"  {'class':<10}{'req':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'err':>8}{'hit':>8}")
+    for name, c in level["classes"].items():
+        hit = f"{c['cache_hit_rate']:.0%}" if "cache_hit_rate" in c else "—"
+        print(f"  {name:<10}{c['requests']:>7}{c['rps']:>9}{c['latency']['p50_ms']:>10}"
+              f"{c['latency']['p95_ms']:>10}{c['latency']['p99_ms']:>10}{c['error_rate']:>8.1%}{hit:>8}")
+    server = level["server"]
+    if server:
+        print(f"  server   cpu {server['cpu_pct_mean']}% mean / {server['cpu_pct_max']}% max  "
+              f"rss {server['rss_mb_start']} → {server['rss_mb_end']} MB (max {server['rss_mb_max']})  "
+              f"threads ≤{server['threads_max']}")
+    else:
+        print("  server   (no resource samples: pass --pid, or /proc is unavailable)")
+    for lane, stats in (level["admission"] or {}).items():
+        if stats:
+            wait = stats.get("queue_wait") or {}
+            print(f"  lane {lane:<4} workers {stats['workers']} max_in_flight {stats['max_in_flight']} "
+                  f"max_queue {stats['max_queue']}"
+                  + (f" | queue wait since start: {wait['count']} waits, mean {wait['mean']}s, "
+                     f"p95 ≤{wait['p95_le']}s" if wait else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test of /ask, /health and /itinerary_add")
+    parser.add_argument('--url', default=None, help='test a running server instead of spawning one')
+    parser.add_argument('--pid', type=int, default=None, help='--url: server pid for CPU / RSS sampling')
+    parser.add_argument('--concurrency', default='1,4,16', help='virtual users; comma list = one level each')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds per level')
+    parser.add_argument('--ramp-seconds', type=float, default=2, help='unmeasured start of each level')
+    parser.add_argument('--think-ms', type=float, default=0, help='pause between a user\'s requests')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'class weights (default {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=0, help='workload seed (same seed = same requests)')
+    parser.add_argument('--no-prime', action='store_true', help='do not pre-cache the "hit" questions')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout')
+    parser.add_argument('--bypass-token', default=os.getenv('RATE_LIMIT_BYPASS_TOKEN'),
+                        help='--url: the server\'s security.rate_limit.bypass_token')
+    parser.add_argument('--backend', default='hashing', choices=('hashing', 'torch', 'onnx'),
+                        help='spawned server: embedding backend')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='spawned server: config override, e.g. server.admission.workers=8')
+    parser.add_argument('--uvicorn-workers', type=int, default=1, help='spawned server: uvicorn --workers')
+    parser.add_argument('--workdir', default=None, help='spawned server: reuse this bench index directory')
+    parser.add_argument('--keep-cache', action='store_true',
+                        help='spawned server: keep the semantic cache of an earlier run in --workdir')
+    parser.add_argument('--startup-timeout', type=float, default=300)
+    parser.add_argument('--json', default=None, help='write the report here')
+    args = parser.parse_args()
+
+    try:
+        mix       = parse_mix(args.mix)
+        overrides = parse_set(args.set)
+        levels    = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.url and overrides:
+        parser.error("--set only applies to a spawned server (drop --url)")
+
+    workload = Workload(mix, args.seed)
+    process, url, pid, config_path, token = None, args.url, args.pid, None, args.bypass_token
+    print(f"[BENCH] loadtest | levels {levels} × {args.duration}s | mix {args.mix}")
+    if url is None:
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        workdir = Path(args.workdir or tempfile.mkdtemp(prefix="pf_load_"))
+        process, url, config_path, token = spawn_server(args.backend, workdir, overrides,
+                                                 args.uvicorn_workers, free_port(), args.keep_cache)
+        pid = process.pid
+        print(f"  spawned uvicorn pid {pid} on {url} (backend {args.backend}, config {config_path})")
+
+    report = {
+        "url":       url,
+        "spawned":   process is not None,
+        "backend":   args.backend if process is not None else None,
+        "overrides": overrides,
+        "uvicorn_workers": args.uvicorn_workers if process is not None else None,
+        "mix":       mix,
+        "seed":      args.seed,
+        "duration":  args.duration,
+        "think_ms":  args.think_ms,
+        "python":    platform.python_version(),
+        "machine":   platform.machine(),
+        "cpus":      os.cpu_count(),
+        "levels":    [],
+    }
+    try:
+        health = wait_ready(url, args.startup_timeout, process)
+        print(f"  server ready ({health.get('facts_loaded')} facts)")
+        if not args.no_prime and mix.get("hit"):
+            report["primed"] = prime_hits(url, workload, max(levels), args.timeout, token)
+            print(f"  primed {len(workload.hits)} hit questions: {report['primed']}")
+
+        status_client = Client(url, 10)
+        for concurrency in levels:
+            results, elapsed, server = run_level(url, workload, concurrency, args.duration,
+                                                 args.ramp_seconds, args.think_ms, args.timeout,
+                                                 token, pid)
+            try:
+                admission = (status_client.get_json("/admin/status") or {}).get("admission")
+            except Exception:
+                admission = None
+            level = level_report(concurrency, results, elapsed, server, admission)
+            report["levels"].append(level)
+            print_level(level)
+        status_client.close()
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    print("\n" + "=" * 72)
+    print("  LOAD TEST SUMMARY")
+    print("=" * 72)
+    print(f"  {'users':>6}{'req/s':>10}{'ok/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'err':>8}{'503':>8}{'cpu %':>8}{'rss MB':>9}")
+    for level in report["levels"]:
+        server = level["server"] or {}
+        print(f"  {level['concurrency']:>6}{level['rps']:>10}{level['ok_rps']:>10}"
+              f"{level['latency']['p50_ms']:>10}{level['latency']['p95_ms']:>10}{level['latency']['p99_ms']:>10}"
+              f"{level['error_rate']:>8.1%}{level['rate_503']:>8.1%}"
+              f"{server.get('cpu_pct_mean', '—'):>8}{server.get('rss_mb_max', '—'):>9}")
+    print("=" * 72)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"  Saved → {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+# =============================================================================
+# bench/micro.py — Microbenchmarks for the ask() building blocks
+# =============================================================================
+# Times each hot helper in isolation, per call, over calibrate.py's
+# TEST_QUERIES (and dataset places / metadata):
+#
+#   entity_extract        EntityExtractor.extract(query)
+#   analyze_query         Controller.analyze_query(query)
+#   geo_get_coords        GeoLookup.get_coords(name) — exact and fuzzy names
+#   activity_filter       Pipeline._passes_activity_filter(meta, keywords)
+#   cache_set / cache_get SemanticCache on a scratch collection (hits + misses)
+#
+# --backend hashing (default) needs no model download or network and gives
+# machine-independent vectors, so numbers are comparable across CI runs;
+# torch / onnx measure the real model. --json saves the report, --compare
+# fails (exit 1) when any case's p50 regressed more than --max-regression.
+#
+# Usage (from src/backend):
+#   python -m bench.micro
+#   python -m bench.micro --backend torch --rounds 10
+#   python -m bench.micro --json micro.json --compare baseline.json --max-regression 0.3
+#
+# *mll
+# =============================================================================
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.fixtures import BACKENDS, open_pipeline
+from bench.stats import regressions, summarize
+
+FILTER_ACTIVITIES = ("beach", "hotel", "food", "waterfall", "surfing")
+
+
+def time_calls(fn, inputs, rounds):
+    # One untimed pass (first-touch), then every call timed on its own.
+    for item in inputs:
+        fn(item)
+    samples = []
+    for _ in range(rounds):
+        for item in inputs:
+            t0 = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def geo_names(pipeline, count=40):
+    # Exact names plus lowercase / truncated variants that take the fuzzy path.
+    names = [pipeline.geo_engine.places_db[k]["name"] for k in sorted(pipeline.geo_engine.places_db)[:count]]
+    fuzzy = [n.lower().replace(" beach", "").replace(" resort", " resrt") for n in names]
+    return names + fuzzy
+
+
+def run_cases(pipeline, queries, rounds):
+    # ("MICRO CASES": case name → per-call latencies (seconds).
+    #  From: main() → To: summarize() | *mll)
+    from pipeline import SemanticCache
+
+    metas = pipeline.collection.get(limit=200, include=["metadatas"])["metadatas"]
+    pairs = [(meta, pipeline._build_required_keywords([activity]), strict)
+             for activity in FILTER_ACTIVITIES for strict in (True, False) for meta in metas]
+
+    cases = {
+        "entity_extract":  time_calls(pipeline.entity_extractor.extract, queries, rounds),
+        "analyze_query":   time_calls(pipeline.controller.analyze_query, queries, rounds),
+        "geo_get_coords":  time_calls(pipeline.geo_engine.get_coords, geo_names(pipeline), rounds),
+        "activity_filter": time_calls(lambda p: pipeline._passes_activity_filter(*p), pairs, rounds),
+    }
+
+    # Scratch cache collection so the bench never touches the real cache.
+    name  = f"bench_cache_{os.getpid()}"
+    cache = SemanticCache(pipeline.client, pipeline.embedding, collection_name=name,
+                          similarity_threshold=pipeline.semantic_cache.similarity_threshold)
+    try:
+        normalized = [pipeline.normalize_query(q) for q in queries]
+        cases["cache_set"] = time_calls(
+            lambda q: cache.set(q, "bench answer", [{"name": "Bench"}]), normalized, 1)
+        cases["cache_get_hit"]  = time_calls(cache.get, normalized, rounds)
+        cases["cache_get_miss"] = time_calls(cache.get, [f"zq {q} xv" for q in normalized], rounds)
+    finally:
+        pipeline.client.delete_collection(name=name)
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the ask() building blocks")
+    parser.add_argument('--backend', choices=BACKENDS, default='hashing',
+                        help='embedding backend; hashing = deterministic, offline')
+    parser.add_argument('--rounds', type=int, default=5, help='timed passes over each input set')
+    parser.add_argument('--workdir', default=None, help='reuse this directory for the bench index')
+    parser.add_argument('--json', default=None, help='write the report here')
+    parser.add_argument('--compare', default=None, help='baseline report (--json of an earlier run)')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='allowed p50 growth over the baseline (0.25 = +25%%)')
+    args = parser.parse_args()
+
+    from calibrate import TEST_QUERIES
+    queries = [q for q, _, _ in TEST_QUERIES]
+
+    print(f"[BENCH] micro | backend={args.backend} | {len(queries)} calibration queries × {args.rounds} rounds")
+    pipeline, workdir = open_pipeline(args.backend, args.workdir)
+    try:
+        cases = run_cases(pipeline, queries, args.rounds)
+    finally:
+        pipeline.enhancer.stop()
+
+    report = {
+        "backend":  args.backend,
+        "rounds":   args.rounds,
+        "python":   platform.python_version(),
+        "machine":  platform.machine(),
+        "cases":    {name: summarize(samples, unit="us") for name, samples in cases.items()},
+    }
+
+    print("\n" + "=" * 72)
+    print(f"  MICROBENCHMARKS ({args.backend})")
+    print("=" * 72)
+    print(f"  {'case':<18}{'calls':>8}{'mean µs':>12}{'p50 µs':>12}{'p95 µs':>12}{'p99 µs':>12}")
+    for name, s in report["cases"].items():
+        print(f"  {name:<18}{s['count']:>8}{s['mean_us']:>12}{s['p50_us']:>12}{s['p95_us']:>12}{s['p99_us']:>12}")
+    print("=" * 72)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"  Saved → {args.json}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("backend") != args.backend:
+            print(f"  ⚠ Baseline backend is '{baseline.get('backend')}', this run is '{args.backend}'")
+        worse = regressions(baseline["cases"], report["cases"], "p50_us", args.max_regression)
+        for name, w in worse.items():
+            print(f"  ❌ {name}: p50 {w['baseline']} → {w['current']} µs (×{w['ratio']})")
+        if worse:
+            sys.exit(1)
+        print(f"  ✅ No case regressed more than {args.max_regression:.0%} vs {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+# =============================================================================
+# bench/replay.py — Replay a recorded query log for A/B comparison of builds
+# =============================================================================
+# Replays query_log.py records (query + active_pin, in recorded order)
+# against either
+#
+#   --target pipeline        an in-process Pipeline (--config for another
+#                            config.yaml). Nothing is enqueued for the LLM
+#                            enhancer or written to the query log.
+#                              --mode live  normal ask(): cache reads/writes
+#                              --mode dry   ask(dry_run=True): no cache at all,
+#                                           deterministic — use for answer diffs
+#   --target http://host:port  a running server (POST /ask?explain=true);
+#                            --bypass-token (default env RATE_LIMIT_BYPASS_TOKEN)
+#                            is sent as X-RateLimit-Bypass so the server's
+#                            rate limit does not throttle the replay
+#
+# at --qps (open loop: query i is due at i/qps, latency is measured from that
+# time so queueing shows up; 0 = as fast as --concurrency allows) and
+# reports p50/p95/p99 latency overall and per route, cache hit rate and
+# route counts.
+#
+# --save writes every answer, pin list and route; --compare diffs this run
+# against a saved one (or --diff A B compares two saved runs) and flags
+# queries whose answer, pins or route changed — exit 1 with --fail-on-diff.
+#
+# Usage (from src/backend):
+#   python -m bench.replay --mode dry --save before.json
+#   python -m bench.replay --mode dry --config /tmp/tuned.yaml --compare before.json
+#   python -m bench.replay --target http://127.0.0.1:8000 --qps 20 --concurrency 8
+#   python -m bench.replay --diff before.json after.json --fail-on-diff
+#
+# *mll
+# =============================================================================
+
+import argparse
+import difflib
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.stats import summarize
+from query_log import read_records
+
+DEFAULT_LOG = BACKEND_DIR / "state" / "query_log" / "queries*.jsonl*"
+
+
+def load_log(pattern, limit=None):
+    # ("LOAD LOG": query_log.py records (or any JSONL with "query"/"question")
+    #  → [{query, active_pin}] in recorded order.
+    #  From: main() → To: replay() | *mll)
+    queries = []
+    for record in read_records(pattern):
+        query = record.get("query") or record.get("question")
+        if isinstance(query, str) and query.strip():
+            queries.append({"query": query, "active_pin": record.get("active_pin")})
+            if limit and len(queries) >= limit:
+                break
+    return queries
+
+
+class PipelineTarget:
+    # ("PIPELINE TARGET": In-process Pipeline. The enhancer gets a throwaway
+    #  job queue so a replay never drains (or bills) the real one.
+    #  From: main() --target pipeline → To: Pipeline.ask() | *mll)
+
+    def __init__(self, config_path, mode):
+        self.tmp_dir = tempfile.mkdtemp(prefix="pf_replay_")
+        os.environ["ENHANCER_QUEUE_PATH"] = str(Path(self.tmp_dir) / "jobs.db")
+        os.environ["QUERY_LOG_ENABLED"]   = "0"
+        from pipeline import Pipeline, DATASET_PATH, CONFIG_PATH
+        self.pipeline = Pipeline(dataset_path=str(DATASET_PATH), config_path=str(config_path or CONFIG_PATH))
+        self.dry_run  = mode == "dry"
+        self.name     = f"pipeline ({mode}, {Path(config_path or CONFIG_PATH).name})"
+
+    def ask(self, query, active_pin=None):
+        result = self.pipeline.ask(query, active_pin, explain=True, dry_run=self.dry_run,
+                                   enqueue=False, log_query=False)
+        return 200, result
+
+    def close(self):
+        self.pipeline.enhancer.stop()
+
+
+class HttpTarget:
+    # ("HTTP TARGET": POST /ask?explain=true on a running server.
+    #  From: main() --target http://… → To: app.py ask_endpoint | *mll)
+
+    def __init__(self, url, timeout, bypass_token=None):
+        self.url     = url.rstrip("/") + "/ask?explain=true"
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json"}
+        self.name    = url
+        if bypass_token:
+            self.headers["X-RateLimit-Bypass"] = bypass_token
+
+    def ask(self, query, active_pin=None):
+        body    = json.dumps({"question": query, "active_pin": active_pin}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, method="POST", headers=self.headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            return e.code, {}
+
+    def close(self):
+        pass
+
+
+def replay(target, queries, qps=0.0, concurrency=4):
+    # ("REPLAY": Sends every query, paced open-loop at qps (0 = closed loop
+    #  on `concurrency` workers). Returns one result per query, in order.
+    #  From: main() → To: report() / diff_runs() | *mll)
+    results = [None] * len(queries)
+    t0      = time.perf_counter()
+
+    def run(i):
+        due = t0 + i / qps if qps else time.perf_counter()
+        if qps:
+            time.sleep(max(0.0, due - time.perf_counter()))
+        started = time.perf_counter()
+        try:
+            status, body = target.ask(queries[i]["query"], queries[i]["active_pin"])
+            error = None if status == 200 else f"HTTP {status}"
+        except Exception as e:
+            status, body, error = None, {}, f"{type(e).__name__}: {e}"
+        finished = time.perf_counter()
+        route    = (body.get("explain") or {}).get("route")
+        results[i] = {
+            "i":          i,
+            "query":      queries[i]["query"],
+            "active_pin": queries[i]["active_pin"],
+            "status":     status,
+            "error":      error,
+            "route":      route,
+            "cache_hit":  route == "cache_hit",
+            "answer":     body.get("answer"),
+            "places":     [p.get("name") for p in body.get("locations") or []],
+            "service_ms": round(1000 * (finished - started), 2),
+            "latency_ms": round(1000 * (finished - due), 2),
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="replay") as pool:
+        list(pool.map(run, range(len(queries))))
+    return results, time.perf_counter() - t0
+
+
+def report(results, elapsed):
+    # ("RUN REPORT": Latency percentiles overall + per route, hit rate,
+    #  route and error counts.
+    #  From: main() → To: printed summary / saved run | *mll)
+    ok       = [r for r in results if not r["error"]]
+    by_route = defaultdict(list)
+    for r in ok:
+        by_route[r["route"] or "unknown"].append(r["latency_ms"] / 1000)
+    return {
+        "queries":        len(results),
+        "errors":         dict(Counter(r["error"] for r in results if r["error"])),
+        "achieved_qps":   round(len(results) / elapsed, 2) if elapsed else None,
+        "latency":        summarize([r["latency_ms"] / 1000 for r in ok]),
+        "service":        summarize([r["service_ms"] / 1000 for r in ok]),
+        "cache_hit_rate": round(sum(r["cache_hit"] for r in ok) / len(ok), 3) if ok else 0.0,
+        "routes":         dict(Counter(r["route"] or "unknown" for r in ok)),
+        "route_latency":  {route: summarize(values) for route, values in sorted(by_route.items())},
+    }
+
+
+def _keyed(results):
+    # (query, active_pin, n-th occurrence) → result, so runs of the same log
+    # pair up even if one side errored on some queries.
+    seen, keyed = Counter(), {}
+    for r in results:
+        base = (r["query"], r["active_pin"])
+        keyed[base + (seen[base],)] = r
+        seen[base] += 1
+    return keyed
+
+
+def diff_runs(baseline, current):
+    # ("DIFF RUNS": Per-query answer / pin / route changes between two runs.
+    #  Errors on either side are reported separately, not as changes.
+    #  From: main() --compare / --diff → To: printed diff, exit code | *mll)
+    before, after = _keyed(baseline), _keyed(current)
+    changes, skipped = [], 0
+    for key, old in before.items():
+        new = after.get(key)
+        if new is None or old["error"] or new["error"]:
+            skipped += 1
+            continue
+        change = {}
+        if (old["answer"] or "").strip() != (new["answer"] or "").strip():
+            change["answer"] = round(difflib.SequenceMatcher(None, old["answer"] or "",
+                                                             new["answer"] or "").ratio(), 3)
+        if set(old["places"]) != set(new["places"]):
+            change["pins"] = {"removed": sorted(set(old["places"]) - set(new["places"])),
+                              "added":   sorted(set(new["places"]) - set(old["places"]))}
+        if old["route"] != new["route"]:
+            change["route"] = [old["route"], new["route"]]
+        if change:
+            changes.append({"query": old["query"], "active_pin": old["active_pin"], **change})
+    return {"compared": len(before) - skipped, "skipped": skipped,
+            "unmatched": len(set(after) - set(before)), "changed": changes}
+
+
+def print_report(name, summary):
+    print("\n" + "=" * 60)
+    print(f"  REPLAY — {name}")
+    print("=" * 60)
+    print(f"  Queries            : {summary['queries']} ({summary['achieved_qps']} q/s achieved)")
+    if summary["errors"]:
+        print(f"  Errors             : {summary['errors']}")
+    print(f"  Latency            : {summary['latency']}")
+    print(f"  Service time       : {summary['service']}")
+    print(f"  Cache hit rate     : {summary['cache_hit_rate']:.1%}")
+    print(f"  Routes             : {summary['routes']}")
+    for route, stats in summary["route_latency"].items():
+        print(f"    {route:<16} : p50 {stats['p50_ms']} / p95 {stats['p95_ms']} / p99 {stats['p99_ms']} ms "
+              f"({stats['count']})")
+    print("=" * 60)
+
+
+def print_diff(diff, limit=20):
+    changed = diff["changed"]
+    print(f"\n  DIFF: {len(changed)} of {diff['compared']} queries changed "
+          f"({diff['skipped']} skipped on errors, {diff['unmatched']} only in the new run)")
+    for c in changed[:limit]:
+        parts = []
+        if "answer" in c:
+            parts.append(f"answer (similarity {c['answer']})")
+        if "pins" in c:
+            parts.append(f"pins -{c['pins']['removed']} +{c['pins']['added']}")
+        if "route" in c:
+            parts.append(f"route {c['route'][0]} → {c['route'][1]}")
+        print(f"    ⚠ '{c['query']}'" + (f" [pin: {c['active_pin']}]" if c["active_pin"] else "")
+              + ": " + "; ".join(parts))
+    if len(changed) > limit:
+        print(f"    … {len(changed) - limit} more (see --save output)")
+
+
+def load_run(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a query log against a Pipeline or server")
+    parser.add_argument('--log', default=str(DEFAULT_LOG), help='query log path or glob (.gz ok)')
+    parser.add_argument('--limit', type=int, default=None, help='first N queries only')
+    parser.add_argument('--target', default='pipeline', help='"pipeline" or a server URL')
+    parser.add_argument('--mode', choices=['live', 'dry'], default='live',
+                        help='pipeline target: live cache, or dry_run (no cache, deterministic)')
+    parser.add_argument('--config', default=None, help='pipeline target: alternative config.yaml')
+    parser.add_argument('--qps', type=float, default=0.0, help='target rate, 0 = closed loop')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=30, help='HTTP target: per-request timeout')
+    parser.add_argument('--bypass-token', default=os.getenv('RATE_LIMIT_BYPASS_TOKEN'),
+                        help='HTTP target: the server\'s security.rate_limit.bypass_token')
+    parser.add_argument('--save', default=None, help='write the run (answers, pins, routes) as JSON')
+    parser.add_argument('--compare', default=None, help='diff against a saved run')
+    parser.add_argument('--diff', nargs=2, metavar=('A', 'B'), help='only diff two saved runs')
+    parser.add_argument('--fail-on-diff', action='store_true', help='exit 1 if any query changed')
+    parser.add_argument('--verbose', action='store_true', help='show pipeline logs')
+    args = parser.parse_args()
+
+    if args.diff:
+        diff = diff_runs(load_run(args.diff[0])["results"], load_run(args.diff[1])["results"])
+        print_diff(diff)
+        sys.exit(1 if args.fail_on_diff and diff["changed"] else 0)
+
+    queries = load_log(args.log, args.limit)
+    if not queries:
+        raise SystemExit(f"[REPLAY] No queries in {args.log}")
+
+    if not args.verbose:
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if args.target == 'pipeline':
+        target = PipelineTarget(args.config, args.mode)
+    else:
+        target = HttpTarget(args.target, args.timeout, args.bypass_token)
+    print(f"[REPLAY] {len(queries)} queries from {args.log} → {target.name} | "
+          f"qps={args.qps or 'max'} concurrency={args.concurrency}")
+
+    try:
+        results, elapsed = replay(target, queries, args.qps, args.concurrency)
+    finally:
+        target.close()
+    summary = report(results, elapsed)
+    print_report(target.name, summary)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"target": target.name, "log": args.log, "qps": args.qps,
+                       "concurrency": args.concurrency, "created_at": time.time(),
+                       "summary": summary, "results": results}, f, indent=1)
+        print(f"  Saved → {args.save}")
+
+    if args.compare:
+        diff = diff_runs(load_run(args.compare)["results"], results)
+        print_diff(diff)
+        if args.fail_on_diff and diff["changed"]:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+# =============================================================================
+# bench/scale.py — How ask() and ingest scale with dataset / map size
+# =============================================================================
+# For each --sizes entry (total dataset.json records) bench/synth.py writes a
+# scale set (records, ~records/3 GeoJSON points, config places), then a fresh
+# child process (so RSS numbers are not polluted by the previous size):
+#
+#   startup   Pipeline() on the scale set — GeoLookup encodes every place
+#             name, EntityExtractor sorts every config place
+#   ingest    rebuild_index() into an empty Chroma directory: time, docs/s,
+#             size on disk
+#   memory    RSS after startup, after ingest, after the queries; peak RSS
+#   queries   calibrate.py TEST_QUERIES through ask(dry_run=True) × --rounds:
+#             latency p50/p95 and mean ms of the stages that scan every
+#             place (entity_extract, geo_lookup, safety_net) next to rag_query
+#   helpers   EntityExtractor.extract() and GeoLookup.get_coords() on names
+#             that miss the exact match (semantic + fuzzy scan) per call
+#
+# The summary prints each metric per size and its growth exponent k between
+# the two largest sizes (time ∝ n^k): k ≈ 0 flat, k ≈ 1 a linear scan.
+# --backend hashing (default) keeps it offline and makes ingest cost mostly
+# Chroma, not the model.
+#
+# Usage (from src/backend):
+#   python -m bench.scale                                  (1k, 10k, 100k)
+#   python -m bench.scale --sizes 10000,100000,1000000 --workdir /tmp/pf_scale --rounds 1
+#   python -m bench.scale --json scale.json
+#
+# *mll
+# =============================================================================
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.stats import summarize
+
+SCAN_STAGES = ("entity_extract", "geo_lookup", "safety_net", "rag_query", "analyze_query")
+
+
+def dir_bytes(path):
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def per_call(fn, inputs, rounds):
+    samples = []
+    for _ in range(rounds):
+        for item in inputs:
+            t0 = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def measure(scale_dir, backend, rounds):
+    # ("MEASURE ONE SIZE": Runs in the child process. Opens a bench Pipeline
+    #  on the scale set, rebuilds its index and times startup, ingest and
+    #  queries. → result dict (JSON-able).
+    #  From: main() --child → To: parent via --child-out | *mll)
+    from bench.fixtures import open_pipeline
+    from calibrate import TEST_QUERIES
+    from startup import rss_mb
+
+    scale_dir = Path(scale_dir)
+    info      = json.loads((scale_dir / "synth.json").read_text(encoding="utf-8"))
+    shutil.rmtree(scale_dir / backend / "chroma", ignore_errors=True)   # ingest from scratch every run
+    result    = {"records": info["records"], "points": info["points"],
+                 "config_places": info["config_places"], "rss_start_mb": rss_mb()}
+
+    t0 = time.perf_counter()
+    pipeline, workdir = open_pipeline(backend, scale_dir, dataset_path=info["dataset_path"],
+                                      geojson_path=info["geojson_path"], config_path=info["config_path"],
+                                      build=False)
+    result["startup_s"]      = round(time.perf_counter() - t0, 2)
+    result["startup_phases"] = {p["phase"]: p["ms"] for p in pipeline.startup.summary()["phases"]}
+    result["rss_startup_mb"] = rss_mb()
+
+    try:
+        t0 = time.perf_counter()
+        pipeline.rebuild_index()
+        ingest_s = time.perf_counter() - t0
+        docs     = pipeline.collection.count()
+        result.update(ingest_s=round(ingest_s, 2), docs=docs,
+                      ingest_docs_per_s=round(docs / ingest_s, 1) if ingest_s else None,
+                      index_mb=round(dir_bytes(workdir / "chroma") / (1024 * 1024), 1),
+                      rss_ingest_mb=rss_mb())
+
+        queries = [q for q, _, _ in TEST_QUERIES]
+        pipeline.warm_up(queries[:5])
+        latencies, stages = [], {name: 0.0 for name in SCAN_STAGES}
+        for _ in range(rounds):
+            for query in queries:
+                t0      = time.perf_counter()
+                explain = pipeline.ask(query, explain=True, dry_run=True, enqueue=False,
+                                       log_query=False).get("explain") or {}
+                latencies.append(time.perf_counter() - t0)
+                for name in SCAN_STAGES:
+                    stages[name] += (explain.get("stages", {}).get(name) or {}).get("ms", 0.0)
+        result["ask"]           = summarize(latencies)
+        result["stage_mean_ms"] = {name: round(ms / len(latencies), 3) for name, ms in stages.items()}
+
+        # Misspelt / partial names skip the exact dict hit: semantic argmax
+        # over every place vector, then difflib over every place name.
+        names  = sorted(pipeline.geo_engine.places_db)[:20]
+        misses = [n[:-2] + "x" for n in names]
+        result["entity_extract"] = summarize(per_call(pipeline.entity_extractor.extract, queries, 1), unit="us")
+        result["geo_exact"]      = summarize(per_call(pipeline.geo_engine.get_coords, names, 1), unit="us")
+        result["geo_miss"]       = summarize(per_call(pipeline.geo_engine.get_coords, misses, 1), unit="us")
+        result["rss_end_mb"]     = rss_mb()
+        result["rss_peak_mb"]    = peak_rss_mb()
+    finally:
+        pipeline.enhancer.stop()
+    return result
+
+
+def exponent(sizes, values):
+    # Growth exponent k of value ∝ size^k between the two largest sizes.
+    if len(sizes) < 2 or not values[-1] or not values[-2] or sizes[-1] == sizes[-2]:
+        return None
+    return round(math.log(values[-1] / values[-2]) / math.log(sizes[-1] / sizes[-2]), 2)
+
+
+def print_summary(results):
+    sizes = [r["records"] for r in results]
+    rows  = [
+        ("startup s",            lambda r: r["startup_s"]),
+        ("  config phase ms",    lambda r: r["startup_phases"].get("config")),
+        ("  geo phase ms",       lambda r: r["startup_phases"].get("geo")),
+        ("  controller phase ms",lambda r: r["startup_phases"].get("controller")),
+        ("ingest s",             lambda r: r["ingest_s"]),
+        ("ingest docs/s",        lambda r: r["ingest_docs_per_s"]),
+        ("index MB",             lambda r: r["index_mb"]),
+        ("rss after ingest MB",  lambda r: r["rss_ingest_mb"]),
+        ("rss peak MB",          lambda r: r["rss_peak_mb"]),
+        ("ask p50 ms",           lambda r: r["ask"]["p50_ms"]),
+        ("ask p95 ms",           lambda r: r["ask"]["p95_ms"]),
+    ] + [
+        (f"  {name} ms",         lambda r, name=name: r["stage_mean_ms"][name]) for name in SCAN_STAGES
+    ] + [
+        ("extract() p50 µs",     lambda r: r["entity_extract"]["p50_us"]),
+        ("get_coords exact µs",  lambda r: r["geo_exact"]["p50_us"]),
+        ("get_coords miss µs",   lambda r: r["geo_miss"]["p50_us"]),
+    ]
+
+    print("\n" + "=" * 78)
+    print("  SCALING BENCHMARK")
+    print("=" * 78)
+    print(f"  {'records':<24}" + "".join(f"{s:>12}" for s in sizes) + f"{'k':>8}")
+    print(f"  {'points':<24}" + "".join(f"{r['points']:>12}" for r in results))
+    for label, get in rows:
+        values = [get(r) for r in results]
+        k      = exponent(sizes, values)
+        print(f"  {label:<24}" + "".join(f"{'—' if v is None else v:>12}" for v in values)
+              + f"{'—' if k is None else k:>8}")
+    print("=" * 78)
+    print("  k = growth exponent between the two largest sizes (≈1: linear in data size)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest / memory / ask() scaling over synthetic data sizes")
+    parser.add_argument('--sizes', default='1000,10000,100000', help='total dataset.json records per run')
+    parser.add_argument('--points-ratio', type=float, default=1 / 3, help='GeoJSON points per record')
+    parser.add_argument('--backend', choices=('hashing', 'torch', 'onnx'), default='hashing')
+    parser.add_argument('--rounds', type=int, default=2, help='passes over the calibration queries')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default=None, help='keep scale sets here (reused when present)')
+    parser.add_argument('--json', default=None, help='write the results here')
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--child-out', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = measure(args.child, args.backend, args.rounds)
+        Path(args.child_out).write_text(json.dumps(result), encoding="utf-8")
+        return
+
+    from bench.synth import write_scale_set
+
+    sizes   = [int(s) for s in args.sizes.split(",") if s.strip()]
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="pf_scale_"))
+    print(f"[BENCH] scale | backend={args.backend} | sizes {sizes} | workdir {workdir}")
+
+    results = []
+    for size in sizes:
+        points    = int(size * args.points_ratio)
+        scale_dir = workdir / f"{size}-{points}-{args.seed}"
+        info_path = scale_dir / "synth.json"
+        if not info_path.exists():
+            t0   = time.perf_counter()
+            info = write_scale_set(scale_dir, size, points, args.seed)
+            info_path.write_text(json.dumps(info), encoding="utf-8")
+            print(f"  {size}: generated {info['records']} records / {info['points']} points "
+                  f"in {time.perf_counter() - t0:.1f}s")
+
+        out = scale_dir / f"result-{args.backend}.json"
+        env = dict(os.environ, LOG_LEVEL=os.environ.get("LOG_LEVEL", "WARNING"))
+        t0  = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "bench.scale", "--child", str(scale_dir),
+                        "--child-out", str(out), "--backend", args.backend, "--rounds", str(args.rounds)],
+                       cwd=str(BACKEND_DIR), env=env, check=True)
+        result = json.loads(out.read_text(encoding="utf-8"))
+        results.append(result)
+        print(f"  {size}: startup {result['startup_s']}s, ingest {result['ingest_s']}s, "
+              f"ask p50 {result['ask']['p50_ms']} ms, rss peak {result['rss_peak_mb']} MB "
+              f"({time.perf_counter() - t0:.0f}s)")
+
+    print_summary(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"backend": args.backend, "seed": args.seed, "rounds": args.rounds,
+                       "python": platform.python_version(), "machine": platform.machine(),
+                       "results": results}, f, indent=2)
+        print(f"  Saved → {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# =============================================================================
+# bench/stats.py — Small statistics helpers shared by the bench tools
+# =============================================================================
+
+import math
+
+UNITS = {"ms": 1000, "us": 1000000}
+
+
+def percentile(values, pct):
+    # ("PERCENTILE": Nearest-rank percentile, pct in 0–100. Empty → 0.0.
+    #  From: every bench report | *mll)
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank    = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies, unit="ms"):
+    # ("SUMMARIZE": Latency list (seconds) → dict of ms (or us) figures for reports.
+    #  From: bench reports | *mll)
+    scale = UNITS[unit]
+    if not latencies:
+        return {"count": 0, f"mean_{unit}": 0.0, f"p50_{unit}": 0.0, f"p95_{unit}": 0.0,
+                f"p99_{unit}": 0.0, f"max_{unit}": 0.0}
+    return {
+        "count":        len(latencies),
+        f"mean_{unit}": round(scale * sum(latencies) / len(latencies), 2),
+        f"p50_{unit}":  round(scale * percentile(latencies, 50), 2),
+        f"p95_{unit}":  round(scale * percentile(latencies, 95), 2),
+        f"p99_{unit}":  round(scale * percentile(latencies, 99), 2),
+        f"max_{unit}":  round(scale * max(latencies), 2),
+    }
+
+
+def regressions(baseline, current, metric, max_regression):
+    # ("REGRESSIONS": {case: summary} pairs → cases whose `metric` (e.g.
+    #  "p50_us") grew by more than max_regression (0.25 = +25%) over the
+    #  baseline. Cases missing on either side are ignored.
+    #  From: bench.micro / bench.ask --compare → To: CI exit code | *mll)
+    worse = {}
+    for case, old in baseline.items():
+        new = current.get(case)
+        if not new or not old.get(metric):
+            continue
+        ratio = new[metric] / old[metric]
+        if ratio > 1 + max_regression:
+            worse[case] = {"baseline": old[metric], "current": new[metric], "ratio": round(ratio, 2)}
+    return worse
@@ -0,0 +1,237 @@
+# =============================================================================
+# bench/stub_llm.py — Local stand-in for the enhancer's LLM providers
+# =============================================================================
+# Speaks both wire formats the enhancer uses, so every provider code path can
+# be exercised without network access:
+#
+#   POST /v1beta/models/<model>:generateContent   → Gemini format
+#   POST /v1/chat/completions                     → OpenAI format (groq / local)
+#   POST /openai/v1/chat/completions              → same, Groq-style prefix
+#   GET  /stats                                   → request / fault counters
+#
+# Replies are canned: the candidate place names are read back out of the
+# enhancer prompt ("- [Place]: fact" lines) and returned as a short answer plus
+# an "APPROVED_PINS:" line, which is what BackgroundEnhancer expects.
+#
+# Fault injection (all optional): --latency-ms / --jitter-ms, --rate-429 with
+# --retry-after, --error-rate (HTTP 500) and --no-answer-rate.
+#
+# Usage (from src/backend):
+#   python -m bench.stub_llm --port 8090 --latency-ms 300 --rate-429 0.1
+#   ENHANCER_PROVIDERS=local uvicorn app:app
+#   GEMINI_BASE_URL=http://127.0.0.1:8090/v1beta GROQ_BASE_URL=http://127.0.0.1:8090/v1 \
+#       GEMINI_API_KEY=stub GROQ_API_KEY=stub uvicorn app:app
+#
+# *mll
+# =============================================================================
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+RE_CANDIDATE = re.compile(r'^- \[(.+?)\]:', re.MULTILINE)
+
+
+class StubBehaviour:
+    # ("STUB BEHAVIOUR": Fault-injection knobs plus thread-safe counters.
+    #  Shared by every request handler thread of one server.
+    #  From: serve() / start_in_thread() → To: StubLLMHandler | *mll)
+
+    def __init__(self, latency_ms=0, jitter_ms=0, rate_429=0.0, retry_after=2,
+                 error_rate=0.0, no_answer_rate=0.0, max_pins=5, seed=None):
+        self.latency_ms     = latency_ms
+        self.jitter_ms      = jitter_ms
+        self.rate_429       = rate_429
+        self.retry_after    = retry_after
+        self.error_rate     = error_rate
+        self.no_answer_rate = no_answer_rate
+        self.max_pins       = max_pins
+        self.random         = random.Random(seed)
+        self.lock           = threading.Lock()
+        self.counters       = {"requests": 0, "ok": 0, "429": 0, "500": 0, "no_answer": 0}
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def roll(self):
+        # One draw per request decides its fate: 429 → 500 → no answer → ok.
+        with self.lock:
+            r = self.random.random()
+        if r < self.rate_429:
+            return "429"
+        if r < self.rate_429 + self.error_rate:
+            return "500"
+        if r < self.rate_429 + self.error_rate + self.no_answer_rate:
+            return "no_answer"
+        return "ok"
+
+    def sleep(self):
+        delay = self.latency_ms
+        if self.jitter_ms:
+            with self.lock:
+                delay += self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def canned_answer(self, prompt):
+        names = list(dict.fromkeys(RE_CANDIDATE.findall(prompt)))
+        names = [n for n in names if n and n != 'General'][:self.max_pins]
+        if not names:
+            return "no answer"
+        lead = ", ".join(names[:3])
+        return (f"{lead} are great picks for that, each worth a visit while you're on the island."
+                f"\nAPPROVED_PINS: {', '.join(names)}")
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters)
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    behaviour = None   # set on the per-server subclass
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass   # keep benchmark output clean
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.behaviour.snapshot())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {"error": "bad json"})
+            return
+
+        path = self.path.split('?', 1)[0]
+        if ':generateContent' in path:
+            kind = 'gemini'
+            try:
+                prompt = body['contents'][0]['parts'][0]['text']
+            except (KeyError, IndexError, TypeError):
+                prompt = ''
+        elif path.endswith('/chat/completions'):
+            kind = 'openai'
+            messages = body.get('messages') or [{}]
+            prompt   = messages[-1].get('content', '')
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        b = self.behaviour
+        b.count("requests")
+        b.sleep()
+        outcome = b.roll()
+
+        if outcome == "429":
+            b.count("429")
+            if kind == 'gemini':
+                self._send_json(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                                "details": [{
+                                                    "@type": "type.googleapis.com/google.rpc.RetryInfo",
+                                                    "retryDelay": f"{b.retry_after}s"}]}})
+            else:
+                self._send_json(429, {"error": {"message": "rate limited"}},
+                                headers={'Retry-After': b.retry_after})
+            return
+        if outcome == "500":
+            b.count("500")
+            self._send_json(500, {"error": {"message": "injected failure"}})
+            return
+
+        if outcome == "no_answer":
+            b.count("no_answer")
+            text = "no answer"
+        else:
+            b.count("ok")
+            text = b.canned_answer(prompt)
+
+        if kind == 'gemini':
+            self._send_json(200, {"candidates": [{"content": {"parts": [{"text": text}]}}]})
+        else:
+            self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": text}}]})
+
+
+def make_server(host='127.0.0.1', port=8090, **behaviour_kwargs):
+    behaviour = StubBehaviour(**behaviour_kwargs)
+    handler   = type('BoundStubLLMHandler', (StubLLMHandler,), {'behaviour': behaviour})
+    server    = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server, behaviour
+
+
+def start_in_thread(host='127.0.0.1', port=0, **behaviour_kwargs):
+    # ("IN-PROCESS STUB": Starts the stub on a background thread. port=0 picks
+    #  a free port; the real one is server.server_address[1].
+    #  From: bench/enhancer.py → To: caller shuts down with server.shutdown() | *mll)
+    server, behaviour = make_server(host, port, **behaviour_kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, behaviour
+
+
+def add_behaviour_args(parser):
+    parser.add_argument('--latency-ms', type=float, default=0, help='base response delay')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='± random delay')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='fraction answered with 429')
+    parser.add_argument('--retry-after', type=int, default=2, help='seconds advertised on 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction answered with 500')
+    parser.add_argument('--no-answer-rate', type=float, default=0.0,
+                        help='fraction answered with "no answer"')
+    parser.add_argument('--max-pins', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def behaviour_kwargs(args):
+    return {
+        'latency_ms':     args.latency_ms,
+        'jitter_ms':      args.jitter_ms,
+        'rate_429':       args.rate_429,
+        'retry_after':    args.retry_after,
+        'error_rate':     args.error_rate,
+        'no_answer_rate': args.no_answer_rate,
+        'max_pins':       args.max_pins,
+        'seed':           args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Gemini/OpenAI-compatible LLM server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    add_behaviour_args(parser)
+    args = parser.parse_args()
+
+    server, _ = make_server(args.host, args.port, **behaviour_kwargs(args))
+    print(f"[STUB LLM] Listening on http://{args.host}:{server.server_address[1]} "
+          f"(gemini: /v1beta, openai: /v1)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+# =============================================================================
+# bench/synth.py — Synthetic scale-up dataset + GeoJSON for scaling tests
+# =============================================================================
+# Writes a dataset / map / config triple in the repo's own schemas, sized
+# from the real 578 records / 170 points up to ~10^6 records:
+#
+#   dataset.json     dataset.json records: input / output / title / topic /
+#                    location / activities / summary_offline, plus place_name,
+#                    coordinates and budget for place records
+#   places.geojson   FeatureCollection; synthetic places are Point features
+#                    with the same properties as public/catanduanes_datafile
+#                    (name, type, category, municipality, opening_hours, …)
+#   config.yaml      config/config.yaml with every synthetic place added to
+#                    `places` (what EntityExtractor matches against)
+#
+# The real records / features come first (--no-base drops them), then
+# synthetic towns — Catanduanes' 11 municipalities, then generated ones
+# spread over the Philippines as --points grows — each with places of the
+# real mix of kinds (resorts, cafés, beaches, falls, viewpoints, churches,
+# shops, bars) and 1–5 questions per place (location, overview, fees,
+# directions, best time) plus town-level questions. Same --seed, same
+# files. Records are streamed to disk, so 10^6 records do not need 10^6
+# dicts in memory.
+#
+# Usage (from src/backend):
+#   python -m bench.synth --records 100000 --out /tmp/pf_synth/100k
+#   python -m bench.synth --records 1000000 --points 300000 --seed 7 --out /tmp/pf_synth/1m
+#
+# *mll
+# =============================================================================
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.fixtures import YAML_DUMPER, YAML_LOADER
+from pipeline import CONFIG_PATH, DATASET_PATH, GEOJSON_PATH
+
+# Catanduanes first (name, lat, lng); synthetic towns follow.
+BASE_TOWNS = (
+    ("Virac", 13.5810, 124.2300), ("San Andres", 13.6040, 124.0960), ("Bato", 13.6060, 124.2980),
+    ("Baras", 13.6610, 124.3650), ("Gigmoto", 13.7790, 124.3900), ("Viga", 13.8700, 124.3090),
+    ("Panganiban", 13.9070, 124.2960), ("Bagamanoc", 13.9400, 124.2880), ("Pandan", 14.0470, 124.1690),
+    ("Caramoran", 13.9840, 124.1340), ("San Miguel", 13.6420, 124.3040),
+)
+# Land-ish box over the Philippines for generated towns.
+LAT_RANGE, LNG_RANGE = (6.0, 18.5), (119.5, 126.3)
+
+SYLLABLES = ("ba", "bi", "bu", "ka", "ki", "ku", "da", "di", "ga", "gi", "gu", "ha", "la", "li",
+             "lu", "ma", "mi", "mu", "na", "ni", "pa", "pi", "pu", "ra", "ri", "sa", "si", "su",
+             "ta", "ti", "tu", "ya", "lan", "ngan", "tan", "bon", "wan", "ay", "og", "in")
+TOWN_PREFIXES = ("", "", "", "San ", "Santa ", "Santo ", "Bagong ", "Puerto ")
+
+# ("PLACE KINDS": One row per kind of map place, modelled on the real
+#  GeoJSON / dataset mix: weight, GeoJSON type + categories, config.yaml
+#  place type, dataset topic + activities, name suffixes, descriptions.
+#  From: synth_points() → To: feature() / place_records() | *mll)
+KINDS = {
+    "resort": dict(weight=30, type="HOTELS & RESORTS", categories=("accommodation", "beach_resort"),
+                   place_type="accommodation", topic="accommodation",
+                   activities=(["accommodation"], ["accommodation", "swimming"]),
+                   suffixes=("Beach Resort", "Resort", "Inn", "Lodge", "Hotel", "Pension House", "Homestay"),
+                   noun="place to stay", exposure="indoor", hours="24/7", visit=0,
+                   describe=("A quiet {noun} a short ride from the {town} town proper.",
+                             "Simple rooms and a garden facing the sea, popular with surfers.",
+                             "Family-run {noun} with air-conditioned rooms and home-cooked meals.")),
+    "food":   dict(weight=18, type="RESTAURANTS & CAFES", categories=("food",),
+                   place_type="food", topic="food", activities=(["dining", "food"], ["dining"]),
+                   suffixes=("Café", "Grill", "Eatery", "Kainan", "Bistro", "Seafood House", "Bakeshop"),
+                   noun="restaurant", exposure="indoor", hours="8:00 AM - 9:00 PM", visit=60,
+                   describe=("Serves local dishes like laing and fresh seafood at fair prices.",
+                             "A small {noun} known for its coffee and native pastries.",
+                             "Open-air {noun} with grilled fish and a view of the bay.")),
+    "beach":  dict(weight=14, type="VIEWPOINTS", categories=("beach",), place_type="swimming",
+                   topic="swimming", activities=(["swimming", "beaches"], ["swimming", "surfing"]),
+                   suffixes=("Beach", "Cove", "Sandbar"), noun="beach", exposure="outdoor",
+                   hours="6:00 AM - 6:00 PM", visit=180,
+                   describe=("A long stretch of white sand with calm water in the morning.",
+                             "Rocky {noun} with clear water, good for snorkeling at low tide.",
+                             "Surf {noun} facing the Pacific with waves from August to October.")),
+    "falls":  dict(weight=8, type="FALLS", categories=("falls", "hike"), place_type="sightseeing",
+                   topic="nature", activities=(["hiking", "sightseeing"], ["hiking", "swimming"]),
+                   suffixes=("Falls",), noun="waterfall", exposure="outdoor",
+                   hours="7:00 AM - 5:00 PM", visit=150,
+                   describe=("A multi-tiered {noun} reached by a short jungle trek.",
+                             "Cold basin pool under a {noun}; bring water shoes for the trail.")),
+    "view":   dict(weight=14, type="VIEWPOINTS", categories=("viewpoint", "nature", "hike"),
+                   place_type="sightseeing", topic="sightseeing",
+                   activities=(["sightseeing", "photography"], ["sightseeing", "hiking"]),
+                   suffixes=("Point", "Viewdeck", "Hill", "Lighthouse", "Rock Formation"),
+                   noun="viewpoint", exposure="outdoor", hours="5:00 AM - 6:00 PM", visit=90,
+                   describe=("Rolling hills that drop into the sea, best at sunrise.",
+                             "A {noun} over the coast with a short uphill walk.")),
+    "church": dict(weight=6, type="RELIGIOUS SITES", categories=("religious", "culture"),
+                   place_type="culture", topic="culture",
+                   activities=(["culture", "sightseeing"], ["sightseeing", "photography"]),
+                   suffixes=("Church", "Chapel", "Shrine"), noun="church", exposure="indoor",
+                   hours="6:00 AM - 7:00 PM", visit=45,
+                   describe=("A Spanish-era {noun} with coral stone walls.",
+                             "Hilltop {noun} visited by pilgrims during Holy Week.")),
+    "shop":   dict(weight=5, type="SHOPPING", categories=("shopping",), place_type="shopping",
+                   topic="shopping", activities=(["shopping"],),
+                   suffixes=("Market", "Pasalubong Center", "Souvenir Shop"), noun="shop",
+                   exposure="indoor", hours="7:00 AM - 7:00 PM", visit=45,
+                   describe=("Abaca crafts, dried fish and local delicacies for pasalubong.",)),
+    "bar":    dict(weight=5, type="NIGHTLIFE", categories=("indoor",), place_type="food",
+                   topic="nightlife", activities=(["nightlife", "drinks"], ["nightlife", "bar"]),
+                   suffixes=("Bar", "KTV", "Resto Bar", "Sports Bar"), noun="bar",
+                   exposure="indoor", hours="6:00 PM - 2:00 AM", visit=120,
+                   describe=("Live acoustic sets on weekends and cold local beer.",)),
+}
+BUDGETS = ("cheap", "mid", "high")
+BEST_TIMES = ("morning", "afternoon", "sunset", "any")
+
+
+def proper_name(rng, syllables):
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def synth_towns(count, rng):
+    # → [(name, lat, lng)]: the real municipalities, then unique generated ones.
+    towns = list(BASE_TOWNS[:count])
+    taken = {t[0] for t in towns}
+    while len(towns) < count:
+        name = rng.choice(TOWN_PREFIXES) + proper_name(rng, rng.choice((2, 3)))
+        if name in taken:
+            continue
+        taken.add(name)
+        towns.append((name, round(rng.uniform(*LAT_RANGE), 4), round(rng.uniform(*LNG_RANGE), 4)))
+    return towns
+
+
+def synth_points(count, towns, rng, taken=()):
+    # ("SYNTH POINTS": `count` uniquely named places as compact tuples
+    #  (name, kind, town index, lat, lng, budget, description). Names are
+    #  "<Name> <suffix>"; a collision gets the town appended, then a number.
+    #  From: write_scale_set() → To: feature() / place_records() | *mll)
+    kinds   = list(KINDS)
+    weights = [KINDS[k]["weight"] for k in kinds]
+    taken   = {name.lower() for name in taken}
+    points  = []
+    for i in range(count):
+        kind      = rng.choices(kinds, weights)[0]
+        spec      = KINDS[kind]
+        town      = i % len(towns) if i < len(towns) * 4 else rng.randrange(len(towns))
+        town_name = towns[town][0]
+        name      = f"{proper_name(rng, rng.choice((2, 3)))} {rng.choice(spec['suffixes'])}"
+        if name.lower() in taken:
+            name = f"{name} {town_name}"
+        n = 2
+        while name.lower() in taken:
+            name = f"{name.rsplit(' #', 1)[0]} #{n}"
+            n += 1
+        taken.add(name.lower())
+        lat = towns[town][1] + rng.uniform(-0.06, 0.06)
+        lng = towns[town][2] + rng.uniform(-0.06, 0.06)
+        description = rng.choice(spec["describe"]).format(noun=spec["noun"], town=town_name)
+        points.append((name, kind, town, round(lat, 6), round(lng, 6), rng.choice(BUDGETS), description))
+    return points
+
+
+def feature(point, towns, rng, feature_id):
+    name, kind, town, lat, lng, budget, description = point
+    spec = KINDS[kind]
+    return {
+        "type": "Feature",
+        "properties": {
+            "name":               name,
+            "type":               spec["type"],
+            "description":        description,
+            "municipality":       towns[town][0].upper(),
+            "visit_time_minutes": spec["visit"],
+            "category":           rng.choice(spec["categories"]),
+            "outdoor_exposure":   spec["exposure"],
+            "opening_hours":      spec["hours"],
+            "best_time_of_day":   rng.choice(BEST_TIMES),
+            "min_budget":         budget,
+            "size":               0.15,
+            "showAtZoom":         12,
+            "id":                 feature_id,
+            "image":              None,
+        },
+        "geometry": {"type": "Point", "coordinates": [lng, lat]},
+    }
+
+
+def place_records(point, towns, rng, count):
+    # ("PLACE RECORDS": `count` (1–5) dataset.json questions about one place,
+    #  always starting with "Where is …?" like the real location records.
+    #  From: write_scale_set() → To: dataset.json | *mll)
+    name, kind, town, lat, lng, budget, description = point
+    spec      = KINDS[kind]
+    town_name = towns[town][0]
+    base = {
+        "topic":       spec["topic"],
+        "location":    town_name,
+        "activities":  list(rng.choice(spec["activities"])),
+        "budget":      budget,
+        "coordinates": {"lat": lat, "lng": lng},
+        "place_name":  name,
+    }
+    fee = {"cheap": "under 50 pesos", "mid": "around 100 to 300 pesos", "high": "above 500 pesos"}[budget]
+    templates = [
+        (f"Where is {name}?",
+         f"{name} is a {spec['noun']} located in {town_name}.",
+         f"{name} Location", f"{name} is located in {town_name}."),
+        (f"What is {name} known for?",
+         f"{description} {name} is one of the better known spots in {town_name}.",
+         f"{name} Overview", description),
+        (f"How much does it cost to visit {name}?",
+         f"Expect to spend {fee} per person at {name}. Bring cash; card payment is rare in {town_name}.",
+         f"{name} Fees", f"Budget {fee} per person at {name}."),
+        (f"How do I get to {name} from {town_name}?",
+         f"From the {town_name} town proper, take a tricycle or habal-habal to {name}; "
+         f"the ride takes about {rng.randrange(10, 60, 5)} minutes.",
+         f"Getting to {name}", f"Tricycle or habal-habal from {town_name} town proper."),
+        (f"When is the best time to visit {name}?",
+         f"Visit {name} in the {rng.choice(('early morning', 'late afternoon', 'dry season'))}; "
+         f"it is open {spec['hours']}.",
+         f"Best Time for {name}", f"{name} is open {spec['hours']}."),
+    ]
+    for question, answer, title, summary in templates[:count]:
+        yield {"input": question, "output": answer, "title": title, "summary_offline": summary, **base}
+
+
+def town_records(town, rng):
+    name = town[0]
+    yield {"input": f"Where can I eat in {name}?",
+           "output": f"The {name} town proper has carinderias and cafés serving local dishes and seafood.",
+           "title": f"Dining in {name}", "topic": "food", "location": name,
+           "activities": ["dining", "food"], "summary_offline": f"Carinderias and cafés in {name} town proper."}
+    yield {"input": f"How do I get around {name}?",
+           "output": f"Tricycles run around {name}; hire a habal-habal for remote barangays.",
+           "title": f"Transport in {name}", "topic": "transport", "location": name,
+           "activities": ["transport"], "summary_offline": "Tricycles in town, habal-habal for barangays."}
+    yield {"input": f"Is {name} safe for tourists?",
+           "output": f"{name} is generally safe; avoid the coast during typhoon warnings.",
+           "title": f"Safety in {name}", "topic": "safety", "location": name,
+           "activities": ["safety"], "summary_offline": f"{name} is generally safe for tourists.",
+           "budget": rng.choice(BUDGETS)}
+
+
+def _write_json_array(f, items):
+    # Streams a JSON array, one item per line; returns the item count.
+    count = 0
+    f.write("[\n")
+    for item in items:
+        f.write(("" if count == 0 else ",\n") + json.dumps(item, ensure_ascii=False))
+        count += 1
+    f.write("\n]")
+    return count
+
+
+def write_scale_set(out_dir, records, points=None, seed=0, include_base=True):
+    # ("WRITE SCALE SET": dataset.json + places.geojson + config.yaml of the
+    #  requested size into out_dir. `records` / `points` are totals including
+    #  the real data (when include_base); points defaults to records / 3.
+    #  From: main() / bench.scale → To: {paths + counts} | *mll)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    base_records, base_features = [], []
+    if include_base:
+        with open(DATASET_PATH, "r", encoding="utf-8") as f:
+            base_records = json.load(f)
+        with open(GEOJSON_PATH, "r", encoding="utf-8") as f:
+            base_features = json.load(f).get("features", [])
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = yaml.load(f, Loader=YAML_LOADER)
+
+    points = records // 3 if points is None else points
+    taken  = {(f.get("properties") or {}).get("name") or "" for f in base_features} | set(config.get("places", {}))
+    base_points = sum(1 for f in base_features if (f.get("geometry") or {}).get("type") == "Point")
+    n_points    = max(0, points - base_points)
+    towns       = synth_towns(max(len(BASE_TOWNS), n_points // 40), rng)
+    synthetic   = synth_points(n_points, towns, rng, taken)
+
+    # Spread the record budget: town questions first, then 1–5 per place.
+    budget = max(0, records - len(base_records))
+    town_q = min(budget // 10, 3 * len(towns))
+    place_q = budget - town_q
+    per_place = [0] * len(synthetic)
+    if synthetic:
+        for i in range(len(synthetic)):
+            per_place[i] = min(5, place_q // len(synthetic) + (1 if i < place_q % len(synthetic) else 0))
+
+    def dataset_items():
+        yield from base_records
+        written = 0
+        for town in towns:
+            for record in town_records(town, rng):
+                if written >= town_q:
+                    break
+                written += 1
+                yield record
+        for point, count in zip(synthetic, per_place):
+            if count:
+                yield from place_records(point, towns, rng, count)
+
+    def geo_items():
+        yield from base_features
+        for i, point in enumerate(synthetic):
+            yield feature(point, towns, rng, 100000 + i)
+
+    dataset_path = out_dir / "dataset.json"
+    geojson_path = out_dir / "places.geojson"
+    config_path  = out_dir / "config.yaml"
+    with open(dataset_path, "w", encoding="utf-8") as f:
+        n_records = _write_json_array(f, dataset_items())
+    with open(geojson_path, "w", encoding="utf-8") as f:
+        f.write('{"type": "FeatureCollection", "features": ')
+        n_features = _write_json_array(f, geo_items())
+        f.write("}\n")
+
+    places = config.setdefault("places", {})
+    for name, kind, town, lat, lng, *_ in synthetic:
+        places[name] = {"lat": lat, "lng": lng, "type": KINDS[kind]["place_type"]}
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.dump(config, f, Dumper=YAML_DUMPER, allow_unicode=True, sort_keys=False)
+
+    return {
+        "dataset_path":  str(dataset_path),
+        "geojson_path":  str(geojson_path),
+        "config_path":   str(config_path),
+        "records":       n_records,
+        "features":      n_features,
+        "points":        base_points + len(synthetic),
+        "towns":         len(towns),
+        "config_places": len(places),
+        "seed":          seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic scale-up dataset.json + GeoJSON + config.yaml")
+    parser.add_argument('--records', type=int, required=True, help='total dataset.json records')
+    parser.add_argument('--points', type=int, default=None, help='total GeoJSON points (default records / 3)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-base', action='store_true', help='synthetic data only (no real records / points)')
+    parser.add_argument('--out', required=True, help='output directory')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    result = write_scale_set(args.out, args.records, args.points, args.seed, not args.no_base)
+    if result["records"] < args.records:
+        print(f"  ⚠ {result['records']} records: at most 5 per place — raise --points for more")
+    print("=" * 60)
+    print(f"  SYNTHETIC SCALE SET ({time.perf_counter() - t0:.1f}s)")
+    print("=" * 60)
+    print(f"  Records       : {result['records']}  → {result['dataset_path']}")
+    print(f"  Points        : {result['points']} in {result['towns']} towns "
+          f"({result['features']} features) → {result['geojson_path']}")
+    print(f"  Config places : {result['config_places']}  → {result['config_path']}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
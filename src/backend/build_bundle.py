@@ -0,0 +1,117 @@
+"""
+build_bundle.py — Offline build of the memory-mapped index bundle
+==================================================================
+Snapshots the active Chroma knowledge collection (stored vectors, no
+re-embedding), the GeoLookup table + name vectors and the Controller keyword
+vectors into one file the server maps at startup (see bundle.py).
+
+Usage:
+    python ingest.py            # make sure Chroma is up to date first
+    python build_bundle.py      # writes rag.bundle.path (default bundle/pathfinder.bundle)
+
+Then set rag.bundle.enabled: true. The server ignores the bundle (and logs
+why) if dataset.json or rag.model_path change after it was built.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from pipeline import Pipeline
+from bundle import write_bundle, IndexBundle
+
+BASE_DIR     = Path(__file__).parent
+DATASET_FILE = BASE_DIR / "dataset" / "dataset.json"
+CONFIG       = BASE_DIR / "config" / "config.yaml"
+
+
+def to_numpy(vectors, dtype):
+    # GeoLookup / Controller hold numpy arrays; accept torch tensors too.
+    if hasattr(vectors, "cpu"):
+        vectors = vectors.cpu().numpy()
+    return np.asarray(vectors, dtype=dtype)
+
+
+def distance_space(collection):
+    # Chroma ≥1.0 keeps the HNSW space in the collection configuration
+    # (cosine by default for sentence-transformer collections); older
+    # versions use metadata["hnsw:space"], defaulting to l2.
+    config = getattr(collection, "configuration_json", None) or {}
+    space  = (config.get("hnsw") or {}).get("space")
+    return space or (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def collect(pipeline):
+    collection = pipeline.index.open_active()
+    records    = collection.get(include=["embeddings", "documents", "metadatas"])
+    if not records["ids"]:
+        raise SystemExit("Knowledge collection is empty — run ingest.py first.")
+
+    embeddings = np.asarray(records["embeddings"], dtype=np.float32)
+    keys       = sorted({k for meta in records["metadatas"] for k in (meta or {})})
+    columns    = {k: [(meta or {}).get(k) for meta in records["metadatas"]] for k in keys}
+
+    geo   = pipeline.geo_engine
+    names = geo.place_names
+    geo_table = {
+        "names":        names,
+        "display":      [geo.places_db[n]["name"] for n in names],
+        "coordinates":  [geo.places_db[n]["coordinates"] for n in names],
+        "type":         [geo.places_db[n]["type"] for n in names],
+        "municipality": [geo.places_db[n]["municipality"] for n in names],
+    }
+
+    arrays = {
+        "doc_embeddings": embeddings.astype(np.float16),
+        "doc_norms":      np.linalg.norm(embeddings, axis=1).astype(np.float32),
+        "geo_embeddings": to_numpy(geo.place_embeddings, np.float16),
+        "kw_embeddings":  to_numpy(pipeline.controller.cached_kw_embeddings, np.float16),
+    }
+    tables = {
+        "docs":     {"ids": records["ids"], "documents": records["documents"], "metadata": columns},
+        "geo":      geo_table,
+        "keywords": pipeline.controller.keyword_texts,
+    }
+    info = {
+        "model":        pipeline.config["rag"]["model_path"],
+        "collection":   collection.name,
+        "space":        distance_space(collection),
+        "dataset_hash": pipeline.dataset_hash(pipeline.dataset_path),
+        "count":        len(records["ids"]),
+        "dim":          int(embeddings.shape[1]),
+    }
+    return arrays, tables, info
+
+
+def main():
+    print("========================================")
+    print("   PATHFINDER BUNDLE BUILD              ")
+    print("========================================")
+
+    pipeline = Pipeline(dataset_path=str(DATASET_FILE), config_path=str(CONFIG))
+    try:
+        out = Path(pipeline.config.get("rag", {}).get("bundle", {}).get("path", "bundle/pathfinder.bundle"))
+        if not out.is_absolute():
+            out = BASE_DIR / out
+
+        arrays, tables, info = collect(pipeline)
+        size = write_bundle(out, arrays, tables, info)
+        print(f"📦 Wrote {out} ({size / 1e6:.1f} MB): {info['count']} docs, "
+              f"{len(tables['geo']['names'])} places, {len(tables['keywords'])} keywords")
+
+        t0 = time.perf_counter()
+        IndexBundle(out).check(model=info["model"], dataset_hash=info["dataset_hash"])
+        print(f"   - Verified: maps in {1000 * (time.perf_counter() - t0):.1f} ms")
+    except SystemExit:
+        raise
+    except Exception as e:
+        print(f"Bundle build failed: {e}")
+        sys.exit(1)
+    finally:
+        pipeline.enhancer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# =============================================================================
+# bundle.py — Prebuilt, memory-mapped index bundle for fast cold start
+# =============================================================================
+# build_bundle.py snapshots everything the server would otherwise compute or
+# open at startup into ONE versioned file:
+#
+#   doc_embeddings   float16 (N, D)    Chroma knowledge vectors, as stored
+#   doc_norms        float32 (N,)      ‖d‖, for exact distances
+#   geo_embeddings   float16 (G, D)    GeoLookup place-name vectors
+#   kw_embeddings    float16 (K, D)    Controller keyword vectors
+#   tables           JSON              columnar doc metadata, geo table,
+#                                      keyword list
+#
+# Layout: MAGIC | u64 header length | JSON header | arrays, 64-byte aligned.
+# IndexBundle maps the file read-only and hands out numpy views straight into
+# the mapping — nothing is copied or parsed per array, so opening is
+# milliseconds. The array pages live in the OS page cache, so every worker
+# process (forked or not) shares one physical copy of the vectors.
+# The tables are NOT shared: they are JSON-decoded from the header into
+# Python objects in each process, so the document strings and metadata
+# columns are a per-worker cost that grows with the dataset. BundleIndex
+# keeps them columnar and builds metadata dicts only for the rows it returns.
+#
+# BundleIndex answers the subset of Chroma's collection.query() the pipeline
+# uses (query_texts, n_results, where with $eq/$ne/$in/$nin/$and/$or) with
+# the distance of the source collection's space (cosine / l2 / ip, recorded
+# at build time), so `1 - distance` confidences and the calibrated
+# thresholds are unchanged. The float16 rows are widened to float32 one
+# CHUNK_ROWS block at a time, so a query never copies the whole matrix.
+#
+# *mll
+# =============================================================================
+
+import json
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+MAGIC          = b"PFBUNDLE"
+FORMAT_VERSION = 1
+ALIGN          = 64
+
+
+class BundleError(Exception):
+    # Bundle missing, corrupt, or built for another format/model/dataset.
+    pass
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_bundle(path, arrays, tables, info):
+    # ("WRITE BUNDLE": Serializes arrays + tables into a single file, written
+    #  to a temp path and renamed into place so a running server never maps a
+    #  half-written bundle.
+    #  From: build_bundle.py → To: rag.bundle.path | *mll)
+    path   = Path(path)
+    layout = {}
+    offset = 0
+    blobs  = []
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        blobs.append((offset, array))
+        offset = _align(offset + array.nbytes)
+
+    header = dict(info, format=FORMAT_VERSION, arrays=layout, tables=tables,
+                  created_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start   = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for rel, array in blobs:
+            f.seek(data_start + rel)
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+    return data_start + offset
+
+
+class IndexBundle:
+    # ("INDEX BUNDLE": Read-only mmap of a bundle file.
+    #  From: Pipeline.__init__ (rag.bundle.enabled) → To: BundleIndex, GeoLookup,
+    #  Controller | *mll)
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise BundleError(f"cannot open bundle {self.path}: {e}")
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise BundleError(f"{self.path} is not a Pathfinder bundle")
+        (header_len,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        start         = len(MAGIC) + 8
+        self.header   = json.loads(self._mm[start:start + header_len].decode("utf-8"))
+        if self.header.get("format") != FORMAT_VERSION:
+            raise BundleError(f"bundle format {self.header.get('format')} != {FORMAT_VERSION}")
+
+        data_start  = _align(start + header_len)
+        self.arrays = {}
+        for name, spec in self.header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+            self.arrays[name] = np.frombuffer(
+                self._mm, dtype=dtype, count=count, offset=data_start + spec["offset"]
+            ).reshape(spec["shape"])
+        self.tables = self.header["tables"]
+
+    def info(self):
+        return {k: v for k, v in self.header.items() if k not in ("arrays", "tables")}
+
+    def check(self, model=None, dataset_hash=None):
+        # Raises BundleError if the bundle was built from another model or dataset.
+        if model and self.header.get("model") != model:
+            raise BundleError(f"bundle model '{self.header.get('model')}' != '{model}'")
+        if dataset_hash and self.header.get("dataset_hash") != dataset_hash:
+            raise BundleError("bundle is stale: dataset.json changed since it was built")
+        return self
+
+
+class BundleIndex:
+    # ("BUNDLE INDEX": Exact (brute-force) nearest-neighbour search over the
+    #  mmap'd float16 doc vectors — a drop-in for the read side of a Chroma
+    #  collection. At a few thousand docs one matrix-vector product beats
+    #  HNSW + SQLite metadata fetches.
+    #  From: Pipeline.collection (bundle mode) → To: ask() retrieval paths | *mll)
+
+    CHUNK_ROWS = 4096   # float32 scratch per block: CHUNK_ROWS × D × 4 bytes
+
+    def __init__(self, bundle, embedding_function):
+        docs                    = bundle.tables["docs"]
+        self.name               = f"bundle:{bundle.header.get('collection', 'knowledge')}"
+        self.embedding_function = embedding_function
+        self.space              = bundle.header.get("space", "l2")
+        self.embeddings         = bundle.arrays["doc_embeddings"]
+        self.norms              = bundle.arrays["doc_norms"]
+        self.ids                = docs["ids"]
+        self.documents          = docs["documents"]
+        self.columns            = docs["metadata"]
+        self._column_arrays     = {}
+
+    def count(self):
+        return len(self.ids)
+
+    def _metadata(self, i):
+        # None marks a key the Chroma record did not have; leave it out so
+        # meta.get(key, default) behaves exactly as with Chroma results.
+        return {k: column[i] for k, column in self.columns.items() if column[i] is not None}
+
+    def _column(self, field):
+        array = self._column_arrays.get(field)
+        if array is None:
+            values = self.columns.get(field)
+            array  = np.array(values if values is not None else [None] * len(self.ids), dtype=object)
+            self._column_arrays[field] = array
+        return array
+
+    def _mask(self, where):
+        if not where:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, cond in where.items():
+            if key == "$and":
+                for sub in cond:
+                    mask &= self._mask(sub)
+            elif key == "$or":
+                any_mask = np.zeros(len(self.ids), dtype=bool)
+                for sub in cond:
+                    any_mask |= self._mask(sub)
+                mask &= any_mask
+            else:
+                column = self._column(key)
+                if not isinstance(cond, dict):
+                    cond = {"$eq": cond}
+                for op, value in cond.items():
+                    if op == "$eq":
+                        mask &= column == value
+                    elif op == "$ne":
+                        mask &= column != value
+                    elif op == "$in":
+                        mask &= np.isin(column, list(value))
+                    elif op == "$nin":
+                        mask &= ~np.isin(column, list(value))
+                    else:
+                        raise ValueError(f"unsupported where operator: {op}")
+        return mask
+
+    def _dots(self, rows, queries):
+        # (rows, queries) float32 dot products straight off the mapping, one
+        # block of rows at a time; rows=None means every doc.
+        n    = len(self.ids) if rows is None else len(rows)
+        dots = np.empty((n, len(queries)), dtype=np.float32)
+        for start in range(0, n, self.CHUNK_ROWS):
+            end   = min(start + self.CHUNK_ROWS, n)
+            block = self.embeddings[start:end] if rows is None else self.embeddings[rows[start:end]]
+            np.matmul(block.astype(np.float32), queries.T, out=dots[start:end])
+        return dots
+
+    def _distances(self, dots, norms, q):
+        # Same definitions as hnswlib / Chroma for each space.
+        if self.space == "cosine":
+            return 1.0 - dots / np.maximum(norms * float(np.linalg.norm(q)), 1e-12)
+        if self.space == "ip":
+            return 1.0 - dots
+        return norms * norms + float(q @ q) - 2.0 * dots
+
+    def query(self, query_texts, n_results=10, where=None, include=None):
+        queries = np.asarray(self.embedding_function(list(query_texts)), dtype=np.float32)
+        mask    = self._mask(where)
+        rows    = np.flatnonzero(mask) if mask is not None else None
+
+        norms   = self.norms if rows is None else self.norms[rows]
+        dots    = self._dots(rows, queries)
+
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for j, q in enumerate(queries):
+            if len(norms) == 0:
+                top = np.empty(0, dtype=np.int64)
+                distances = np.empty(0, dtype=np.float32)
+            else:
+                distances = self._distances(dots[:, j], norms, q)
+                k   = min(n_results, len(distances))
+                top = np.argpartition(distances, k - 1)[:k]
+                top = top[np.argsort(distances[top], kind="stable")]
+            index = top if rows is None else rows[top]
+            out["ids"].append([self.ids[i] for i in index])
+            out["documents"].append([self.documents[i] for i in index])
+            out["metadatas"].append([self._metadata(i) for i in index])
+            out["distances"].append([float(d) for d in distances[top]])
+        return out
@@ -12,13 +12,12 @@ Output:
     - calibration_raw.csv      (raw data for spreadsheet review)
 """
 
-import chromadb
 import yaml
 import json
 import csv
 import os
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+from index_manager import active_collection_name
 
 
 
@@ -118,8 +117,9 @@ def load_config():
 
 
 def get_collection(config):
+    import chromadb
     client = chromadb.PersistentClient(path=str(CHROMA_STORAGE))
-    collection_name = config["rag"]["collection_name"]
+    collection_name = active_collection_name(CHROMA_STORAGE, config["rag"]["collection_name"])
     try:
         return client.get_collection(name=collection_name)
     except Exception as e:
@@ -131,6 +131,7 @@ def get_collection(config):
 def load_embedder(config):
     model_name = config["rag"].get("embedding_model", "all-MiniLM-L6-v2")
     print(f"  Loading embedding model: {model_name}")
+    from sentence_transformers import SentenceTransformer
     return SentenceTransformer(model_name)
 
 
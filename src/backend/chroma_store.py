@@ -0,0 +1,152 @@
+# =============================================================================
+# chroma_store.py — Opens the Chroma client every Pipeline works against
+# =============================================================================
+# Two modes, picked by config.yaml rag.chroma_server:
+#
+#   embedded (default)  chromadb.PersistentClient on chroma_storage/. Chroma
+#                       keeps collection indexes in process memory, so a
+#                       second process on the same directory doesn't see the
+#                       first one's writes (semantic cache entries, rebuilt
+#                       generations) and its own writes can clobber them.
+#                       The API therefore claims the directory for ONE serving
+#                       process (claim_serving_store, an flock held for the
+#                       process lifetime): a second uvicorn worker fails its
+#                       startup with a message pointing here. CLI tools
+#                       (ingest.py, prefill.py, bench/) don't take the claim.
+#
+#   server              chromadb.HttpClient on rag.chroma_server.host:port —
+#                       one `chroma run --path chroma_storage/` process that
+#                       every worker shares, so the semantic cache, the
+#                       knowledge generations and /admin/rebuild|rollback are
+#                       the same for all of them. With autostart, the first
+#                       worker starts it (flock, like embedding_service.py).
+#
+# CHROMA_SERVER=host:port turns server mode on without editing config.yaml.
+#
+# *mll
+# =============================================================================
+
+import fcntl
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+from log_setup import get_logger
+
+log = get_logger("chroma_store")
+
+BASE_DIR       = Path(__file__).parent
+CHROMA_STORAGE = BASE_DIR / "chroma_storage"
+SERVING_LOCK   = ".serving.lock"
+
+_claims = []   # open lock files; the flock lasts as long as the process
+
+
+class ChromaStoreError(RuntimeError):
+    pass
+
+
+def server_config(config):
+    # rag.chroma_server, with CHROMA_SERVER=host:port forcing it on.
+    conf = dict((config or {}).get('rag', {}).get('chroma_server', {}))
+    env  = os.getenv('CHROMA_SERVER')
+    if env:
+        host, _, port = env.rpartition(':')
+        conf.update(enabled=True, host=host or conf.get('host', '127.0.0.1'), port=int(port))
+    return conf
+
+
+def claim_serving_store(config_path, chroma_path=None):
+    # ("CLAIM STORE": Called once per API process before the pipeline loads.
+    #  Server mode needs no claim; embedded mode takes an exclusive flock on
+    #  chroma_storage/.serving.lock and raises ChromaStoreError if another
+    #  serving process already holds it.
+    #  From: app.py lifespan() → To: uvicorn startup (fails on error) | *mll)
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    if server_config(config).get('enabled', False):
+        return None
+
+    path = Path(chroma_path or CHROMA_STORAGE)
+    path.mkdir(parents=True, exist_ok=True)
+    lock = open(path / SERVING_LOCK, "a+")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.seek(0)
+        holder = lock.read().strip() or "another process"
+        lock.close()
+        raise ChromaStoreError(
+            f"embedded Chroma store {path} is already served by {holder}; run one worker, "
+            f"or set rag.chroma_server.enabled (CHROMA_SERVER=host:port) to share it across workers")
+    lock.truncate(0)
+    lock.write(f"pid {os.getpid()}\n")
+    lock.flush()
+    _claims.append(lock)
+    return path
+
+
+def open_client(config, chroma_path=None):
+    # ("OPEN CLIENT": PersistentClient (embedded) or HttpClient (server),
+    #  starting the server first when rag.chroma_server.autostart allows.
+    #  From: Pipeline.__init__ "chroma_client" phase → To: Pipeline.client | *mll)
+    import chromadb
+
+    path = Path(chroma_path or CHROMA_STORAGE)
+    conf = server_config(config)
+    if not conf.get('enabled', False):
+        return chromadb.PersistentClient(path=str(path))
+
+    host, port = conf.get('host', '127.0.0.1'), int(conf.get('port', 8001))
+    client     = _connect(chromadb, host, port)
+    if client is None and conf.get('autostart', True):
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / ".server.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                client = _connect(chromadb, host, port)
+                if client is None:
+                    start_server(path, host, port, conf.get('start_timeout', 60))
+                    client = _connect(chromadb, host, port)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    if client is None:
+        raise ChromaStoreError(f"no Chroma server listening on {host}:{port}")
+    log.info("[CHROMA] Using shared Chroma server on %s:%s", host, port)
+    return client
+
+
+def _connect(chromadb, host, port):
+    try:
+        return chromadb.HttpClient(host=host, port=port)
+    except ValueError:   # chromadb: "Could not connect to a Chroma server"
+        return None
+
+
+def start_server(path, host, port, start_timeout=60):
+    # Runs `chroma run` on path and returns its Popen once it answers.
+    # From: open_client() autostart, bench/loadtest.py (multi-worker runs)
+    import chromadb
+
+    cli = Path(sys.executable).with_name("chroma")
+    cmd = [str(cli) if cli.exists() else (shutil.which("chroma") or "chroma"),
+           "run", "--path", str(path), "--host", host, "--port", str(port)]
+    log.info("[CHROMA] Starting Chroma server: %s", " ".join(cmd))
+    # New session: the server outlives the worker that started it, since
+    # the other workers depend on it too.
+    proc = subprocess.Popen(cmd, cwd=str(BASE_DIR), start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + start_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise ChromaStoreError(f"chroma server exited with code {proc.returncode}")
+        if _connect(chromadb, host, port) is not None:
+            return proc
+        time.sleep(0.2)
+    proc.terminate()
+    raise ChromaStoreError(f"chroma server did not start within {start_timeout}s")
@@ -1,8 +1,14 @@
 import re
 import math
 import unicodedata
-from sentence_transformers import util
-import torch
+
+import numpy as np
+
+from embedding_service import cos_sim
+from log_setup import get_logger
+
+log = get_logger("controller")
+
 
 class Controller:
 
@@ -25,7 +31,7 @@ class Controller:
         'lkjhgfdsa', 'poiuytrewq', 'mnbvcxz', '0987654321'
     ]
 
-    def __init__(self, config, embedding_model):
+    def __init__(self, config, embedding_model, bundle=None):
         self.greetings = [
             'hi', 'hello', 'hey', 'kumusta', 'good morning',
             'good afternoon', 'good evening', 'musta', 'kamusta', 'yo'
@@ -54,8 +60,16 @@ class Controller:
         all_kw_text.extend(['virac', 'baras', 'bato', 'pandan', 'viga', 'gigmoto',
                             'panganiban', 'bagamanoc', 'caramoran', 'san miguel', 'san andres'])
 
-        print("[INFO] Caching keyword embeddings...")
-        self.cached_kw_embeddings = self.embedding_model.encode(all_kw_text, convert_to_tensor=True)
+        self.keyword_texts = all_kw_text
+
+        # Prebuilt bundle vectors are only used if they were built from the
+        # same keyword list; otherwise config.yaml changed and we re-encode.
+        if bundle is not None and bundle.tables.get("keywords") == all_kw_text:
+            log.info("[CONTROLLER] Keyword embeddings loaded from bundle")
+            self.cached_kw_embeddings = bundle.arrays["kw_embeddings"].astype("float32")
+        else:
+            log.info("[CONTROLLER] Caching keyword embeddings...")
+            self.cached_kw_embeddings = self.embedding_model.encode(all_kw_text)
 
     def _normalize_text(self, text):
         text = text.lower().strip()
@@ -91,8 +105,8 @@ class Controller:
         if char_len > 0:
             unique_ratio = unique_chars / char_len
             threshold = self._unique_ratio_threshold(char_len)
-            print(f"[GIBBERISH] len={char_len} unique={unique_chars} "
-                f"ratio={unique_ratio:.3f} threshold={threshold:.3f}")
+            log.debug("[GIBBERISH] len=%s unique=%s ratio=%.3f threshold=%.3f",
+                      char_len, unique_chars, unique_ratio, threshold)
             if unique_ratio < threshold:
                 return True
 
@@ -125,9 +139,9 @@ class Controller:
         if len(user_input) < 3:
             return False
 
-        query_embedding = self.embedding_model.encode(user_input, convert_to_tensor=True)
-        cosine_scores = util.cos_sim(query_embedding, self.cached_kw_embeddings)[0]
-        best_score, best_index = torch.max(cosine_scores, dim=0)
+        query_embedding = self.embedding_model.encode(user_input)
+        cosine_scores = cos_sim(query_embedding, self.cached_kw_embeddings)[0]
+        best_score = float(np.max(cosine_scores))
 
         threshold = 0.80 if len(user_input) < 10 else 0.85
 
@@ -0,0 +1,576 @@
+# =============================================================================
+# embedding_service.py — One shared embedding model for all uvicorn workers
+# =============================================================================
+# Without it every worker process loads its own MiniLM. With
+# rag.embedding_service.enabled, the model lives in ONE local process and the
+# workers send it encode requests over a Unix socket:
+#
+#   worker 1 ─┐                      ┌──────────────────────────────────┐
+#   worker 2 ─┼── RemoteEncoder ───▶ │ EmbeddingServer                  │
+#   worker N ─┘   (unix socket)      │  connection threads → batch queue │
+#                                    │  batcher: ≤ max_batch texts or    │
+#                                    │  max_wait_ms → one encode() call  │
+#                                    └──────────────────────────────────┘
+#
+# Concurrent requests from all workers are merged into one forward pass, so
+# adding workers adds request-handling capacity, not model replicas.
+#
+# Wire format (both directions): u32 header length | u32 payload length |
+# JSON header | payload. Requests are {"op": "encode", "texts": [...],
+# "normalize": bool}, "info" or "stats"; an encode reply carries
+# {"shape", "dtype"} and the raw float32 matrix as payload.
+#
+# RemoteEncoder exposes the SentenceTransformer.encode() subset the backend
+# uses (str → 1-D, list → 2-D, convert_to_tensor), so GeoLookup, Controller
+# and the Chroma embedding function take it unchanged.
+#
+# BatchingEncoder is the batching core on its own: the service wraps its
+# model in one, and so does Pipeline (rag.batching) when it encodes locally,
+# so concurrent ask() threads share forward passes instead of each running
+# encode() on one sentence and fighting over torch's intra-op threads.
+#
+# Run standalone (systemd, container sidecar):
+#     python embedding_service.py [--config config/config.yaml] [--socket PATH]
+# or let the first worker start it (rag.embedding_service.autostart).
+#
+# *mll
+# =============================================================================
+
+import argparse
+import fcntl
+import concurrent.futures
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from log_setup import get_logger, setup_logging
+from metrics import REGISTRY
+
+log = get_logger("embedder")
+
+# ("EMBED BATCH METRICS": Texts per forward pass and passes per batcher.
+#  From: BatchingEncoder._batch_loop() → To: /metrics | *mll)
+EMBED_BATCH_SIZE = REGISTRY.histogram(
+    "pathfinder_embed_batch_size", "Texts per batched encode() call", ("batcher",),
+    buckets=(1, 2, 4, 8, 16, 32, 64))
+EMBED_BATCH_SECONDS = REGISTRY.histogram(
+    "pathfinder_embed_batch_seconds", "Duration of one batched encode() call", ("batcher",))
+
+BASE_DIR       = Path(__file__).parent
+CONFIG_PATH    = BASE_DIR / "config" / "config.yaml"
+DEFAULT_SOCKET = "state/embedder.sock"
+
+_FRAME = struct.Struct("<II")
+
+
+class EmbeddingServiceError(Exception):
+    # Service unreachable, or it answered with an error.
+    pass
+
+
+def resolve_socket_path(path):
+    path = Path(path or DEFAULT_SOCKET)
+    return path if path.is_absolute() else BASE_DIR / path
+
+
+def cos_sim(a, b):
+    # numpy counterpart of sentence_transformers.util.cos_sim: 1-D or (n, d)
+    # against (m, d) → (n, m), so similarity scoring needs no torch.
+    a = np.atleast_2d(np.asarray(a, dtype=np.float32))
+    b = np.atleast_2d(np.asarray(b, dtype=np.float32))
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return a @ b.T
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("embedding service closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def send_frame(sock, header, payload=b""):
+    head = json.dumps(header).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(head), len(payload)) + head + payload)
+
+
+def recv_frame(sock):
+    head_len, payload_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header  = json.loads(_recv_exact(sock, head_len).decode("utf-8"))
+    payload = _recv_exact(sock, payload_len) if payload_len else b""
+    return header, payload
+
+
+# =============================================================================
+# SERVER SIDE
+# =============================================================================
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class _Pending:
+    __slots__ = ("texts", "normalize", "future")
+
+    def __init__(self, texts, normalize):
+        self.texts     = texts
+        self.normalize = normalize
+        self.future    = concurrent.futures.Future()
+
+
+class BatchingEncoder:
+    # ("BATCHING ENCODER": Micro-batching front for an encoder. Callers put
+    #  their texts on a queue and block on a Future; one batcher thread
+    #  merges whatever is queued (≤ max_batch texts, waiting ≤ max_wait_ms
+    #  for more while other callers are in flight) into a single encode()
+    #  and resolves each caller's Future with its slice. A lone caller never
+    #  waits, and calls of ≥ max_batch texts (GeoLookup startup, ingest
+    #  batches) are already batches and run directly in the calling thread.
+    #  From: Pipeline._load_encoder(), EmbeddingServer →
+    #  To: GeoLookup, Controller, Chroma embedding function | *mll)
+
+    def __init__(self, model, max_batch=32, max_wait_ms=3, name="local"):
+        self.model     = model
+        self.max_batch = max_batch
+        self.max_wait  = max_wait_ms / 1000.0
+        self.name      = name
+        self._queue    = queue.Queue()
+        self._active   = 0               # callers currently inside encode()
+        self._lock     = threading.Lock()
+        self.batches   = 0
+        self.texts     = 0
+        self.encode_s  = 0.0
+        threading.Thread(target=self._batch_loop, name=f"embed-batcher-{name}", daemon=True).start()
+
+    def __getattr__(self, attr):
+        # get_sentence_embedding_dimension() etc. come from the wrapped model.
+        if attr == "model":
+            raise AttributeError(attr)
+        return getattr(self.model, attr)
+
+    def encode(self, sentences, convert_to_tensor=False, normalize_embeddings=False, **kwargs):
+        single  = isinstance(sentences, str)
+        texts   = [sentences] if single else list(sentences)
+        vectors = self.submit(texts, normalize_embeddings)
+        if single:
+            vectors = vectors[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(vectors.copy())
+        return vectors
+
+    def submit(self, texts, normalize=False):
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        if len(texts) >= self.max_batch:
+            return self._encode(texts, normalize)
+        pending = _Pending(texts, bool(normalize))
+        with self._lock:
+            self._active += 1
+        try:
+            self._queue.put(pending)
+            return pending.future.result()
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _encode(self, texts, normalize):
+        return np.asarray(
+            self.model.encode(texts, batch_size=self.max_batch, convert_to_numpy=True,
+                              normalize_embeddings=normalize),
+            dtype=np.float32)
+
+    def _collect(self):
+        # First request blocks; then keep taking requests until max_batch
+        # texts are queued or max_wait has passed since the first arrived.
+        # Requests that queued up during the previous encode() are taken
+        # without waiting; the max_wait window is only spent while there is
+        # concurrency (another caller inside encode()), so a lone request on
+        # an idle server is encoded immediately. max_wait_ms: 0 keeps just
+        # the free batching.
+        first    = self._queue.get()
+        batch    = [first]
+        size     = len(first.texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._active <= 1:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            batch.append(item)
+            size += len(item.texts)
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._collect()
+            # normalize_embeddings differs per caller; encode each flavour once.
+            for normalize in {p.normalize for p in batch}:
+                group = [p for p in batch if p.normalize == normalize]
+                texts = [t for p in group for t in p.texts]
+                t0 = time.perf_counter()
+                try:
+                    vectors = self._encode(texts, normalize)
+                except Exception as e:
+                    log.error("[EMBEDDER] encode failed for %s texts: %s", len(texts), e)
+                    for p in group:
+                        p.future.set_exception(e)
+                    continue
+                elapsed = time.perf_counter() - t0
+                self.encode_s += elapsed
+                self.batches  += 1
+                self.texts    += len(texts)
+                EMBED_BATCH_SIZE.observe(len(texts), batcher=self.name)
+                EMBED_BATCH_SECONDS.observe(elapsed, batcher=self.name)
+                offset = 0
+                for p in group:
+                    p.future.set_result(vectors[offset:offset + len(p.texts)])
+                    offset += len(p.texts)
+
+    def stats(self):
+        return {
+            "max_batch":     self.max_batch,
+            "max_wait_ms":   round(self.max_wait * 1000, 2),
+            "batches":       self.batches,
+            "texts":         self.texts,
+            "avg_batch":     round(self.texts / self.batches, 2) if self.batches else None,
+            "avg_encode_ms": round(1000 * self.encode_s / self.batches, 2) if self.batches else None,
+            "queued":        self._queue.qsize(),
+        }
+
+
+class EmbeddingServer:
+    # ("EMBEDDING SERVER": Owns the model. Connection threads submit requests
+    #  to a BatchingEncoder, which merges them across all workers.
+    #  From: python embedding_service.py → To: RemoteEncoder in each worker | *mll)
+
+    def __init__(self, model, model_name, socket_path, max_batch=32, max_wait_ms=5):
+        self.model       = model
+        self.model_name  = model_name
+        self.socket_path = Path(socket_path)
+        self.batcher     = BatchingEncoder(model, max_batch=max_batch, max_wait_ms=max_wait_ms,
+                                           name="service")
+        self.dim         = int(model.get_sentence_embedding_dimension())
+        self._server     = None
+        self.started     = time.time()
+        self.requests    = 0
+
+    # ── protocol ──────────────────────────────────────────────────────────
+    def info(self):
+        return {"model": self.model_name, "dim": self.dim, "pid": os.getpid(),
+                "max_batch": self.batcher.max_batch,
+                "max_wait_ms": round(self.batcher.max_wait * 1000, 2)}
+
+    def stats(self):
+        return dict(self.info(), **self.batcher.stats(),
+                    uptime_s = round(time.time() - self.started, 1),
+                    requests = self.requests)
+
+    def handle(self, header):
+        op = header.get("op")
+        if op == "encode":
+            texts = [str(t) for t in header.get("texts", [])]
+            self.requests += 1
+            if not texts:
+                return {"shape": [0, self.dim], "dtype": "<f4"}, b""
+            vectors = self.batcher.submit(texts, bool(header.get("normalize", False)))
+            return {"shape": list(vectors.shape), "dtype": "<f4"}, np.ascontiguousarray(vectors).tobytes()
+        if op == "info":
+            return self.info(), b""
+        if op == "stats":
+            return self.stats(), b""
+        return {"error": f"unknown op: {op}"}, b""
+
+    def _claim_socket(self):
+        # A leftover socket file from a crashed service is removed; a live one
+        # means another service already serves this path.
+        if not self.socket_path.exists():
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.socket_path))
+        except OSError:
+            self.socket_path.unlink()
+            return
+        finally:
+            probe.close()
+        raise EmbeddingServiceError(f"an embedding service is already listening on {self.socket_path}")
+
+    def serve_forever(self):
+        service = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        header, _ = recv_frame(self.request)
+                    except (ConnectionError, OSError):
+                        return
+                    try:
+                        reply, payload = service.handle(header)
+                    except Exception as e:
+                        reply, payload = {"error": str(e)}, b""
+                    try:
+                        send_frame(self.request, reply, payload)
+                    except OSError:
+                        return
+
+        self._claim_socket()
+        self._server = _UnixServer(str(self.socket_path), Handler)
+        os.chmod(self.socket_path, 0o660)
+        log.info("[EMBEDDER] Serving %s (dim %s) on %s — max_batch=%s max_wait_ms=%s",
+                 self.model_name, self.dim, self.socket_path, self.batcher.max_batch,
+                 round(self.batcher.max_wait * 1000, 2))
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# =============================================================================
+# CLIENT SIDE
+# =============================================================================
+
+class RemoteEncoder:
+    # ("REMOTE ENCODER": SentenceTransformer.encode() stand-in that forwards to
+    #  the embedding service. One persistent connection per calling thread
+    #  (the threadpool reuses its threads), reconnected once on failure.
+    #  From: Pipeline.__init__ (rag.embedding_service.enabled) →
+    #  To: GeoLookup, Controller, Chroma embedding function | *mll)
+
+    def __init__(self, socket_path, timeout=30.0):
+        self.socket_path = str(socket_path)
+        self.timeout     = timeout
+        self._local      = threading.local()
+        self.model_name  = None
+        self.dim         = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self._local.sock = sock
+        return sock
+
+    def _drop(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _call(self, header):
+        for attempt in (1, 2):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._connect()
+                send_frame(sock, header)
+                reply, payload = recv_frame(sock)
+                break
+            except (OSError, ConnectionError) as e:
+                self._drop()
+                if attempt == 2:
+                    raise EmbeddingServiceError(f"embedding service at {self.socket_path}: {e}")
+        if "error" in reply:
+            raise EmbeddingServiceError(reply["error"])
+        return reply, payload
+
+    def ping(self):
+        # Service info dict, or None if nothing is listening.
+        try:
+            info, _ = self._call({"op": "info"})
+        except EmbeddingServiceError:
+            return None
+        self.model_name = info.get("model")
+        self.dim        = info.get("dim")
+        return info
+
+    def stats(self):
+        reply, _ = self._call({"op": "stats"})
+        return reply
+
+    def get_sentence_embedding_dimension(self):
+        if self.dim is None:
+            self.ping()
+        return self.dim
+
+    def encode(self, sentences, convert_to_tensor=False, normalize_embeddings=False, **kwargs):
+        # batch_size / show_progress_bar / convert_to_numpy are accepted and
+        # ignored: the service batches across callers itself.
+        single = isinstance(sentences, str)
+        texts  = [sentences] if single else list(sentences)
+        reply, payload = self._call({"op": "encode", "texts": texts,
+                                     "normalize": bool(normalize_embeddings)})
+        vectors = np.frombuffer(payload, dtype=np.dtype(reply["dtype"])).reshape(reply["shape"])
+        if single:
+            vectors = vectors[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(vectors.copy())
+        return vectors
+
+
+def connect(socket_path, model_name, config_path=None, autostart=True, start_timeout=120.0,
+            timeout=30.0):
+    # ("CONNECT": Returns a RemoteEncoder for a running service, starting one
+    #  first if allowed. An flock next to the socket makes sure that when N
+    #  workers boot together exactly one spawns the service; the rest wait on
+    #  the lock and then find it listening. Raises EmbeddingServiceError if no
+    #  service serving model_name is reachable.
+    #  From: Pipeline._load_encoder() → To: Pipeline.raw_model | *mll)
+    socket_path = resolve_socket_path(socket_path)
+    encoder     = RemoteEncoder(socket_path, timeout=timeout)
+    info        = encoder.ping()
+
+    if info is None and autostart:
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(str(socket_path) + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                info = encoder.ping()
+                if info is None:
+                    info = _spawn(encoder, socket_path, config_path, start_timeout)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    if info is None:
+        raise EmbeddingServiceError(f"no embedding service listening on {socket_path}")
+    if info.get("model") != model_name:
+        raise EmbeddingServiceError(
+            f"embedding service serves '{info.get('model')}', expected '{model_name}'")
+    log.info("[EMBEDDER] Using shared embedding service pid %s on %s", info.get("pid"), socket_path)
+    return encoder
+
+
+def _spawn(encoder, socket_path, config_path, start_timeout):
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--socket", str(socket_path)]
+    if config_path:
+        cmd += ["--config", str(config_path)]
+    log.info("[EMBEDDER] Starting embedding service: %s", " ".join(cmd))
+    # New session: the service outlives the worker that started it, since
+    # the other workers depend on it too.
+    proc = subprocess.Popen(cmd, cwd=str(BASE_DIR), start_new_session=True)
+    deadline = time.monotonic() + start_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise EmbeddingServiceError(f"embedding service exited with code {proc.returncode}")
+        info = encoder.ping()
+        if info is not None:
+            return info
+        time.sleep(0.2)
+    raise EmbeddingServiceError(f"embedding service did not start within {start_timeout}s")
+
+
+def load_local_model(model_name, rag_conf):
+    # ("LOAD LOCAL MODEL": rag.embedding_backend picks the in-process model —
+    #  torch (SentenceTransformer), onnx (int8 OnnxEncoder) or hashing (the
+    #  deterministic offline HashingEncoder used by bench/). A missing,
+    #  stale or unloadable ONNX export falls back to torch with a warning.
+    #  From: Pipeline._load_encoder(), embedding_service main() →
+    #  To: BatchingEncoder / EmbeddingServer | *mll)
+    backend = os.getenv("EMBEDDING_BACKEND", rag_conf.get("embedding_backend", "torch")).lower()
+    t0 = time.perf_counter()
+    if backend == "onnx":
+        onnx_conf = rag_conf.get("onnx", {})
+        model_dir = Path(onnx_conf.get("path", "models/all-MiniLM-L6-v2-int8"))
+        if not model_dir.is_absolute():
+            model_dir = BASE_DIR / model_dir
+        try:
+            from onnx_encoder import OnnxEncoder
+            model = OnnxEncoder(model_dir, threads=onnx_conf.get("threads", 0)).check(model_name)
+            log.info("[EMBEDDER] Loaded ONNX int8 %s from %s in %.2fs",
+                     model_name, model_dir, time.perf_counter() - t0)
+            return model
+        except Exception as e:
+            log.warning("[EMBEDDER] ONNX backend unavailable (%s); falling back to torch", e)
+    elif backend == "hashing":
+        from hashing_encoder import HashingEncoder
+        model = HashingEncoder(dim=rag_conf.get("hashing", {}).get("dim", 384))
+        log.warning("[EMBEDDER] Using the hashing embedding stand-in (%s) — lexical, not semantic",
+                    model.model_name)
+        return model
+    elif backend != "torch":
+        log.warning("[EMBEDDER] Unknown embedding_backend '%s'; using torch", backend)
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device="cpu")
+    log.info("[EMBEDDER] Loaded torch %s in %.2fs", model_name, time.perf_counter() - t0)
+    return model
+
+
+def load_config(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Pathfinder embedding model over a Unix socket")
+    parser.add_argument("--config", default=str(CONFIG_PATH))
+    parser.add_argument("--socket", help="overrides rag.embedding_service.socket_path")
+    parser.add_argument("--max-batch", type=int, help="overrides rag.embedding_service.max_batch")
+    parser.add_argument("--max-wait-ms", type=float, help="overrides rag.embedding_service.max_wait_ms")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    setup_logging(config)
+    conf   = config.get("rag", {}).get("embedding_service", {})
+    model_name = "sentence-transformers/" + config["rag"]["model_path"]
+
+    # Same offline settings as pipeline.py: use the local HF cache only.
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    os.environ["HF_DATASETS_OFFLINE"]  = "1"
+    model = load_local_model(model_name, config.get("rag", {}))
+
+    server = EmbeddingServer(
+        model, model_name,
+        socket_path = resolve_socket_path(args.socket or conf.get("socket_path")),
+        max_batch   = args.max_batch or conf.get("max_batch", 32),
+        max_wait_ms = args.max_wait_ms if args.max_wait_ms is not None else conf.get("max_wait_ms", 5),
+    )
+    # SIGTERM (systemd, docker stop) unwinds serve_forever so the socket is removed.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except EmbeddingServiceError as e:
+        log.error("[EMBEDDER] %s", e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -41,6 +41,18 @@ class EntityExtractor:
             'panganiban', 'san miguel'
         ]
 
+        # Matchers are built once here rather than on every extract() call:
+        # place names longest-first with their punctuation-stripped form, and
+        # one compiled alternation per activity topic.
+        self.sorted_places = [
+            (place, re.sub(r'[^\w\s]', ' ', place.lower()))
+            for place in sorted(self.places.keys(), key=len, reverse=True)
+        ]
+        self.activity_patterns = {
+            topic: re.compile(r'\b(' + '|'.join(map(re.escape, keywords)) + r')s?\b')
+            for topic, keywords in self.config['keywords'].items()
+        }
+
     def extract(self, user_input):
         query_lower = user_input.lower()
 
@@ -70,12 +82,7 @@ class EntityExtractor:
         clean_input = re.sub(r'[^\w\s]', ' ', query_lower)
 
 
-        sorted_places = sorted(self.places.keys(), key=len, reverse=True)
-
-        for place in sorted_places:
-
-            clean_place_name = re.sub(r'[^\w\s]', ' ', place.lower())
-
+        for place, clean_place_name in self.sorted_places:
 
             if clean_place_name in clean_input:
                 found.append(place)
@@ -140,9 +147,8 @@ class EntityExtractor:
                 cleaned = cleaned.replace(phrase, replacement)
 
         found = []
-        for topic, keywords in self.config['keywords'].items():
-            pattern = r'\b(' + '|'.join(map(re.escape, keywords)) + r')s?\b'
-            if re.search(pattern, cleaned):
+        for topic, pattern in self.activity_patterns.items():
+            if pattern.search(cleaned):
                 found.append(topic)
 
         # Snorkeling should be explicit so downstream routing/filtering can
@@ -0,0 +1,191 @@
+"""
+export_onnx.py — Export the embedding model to int8 ONNX
+=========================================================
+Exports rag.model_path (all-MiniLM-L6-v2) from the local sentence-transformers
+cache to ONNX with mean pooling (and the model's L2 normalize) baked into the
+graph, quantizes the weights to int8 with onnxruntime's dynamic quantizer, and
+checks cosine parity against the torch model on calibrate.py's TEST_QUERIES.
+
+Usage:
+    python export_onnx.py                 # writes rag.onnx.path (default models/all-MiniLM-L6-v2-int8)
+    python -m bench.embedding             # parity + latency/RSS, torch vs onnx
+
+Then set rag.embedding_backend: onnx. Export needs torch + sentence-transformers
+(and onnxruntime); serving the export needs only onnxruntime + tokenizers.
+onnxruntime is not in requirements.txt: pip install -r requirements-onnx.txt.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+os.environ['TRANSFORMERS_OFFLINE'] = '1'
+os.environ['HF_DATASETS_OFFLINE']  = '1'
+
+from onnx_encoder import OnnxEncoder, META_FILE
+
+BASE_DIR     = Path(__file__).parent
+CONFIG       = BASE_DIR / "config" / "config.yaml"
+OPSET        = 14
+MIN_COSINE   = 0.99     # worst-case agreement required to keep the export
+
+
+def sentence_graph(model):
+    # ("SENTENCE GRAPH": nn.Module mirroring the SentenceTransformer modules —
+    #  transformer → mean pooling over the attention mask → optional
+    #  normalize — so the exported graph returns sentence embeddings.
+    #  From: export() → To: torch.onnx.export | *mll)
+    import torch
+    from sentence_transformers.models import Normalize, Pooling, Transformer
+
+    modules = list(model)
+    if not isinstance(modules[0], Transformer):
+        raise SystemExit(f"unsupported first module {type(modules[0]).__name__}")
+    pooling = next((m for m in modules if isinstance(m, Pooling)), None)
+    if pooling is None or pooling.get_config_dict().get("pooling_mode_mean_tokens") is not True:
+        raise SystemExit("only mean-pooling sentence-transformer models are supported")
+    normalize = any(isinstance(m, Normalize) for m in modules)
+
+    class SentenceGraph(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = modules[0].auto_model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            tokens = self.transformer(input_ids=input_ids, attention_mask=attention_mask,
+                                      token_type_ids=token_type_ids)[0]
+            mask   = attention_mask.unsqueeze(-1).to(tokens.dtype)
+            pooled = (tokens * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            if normalize:
+                pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+            return pooled
+
+    return SentenceGraph().eval(), normalize
+
+
+def export(model_name, out_dir, quantize=True):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model            = SentenceTransformer(model_name, device="cpu")
+    graph, normalize = sentence_graph(model)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = out_dir / "model_fp32.onnx"
+
+    sample = model.tokenizer(["a sample sentence", "another one"], padding=True, return_tensors="pt")
+    names  = ["input_ids", "attention_mask", "token_type_ids"]
+    inputs = tuple(sample.get(n, torch.zeros_like(sample["input_ids"])) for n in names)
+    with torch.no_grad():
+        torch.onnx.export(
+            graph, inputs, str(fp32_path),
+            input_names=names, output_names=["sentence_embedding"],
+            dynamic_axes={**{n: {0: "batch", 1: "sequence"} for n in names},
+                          "sentence_embedding": {0: "batch"}},
+            opset_version=OPSET,
+        )
+
+    model_file = "model.onnx"
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(fp32_path), str(out_dir / model_file), weight_type=QuantType.QInt8)
+        fp32_path.unlink()
+    else:
+        fp32_path.replace(out_dir / model_file)
+
+    model.tokenizer.save_pretrained(str(out_dir))
+    for extra in ("tokenizer_config.json", "special_tokens_map.json", "vocab.txt"):
+        # OnnxEncoder reads tokenizer.json only.
+        (out_dir / extra).unlink(missing_ok=True)
+
+    meta = {
+        "model":      model_name,
+        "file":       model_file,
+        "dim":        int(model.get_sentence_embedding_dimension()),
+        "max_length": int(model.max_seq_length),
+        "pad_token":  model.tokenizer.pad_token,
+        "normalize":  normalize,
+        "quantized":  "int8-dynamic" if quantize else None,
+        "opset":      OPSET,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with open(out_dir / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return model, meta
+
+
+def cosine_agreement(a, b, texts):
+    # ("COSINE AGREEMENT": Per-text cosine between two embedding matrices of
+    #  the same texts → min / mean / worst text.
+    #  From: parity(), bench.embedding → To: export gate / report | *mll)
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    cosines = (a * b).sum(axis=1)
+    return {"texts": len(texts), "min": round(float(cosines.min()), 5),
+            "mean": round(float(cosines.mean()), 5), "worst": texts[int(cosines.argmin())]}
+
+
+def parity(reference, candidate, texts):
+    # Torch reference vs exported model on the same texts.
+    return cosine_agreement(reference.encode(texts), candidate.encode(texts), texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Pathfinder embedding model to int8 ONNX")
+    parser.add_argument("--out", help="overrides rag.onnx.path")
+    parser.add_argument("--no-quantize", action="store_true", help="keep fp32 weights")
+    args = parser.parse_args()
+
+    print("========================================")
+    print("   PATHFINDER ONNX EXPORT               ")
+    print("========================================")
+
+    with open(CONFIG, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    rag_conf   = config.get("rag", {})
+    model_name = "sentence-transformers/" + rag_conf["model_path"]
+    out_dir    = Path(args.out or rag_conf.get("onnx", {}).get("path", "models/all-MiniLM-L6-v2-int8"))
+    if not out_dir.is_absolute():
+        out_dir = BASE_DIR / out_dir
+
+    from calibrate import TEST_QUERIES
+
+    try:
+        t0 = time.perf_counter()
+        torch_model, meta = export(model_name, out_dir, quantize=not args.no_quantize)
+        size = (out_dir / meta["file"]).stat().st_size
+        print(f"📦 Exported {model_name} → {out_dir} ({size / 1e6:.1f} MB, "
+              f"{meta['quantized'] or 'fp32'}) in {time.perf_counter() - t0:.1f}s")
+
+        result = parity(torch_model, OnnxEncoder(out_dir), [q for q, _, _ in TEST_QUERIES])
+        meta["parity"] = result
+        with open(out_dir / META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        print(f"   - Parity on {result['texts']} calibration queries: "
+              f"min cos {result['min']}, mean {result['mean']} (worst: '{result['worst']}')")
+        if result["min"] < MIN_COSINE:
+            # Without its metadata file OnnxEncoder refuses the export, so
+            # rag.embedding_backend: onnx falls back to torch.
+            (out_dir / META_FILE).unlink()
+            print(f"❌ Parity below {MIN_COSINE} — export disabled, keep rag.embedding_backend: torch")
+            sys.exit(1)
+    except SystemExit:
+        raise
+    except Exception as e:
+        print(f"ONNX export failed: {e}")
+        sys.exit(1)
+
+    print("========================================")
+    print("   DONE. Set rag.embedding_backend: onnx")
+    print("========================================")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# =============================================================================
+# hashing_encoder.py — Deterministic offline embedding stand-in
+# =============================================================================
+# rag.embedding_backend: hashing (or EMBEDDING_BACKEND=hashing) replaces the
+# sentence-transformer with a feature-hashing encoder:
+#
+#   text → lowercase words + character trigrams of " word "
+#        → blake2b(feature) picks a bucket and a sign in a `dim`-wide vector
+#        → L2 normalized
+#
+# Needs nothing but numpy, no download and no network, and gives the same
+# vectors on every machine, so bench/ numbers are comparable between CI runs.
+# Similarity is lexical (shared words / trigrams), not semantic: routes and
+# confidence tiers differ from the real model, and an index built with it
+# must not be mixed with one built by the real model — bench/ always builds
+# its own in a scratch directory.
+#
+# *mll
+# =============================================================================
+
+import hashlib
+import re
+from functools import lru_cache
+
+import numpy as np
+
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature, dim):
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value  = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if (value >> 63) & 1 else -1.0
+
+
+class HashingEncoder:
+    # ("HASHING ENCODER": SentenceTransformer.encode() subset over hashed
+    #  word + trigram features, like OnnxEncoder, so BatchingEncoder,
+    #  GeoLookup, Controller and the Chroma embedding function take it as is.
+    #  From: embedding_service.load_local_model() (embedding_backend: hashing)
+    #  → To: Pipeline.raw_model, bench/ | *mll)
+
+    def __init__(self, dim=384, word_weight=2.0):
+        self.dim         = int(dim)
+        self.word_weight = float(word_weight)
+        self.model_name  = f"hashing-{self.dim}"
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            index, sign = _bucket("w:" + word, self.dim)
+            vector[index] += sign * self.word_weight
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                index, sign = _bucket(padded[i:i + 3], self.dim)
+                vector[index] += sign
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, batch_size=32, convert_to_tensor=False, normalize_embeddings=False,
+               **kwargs):
+        single  = isinstance(sentences, str)
+        texts   = [sentences] if single else list(sentences)
+        vectors = (np.stack([self._vector(t) for t in texts]) if texts
+                   else np.zeros((0, self.dim), dtype=np.float32))
+        if single:
+            vectors = vectors[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(np.ascontiguousarray(vectors))
+        return vectors
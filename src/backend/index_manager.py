@@ -0,0 +1,215 @@
+# =============================================================================
+# index_manager.py — Blue/green generations of the RAG knowledge collection
+# =============================================================================
+# The live collection is never rebuilt in place. Each rebuild fills a fresh
+# "shadow" generation next to it, and only a validated one becomes active:
+#
+#   knowledge_base            legacy / first generation
+#   knowledge_base_v<ts>      one collection per rebuild
+#   active_index.json         {"active": ..., "previous": ..., "swapped_at": ...}
+#
+#   build()     create shadow → fill (caller's loader) → validate → swap pointer
+#   rollback()  point back at the previous generation (kept until the next swap)
+#
+#   ingest_manifest.json  {generation: {"dataset_hash": ..., "count": ...}}
+#                         what each generation was last synced from, so an
+#                         unchanged dataset.json skips ingest entirely
+#
+# The pointer file is replaced atomically (write tmp + os.replace), and
+# Pipeline swaps self.collection with a single reference assignment, so a
+# concurrent ask() sees either the old or the new index, never a half-filled
+# one. Other processes on the same storage (uvicorn workers) notice a moved
+# pointer through pointer_stamp() within rag.index_check_seconds, so they
+# only ever serve active or, briefly, previous — which is why older
+# generations beyond those two can be dropped after a swap.
+#
+# *mll
+# =============================================================================
+
+import json
+import os
+import time
+from pathlib import Path
+
+from log_setup import get_logger
+
+log = get_logger("index")
+
+POINTER_FILE  = "active_index.json"
+MANIFEST_FILE = "ingest_manifest.json"
+
+
+class IndexValidationError(Exception):
+    # Raised when a shadow build fails validation; the active index is untouched.
+    pass
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def read_pointer(storage_dir):
+    return _read_json(Path(storage_dir) / POINTER_FILE)
+
+
+def active_collection_name(storage_dir, base_name):
+    # For tools that open Chroma directly (calibrate.py) instead of via Pipeline.
+    return read_pointer(storage_dir).get("active") or base_name
+
+
+class IndexManager:
+    # ("INDEX MANAGER": Resolves, builds, validates and swaps knowledge
+    #  collection generations.
+    #  From: Pipeline.__init__ / rebuild_index() → To: Pipeline.collection | *mll)
+
+    def __init__(self, client, embedding_function, base_name, storage_dir,
+                 smoke_query="beaches", min_count=1):
+        self.client             = client
+        self.embedding_function = embedding_function
+        self.base_name          = base_name
+        self.storage_dir        = Path(storage_dir)
+        self.smoke_query        = smoke_query
+        self.min_count          = min_count
+
+    # ── pointer ───────────────────────────────────────────────────────────
+    def pointer(self):
+        return read_pointer(self.storage_dir)
+
+    def active_name(self):
+        return self.pointer().get("active") or self.base_name
+
+    def pointer_stamp(self):
+        # Cheap change check for the pointer file (one stat, no read).
+        try:
+            st = os.stat(self.storage_dir / POINTER_FILE)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def _write_pointer(self, active, previous):
+        _write_json(self.storage_dir / POINTER_FILE,
+                    {"active": active, "previous": previous,
+                     "swapped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())})
+
+    # ── ingest manifest ───────────────────────────────────────────────────
+    def manifest(self, name):
+        return _read_json(self.storage_dir / MANIFEST_FILE).get(name, {})
+
+    def save_manifest(self, name, dataset_hash, count):
+        path = self.storage_dir / MANIFEST_FILE
+        data = _read_json(path)
+        data[name] = {"dataset_hash": dataset_hash, "count": count,
+                      "synced_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        _write_json(path, data)
+
+    def _forget_manifest(self, name):
+        path = self.storage_dir / MANIFEST_FILE
+        data = _read_json(path)
+        if data.pop(name, None) is not None:
+            _write_json(path, data)
+
+    def _open(self, name):
+        return self.client.get_collection(name=name, embedding_function=self.embedding_function)
+
+    def open_active(self):
+        # ("OPEN ACTIVE": Loads the generation the pointer names, falling back
+        #  to an empty base collection on a fresh install.
+        #  From: Pipeline.__init__ → To: self.collection | *mll)
+        name = self.active_name()
+        try:
+            return self._open(name)
+        except Exception:
+            log.warning("[INDEX] Collection '%s' not found. Creating new empty one.", name)
+            return self.client.get_or_create_collection(
+                name=self.base_name, embedding_function=self.embedding_function)
+
+    # ── build / validate / swap ───────────────────────────────────────────
+    def _shadow_name(self):
+        existing = {c if isinstance(c, str) else c.name for c in self.client.list_collections()}
+        name = f"{self.base_name}_v{int(time.time())}"
+        suffix = 1
+        while name in existing:
+            name = f"{self.base_name}_v{int(time.time())}_{suffix}"
+            suffix += 1
+        return name
+
+    def validate(self, collection, expected_count):
+        count = collection.count()
+        if count < max(self.min_count, expected_count):
+            raise IndexValidationError(
+                f"shadow '{collection.name}' has {count} docs, expected {expected_count}")
+        results = collection.query(query_texts=[self.smoke_query], n_results=1)
+        if not results['documents'] or not results['documents'][0]:
+            raise IndexValidationError(
+                f"smoke query '{self.smoke_query}' returned nothing from '{collection.name}'")
+        return count
+
+    def build(self, fill):
+        # ("BUILD": fill(collection) loads the shadow and returns how many docs
+        #  it added. The pointer only moves once validate() passes; a failed
+        #  shadow is dropped and the live index keeps serving.
+        #  From: Pipeline.rebuild_index() → To: returns the new active collection | *mll)
+        previous = self.active_name()
+        name     = self._shadow_name()
+        shadow   = self.client.create_collection(name=name, embedding_function=self.embedding_function)
+        log.info("[INDEX] Building shadow generation '%s' (active: '%s')", name, previous)
+
+        try:
+            expected = fill(shadow)
+            count    = self.validate(shadow, expected or 0)
+        except Exception:
+            self._drop(name)
+            raise
+
+        self._write_pointer(name, previous)
+        log.info("[INDEX] Swapped active index → '%s' (%s docs), previous '%s' kept for rollback",
+                 name, count, previous)
+        self._prune(keep={name, previous})
+        return shadow
+
+    def rollback(self):
+        pointer  = self.pointer()
+        previous = pointer.get("previous")
+        if not previous:
+            raise IndexValidationError("no previous index generation to roll back to")
+        collection = self._open(previous)
+        self._write_pointer(previous, pointer.get("active"))
+        log.warning("[INDEX] Rolled back active index → '%s'", previous)
+        return collection
+
+    def _drop(self, name):
+        try:
+            self.client.delete_collection(name=name)
+        except Exception as e:
+            log.warning("[INDEX] Could not drop '%s': %s", name, e)
+        self._forget_manifest(name)
+
+    def _prune(self, keep):
+        for c in self.client.list_collections():
+            name = c if isinstance(c, str) else c.name
+            is_generation = name == self.base_name or name.startswith(f"{self.base_name}_v")
+            if is_generation and name not in keep:
+                log.info("[INDEX] Dropping old generation '%s'", name)
+                self._drop(name)
+
+    def stats(self):
+        pointer = self.pointer()
+        active  = pointer.get("active") or self.base_name
+        return {
+            "active":     active,
+            "previous":   pointer.get("previous"),
+            "swapped_at": pointer.get("swapped_at"),
+            "synced":     self.manifest(active) or None,
+        }
@@ -1,29 +1,25 @@
 from pipeline import Pipeline
 from pathlib import Path
+import argparse
 import sys
-import shutil
-import os
 
 BASE_DIR = Path(__file__).parent
 DATASET_FILE = BASE_DIR / "dataset" / "dataset.json"
 CONFIG = BASE_DIR / "config" / "config.yaml"
-CHROMA_STORAGE = BASE_DIR / "chroma_storage"
 
 def main():
+    parser = argparse.ArgumentParser(description="Sync dataset.json into the Pathfinder knowledge index")
+    parser.add_argument("--reset", action="store_true",
+                        help="full blue/green rebuild into a fresh index generation")
+    parser.add_argument("--force", action="store_true",
+                        help="diff against the index even if dataset.json is unchanged")
+    args = parser.parse_args()
+
     print("========================================")
-    print("   PATHFINDER FACTORY RESET & INGEST    ")
+    print("   PATHFINDER INGEST                    ")
     print("========================================")
 
-    if CHROMA_STORAGE.exists():
-        print(f"🗑️  Wiping old brain storage...")
-        try:
-            shutil.rmtree(CHROMA_STORAGE)
-            print("   - Storage deleted successfully.")
-        except Exception as e:
-            print(f"⚠️  Warning: Could not delete folder (Is the app running?): {e}")
-
-
-    print("⚙️  Initializing fresh Pipeline...")
+    print("⚙️  Initializing Pipeline...")
     try:
         pipeline = Pipeline(
             dataset_path=str(DATASET_FILE),
@@ -33,13 +29,27 @@ def main():
         print(f"Failed to initialize pipeline: {e}")
         sys.exit(1)
 
-
-
-    pipeline.rebuild_index()
+    try:
+        if args.reset:
+            print("🔁 Rebuilding index from scratch...")
+            pipeline.rebuild_index()
+            print(f"   - Now serving '{pipeline.collection.name}' ({pipeline.collection.count()} facts)")
+        else:
+            result = pipeline.sync_index(force=args.force)
+            if result["unchanged"]:
+                print("✅ dataset.json unchanged — nothing to do.")
+            else:
+                print(f"   - '{result['collection']}': +{result['added']} added, "
+                      f"-{result['deleted']} deleted ({pipeline.collection.count()} facts)")
+    except Exception as e:
+        print(f"Ingest failed: {e}")
+        sys.exit(1)
+    finally:
+        pipeline.enhancer.stop()
 
     print("========================================")
     print("   DONE. System is clean and updated.   ")
     print("========================================")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
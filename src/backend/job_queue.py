@@ -0,0 +1,342 @@
+# =============================================================================
+# job_queue.py — Enhancer Job Queues (in-memory and durable SQLite)
+# =============================================================================
+# Both queues expose the same small interface used by BackgroundEnhancer:
+#
+#   put(job)          → enqueue a job dict (candidates, tier, counts, …)
+#   get(timeout)      → lease the oldest job, raises queue.Empty on timeout
+#   ack(job)          → job finished (success OR deliberate discard)
+#   release(job)      → job failed mid-flight, hand it back for a retry
+#   release(job, retry_after=s)
+#                     → nothing could run it right now (every LLM provider
+#                       answered 429): pending again after s seconds, does
+#                       not count towards max_attempts
+#   release(job, retry_after=s, count_attempt=True)
+#                     → provider errors without a 429: same delay, but the
+#                       attempt counts (the caller gives up at max_attempts)
+#   has_job(query)    → a job for this query is pending or in flight
+#   depth()           → jobs not yet acknowledged
+#   oldest_age()      → seconds since the oldest unacknowledged job was queued
+#
+# SqliteJobQueue keeps every job on disk until ack(), so a deploy or crash
+# between enqueue and cache.update() never loses enhancement work. Several
+# processes may share one file (uvicorn workers, prefill.py, bench tools):
+# each lease records its owner ("host:pid"), and a starting process only
+# reclaims leases whose owner is gone or whose lease_seconds ran out.
+#
+# *mll
+# =============================================================================
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from queue import Queue, Empty
+
+from log_setup import get_logger
+
+log = get_logger("job_queue")
+
+
+class MemoryJobQueue:
+    # ("MEMORY QUEUE": The original queue.Queue behaviour behind the shared
+    #  interface. Nothing survives a restart — use for tests / throwaway runs.
+    #  From: open_job_queue(backend="memory") → To: BackgroundEnhancer | *mll)
+
+    def __init__(self, max_attempts=3):
+        self.max_attempts = max_attempts
+        self._queue  = Queue()
+        self._lock   = threading.Lock()
+        self._queued = {}     # id(job) → (enqueue timestamp, query), includes leased jobs
+
+    def put(self, job):
+        with self._lock:
+            self._queued[id(job)] = (job.get('timestamp', time.time()), job.get('query'))
+        self._queue.put(job)
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+    def ack(self, job):
+        with self._lock:
+            self._queued.pop(id(job), None)
+
+    def release(self, job, retry_after=None, count_attempt=None):
+        if count_attempt is None:
+            count_attempt = retry_after is None
+        if count_attempt:
+            job['_attempts'] = job.get('_attempts', 0) + 1
+            if job['_attempts'] >= self.max_attempts:
+                self.ack(job)
+                log.warning("[QUEUE] Dropped job after %s failed attempts", job['_attempts'])
+                return
+        else:
+            job['_deferrals'] = job.get('_deferrals', 0) + 1
+        if retry_after is None:
+            self._queue.put(job)
+            return
+        timer = threading.Timer(retry_after, self._queue.put, args=(job,))
+        timer.daemon = True
+        timer.start()
+
+    def depth(self):
+        with self._lock:
+            return len(self._queued)
+
+    def oldest_age(self):
+        with self._lock:
+            if not self._queued:
+                return 0.0
+            return max(0.0, time.time() - min(ts for ts, _ in self._queued.values()))
+
+    def has_job(self, query):
+        with self._lock:
+            return any(q == query for _, q in self._queued.values())
+
+    def close(self):
+        pass
+
+
+class SqliteJobQueue:
+    # ("DURABLE QUEUE": SQLite in WAL mode. Jobs are leased on get() and only
+    #  deleted on ack(), so anything in flight when the process dies is picked
+    #  up again on the next start. Leases older than lease_seconds are also
+    #  reclaimed at runtime in case a worker hangs. Leases held by another
+    #  live process on this host are left alone.
+    #  From: open_job_queue(backend="sqlite") → To: BackgroundEnhancer | *mll)
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS enhancer_jobs (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload     TEXT    NOT NULL,
+            enqueued_at REAL    NOT NULL,
+            status      TEXT    NOT NULL DEFAULT 'pending',
+            leased_at   REAL,
+            lease_owner TEXT,
+            attempts    INTEGER NOT NULL DEFAULT 0,
+            not_before  REAL,
+            deferrals   INTEGER NOT NULL DEFAULT 0,
+            query       TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_enhancer_jobs_status
+            ON enhancer_jobs (status, id);
+    """
+    QUERY_INDEX = "CREATE INDEX IF NOT EXISTS idx_enhancer_jobs_query ON enhancer_jobs (query)"
+
+    ADDED_COLUMNS = (
+        ("lease_owner", "TEXT"),
+        ("not_before",  "REAL"),
+        ("deferrals",   "INTEGER NOT NULL DEFAULT 0"),
+        ("query",       "TEXT"),
+    )
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.path          = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts  = max_attempts
+        self._lock         = threading.Lock()
+        self._available    = threading.Condition(self._lock)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(enhancer_jobs)")}
+        for column, ddl in self.ADDED_COLUMNS:   # queue files from older versions
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE enhancer_jobs ADD COLUMN {column} {ddl}")
+        self._conn.execute(self.QUERY_INDEX)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        resumed = self._reclaim_orphans()
+        depth   = self.depth()
+        log.info("[QUEUE] Durable enhancer queue at '%s' | pending=%s | resumed_in_flight=%s",
+                 self.path, depth, resumed)
+
+    def _reclaim_orphans(self):
+        # Resume: leases whose owner process is gone (or that predate lease
+        # owners) are pending again. Other hosts' leases wait for the
+        # lease_seconds expiry in _lease_next().
+        host = socket.gethostname()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, lease_owner FROM enhancer_jobs WHERE status='leased'").fetchall()
+            orphaned = [job_id for job_id, owner in rows if self._owner_gone(owner, host)]
+            for job_id in orphaned:
+                self._conn.execute(
+                    "UPDATE enhancer_jobs SET status='pending', leased_at=NULL, lease_owner=NULL "
+                    "WHERE id=? AND status='leased'", (job_id,))
+        return len(orphaned)
+
+    @staticmethod
+    def _owner_gone(owner, host):
+        if not owner:
+            return True
+        owner_host, _, pid = owner.rpartition(":")
+        if owner_host != host or not pid.isdigit():
+            return False
+        if int(pid) == os.getpid():
+            return True            # same pid as us: a previous process, not a live peer
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            return False           # exists, owned by another user
+        return False
+
+    def put(self, job):
+        payload = json.dumps(job)
+        with self._available:
+            self._conn.execute(
+                "INSERT INTO enhancer_jobs (payload, enqueued_at, query) VALUES (?, ?, ?)",
+                (payload, job.get('timestamp', time.time()), job.get('query'))
+            )
+            self._available.notify()
+
+    def get(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._available:
+            while True:
+                job = self._lease_next()
+                if job is not None:
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise Empty
+                due = self._next_due()    # a deferred job becomes leasable without a notify
+                if due is not None:
+                    remaining = due if remaining is None else min(remaining, due)
+                self._available.wait(remaining)
+
+    def _lease_next(self):
+        # Caller holds self._lock. BEGIN IMMEDIATE makes the select+update
+        # atomic against other processes sharing the same file.
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT id, payload, attempts, deferrals FROM enhancer_jobs "
+                "WHERE (status='pending' AND (not_before IS NULL OR not_before <= ?)) "
+                "   OR (status='leased' AND leased_at < ?) "
+                "ORDER BY id LIMIT 1",
+                (now, now - self.lease_seconds)
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+            self._conn.execute(
+                "UPDATE enhancer_jobs SET status='leased', leased_at=?, lease_owner=? WHERE id=?",
+                (now, self.owner, row[0])
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        job = json.loads(row[1])
+        job['_job_id']   = row[0]
+        job['_attempts']  = row[2]
+        job['_deferrals'] = row[3]
+        return job
+
+    def _next_due(self):
+        # Caller holds self._lock. Seconds until the next deferred job is due.
+        now = time.time()
+        due = self._conn.execute(
+            "SELECT MIN(not_before) FROM enhancer_jobs WHERE status='pending' AND not_before > ?",
+            (now,)
+        ).fetchone()[0]
+        return None if due is None else due - now
+
+    def ack(self, job):
+        job_id = job.get('_job_id')
+        if job_id is None:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM enhancer_jobs WHERE id=?", (job_id,))
+
+    def release(self, job, retry_after=None, count_attempt=None):
+        # ("RELEASE": Failed job goes back to pending. Poison jobs that keep
+        #  crashing the worker are dropped after max_attempts. With
+        #  retry_after the job is not leased again before the delay is up;
+        #  it is only deferred (attempts unchanged) unless count_attempt.
+        #  From: BackgroundEnhancer._worker_loop() error / deferral branch | *mll)
+        job_id = job.get('_job_id')
+        if job_id is None:
+            return
+        if count_attempt is None:
+            count_attempt = retry_after is None
+        if not count_attempt:
+            with self._available:
+                self._conn.execute(
+                    "UPDATE enhancer_jobs SET status='pending', leased_at=NULL, lease_owner=NULL, "
+                    "not_before=?, deferrals=deferrals+1 WHERE id=?",
+                    (time.time() + retry_after, job_id)
+                )
+                self._available.notify()
+            return
+        attempts = job.get('_attempts', 0) + 1
+        with self._available:
+            if attempts >= self.max_attempts:
+                self._conn.execute("DELETE FROM enhancer_jobs WHERE id=?", (job_id,))
+                log.warning("[QUEUE] Dropped job %s after %s failed attempts", job_id, attempts)
+                return
+            self._conn.execute(
+                "UPDATE enhancer_jobs SET status='pending', leased_at=NULL, lease_owner=NULL, "
+                "attempts=?, not_before=? WHERE id=?",
+                (attempts, None if retry_after is None else time.time() + retry_after, job_id)
+            )
+            self._available.notify()
+
+    def depth(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM enhancer_jobs").fetchone()[0]
+
+    def has_job(self, query):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM enhancer_jobs WHERE query=? LIMIT 1", (query,)).fetchone() is not None
+
+    def oldest_age(self):
+        with self._lock:
+            oldest = self._conn.execute(
+                "SELECT MIN(enqueued_at) FROM enhancer_jobs"
+            ).fetchone()[0]
+        if oldest is None:
+            return 0.0
+        return max(0.0, time.time() - oldest)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_job_queue(config, base_dir):
+    # ("QUEUE FACTORY": Picks the queue backend from config.yaml enhancer.queue_*.
+    #  Relative queue_path values resolve against the backend directory.
+    #  From: BackgroundEnhancer.__init__ → To: self.job_queue | *mll)
+    enhancer_cfg = (config or {}).get('enhancer', {})
+    backend      = enhancer_cfg.get('queue_backend', 'sqlite')
+
+    if backend == 'memory':
+        return MemoryJobQueue(max_attempts=enhancer_cfg.get('max_attempts', 3))
+
+    if backend != 'sqlite':
+        log.warning("[QUEUE] Unknown queue_backend '%s', falling back to sqlite", backend)
+
+    path = Path(os.getenv('ENHANCER_QUEUE_PATH',
+                          enhancer_cfg.get('queue_path', 'state/enhancer_jobs.db')))
+    if not path.is_absolute():
+        path = Path(base_dir) / path
+    return SqliteJobQueue(
+        path,
+        lease_seconds = enhancer_cfg.get('lease_seconds', 300),
+        max_attempts  = enhancer_cfg.get('max_attempts', 3),
+    )
@@ -0,0 +1,209 @@
+# =============================================================================
+# llm_providers.py — LLM Providers for the Background Enhancer
+# =============================================================================
+# Every provider exposes one call:
+#
+#   complete(prompt) → (text, retry_after_seconds)
+#
+#   text         — the model's reply, or None on any failure
+#   retry_after  — set when the provider answered 429, None otherwise
+#
+# Providers:
+#   GeminiProvider           → Google generateContent REST API
+#   OpenAICompatibleProvider → /chat/completions (Groq, or any local server
+#                              such as bench/stub_llm.py, llama.cpp, vLLM)
+#
+# build_providers() reads config.yaml enhancer.providers for the fallback
+# order. Base URLs can be overridden per provider (config or env) so the
+# whole enhancer path can run against a local stand-in with no network.
+#
+# *mll
+# =============================================================================
+
+import os
+from abc import ABC, abstractmethod
+
+from log_setup import get_logger
+
+log = get_logger("llm_providers")
+
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+GROQ_BASE_URL   = "https://api.groq.com/openai/v1"
+LOCAL_BASE_URL  = "http://127.0.0.1:8090/v1"
+
+
+def _retry_after_header(resp, default=60):
+    # ("RETRY-AFTER": Reads the standard Retry-After header (seconds form).
+    #  From: OpenAICompatibleProvider 429 branch | *mll)
+    try:
+        return int(float(resp.headers.get('Retry-After', default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class LLMProvider(ABC):
+    # ("PROVIDER BASE": Shared shape for all providers. is_available() lets the
+    #  enhancer skip providers with no API key instead of failing a request.
+    #  Subclasses must implement complete().
+    #  From: build_providers() → To: BackgroundEnhancer._enhance_with_llm() | *mll)
+    name = "base"
+
+    def __init__(self, base_url, model, api_key=None, timeout=15, temperature=0.1):
+        self.base_url    = base_url.rstrip('/')
+        self.model       = model
+        self.api_key     = api_key
+        self.timeout     = timeout
+        self.temperature = temperature
+
+    def is_available(self):
+        return True
+
+    @abstractmethod
+    def complete(self, prompt):
+        # → (text or None, retry_after seconds or None), see the header above
+        ...
+
+
+class GeminiProvider(LLMProvider):
+    # ("GEMINI PROVIDER": Gemini generateContent via REST.
+    #  429 responses carry the retry delay in a RetryInfo error detail.
+    #  From: build_providers() → To: BackgroundEnhancer | *mll)
+    name = "gemini"
+
+    def is_available(self):
+        return bool(self.api_key)
+
+    def complete(self, prompt):
+        # Strip "models/" prefix if present — the URL builder adds the path itself
+        model = self.model.replace('models/', '')
+        url   = f"{self.base_url}/models/{model}:generateContent?key={self.api_key}"
+        payload = {
+            'contents': [{'parts': [{'text': prompt}]}],
+            'generationConfig': {'temperature': self.temperature}
+        }
+        import requests   # first enhancer call, off the startup path
+        try:
+            resp = requests.post(url, json=payload,
+                                 headers={'Content-Type': 'application/json'},
+                                 timeout=self.timeout)
+            if resp.status_code == 200:
+                text = resp.json()['candidates'][0]['content']['parts'][0]['text'].strip()
+                return text, None
+            elif resp.status_code == 429:
+                # Read retryDelay from the error body if present
+                retry_after = 60  # safe default
+                try:
+                    details = resp.json().get('error', {}).get('details', [])
+                    for d in details:
+                        if d.get('@type', '').endswith('RetryInfo'):
+                            delay_str   = d.get('retryDelay', '60s')
+                            retry_after = int(delay_str.replace('s', '').strip().split('.')[0])
+                            break
+                except Exception:
+                    pass
+                log.warning("[ENHANCER] Gemini 429 — retry after %ss", retry_after)
+                return None, retry_after
+            else:
+                log.error("[ENHANCER ERROR] Gemini %s: %s", resp.status_code, resp.text[:200])
+                return None, None
+        except Exception as e:
+            log.error("[ENHANCER ERROR] Gemini network failure: %s", e)
+            return None, None
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    # ("OPENAI-COMPATIBLE PROVIDER": POST {base_url}/chat/completions.
+    #  Used for Groq and for local endpoints. requires_key=False lets a local
+    #  server run without any credentials.
+    #  From: build_providers() → To: BackgroundEnhancer | *mll)
+
+    def __init__(self, name, base_url, model, api_key=None, requires_key=True,
+                 max_tokens=512, **kwargs):
+        super().__init__(base_url, model, api_key=api_key, **kwargs)
+        self.name         = name
+        self.requires_key = requires_key
+        self.max_tokens   = max_tokens
+
+    def is_available(self):
+        return bool(self.api_key) or not self.requires_key
+
+    def complete(self, prompt):
+        label   = self.name.upper()
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        payload = {
+            'model':       self.model,
+            'messages':    [{'role': 'user', 'content': prompt}],
+            'temperature': self.temperature,
+            'max_tokens':  self.max_tokens,
+        }
+        import requests
+        try:
+            resp = requests.post(f"{self.base_url}/chat/completions", json=payload,
+                                 headers=headers, timeout=self.timeout)
+            if resp.status_code == 200:
+                text = resp.json()['choices'][0]['message']['content'].strip()
+                return text, None
+            elif resp.status_code == 429:
+                retry_after = _retry_after_header(resp)
+                log.warning("[ENHANCER] %s 429 — retry after %ss", label, retry_after)
+                return None, retry_after
+            else:
+                log.error("[ENHANCER ERROR] %s %s: %s", label, resp.status_code, resp.text[:200])
+                return None, None
+        except Exception as e:
+            log.error("[ENHANCER ERROR] %s network failure: %s", label, e)
+            return None, None
+
+
+def build_providers(config, gemini_key=None):
+    # ("PROVIDER FACTORY": Builds the ordered fallback chain.
+    #  Order:    env ENHANCER_PROVIDERS ("local" / "gemini,groq") → config
+    #            enhancer.providers → default [gemini, groq].
+    #  Base URL: env {NAME}_BASE_URL → config <name>.base_url → public API.
+    #  From: BackgroundEnhancer.__init__ → To: self.providers | *mll)
+    config       = config or {}
+    enhancer_cfg = config.get('enhancer', {})
+    timeout      = enhancer_cfg.get('request_timeout', 15)
+
+    env_order = os.getenv('ENHANCER_PROVIDERS')
+    if env_order:
+        order = [p.strip().lower() for p in env_order.split(',') if p.strip()]
+    else:
+        order = enhancer_cfg.get('providers', ['gemini', 'groq'])
+
+    providers = []
+    for name in order:
+        if name == 'gemini':
+            gemini_cfg = config.get('gemini', {})
+            providers.append(GeminiProvider(
+                base_url = os.getenv('GEMINI_BASE_URL', gemini_cfg.get('base_url', GEMINI_BASE_URL)),
+                model    = gemini_cfg.get('model_name', 'gemini-2.5-flash'),
+                api_key  = gemini_key if gemini_key is not None else os.getenv('GEMINI_API_KEY'),
+                timeout  = timeout,
+            ))
+        elif name == 'groq':
+            groq_cfg = config.get('groq', {})
+            providers.append(OpenAICompatibleProvider(
+                name     = 'groq',
+                base_url = os.getenv('GROQ_BASE_URL', groq_cfg.get('base_url', GROQ_BASE_URL)),
+                model    = groq_cfg.get('model_name', 'llama-3.1-8b-instant'),
+                api_key  = os.getenv('GROQ_API_KEY'),
+                timeout  = timeout,
+            ))
+        elif name == 'local':
+            local_cfg = enhancer_cfg.get('local', {})
+            providers.append(OpenAICompatibleProvider(
+                name         = 'local',
+                base_url     = os.getenv('LOCAL_BASE_URL', local_cfg.get('base_url', LOCAL_BASE_URL)),
+                model        = local_cfg.get('model_name', 'local'),
+                api_key      = os.getenv('LOCAL_API_KEY'),
+                requires_key = False,
+                timeout      = timeout,
+            ))
+        else:
+            log.warning("[ENHANCER] Unknown provider '%s' in config — ignored", name)
+
+    return providers
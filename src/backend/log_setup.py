@@ -0,0 +1,124 @@
+# =============================================================================
+# log_setup.py — Level-gated, non-blocking structured logging
+# =============================================================================
+# All backend modules log through "pathfinder.*" loggers:
+#
+#   log = get_logger("pipeline")
+#   log.debug("[RAW DOC %d] '%s' | conf=%.3f", i, name, conf)   ← lazy %-args
+#
+# setup_logging(config) installs one QueueHandler on the "pathfinder" logger.
+# The request thread only checks the level and puts the record on a queue;
+# JSON encoding and the stdout write happen on a QueueListener thread. Calls
+# below the configured level return after a cached level check, before any
+# string formatting, so per-document debug detail costs nothing in production.
+#
+# Config (config.yaml logging.*, env overrides LOG_LEVEL / LOG_FORMAT):
+#   level:  DEBUG | INFO | WARNING | ERROR         (default INFO)
+#   format: json | text                            (default json)
+#   levels: {pipeline: DEBUG, controller: WARNING}  per-module overrides
+#
+# *mll
+# =============================================================================
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+
+ROOT_LOGGER = "pathfinder"
+
+_listener = None
+_stream   = None
+
+
+class JsonFormatter(logging.Formatter):
+    # ("JSON FORMATTER": One JSON object per line — ts, level, logger, thread,
+    #  msg, plus exc when an exception was logged.
+    #  From: QueueListener thread → To: stdout / container log collector | *mll)
+
+    def format(self, record):
+        entry = {
+            "ts":     time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                      + f".{int(record.msecs):03d}Z",
+            "level":  record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg":    record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # Stock QueueHandler.prepare() runs the full formatter on the caller's
+    # thread. Here only the %-merge (and traceback text, which must be captured
+    # while the frames still exist) happens on the request thread.
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg  = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def get_logger(name):
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def setup_logging(config=None):
+    # ("SETUP LOGGING": Idempotent — the handler and listener thread are
+    #  created once; later calls re-apply level and format. Called from
+    #  Pipeline.__init__ so the API, the CLI and scripts that build a Pipeline
+    #  all get the same handler.
+    #  From: Pipeline.__init__ → To: every pathfinder.* logger | *mll)
+    global _listener, _stream
+    conf   = (config or {}).get('logging', {}) or {}
+    level  = os.getenv('LOG_LEVEL', conf.get('level', 'INFO')).upper()
+    fmt    = os.getenv('LOG_FORMAT', conf.get('format', 'json')).lower()
+    root   = logging.getLogger(ROOT_LOGGER)
+
+    root.setLevel(level)
+    for name, module_level in (conf.get('levels') or {}).items():
+        get_logger(name).setLevel(str(module_level).upper())
+
+    if fmt == 'text':
+        formatter = logging.Formatter("%(asctime)s %(levelname)-7s %(name)s | %(message)s")
+    else:
+        formatter = JsonFormatter()
+
+    if _listener is not None:
+        _stream.setFormatter(formatter)
+        return root
+
+    _stream = logging.StreamHandler(sys.stdout)
+    _stream.setFormatter(formatter)
+
+    for handler in list(root.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            root.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, _stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    # Flushes whatever is still queued. Safe to call more than once.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
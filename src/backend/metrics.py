@@ -0,0 +1,248 @@
+# =============================================================================
+# metrics.py — In-process metrics (counters, gauges, histograms)
+# =============================================================================
+# A deliberately small, dependency-free take on the Prometheus client:
+#
+#   REGISTRY.counter(name, help, labelnames)    → .inc(amount=1, **labels)
+#   REGISTRY.gauge(name, help, labelnames)      → .set(value, **labels)
+#                                                 .set_function(fn) (read on scrape)
+#   REGISTRY.histogram(name, help, labelnames)  → .observe(seconds, **labels)
+#
+#   REGISTRY.render()    → Prometheus text exposition format (GET /metrics)
+#   metric.snapshot()    → plain dict for JSON admin endpoints
+#
+# All metric updates are guarded by a per-metric lock, so they are safe from
+# the threadpool, the enhancer worker and the event loop alike.
+#
+# *mll
+# =============================================================================
+
+import math
+import threading
+
+
+# Latency buckets in seconds: sub-ms cache hits up to multi-second LLM calls.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, values)]
+    if extra:
+        pairs.extend(f'{n}="{_escape(v)}"' for n, v in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name       = name
+        self.help_text  = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock      = threading.Lock()
+        self._values    = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            if not self.labelnames:
+                return self._values.get((), 0)
+            return {",".join(key): value for key, value in sorted(self._values.items())}
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn):
+        # Unlabelled gauge whose value is computed at scrape time (queue depth…).
+        self._function = fn
+
+    def _current(self):
+        if self._function is not None:
+            try:
+                return {(): self._function()}
+            except Exception:
+                return {}
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = self._header()
+        for key, value in sorted(self._current().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+    def snapshot(self):
+        values = self._current()
+        if not self.labelnames:
+            return values.get((), 0)
+        return {",".join(key): value for key, value in sorted(values.items())}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1),
+                                             "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            else:
+                state["counts"][-1] += 1
+            state["sum"]   += value
+            state["count"] += 1
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = [(k, {"counts": list(v["counts"]), "sum": v["sum"], "count": v["count"]})
+                     for k, v in sorted(self._values.items())]
+        for key, state in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), state["counts"]):
+                cumulative += n
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            base = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{base} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{base} {state['count']}")
+        return lines
+
+    def _quantile(self, counts, total, q):
+        # Upper bound of the bucket holding the q-th observation (Prometheus-style estimate).
+        if not total:
+            return 0.0
+        target     = q * total
+        cumulative = 0
+        for bound, n in zip(self.buckets + (math.inf,), counts):
+            cumulative += n
+            if cumulative >= target:
+                return bound if bound != math.inf else self.buckets[-1]
+        return self.buckets[-1]
+
+    def snapshot(self):
+        with self._lock:
+            items = [(k, dict(v, counts=list(v["counts"]))) for k, v in sorted(self._values.items())]
+        out = {}
+        for key, state in items:
+            total = state["count"]
+            out[",".join(key) or "all"] = {
+                "count":  total,
+                "sum":    round(state["sum"], 4),
+                "mean":   round(state["sum"] / total, 4) if total else 0.0,
+                "p50_le": self._quantile(state["counts"], total, 0.50),
+                "p95_le": self._quantile(state["counts"], total, 0.95),
+                "p99_le": self._quantile(state["counts"], total, 0.99),
+            }
+        return out
+
+
+class MetricsRegistry:
+    # ("METRICS REGISTRY": Owns every metric and renders them for /metrics.
+    #  Registering the same name twice returns the existing metric, so modules
+    #  can declare their metrics at import time without ordering concerns.
+    #  From: any module → To: app.py GET /metrics | *mll)
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, cls, name, help_text, labelnames, **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                return existing
+            metric = cls(name, help_text, labelnames, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide default registry used by the pipeline and the API.
+REGISTRY = MetricsRegistry()
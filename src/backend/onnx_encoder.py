@@ -0,0 +1,116 @@
+# =============================================================================
+# onnx_encoder.py — int8 ONNX Runtime backend for the embedding model
+# =============================================================================
+# rag.embedding_backend: onnx runs the exported, dynamically quantized
+# (int8 weights) all-MiniLM-L6-v2 through onnxruntime instead of PyTorch:
+#
+#   export_onnx.py  → models/<model>-int8/
+#                       model.onnx            transformer + mean pooling
+#                                             (+ L2 normalize) in one graph,
+#                                             input: token ids, output:
+#                                             sentence_embedding (B, D)
+#                       tokenizer.json        HF fast tokenizer
+#                       pathfinder_onnx.json  source model, dim, max_length,
+#                                             parity result
+#
+# OnnxEncoder needs only onnxruntime + tokenizers + numpy and exposes the
+# SentenceTransformer.encode() subset the backend uses, so BatchingEncoder,
+# the embedding service, GeoLookup, Controller and the Chroma embedding
+# function take it unchanged. Parity and speed are checked with
+# `python -m bench.embedding`. onnxruntime is optional
+# (requirements-onnx.txt); without it load_local_model falls back to torch.
+#
+# *mll
+# =============================================================================
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+META_FILE = "pathfinder_onnx.json"
+
+
+class OnnxModelError(Exception):
+    # Export directory missing, incomplete, or built from another model.
+    pass
+
+
+class OnnxEncoder:
+    # ("ONNX ENCODER": Tokenizes with the exported fast tokenizer and runs the
+    #  quantized graph on CPU. Thread-safe: InferenceSession.run() may be
+    #  called concurrently.
+    #  From: embedding_service.load_local_model() (rag.embedding_backend: onnx)
+    #  → To: Pipeline.raw_model, EmbeddingServer | *mll)
+
+    def __init__(self, model_dir, threads=0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = Path(model_dir)
+        meta_path      = self.model_dir / META_FILE
+        if not meta_path.exists():
+            raise OnnxModelError(f"{meta_path} not found — run export_onnx.py")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.model_name = self.meta["model"]
+        self.dim        = int(self.meta["dim"])
+        self.max_length = int(self.meta.get("max_length", 256))
+
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_length)
+        pad_token = self.meta.get("pad_token", "[PAD]")
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token), pad_token=pad_token)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(str(self.model_dir / self.meta.get("file", "model.onnx")),
+                                            sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def check(self, model_name):
+        # Raises OnnxModelError if the export came from another model.
+        if self.model_name != model_name:
+            raise OnnxModelError(f"ONNX export is of '{self.model_name}', expected '{model_name}'")
+        return self
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def _run(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids":      np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+        return self.session.run(["sentence_embedding"], feeds)[0]
+
+    def encode(self, sentences, batch_size=32, convert_to_tensor=False, normalize_embeddings=False,
+               **kwargs):
+        single = isinstance(sentences, str)
+        texts  = [sentences] if single else list(sentences)
+        if not texts:
+            vectors = np.zeros((0, self.dim), dtype=np.float32)
+        else:
+            # Sort by length so each chunk pads to a similar length, as
+            # SentenceTransformer.encode() does, then restore the order.
+            order   = np.argsort([-len(t) for t in texts], kind="stable")
+            vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+            for start in range(0, len(texts), batch_size):
+                chunk = order[start:start + batch_size]
+                vectors[chunk] = self._run([texts[i] for i in chunk])
+        if normalize_embeddings:
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        if single:
+            vectors = vectors[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(np.ascontiguousarray(vectors))
+        return vectors
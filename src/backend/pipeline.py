@@ -7,13 +7,13 @@
 #   2. HELPERS      → parse_count_from_query(), normalize_activities()
 #   3. GeoLookup    → loads GeoJSON, resolves place name → coordinates
 #   4. SemanticCache → get / set / update cached Q&A pairs in ChromaDB
-#   5. BackgroundEnhancer → Gemini/Groq async rewriter for cache upgrade
-#   6. RateLimiter  → sliding-window request throttle
-#   7. Pipeline     → __init__ wires everything together
-#       └─ ask()    → main query entry point
-#           ├─ Gate checks      (rate limit, profanity, intent)
-#           ├─ Cache check      (semantic similarity hit?)
-#           ├─ Entity extraction + context resolution
+#   5. BackgroundEnhancer → Gemini/Groq/local async rewriter for cache upgrade
+#   6. Pipeline     → __init__ wires everything together
+#       └─ ask()    → main query entry point (= ask_front() then ask_back())
+#           ├─ Gate checks      (profanity, intent)          ┐ ask_front()
+#           ├─ Cache check      (semantic similarity hit?)   ┘ fast lane
+#           ├─ Entity extraction + context resolution        ┐ ask_back()
+#           │                                                ┘ heavy lane, misses only
 #           ├─ Budget / listing overrides
 #           ├─ Route: multi-activity | multi-place | single/browsing
 #           ├─ RAG filter + answer assembly
@@ -33,6 +33,8 @@ import yaml
 import hashlib
 import threading
 import re
+import uuid
+import atexit
 from pathlib import Path
 from dotenv import load_dotenv
 from difflib import get_close_matches
@@ -50,19 +52,30 @@ os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"       # suppress TensorFlow C++ logs
 os.environ['TRANSFORMERS_OFFLINE'] = '1'        # use cached HF model, no network
 os.environ['HF_DATASETS_OFFLINE']  = '1'        # same for datasets
 
-import chromadb
-from chromadb.utils import embedding_functions
-from sentence_transformers import SentenceTransformer, util
-import torch
-from langdetect import detect, LangDetectException
-import requests
-from better_profanity import profanity
-from collections import deque
-from queue import Queue
+# chromadb, sentence_transformers/torch (or onnxruntime) and better_profanity
+# are imported lazily inside the Pipeline.__init__ phase that first needs
+# them (see startup.py), so importing this module stays cheap.
+import numpy as np
+from functools import lru_cache
+from queue import Empty
 
 # Internal modules (same package)
 from controller import Controller
 from entity_extractor import EntityExtractor
+from job_queue import open_job_queue
+from index_manager import IndexManager
+from chroma_store import open_client as open_chroma_client
+from embedding_service import (connect as connect_embedding_service, EmbeddingServiceError,
+                               BatchingEncoder, RemoteEncoder, load_local_model, cos_sim)
+from bundle import IndexBundle, BundleIndex, BundleError
+from llm_providers import build_providers
+from metrics import REGISTRY
+from tracing import start_trace, resume_trace, finish_trace, stage, record, timed, note, tag
+from query_log import open_query_log
+from log_setup import get_logger, setup_logging
+from startup import StartupReport
+
+log = get_logger("pipeline")
 
 # =============================================================================
 # SECTION 2 — PATH CONSTANTS
@@ -98,17 +111,39 @@ def parse_count_from_query(user_input):
     if digit_match:
         n = int(digit_match.group(2))
         if 1 <= n <= 50:
-            print(f"[COUNT] Detected digit count: {n}")
+            log.debug("[COUNT] Detected digit count: %s", n)
             return n, True  # <-- Added True
     for word, num in WORD_NUMBERS.items():
         pattern = r'\b(top|best|give me|show me)?\s*' + word + r'\b'
         if re.search(pattern, query_lower):
-            print(f"[COUNT] Detected word count: '{word}' -> {num}")
+            log.debug("[COUNT] Detected word count: '%s' -> %s", word, num)
             return num, True # <-- Added True
-    print(f"[COUNT] No count found, defaulting to 5")
+    log.debug("[COUNT] No count found, defaulting to 5")
     return 5, False # <-- Added False
 
 
+def lower_thread_priority(nice):
+    # ("THREAD PRIORITY": Raises the calling thread's niceness. On Linux threads
+    #  are scheduled as tasks, so the native thread id is a valid PRIO_PROCESS
+    #  target. No-op where unsupported.
+    #  From: Pipeline.rebuild_index() → To: index-rebuild thread | *mll)
+    if not nice or not hasattr(os, 'setpriority'):
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+    except OSError as e:
+        log.debug("[INGEST] Could not lower rebuild priority: %s", e)
+
+
+def record_id(meta):
+    # ("RECORD ID": Stable Chroma id for one dataset record — a hash of its
+    #  stored metadata (which includes the question text), independent of
+    #  the record's position in dataset.json.
+    #  From: Pipeline.dataset_records() → To: Chroma ids / ingest diff | *mll)
+    canonical = json.dumps(meta, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:20]
+
+
 def normalize_activities(raw):
     # ("ACTIVITY NORMALIZER": Converts raw activity tags (list or string) to a
     #  lowercase comma-separated string for consistent ChromaDB metadata storage.
@@ -122,6 +157,65 @@ def normalize_activities(raw):
     return ""
 
 
+@lru_cache(maxsize=None)
+def _encoder_embedding_function_class():
+    # Built on first use so chromadb is only imported with the Chroma client.
+    from chromadb.api.types import EmbeddingFunction
+    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+    class EncoderEmbeddingFunction(EmbeddingFunction):
+        # Chroma's public embedding-function protocol. name(), get_config()
+        # and default_space() match the sentence_transformer function, so
+        # collections built with either one open with the other.
+        def __init__(self, encoder, model_name, device="cpu", normalize_embeddings=False):
+            self.encoder              = encoder
+            self.model_name           = model_name
+            self.device               = device
+            self.normalize_embeddings = normalize_embeddings
+
+        def __call__(self, input):
+            if self.encoder is None:   # rebuilt from a persisted config
+                from sentence_transformers import SentenceTransformer
+                self.encoder = SentenceTransformer(self.model_name, device=self.device)
+            embeddings = self.encoder.encode(list(input), convert_to_numpy=True,
+                                             normalize_embeddings=self.normalize_embeddings)
+            return [np.asarray(e, dtype=np.float32) for e in embeddings]
+
+        @staticmethod
+        def name():
+            return SentenceTransformerEmbeddingFunction.name()
+
+        def default_space(self):
+            return "cosine"
+
+        def supported_spaces(self):
+            return ["cosine", "l2", "ip"]
+
+        def get_config(self):
+            return {"model_name": self.model_name, "device": self.device,
+                    "normalize_embeddings": self.normalize_embeddings, "kwargs": {}}
+
+        @staticmethod
+        def build_from_config(config):
+            # Chroma rebuilds the function from a persisted config (it does so
+            # on every create_collection to validate it): no encoder to hand
+            # over, so the model is only loaded if the copy is actually called.
+            return EncoderEmbeddingFunction(None, config["model_name"], config.get("device", "cpu"),
+                                            config.get("normalize_embeddings", False))
+
+    return EncoderEmbeddingFunction
+
+
+def encoder_embedding_function(encoder, model_name):
+    # ("ENCODER EMBEDDING FUNCTION": A Chroma embedding function backed by an
+    #  encoder we already hold (the pipeline's local model or a
+    #  RemoteEncoder) instead of loading a second model copy. It reports the
+    #  sentence_transformer name/config, so collections keep the same
+    #  persisted embedding-function config either way.
+    #  From: Pipeline.__init__ → To: SemanticCache, IndexManager, BundleIndex | *mll)
+    return _encoder_embedding_function_class()(encoder, model_name=model_name)
+
+
 # =============================================================================
 # SECTION 4 — GEO LOOKUP
 # =============================================================================
@@ -132,12 +226,16 @@ class GeoLookup:
     #  Feeds map pins to the frontend.
     #  From: Pipeline.__init__ → To: ask() final_locations assembly | *mll)
 
-    def __init__(self, geojson_path, model):
+    def __init__(self, geojson_path, model, bundle=None):
         self.places_db        = {}
         self.model            = model
         self.place_names      = []
         self.place_embeddings = None
 
+        if bundle is not None:
+            self._load_bundle(bundle)
+            return
+
         try:
             with open(geojson_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
@@ -157,17 +255,33 @@ class GeoLookup:
                     }
                     self.place_names.append(clean_name)
 
-            print(f"[GEO] Loaded {len(self.places_db)} locations. Computing embeddings...")
+            log.info("[GEO] Loaded %s locations. Computing embeddings...", len(self.places_db))
 
             # Pre-compute embeddings for all place names once at startup
             # so get_coords() semantic matching is fast at query time.
             if self.place_names:
-                self.place_embeddings = self.model.encode(self.place_names,
-                                                          convert_to_tensor=True)
+                self.place_embeddings = self.model.encode(self.place_names)
 
         except Exception as e:
-            print(f"[GEO ERROR] {e}")
+            log.error("[GEO ERROR] %s", e)
+
+    def _load_bundle(self, bundle):
+        # Geo table + name vectors from the prebuilt bundle: no GeoJSON parse,
+        # no encode() of every place name.
+        geo = bundle.tables["geo"]
+        for i, clean_name in enumerate(geo["names"]):
+            self.places_db[clean_name] = {
+                "name":         geo["display"][i],
+                "coordinates":  geo["coordinates"][i],
+                "type":         geo["type"][i],
+                "municipality": geo["municipality"][i],
+            }
+        self.place_names = list(geo["names"])
+        if self.place_names:
+            self.place_embeddings = bundle.arrays["geo_embeddings"].astype(np.float32)
+        log.info("[GEO] Loaded %s locations from bundle.", len(self.places_db))
 
+    @timed("geo_lookup")
     def get_coords(self, place_name):
         # ("GET COORDS": Resolves a place name string to its geo data.
         #  Called from answer assembly in ask(), _handle_multi_activity(),
@@ -180,37 +294,45 @@ class GeoLookup:
         # Strategy 1: exact dictionary match (fastest)
         exact = self.places_db.get(query)
         if exact:
-            print(f"[GEO] Exact Match: '{place_name}'")
+            log.debug("[GEO] Exact Match: '%s'", place_name)
             return exact
 
         # Strategy 2: semantic cosine similarity (handles slight wording differences)
         if self.place_names:
-            query_embedding = self.model.encode(query, convert_to_tensor=True)
-            scores          = util.cos_sim(query_embedding, self.place_embeddings)[0]
-            best_idx        = torch.argmax(scores).item()
-            best_score      = scores[best_idx].item()
+            query_embedding = self.model.encode(query)
+            scores          = cos_sim(query_embedding, self.place_embeddings)[0]
+            best_idx        = int(np.argmax(scores))
+            best_score      = float(scores[best_idx])
 
             if best_score > 0.92:
                 match_name = self.place_names[best_idx]
-                print(f"[GEO] Semantic Match: '{query}' -> '{match_name}' ({best_score:.2f})")
+                log.debug("[GEO] Semantic Match: '%s' -> '%s' (%.2f)",
+                          query, match_name, best_score)
                 return self.places_db[match_name]
             else:
-                print(f"[GEO] Semantic match too weak: '{query}' best was "
-                      f"'{self.place_names[best_idx]}' ({best_score:.2f}) — skipping")
+                log.debug("[GEO] Semantic match too weak: '%s' best was '%s' (%.2f) — skipping",
+                          query, self.place_names[best_idx], best_score)
 
         # Strategy 3: fuzzy string matching (typos, short forms)
         matches = get_close_matches(query, self.place_names, n=1, cutoff=0.85)
         if matches:
-            print(f"[GEO] Fuzzy Match: '{query}' -> '{matches[0]}'")
+            log.debug("[GEO] Fuzzy Match: '%s' -> '%s'", query, matches[0])
             return self.places_db[matches[0]]
 
-        print(f"[GEO] No match found for: '{place_name}'")
+        log.debug("[GEO] No match found for: '%s'", place_name)
         return None
 
 
 # =============================================================================
 # SECTION 5 — SEMANTIC CACHE
 # =============================================================================
+# ("CACHE UPDATE OUTCOMES": Why an enhancer write did or didn't land —
+#  updated / locked (T1 lock) / rejected_non_answer / no_match / error.
+#  From: SemanticCache.update() → To: /metrics, /admin/enhancer | *mll)
+CACHE_UPDATES = REGISTRY.counter(
+    "pathfinder_enhancer_cache_updates_total",
+    "SemanticCache.update() calls from the enhancer by result", ("result",))
+
 class SemanticCache:
     # ("SEMANTIC CACHE CLASS": Stores and retrieves Q&A pairs by semantic similarity
     #  instead of exact-string matching. A cache hit avoids a full RAG + Gemini
@@ -228,16 +350,18 @@ class SemanticCache:
                 name=collection_name,
                 embedding_function=embedding_function
             )
-            print(f"[CACHE] Loaded existing cache collection "
-                  f"with {self.cache_collection.count()} entries")
+            log.info("[CACHE] Loaded existing cache collection with %s entries",
+                     self.cache_collection.count())
         except Exception:
-            self.cache_collection = client.create_collection(
+            # get_or_create: workers sharing a Chroma server race to create it.
+            self.cache_collection = client.get_or_create_collection(
                 name=collection_name,
                 embedding_function=embedding_function,
                 metadata={"hnsw:space": "cosine"}
             )
-            print(f"[CACHE] Created new cache collection")
+            log.info("[CACHE] Created new cache collection")
 
+    @timed("cache_get")
     def get(self, query, requested_count=None):
         # ("CACHE GET": Checks if a semantically similar query was answered before.
         #  Also validates count match to prevent a "top 3" result returning for "top 5".
@@ -272,8 +396,9 @@ class SemanticCache:
                         # STRICT MATCH: If the numbers don't match, skip this cache entry.
                         # It doesn't matter if it is raw or enhanced.
                         if stored_count != requested_count:
-                            print(f"[CACHE] Similarity OK ({similarity:.3f}) but count mismatch: "
-                                  f"stored={stored_count} requested={requested_count} — skipping")
+                            log.debug("[CACHE] Similarity OK (%.3f) but count mismatch: "
+                                      "stored=%s requested=%s — skipping",
+                                      similarity, stored_count, requested_count)
                             continue
 
                     answer  = metadata.get('answer', '')
@@ -285,15 +410,17 @@ class SemanticCache:
                     except:
                         places_list = []
 
-                    print(f"[CACHE HIT] Similarity: {similarity:.3f} | Count: {stored_count} | "
-                          f"Ver: {version} | '{cached_query[:30]}...'")
+                    log.debug("[CACHE HIT] Similarity: %.3f | Count: %s | Ver: %s | '%s...'",
+                              similarity, stored_count, version, cached_query[:30])
+                    note("cache_match", {"similarity": round(similarity, 3),
+                                         "cached_query": cached_query, "version": version})
                     return (answer, places_list, version)
 
-                print(f"[CACHE MISS] No matching entry (count={requested_count})")
+                log.debug("[CACHE MISS] No matching entry (count=%s)", requested_count)
                 return None
 
             except Exception as e:
-                print(f"[CACHE ERROR] {e}")
+                log.error("[CACHE ERROR] %s", e)
                 return None
 
     def set(self, query, answer, places, requested_count=None):
@@ -317,9 +444,9 @@ class SemanticCache:
                     metadatas=[metadata],
                     ids=[cache_id]
                 )
-                print(f"[CACHE SET] Stored: '{query[:50]}...' (count={requested_count})")
+                log.debug("[CACHE SET] Stored: '%s...' (count=%s)", query[:50], requested_count)
             except Exception as e:
-                print(f"[CACHE SET ERROR] {e}")
+                log.error("[CACHE SET ERROR] %s", e)
 
     def update(self, query, enhanced_answer, places=None):
         # ("CACHE UPDATE": Upgrades a 'raw' entry to 'enhanced' with Gemini's rewrite.
@@ -345,7 +472,8 @@ class SemanticCache:
         ]
         cleaned = enhanced_answer.strip().lower() if enhanced_answer else ''
         if not cleaned or any(sig in cleaned for sig in NO_ANSWER_SIGNALS):
-            print(f"[CACHE] Rejected — Gemini non-answer detected, cache unchanged")
+            log.debug("[CACHE] Rejected — Gemini non-answer detected, cache unchanged")
+            CACHE_UPDATES.inc(result="rejected_non_answer")
             return False
 
         with self.lock:
@@ -353,6 +481,7 @@ class SemanticCache:
                 results = self.cache_collection.query(query_texts=[query], n_results=1)
 
                 if not results['documents'][0]:
+                    CACHE_UPDATES.inc(result="no_match")
                     return False
 
                 distance   = results['distances'][0][0]
@@ -370,7 +499,8 @@ class SemanticCache:
                     # 'enhanced' + T3 redirect → allow (recovering a dead end)
                     # 'enhanced' + real answer → LOCKED, Gemini's noisy pool cannot improve it
                     if old_version == 'enhanced' and not is_t3_redirect:
-                        print(f"[CACHE] Locked — already enhanced with real answer, skipping")
+                        log.debug("[CACHE] Locked — already enhanced with real answer, skipping")
+                        CACHE_UPDATES.inc(result="locked")
                         return False
 
                     new_metadata = old_metadata.copy()
@@ -384,43 +514,115 @@ class SemanticCache:
                         ids=[cache_id],
                         metadatas=[new_metadata]
                     )
-                    print(f"[CACHE UPDATED] Was '{old_version}' → 'enhanced': '{query[:50]}...'")
+                    log.info("[CACHE UPDATED] Was '%s' → 'enhanced': '%s...'",
+                             old_version, query[:50])
+                    CACHE_UPDATES.inc(result="updated")
                     return True
+                CACHE_UPDATES.inc(result="no_match")
                 return False
             except Exception as e:
-                print(f"[CACHE UPDATE ERROR] {e}")
+                log.error("[CACHE UPDATE ERROR] %s", e)
+                CACHE_UPDATES.inc(result="error")
                 return False
 
 
 # =============================================================================
 # SECTION 6 — BACKGROUND ENHANCER
 # =============================================================================
+# ("ENHANCER TELEMETRY": Queue, wait, provider and outcome metrics used for
+#  LLM quota capacity planning. Exposed on /metrics and /admin/enhancer.
+#  From: BackgroundEnhancer → To: metrics.REGISTRY | *mll)
+ENHANCER_QUEUE_DEPTH = REGISTRY.gauge(
+    "pathfinder_enhancer_queue_depth", "Enhancer jobs not yet acknowledged")
+ENHANCER_OLDEST_AGE = REGISTRY.gauge(
+    "pathfinder_enhancer_oldest_job_age_seconds", "Age of the oldest unacknowledged enhancer job")
+ENHANCER_ENQUEUED = REGISTRY.counter(
+    "pathfinder_enhancer_jobs_enqueued_total", "Jobs handed to the enhancer")
+ENHANCER_JOBS = REGISTRY.counter(
+    "pathfinder_enhancer_jobs_total", "Finished enhancer jobs by outcome", ("outcome",))
+ENHANCER_JOB_WAIT = REGISTRY.histogram(
+    "pathfinder_enhancer_job_wait_seconds", "Time from enqueue until a worker picked the job up")
+ENHANCER_JOB_DURATION = REGISTRY.histogram(
+    "pathfinder_enhancer_job_duration_seconds", "Worker time per job, including 429 backoff")
+PROVIDER_LATENCY = REGISTRY.histogram(
+    "pathfinder_enhancer_provider_latency_seconds", "LLM provider call latency", ("provider",))
+PROVIDER_CALLS = REGISTRY.counter(
+    "pathfinder_enhancer_provider_calls_total", "LLM provider calls by outcome", ("provider", "outcome"))
+PROVIDER_429 = REGISTRY.counter(
+    "pathfinder_enhancer_provider_429_total", "429 rate-limit responses per provider", ("provider",))
+ENHANCER_NON_ANSWERS = REGISTRY.counter(
+    "pathfinder_enhancer_non_answer_discards_total", "LLM replies discarded as non-answers", ("provider",))
+
+
+class ProvidersUnavailable(Exception):
+    # ("NO PROVIDER ANSWERED": Every configured provider errored or hit a 429.
+    #  Unlike a non-answer the job is not finished: the worker hands it back
+    #  to the queue with a delay. Only 429s are waited out indefinitely;
+    #  other errors (bad key, 4xx, a 500 that never clears) use up attempts.
+    #  From: _enhance_with_llm() → To: _worker_loop() deferral branch | *mll)
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after   # largest Retry-After a provider sent, if any
+
 class BackgroundEnhancer:
     # ("BACKGROUND ENHANCER CLASS": Runs a daemon thread that upgrades 'raw' cache
     #  entries using Gemini 2.5 Flash (primary) or Groq llama (fallback).
     #  Decoupled from the main ask() path so the user gets a fast raw answer first
     #  and the next identical query gets a richer enhanced answer.
+    #  Jobs live in a durable queue (job_queue.py) so restarts don't drop them.
     #  From: Pipeline.__init__ (start) / ask() (enqueue) → To: SemanticCache.update() | *mll)
 
-    def __init__(self, api_key, cache, config, geo_db=None):
+    def __init__(self, api_key, cache, config, geo_db=None, providers=None):
         self.api_key       = api_key
         self.cache         = cache
         self.config        = config
         self.geo_db        = geo_db or {}   # keyed by lowercase name → geo record
-        self.job_queue     = Queue()
+        self.providers     = providers if providers is not None else build_providers(config, api_key)
+        self.max_backoff   = config.get('enhancer', {}).get('max_backoff_seconds', 120)
+        self.retry_delay   = config.get('enhancer', {}).get('retry_seconds', 30)
+        self.max_retry     = config.get('enhancer', {}).get('max_retry_seconds', 900)
+        self.job_queue     = open_job_queue(config, BASE_DIR)   # durable unless config says memory
         self.worker_thread = None
         self.running       = False
+        self.listeners     = []   # callables(request_id, payload), e.g. PushHub.publish
+
+        ENHANCER_QUEUE_DEPTH.set_function(self.job_queue.depth)
+        ENHANCER_OLDEST_AGE.set_function(lambda: round(self.job_queue.oldest_age(), 3))
+
+    def available(self):
+        # False when no provider has a key / endpoint: nothing will ever
+        # enhance a job, so ask() doesn't enqueue and clients don't wait.
+        return any(p.is_available() for p in self.providers)
+
+    def is_queued(self, query):
+        return self.job_queue.has_job(query)
+
+    def add_listener(self, callback):
+        # ("ADD LISTENER": Registers a callback fired when a job that carries a
+        #  request_id is finished — lets the API push the upgrade to the client.
+        #  From: app.py lifespan → To: _notify() | *mll)
+        self.listeners.append(callback)
+
+    def _notify(self, job, payload):
+        request_id = job.get('request_id')
+        if not request_id:
+            return
+        for callback in self.listeners:
+            try:
+                callback(request_id, payload)
+            except Exception as e:
+                log.error("[ENHANCER ERROR] Listener failed: %s", e)
 
     def start(self):
         # ("ENHANCER START": Launches the daemon worker thread once at init time.
         #  From: Pipeline.__init__ → To: _worker_loop() | *mll)
         if self.worker_thread is not None:
-            print("[ENHANCER] Already running")
+            log.info("[ENHANCER] Already running")
             return
         self.running       = True
         self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
         self.worker_thread.start()
-        print("[ENHANCER] Background worker started")
+        log.info("[ENHANCER] Background worker started")
 
     def stop(self):
         # ("ENHANCER STOP": Gracefully joins the worker thread on app exit.
@@ -428,11 +630,12 @@ class BackgroundEnhancer:
         self.running = False
         if self.worker_thread:
             self.worker_thread.join(timeout=2)
-        print("[ENHANCER] Background worker stopped")
+        log.info("[ENHANCER] Background worker stopped")
 
-    def enqueue(self, query, raw_facts, raw_answer, candidates=None, rag_tier='T3', is_browsing=False, requested_count=5, is_explicit_count=False):
+    def enqueue(self, query, raw_facts, raw_answer, candidates=None, rag_tier='T3', is_browsing=False, requested_count=5, is_explicit_count=False, request_id=None):
         job = {
             'query':      query,
+            'request_id': request_id,
             'raw_facts':  raw_facts,
             'raw_answer': raw_answer,
             'candidates': candidates or [],
@@ -443,61 +646,147 @@ class BackgroundEnhancer:
             'timestamp':  time.time()
         }
         self.job_queue.put(job)
-        print(
-            f"[ENHANCER] Queued | tier={rag_tier} | "
-            f"candidates={len(candidates or [])} | '{query[:50]}...'"
-        )
+        ENHANCER_ENQUEUED.inc()
+        log.debug("[ENHANCER] Queued | tier=%s | candidates=%s | '%s...'",
+                  rag_tier, len(candidates or []), query[:50])
+
+    def stats(self):
+        # ("QUEUE STATS": Backlog size and age of the oldest unfinished job.
+        #  From: /admin/status → To: operator dashboards | *mll)
+        return {
+            "queue_depth":           self.job_queue.depth(),
+            "oldest_job_age_seconds": round(self.job_queue.oldest_age(), 1),
+            "running":               self.running,
+        }
+
+    def telemetry(self):
+        # ("TELEMETRY SNAPSHOT": stats() plus every enhancer metric as plain JSON.
+        #  From: /admin/enhancer → To: operators / capacity planning | *mll)
+        return {
+            **self.stats(),
+            "providers":        [p.name for p in self.providers if p.is_available()],
+            "jobs_enqueued":    ENHANCER_ENQUEUED.snapshot(),
+            "jobs":             ENHANCER_JOBS.snapshot(),
+            "job_wait_seconds": ENHANCER_JOB_WAIT.snapshot(),
+            "job_duration_seconds": ENHANCER_JOB_DURATION.snapshot(),
+            "provider_latency_seconds": PROVIDER_LATENCY.snapshot(),
+            "provider_calls":   PROVIDER_CALLS.snapshot(),
+            "provider_429":     PROVIDER_429.snapshot(),
+            "non_answer_discards": ENHANCER_NON_ANSWERS.snapshot(),
+            "cache_updates":    CACHE_UPDATES.snapshot(),
+        }
 
     def _worker_loop(self):
         # ("WORKER LOOP": Continuously drains the job queue.
-        #  For each job: calls Gemini/Groq, resolves pins from the response text,
-        #  then writes the upgrade to cache.
-        #  From: start() thread → To: _enhance_with_gemini() + cache.update() | *mll)
-        print("[ENHANCER] Worker loop started")
+        #  Jobs are acked only after they are fully handled, so a crash or
+        #  restart mid-job leaves it in the durable queue for the next run.
+        #  When no provider answers the job goes back with a delay and the
+        #  worker pauses for it before trying the next one: open-ended for
+        #  429s, max_attempts tries for other errors, after which the job is
+        #  dropped and its client told "unchanged".
+        #  From: start() thread → To: _process_job() | *mll)
+        log.info("[ENHANCER] Worker loop started")
         while self.running:
             try:
-                job      = self.job_queue.get(timeout=2)
-                enhanced = self._enhance_with_gemini(job)
-
-                if enhanced:
-                    # 1. Split the Text UI from the Map Pins
-                    if "APPROVED_PINS:" in enhanced:
-                        parts = enhanced.split("APPROVED_PINS:")
-                        display_text = parts[0].strip()
-                        hidden_pins_text = parts[1].strip()
-                    else:
-                        display_text = enhanced.strip()
-                        hidden_pins_text = enhanced.strip()
+                job = self.job_queue.get(timeout=2)
+            except Empty:
+                continue
 
-                    # 2. Resolve the pins
-                    resolved = self._resolve_places_from_enhanced(hidden_pins_text, job.get('candidates', []))
+            picked_up = time.time()
+            ENHANCER_JOB_WAIT.observe(max(0.0, picked_up - job.get('timestamp', picked_up)))
+            try:
+                outcome = self._process_job(job)
+                self.job_queue.ack(job)
+                ENHANCER_JOBS.inc(outcome=outcome)
+            except ProvidersUnavailable as e:
+                rate_limited = e.retry_after is not None
+                attempts     = job.get('_attempts', 0) + (0 if rate_limited else 1)
+                if attempts >= self.job_queue.max_attempts:
+                    log.warning("[ENHANCER] %s — giving up after %s attempts", e, attempts)
+                    ENHANCER_JOBS.inc(outcome="gave_up")
+                    self.job_queue.ack(job)
+                    self._notify(job, {"status": "unchanged"})
+                else:
+                    delay = self._retry_after(job, e.retry_after)
+                    log.warning("[ENHANCER] %s — job deferred, retry in %ss", e, delay)
+                    ENHANCER_JOBS.inc(outcome="deferred" if rate_limited else "retried")
+                    self.job_queue.release(job, retry_after=delay, count_attempt=not rate_limited)
+                    self._pause(delay)
+            except Exception as e:
+                log.error("[ENHANCER ERROR] Loop crashed: %s", e)
+                ENHANCER_JOBS.inc(outcome="failed")
+                self.job_queue.release(job)
+                time.sleep(60)
+            finally:
+                ENHANCER_JOB_DURATION.observe(time.time() - picked_up)
+
+    def _retry_after(self, job, hint=None):
+        # Exponential per job (retry_seconds × 2^(deferrals + attempts)), never
+        # shorter than a provider's Retry-After, capped at max_retry_seconds.
+        retries = job.get('_deferrals', 0) + job.get('_attempts', 0)
+        delay   = self.retry_delay * 2 ** min(retries, 16)
+        if hint:
+            delay = max(delay, hint)
+        return min(delay, self.max_retry)
+
+    def _pause(self, seconds):
+        deadline = time.time() + seconds
+        while self.running and time.time() < deadline:
+            time.sleep(min(1.0, max(0.0, deadline - time.time())))
+
+    def _process_job(self, job):
+        # ("PROCESS JOB": Calls Gemini/Groq, resolves pins from the response text,
+        #  then writes the upgrade to cache. Returns the outcome label for metrics.
+        #  From: _worker_loop() → To: _enhance_with_llm() + cache.update() | *mll)
+        if not self.available():
+            # Queued before the keys were removed: nothing will answer it.
+            log.info("[ENHANCER] ✗ No provider available — job dropped")
+            self._notify(job, {"status": "unchanged"})
+            return "no_provider"
+
+        enhanced = self._enhance_with_llm(job)
+
+        if enhanced:
+            # 1. Split the Text UI from the Map Pins
+            if "APPROVED_PINS:" in enhanced:
+                parts = enhanced.split("APPROVED_PINS:")
+                display_text = parts[0].strip()
+                hidden_pins_text = parts[1].strip()
+            else:
+                display_text = enhanced.strip()
+                hidden_pins_text = enhanced.strip()
 
-                    # 3. IDIOT-PROOF THE LLM: If the user explicitly asked for 3, force the list to 3.
-                    if job.get('is_explicit_count') and resolved:
-                        resolved = resolved[:job.get('requested_count')]
+            # 2. Resolve the pins
+            resolved = self._resolve_places_from_enhanced(hidden_pins_text, job.get('candidates', []))
 
-                    # 4. Update the cache
-                    success = self.cache.update(
-                        job['query'],
-                        display_text, 
-                        places=resolved if resolved else None,
-                    )
-                    
-                    print(
-                        f"[ENHANCER] ✓ Cache update: {success}"
-                        + (f" | {len(resolved)} pins resolved from hidden list" if resolved else " | no pins resolved")
-                    )
-                else:
-                    # None = either "no answer" (discard silently) or API failure.
-                    # _enhance_with_gemini logs the reason itself.
-                    print(f"[ENHANCER] ✗ No enhancement produced")
+            # 3. IDIOT-PROOF THE LLM: If the user explicitly asked for 3, force the list to 3.
+            if job.get('is_explicit_count') and resolved:
+                resolved = resolved[:job.get('requested_count')]
 
-                self.job_queue.task_done()
-            except Exception as e:
-                if "Empty" not in str(type(e).__name__):
-                    print(f"[ENHANCER ERROR] Loop crashed: {e}")
-                    time.sleep(60)
-                continue
+            # 4. Update the cache
+            success = self.cache.update(
+                job['query'],
+                display_text,
+                places=resolved if resolved else None,
+            )
+
+            log.info("[ENHANCER] ✓ Cache update: %s | %s pins resolved from hidden list",
+                     success, len(resolved) if resolved else "no")
+
+            # 5. Push to the client that asked (pins only replace the raw ones if resolved)
+            self._notify(job, {
+                "status":    "enhanced",
+                "answer":    display_text,
+                "locations": resolved or None,
+                "cached":    bool(success),
+            })
+            return "enhanced"
+        else:
+            # None = the LLM had no answer (discard). Provider failures raise
+            # ProvidersUnavailable instead and never reach this branch.
+            log.info("[ENHANCER] ✗ No enhancement produced")
+            self._notify(job, {"status": "unchanged"})
+            return "no_enhancement"
 
     def _resolve_places_from_enhanced(self, enhanced_text, candidates):
         # ("PIN RESOLVER": Scans Gemini's response for place names mentioned in
@@ -552,8 +841,8 @@ class BackgroundEnhancer:
     def _build_prompt(self, job):
         # ("PROMPT BUILDER": Assembles the enhancement prompt from the candidate
         #  pool docs and the config template. Falls back to raw_facts if no pool.
-        #  Both Gemini and Groq use this same prompt.
-        #  From: _enhance_with_gemini() → To: _call_gemini() / _call_groq() | *mll)
+        #  Every provider (Gemini, Groq, local) uses this same prompt.
+        #  From: _enhance_with_llm() → To: provider.complete() | *mll)
         """Build the prompt string and facts_text from a job dict."""
         candidates = job.get('candidates', [])
         rag_tier   = job.get('rag_tier', 'T3')
@@ -563,10 +852,10 @@ class BackgroundEnhancer:
                 f"- [{c.get('place', 'General')}]: {c.get('text', '')}"
                 for c in candidates if c.get('text')
             ])
-            print(f"[ENHANCER] Candidate pool | tier={rag_tier} | count={len(candidates)}")
+            log.debug("[ENHANCER] Candidate pool | tier=%s | count=%s", rag_tier, len(candidates))
         else:
             facts_text = job['raw_facts']
-            print(f"[ENHANCER] No pool — raw_facts fallback | tier={rag_tier}")
+            log.debug("[ENHANCER] No pool — raw_facts fallback | tier=%s", rag_tier)
 
         gemini_cfg   = self.config.get('gemini', {})
         template_key = ('enhancer_prompt_template'
@@ -582,184 +871,70 @@ class BackgroundEnhancer:
     def _is_non_answer(self, text):
         # ("NON-ANSWER CHECK": Returns True if the LLM admitted it couldn't answer.
         #  Prevents garbage from being written to cache.
-        #  From: _enhance_with_gemini() → To: discard branch | *mll)
+        #  From: _enhance_with_llm() → To: discard branch | *mll)
         """Return True if the LLM admitted it couldn't answer — discard these."""
         return any(sig in text.lower() for sig in self.NO_ANSWER_SIGNALS)
 
-    def _call_gemini(self, prompt):
-        # ("GEMINI CALL": Sends prompt to Gemini 2.5 Flash via REST.
-        #  Returns (text, retry_after_seconds). retry_after is set on 429,
-        #  None on success or non-429 error.
-        #  From: _enhance_with_gemini() → To: fallback decision | *mll)
-        """
-        Call Gemini. Model is read from config gemini.model_name.
-        Returns (text, retry_after_seconds).
-        retry_after_seconds is set on 429, None otherwise.
-        """
-        gemini_cfg = self.config.get('gemini', {})
-        # Strip "models/" prefix if present — the URL builder adds the path itself
-        model = gemini_cfg.get('model_name', 'gemini-2.5-flash').replace('models/', '')
-        url   = (f"https://generativelanguage.googleapis.com/v1beta/models/"
-                 f"{model}:generateContent?key={self.api_key}")
-        payload = {
-            'contents': [{'parts': [{'text': prompt}]}],
-            'generationConfig': {'temperature': 0.1}
-        }
-        try:
-            resp = requests.post(url, json=payload,
-                                 headers={'Content-Type': 'application/json'}, timeout=15)
-            if resp.status_code == 200:
-                text = resp.json()['candidates'][0]['content']['parts'][0]['text'].strip()
-                return text, None
-            elif resp.status_code == 429:
-                # Read retryDelay from the error body if present
-                retry_after = 60  # safe default
-                try:
-                    details = resp.json().get('error', {}).get('details', [])
-                    for d in details:
-                        if d.get('@type', '').endswith('RetryInfo'):
-                            delay_str   = d.get('retryDelay', '60s')
-                            retry_after = int(delay_str.replace('s', '').strip().split('.')[0])
-                            break
-                except Exception:
-                    pass
-                print(f"[ENHANCER] Gemini 429 — retry after {retry_after}s")
-                return None, retry_after
-            else:
-                print(f"[ENHANCER ERROR] Gemini {resp.status_code}: {resp.text[:200]}")
-                return None, None
-        except Exception as e:
-            print(f"[ENHANCER ERROR] Gemini network failure: {e}")
-            return None, None
-
-    def _call_groq(self, prompt):
-        # ("GROQ CALL": Fallback LLM via Groq's OpenAI-compatible endpoint.
-        #  Model is read from config groq.model_name (llama-3.3-70b-versatile recommended).
-        #  Called when Gemini hits 429 or has no API key configured.
-        #  From: _enhance_with_gemini() fallback branch → To: cache.update() | *mll)
-        """
-        Call Groq llama as fallback. Returns text or None.
-        Uses OpenAI-compatible chat completions endpoint.
-        """
-        groq_key = os.getenv('GROQ_API_KEY')
-        if not groq_key:
-            print("[ENHANCER] Groq fallback skipped — GROQ_API_KEY not set")
-            return None
-
-        url     = "https://api.groq.com/openai/v1/chat/completions"
-        headers = {
-            'Content-Type':  'application/json',
-            'Authorization': f'Bearer {groq_key}',
-        }
-        payload = {
-            'model':       self.config.get('groq', {}).get('model_name', 'llama-3.1-8b-instant'),
-            'messages':    [{'role': 'user', 'content': prompt}],
-            'temperature': 0.1,
-            'max_tokens':  512,
-        }
-        try:
-            resp = requests.post(url, json=payload, headers=headers, timeout=15)
-            if resp.status_code == 200:
-                text = resp.json()['choices'][0]['message']['content'].strip()
-                print(f"[ENHANCER] ✓ Provider=GROQ | answer={len(text)} chars")
-                return text
-            else:
-                print(f"[ENHANCER ERROR] Groq {resp.status_code}: {resp.text[:200]}")
-                return None
-        except Exception as e:
-            print(f"[ENHANCER ERROR] Groq network failure: {e}")
-            return None
-
-    def _enhance_with_gemini(self, job):
-        # ("ENHANCE ORCHESTRATOR": Tries Gemini first, falls back to Groq on 429
-        #  or missing key. Validates both responses against NO_ANSWER_SIGNALS
-        #  before returning.
-        #  From: _worker_loop() → To: _resolve_places_from_enhanced() + cache.update() | *mll)
+    def _enhance_with_llm(self, job):
+        # ("ENHANCE ORCHESTRATOR": Walks the provider chain (Gemini → Groq by
+        #  default, see llm_providers.py). Providers without a key are skipped.
+        #  On a 429 it waits the requested delay (capped) before the next provider;
+        #  other failures fall through immediately. Validates every response
+        #  against NO_ANSWER_SIGNALS before returning; raises ProvidersUnavailable
+        #  when no provider answered (_process_job already checked that one
+        #  is available).
+        #  From: _process_job() → To: _resolve_places_from_enhanced() + cache.update() | *mll)
         """
-        Primary: Gemini 2.5 Flash.
-        Fallback: Groq llama (if Gemini hits 429).
-        Both checked against NO_ANSWER_SIGNALS before returning.
+        Primary: first available provider in enhancer.providers (Gemini).
+        Fallback: the next ones in order (Groq, local).
+        Every response is checked against NO_ANSWER_SIGNALS before returning.
         """
-        if not self.api_key:
-            # No Gemini key — try Groq directly
-            print("[ENHANCER] No GEMINI_API_KEY — using Groq directly")
-            prompt = self._build_prompt(job)
-            text   = self._call_groq(prompt)
-            if text and not self._is_non_answer(text):
+        prompt    = self._build_prompt(job)
+        available = [p for p in self.providers if p.is_available()]
+        skipped = [p.name for p in self.providers if not p.is_available()]
+        if skipped:
+            log.debug("[ENHANCER] Skipping providers without a key: %s", skipped)
+
+        rate_limited = []
+        for i, provider in enumerate(available):
+            call_start        = time.time()
+            text, retry_after = provider.complete(prompt)
+            PROVIDER_LATENCY.observe(time.time() - call_start, provider=provider.name)
+
+            if text:
+                if self._is_non_answer(text):
+                    log.debug("[ENHANCER] ✗ %s non-answer — discarding, cache unchanged",
+                              provider.name.upper())
+                    PROVIDER_CALLS.inc(provider=provider.name, outcome="non_answer")
+                    ENHANCER_NON_ANSWERS.inc(provider=provider.name)
+                    return None
+                log.debug("[ENHANCER] ✓ Provider=%s | answer=%s chars",
+                          provider.name.upper(), len(text))
+                PROVIDER_CALLS.inc(provider=provider.name, outcome="ok")
                 return text
-            return None
-
-        prompt = self._build_prompt(job)
 
-        # ── Try Gemini first ──────────────────────────────────────────────
-        text, retry_after = self._call_gemini(prompt)
-
-        if text:
-            if self._is_non_answer(text):
-                print("[ENHANCER] ✗ Gemini non-answer — discarding, cache unchanged")
-                return None
-            print(f"[ENHANCER] ✓ Provider=GEMINI | answer={len(text)} chars")
-            return text
-
-        # ── Gemini failed — decide whether to try Groq ───────────────────
-        if retry_after is not None:
-            # 429 rate limit — wait the requested delay then try Groq
-            wait = min(retry_after, 120)   # cap at 2 min so queue doesn't freeze
-            print(f"[ENHANCER] Waiting {wait}s before Groq fallback...")
-            time.sleep(wait)
-            text = self._call_groq(prompt)
-        else:
-            # Non-429 error (network, 500, etc.) — try Groq immediately
-            text = self._call_groq(prompt)
+            if retry_after is not None:
+                PROVIDER_CALLS.inc(provider=provider.name, outcome="429")
+                PROVIDER_429.inc(provider=provider.name)
+                rate_limited.append(retry_after)
+            else:
+                PROVIDER_CALLS.inc(provider=provider.name, outcome="error")
 
-        if text:
-            if self._is_non_answer(text):
-                print("[ENHANCER] Groq non-answer — discarding, cache unchanged")
-                return None
-            return text
+            is_last = (i == len(available) - 1)
+            if retry_after is not None and not is_last:
+                # 429 rate limit — wait the requested delay then try the next provider.
+                # Capped so the queue doesn't freeze.
+                wait = min(retry_after, self.max_backoff)
+                log.info("[ENHANCER] Waiting %ss before %s fallback...",
+                         wait, available[i + 1].name)
+                time.sleep(wait)
 
-        return None
+        raise ProvidersUnavailable(f"All {len(available)} provider(s) failed",
+                                   retry_after=max(rate_limited) if rate_limited else None)
 
 
 # =============================================================================
-# SECTION 7 — RATE LIMITER
-# =============================================================================
-class RateLimiter:
-    # ("RATE LIMITER CLASS": Sliding-window throttle. Configured via config.yaml
-    #  security.rate_limit.max_request and .period_seconds.
-    #  Prevents abuse without blocking legitimate back-to-back queries.
-    #  From: Pipeline.__init__ → To: ask() gate check | *mll)
-
-    def __init__(self, max_request, period_seconds):
-        self.max_request    = max_request
-        self.period_seconds = period_seconds
-        self.timestamps     = deque()
-
-    def is_allowed(self):
-        # ("IS ALLOWED": Prunes expired timestamps and checks if request count
-        #  is within the window limit. Stamps the request if allowed.
-        #  From: ask() first gate check → To: early return with wait message | *mll)
-        now = time.time()
-        while self.timestamps and self.timestamps[0] < now - self.period_seconds:
-            self.timestamps.popleft()
-        if len(self.timestamps) < self.max_request:
-            self.timestamps.append(now)
-            return True
-        return False
-
-    def get_remaining_time(self):
-        # ("GET REMAINING TIME": Calculates seconds until the oldest request
-        #  expires from the window — used in the "please wait Xs" message.
-        #  From: ask() gate check → To: rate limit response string | *mll)
-        if not self.timestamps:
-            return 0
-        now    = time.time()
-        expiry = self.timestamps[0] + self.period_seconds
-        return max(0, int(expiry - now))
-
-
-# =============================================================================
-# SECTION 8 — MAIN PIPELINE CLASS
+# SECTION 7 — MAIN PIPELINE CLASS
 # =============================================================================
 class Pipeline:
     # ("PIPELINE CLASS": Top-level orchestrator. Wires together all subsystems
@@ -768,78 +943,98 @@ class Pipeline:
 
     # Reference words that signal a follow-up query pointing to the last place
     # INIT — WIRE ALL SUBSYSTEMS
-    def __init__(self, dataset_path=str(DATASET_PATH), config_path=str(CONFIG_PATH)):
+    def __init__(self, dataset_path=str(DATASET_PATH), config_path=str(CONFIG_PATH), startup=None,
+                 chroma_path=None, geojson_path=None):
         # ("PIPELINE INIT": Loads config, then builds each subsystem in dependency
         #  order: model → geo → cache → enhancer → controller → collection.
+        #  Each step is a timed startup phase (startup.py); pass the caller's
+        #  StartupReport to extend it, e.g. with app.py's import phase.
+        #  chroma_path / geojson_path override the defaults (bench/ points
+        #  chroma_path at a scratch directory).
         #  From: __main__ / server startup → To: ask() is now ready | *mll)
-
-        self.config = self.load_config(config_path)
-        print(f"[INFO] Loaded config")
-        load_dotenv()
+        self.startup = startup or StartupReport()
+        phase        = self.startup.phase
+
+        with phase("config"):
+            self.config = self.load_config(config_path)
+            setup_logging(self.config)
+            log.info("[PIPELINE] Loaded config")
+            load_dotenv()
         self.internet_status = True
         self.dataset_path    = dataset_path
-
-        # -- Rate limiter --
-        sec_conf        = self.config.get('security', {})
-        rate_limit_conf = sec_conf.get('rate_limit', {})
-        self.limiter    = RateLimiter(
-            max_request    = rate_limit_conf.get('max_request', 5),
-            period_seconds = rate_limit_conf.get('period_seconds', 60)
-        )
+        self.chroma_path     = Path(chroma_path) if chroma_path else CHROMA_STORAGE
 
         # -- RAG embedding model --
-        # SentenceTransformer is the shared model used by both RAG retrieval
-        # and GeoLookup semantic matching.
-        RAG_MODEL      = "sentence-transformers/" + self.config['rag']['model_path']
-        self.raw_model = SentenceTransformer(RAG_MODEL, device="cpu")
-        self.client    = chromadb.PersistentClient(path=str(CHROMA_STORAGE))
-        self.embedding = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=RAG_MODEL, device="cpu"
-        )
+        # One encoder serves RAG retrieval (via the Chroma embedding function),
+        # GeoLookup and Controller: a micro-batched local model (torch or ONNX),
+        # or the shared embedding service when rag.embedding_service.enabled.
+        RAG_MODEL = "sentence-transformers/" + self.config['rag']['model_path']
+        with phase("model"):
+            self.raw_model = self._load_encoder(RAG_MODEL, config_path)
+        with phase("chroma_client"):
+            self.client    = open_chroma_client(self.config, self.chroma_path)   # see chroma_store.py
+            self.embedding = encoder_embedding_function(self.raw_model, RAG_MODEL)
+
+        # -- Prebuilt index bundle (build_bundle.py), if enabled and fresh --
+        with phase("bundle"):
+            self.bundle = self._open_bundle()
 
         # -- GeoLookup: must come after model is ready --
-        self.geo_engine = GeoLookup(str(GEOJSON_PATH), self.raw_model)
+        with phase("geo"):
+            self.geo_engine = GeoLookup(str(geojson_path or GEOJSON_PATH), self.raw_model, bundle=self.bundle)
 
         # -- Semantic cache --
-        cache_threshold       = self.config.get('cache', {}).get('similarity_threshold', 0.88)
-        cache_collection_name = self.config.get('cache', {}).get('collection_name', 'query_cache')
-        self.semantic_cache   = SemanticCache(
-            client               = self.client,
-            embedding_function   = self.embedding,
-            collection_name      = cache_collection_name,
-            similarity_threshold = cache_threshold
-        )
+        with phase("cache"):
+            cache_threshold       = self.config.get('cache', {}).get('similarity_threshold', 0.88)
+            cache_collection_name = self.config.get('cache', {}).get('collection_name', 'query_cache')
+            self.semantic_cache   = SemanticCache(
+                client               = self.client,
+                embedding_function   = self.embedding,
+                collection_name      = cache_collection_name,
+                similarity_threshold = cache_threshold
+            )
 
         # -- Background Gemini enhancer: starts daemon thread --
-        gemini_key    = os.getenv('GEMINI_API_KEY')
-        self.enhancer = BackgroundEnhancer(gemini_key, self.semantic_cache, self.config,
-                                           geo_db=self.geo_engine.places_db)
-        self.enhancer.start()
+        with phase("enhancer"):
+            gemini_key    = os.getenv('GEMINI_API_KEY')
+            self.enhancer = BackgroundEnhancer(gemini_key, self.semantic_cache, self.config,
+                                               geo_db=self.geo_engine.places_db)
+            self.enhancer.start()
 
         # -- Controller (intent / validity) and entity extractor --
-        self.controller       = Controller(self.config, self.raw_model)
-        self.entity_extractor = EntityExtractor(self.config)
+        with phase("controller"):
+            self.controller       = Controller(self.config, self.raw_model, bundle=self.bundle)
+            self.entity_extractor = EntityExtractor(self.config)
 
         # -- Profanity filter --
-        profanity.load_censor_words()
-        profanity.add_censor_words(self.config['profanity'])
+        with phase("profanity"):
+            from better_profanity import profanity
+            profanity.load_censor_words()
+            profanity.add_censor_words(self.config['profanity'])
+            self.profanity = profanity
 
         # -- ChromaDB knowledge collection (loaded by ingest.py) --
-        try:
-            self.collection = self.client.get_collection(
-                name               = self.config['rag']['collection_name'],
-                embedding_function = self.embedding
+        # The active generation comes from chroma_storage/active_index.json;
+        # rebuilds fill a shadow generation and swap it in (index_manager.py).
+        with phase("collection"):
+            rebuild_conf       = self.config.get('rag', {}).get('rebuild', {})
+            self.index         = IndexManager(
+                client             = self.client,
+                embedding_function = self.embedding,
+                base_name          = self.config['rag']['collection_name'],
+                storage_dir        = self.chroma_path,
+                smoke_query        = rebuild_conf.get('smoke_query', 'beaches'),
             )
+            self._rebuild_lock = threading.Lock()
+            self._index_stamp  = self.index.pointer_stamp()
+            self._index_check  = self.config.get('rag', {}).get('index_check_seconds', 1.0)
+            self._index_seen   = time.monotonic()
+            self.collection    = (BundleIndex(self.bundle, self.embedding) if self.bundle is not None
+                                  else self.index.open_active())
             count = self.collection.count()
-            print(f"[INFO] Brain loaded. Facts available: {count}")
-            if count == 0:
-                print("[WARN] Brain is empty! Run 'ingest.py' to read dataset.json.")
-        except Exception:
-            print("[WARN] Collection not found. Creating new empty one.")
-            self.collection = self.client.create_collection(
-                name               = self.config['rag']['collection_name'],
-                embedding_function = self.embedding
-            )
+        log.info("[PIPELINE] Brain loaded ('%s'). Facts available: %s", self.collection.name, count)
+        if count == 0:
+            log.warning("[PIPELINE] Brain is empty! Run 'ingest.py' to read dataset.json.")
 
         # -- Confidence thresholds from config --
         # T1 ≥ 0.72 → authoritative | T2 ≥ 0.60 → qualified | T3 < 0.60 → hard stop
@@ -848,9 +1043,73 @@ class Pipeline:
         self.confidence_t2 = rag_conf.get('confidence_threshold_t2', 0.60)
         self.browsing_min  = rag_conf.get('browsing_min_confidence',  0.30)
         self.specific_min  = rag_conf.get('specific_min_confidence',  0.40)
-        print(f"[INFO] Confidence tiers — T1≥{self.confidence_t1} | "
-              f"T2≥{self.confidence_t2} | "
-              f"browsing_min={self.browsing_min} | specific_min={self.specific_min}")
+        log.info("[PIPELINE] Confidence tiers — T1≥%s | T2≥%s | browsing_min=%s | specific_min=%s",
+                 self.confidence_t1, self.confidence_t2, self.browsing_min, self.specific_min)
+
+        # -- Query log: one JSONL record per ask() (query_log.py) --
+        self.query_log = open_query_log(self.config, BASE_DIR)
+        if self.query_log is not None:
+            atexit.register(self.query_log.close)
+
+    def _load_encoder(self, model_name, config_path):
+        # ("LOAD ENCODER": With rag.embedding_service.enabled, connects to (or
+        #  starts) the shared embedding process so this worker holds no model.
+        #  If the service can't be reached, falls back to a local model (torch
+        #  or int8 ONNX, rag.embedding_backend), which rag.batching wraps in a BatchingEncoder so concurrent ask() calls
+        #  share forward passes (the service already batches on its side).
+        #  From: __init__ → To: self.raw_model | *mll)
+        conf = self.config.get('rag', {}).get('embedding_service', {})
+        if conf.get('enabled', False):
+            try:
+                return connect_embedding_service(
+                    socket_path   = conf.get('socket_path'),
+                    model_name    = model_name,
+                    config_path   = config_path,
+                    autostart     = conf.get('autostart', True),
+                    start_timeout = conf.get('start_timeout', 120),
+                    timeout       = conf.get('request_timeout', 30),
+                )
+            except EmbeddingServiceError as e:
+                log.warning("[EMBEDDER] Shared embedding service unavailable (%s); loading model locally", e)
+
+        model    = load_local_model(model_name, self.config.get('rag', {}))
+        batching = self.config.get('rag', {}).get('batching', {})
+        if not batching.get('enabled', True):
+            return model
+        return BatchingEncoder(model,
+                               max_batch   = batching.get('max_batch', 32),
+                               max_wait_ms = batching.get('max_wait_ms', 3))
+
+    def embedding_stats(self):
+        if isinstance(self.raw_model, RemoteEncoder):
+            try:
+                return dict(self.raw_model.stats(), mode="service")
+            except EmbeddingServiceError as e:
+                return {"mode": "service", "error": str(e)}
+        if isinstance(self.raw_model, BatchingEncoder):
+            return dict(self.raw_model.stats(), mode="local")
+        return {"mode": "local", "batching": False}
+
+    def _open_bundle(self):
+        # ("OPEN BUNDLE": Maps rag.bundle.path if enabled. A missing, corrupt or
+        #  stale bundle (other model, dataset.json changed) is skipped with a
+        #  warning and startup falls back to Chroma + on-the-fly encoding.
+        #  From: __init__ → To: GeoLookup, Controller, self.collection | *mll)
+        conf = self.config.get('rag', {}).get('bundle', {})
+        if not conf.get('enabled', False):
+            return None
+        path = Path(conf.get('path', 'bundle/pathfinder.bundle'))
+        if not path.is_absolute():
+            path = BASE_DIR / path
+        try:
+            bundle = IndexBundle(path).check(model=self.config['rag']['model_path'],
+                                             dataset_hash=self.dataset_hash(self.dataset_path))
+        except BundleError as e:
+            log.warning("[BUNDLE] Not using bundle: %s", e)
+            return None
+        log.info("[BUNDLE] Mapped %s (built %s, %s docs)",
+                 path.name, bundle.header.get('created_at'), bundle.header.get('count'))
+        return bundle
 
     # CONFIG / DATASET HELPERS
     def load_config(self, config_path):
@@ -861,13 +1120,13 @@ class Pipeline:
             with open(config_path, 'r', encoding='utf-8') as f:
                 return yaml.safe_load(f)
         except Exception as e:
-            print(f"Config Error: {e}")
+            log.error("Config Error: %s", e)
             exit(1)
 
     def dataset_hash(self, dataset_path):
-        # ("DATASET HASH": MD5 fingerprint of dataset.json used by ingest.py
-        #  to detect whether a re-index is needed.
-        #  From: ingest.py → To: rebuild_index() decision | *mll)
+        # ("DATASET HASH": MD5 fingerprint of dataset.json, compared with the
+        #  ingest manifest to skip sync_index() when nothing changed.
+        #  From: sync_index() / rebuild_index() → To: ingest manifest | *mll)
         hasher = hashlib.md5()
         try:
             with open(dataset_path, 'rb') as f:
@@ -876,28 +1135,24 @@ class Pipeline:
         except FileNotFoundError:
             return None
 
-    def load_dataset(self, dataset_path):
-        # ("LOAD DATASET": Reads dataset.json and inserts all Q&A pairs into
-        #  ChromaDB with rich metadata tags (place_name, activities_tag, location…).
-        #  Only called by rebuild_index() / ingest.py — not at query time.
-        #  From: rebuild_index() → To: self.collection (ChromaDB) | *mll)
+    def dataset_records(self, dataset_path):
+        # ("DATASET RECORDS": Reads dataset.json into {id: (document, metadata)}.
+        #  Ids are content hashes of the metadata (record_id()), so inserting
+        #  or editing one record leaves every other id unchanged. Exact
+        #  duplicate records collapse to one id.
+        #  From: load_dataset() / sync_index() → To: Chroma add/delete sets | *mll)
         try:
             with open(dataset_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
         except Exception as e:
-            print(f"Dataset error: {e}")
-            return
-
-        documents = []
-        metadatas = []
-        ids       = []
+            log.error("Dataset error: %s", e)
+            return None
 
-        for idx, item in enumerate(data):
+        records = {}
+        for item in data:
             if 'input' not in item or 'output' not in item:
                 continue
 
-            documents.append(item['input'])
-
             meta = {
                 "question":        item['input'],
                 "answer":          item['output'],
@@ -910,40 +1165,206 @@ class Pipeline:
                 "skill_level":     str(item.get('skill_level', '')).lower(),
                 "group_type":      str(item.get('group_type', '')).lower(),
             }
+            records.setdefault(record_id(meta), (item['input'], meta))
+        return records
+
+    def _add_records(self, collection, records, ids, batch_size=None, pause_seconds=0.0,
+                     progress=None):
+        batch_size = batch_size or max(1, len(ids))
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            collection.add(ids       = chunk,
+                           documents = [records[i][0] for i in chunk],
+                           metadatas = [records[i][1] for i in chunk])
+            if progress is not None:
+                progress(start + len(chunk), len(ids))
+            if pause_seconds and start + batch_size < len(ids):
+                time.sleep(pause_seconds)
+
+    def load_dataset(self, dataset_path, collection=None, batch_size=None, pause_seconds=0.0,
+                     progress=None):
+        # ("LOAD DATASET": Inserts every dataset.json Q&A pair into an empty
+        #  collection with rich metadata tags (place_name, activities_tag, location…).
+        #  Adds in batches with an optional pause between them so a rebuild
+        #  running next to live traffic leaves CPU for ask(). Returns the
+        #  number of docs added; progress(done, total) is called after each batch.
+        #  Only called by rebuild_index() — not at query time.
+        #  From: rebuild_index() → To: shadow collection (ChromaDB) | *mll)
+        collection = collection if collection is not None else self.collection
+        records    = self.dataset_records(dataset_path)
+        if not records:
+            return 0
 
-            metadatas.append(meta)
-            ids.append(str(idx))
-
-        if documents:
-            self.collection.add(documents=documents, metadatas=metadatas, ids=ids)
-            print(f"[INFO] Loaded {len(documents)} Q&A pairs with Metadata Tags")
-
-            sample = next((m for m in metadatas if m.get('activities_tag')), None)
-            if sample:
-                print(f"[INFO] Sample activities_tag: '{sample['activities_tag']}' "
-                      f"← should be words not characters")
-
-    def rebuild_index(self):
-        # ("REBUILD INDEX": Wipes and re-populates ChromaDB from dataset.json.
-        #  Called by ingest.py when a dataset change is detected.
-        #  From: ingest.py → To: load_dataset() | *mll)
-        print("[INGEST] Wiping old memory...")
+        self._add_records(collection, records, list(records), batch_size, pause_seconds, progress)
+        log.info("[PIPELINE] Loaded %s Q&A pairs with Metadata Tags", len(records))
+
+        sample = next((m for _, m in records.values() if m.get('activities_tag')), None)
+        if sample:
+            log.info("[PIPELINE] Sample activities_tag: '%s' ← should be words not characters",
+                     sample['activities_tag'])
+        return len(records)
+
+    def sync_index(self, force=False):
+        # ("SYNC INDEX": Incremental ingest into the active collection.
+        #    dataset_hash() == manifest hash → nothing to do (no embedding at all)
+        #    otherwise diff content-hash ids: add new ones, delete removed ones
+        #  An edited record is a new id plus a removed one, so work scales with
+        #  the size of the change. Adds land before deletes, so ask() never
+        #  sees a record missing mid-sync.
+        #  From: ingest.py → To: self.collection + ingest manifest | *mll)
+        with self._rebuild_lock:
+            collection   = self.index.open_active()   # Chroma, even when serving from a bundle
+            name         = collection.name
+            current_hash = self.dataset_hash(self.dataset_path)
+            if current_hash is None:
+                raise FileNotFoundError(f"Dataset not found: {self.dataset_path}")
+            if not force and self.index.manifest(name).get('dataset_hash') == current_hash:
+                log.info("[INGEST] dataset.json unchanged (%s) — '%s' is up to date",
+                         current_hash[:8], name)
+                return {"collection": name, "added": 0, "deleted": 0, "unchanged": True}
+
+            records  = self.dataset_records(self.dataset_path)
+            if records is None:
+                raise ValueError(f"Could not read dataset: {self.dataset_path}")
+            existing = set(collection.get(include=[])['ids'])
+            to_add   = [i for i in records if i not in existing]
+            to_del   = [i for i in existing if i not in records]
+
+            conf = self.config.get('rag', {}).get('rebuild', {})
+            if to_add:
+                self._add_records(collection, records, to_add,
+                                  batch_size    = conf.get('batch_size', 64),
+                                  pause_seconds = conf.get('pause_seconds', 0.05))
+            if to_del:
+                collection.delete(ids=to_del)
+
+            # A bundle no longer matches the data; serve the synced collection.
+            self.collection = collection
+            self.index.save_manifest(name, current_hash, collection.count())
+            log.info("[INGEST] Synced '%s': +%s added, -%s deleted, %s unchanged",
+                     name, len(to_add), len(to_del), len(records) - len(to_add))
+            return {"collection": name, "added": len(to_add), "deleted": len(to_del),
+                    "unchanged": False}
+
+    def rebuild_index(self, progress=None):
+        # ("REBUILD INDEX": Blue/green re-index from dataset.json. Fills a shadow
+        #  generation on a low-priority thread, validates count + smoke query,
+        #  then swaps self.collection in one assignment. ask() keeps serving
+        #  the old generation throughout; it stays on disk for rollback_index().
+        #  progress(done, total) reports docs added (app.py readiness).
+        #  From: ingest.py / POST /admin/rebuild → To: IndexManager.build() | *mll)
+        if not self._rebuild_lock.acquire(blocking=False):
+            raise RuntimeError("A rebuild is already running")
         try:
-            self.client.delete_collection(name=self.config['rag']['collection_name'])
-        except:
-            pass
+            conf   = self.config.get('rag', {}).get('rebuild', {})
+            result = {}
 
-        self.collection = self.client.create_collection(
-            name               = self.config['rag']['collection_name'],
-            embedding_function = self.embedding
-        )
+            def fill(shadow):
+                return self.load_dataset(self.dataset_path, shadow,
+                                         batch_size    = conf.get('batch_size', 64),
+                                         pause_seconds = conf.get('pause_seconds', 0.05),
+                                         progress      = progress)
 
-        self.load_dataset(self.dataset_path)
-        print(f"[INGEST] SUCCESS.")
+            def run():
+                lower_thread_priority(conf.get('nice', 10))
+                try:
+                    result['collection'] = self.index.build(fill)
+                except Exception as e:
+                    result['error'] = e
+
+            # Dedicated thread: niceness set on a pooled thread would stick to it.
+            worker = threading.Thread(target=run, name="index-rebuild", daemon=True)
+            worker.start()
+            worker.join()
+            if 'error' in result:
+                log.error("[INGEST] Rebuild failed, active index unchanged: %s", result['error'])
+                raise result['error']
+
+            self.collection = result['collection']
+            self.index.save_manifest(self.collection.name, self.dataset_hash(self.dataset_path),
+                                     self.collection.count())
+            log.info("[INGEST] SUCCESS. Serving '%s' (%s facts).",
+                     self.collection.name, self.collection.count())
+        finally:
+            self._rebuild_lock.release()
+
+    def follow_active_index(self):
+        # ("FOLLOW ACTIVE INDEX": Another process on the same storage (a second
+        #  uvicorn worker's /admin/rebuild or /admin/rollback, ingest.py) may
+        #  have moved active_index.json. At most every rag.index_check_seconds
+        #  one stat of the pointer decides whether to reopen self.collection.
+        #  Bundle mode never swaps. Returns True when it switched.
+        #  From: _ask_back() → To: self.collection | *mll)
+        now = time.monotonic()
+        if self.bundle is not None or now - self._index_seen < self._index_check:
+            return False
+        self._index_seen = now
+        stamp = self.index.pointer_stamp()
+        if stamp == self._index_stamp:
+            return False
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False            # our own rebuild / rollback is moving it
+        try:
+            self._index_stamp = stamp
+            if self.index.active_name() == self.collection.name:
+                return False
+            self.collection = self.index.open_active()
+        finally:
+            self._rebuild_lock.release()
+        log.info("[INDEX] Active index moved by another process → '%s'", self.collection.name)
+        return True
+
+    def rollback_index(self):
+        # ("ROLLBACK INDEX": Re-activates the generation the last rebuild replaced.
+        #  From: POST /admin/rollback → To: self.collection | *mll)
+        with self._rebuild_lock:
+            self.collection = self.index.rollback()
+        return self.collection.name
+
+    def warmup_queries(self):
+        # server.warmup.queries, else calibrate.py's TEST_QUERIES (one per
+        # category first, so a short max_queries still covers every route).
+        conf    = self.config.get('server', {}).get('warmup', {})
+        queries = list(conf.get('queries') or [])
+        if not queries:
+            from calibrate import TEST_QUERIES
+            firsts, rest, seen = [], [], set()
+            for query, category, _ in TEST_QUERIES:
+                (rest if category in seen else firsts).append(query)
+                seen.add(category)
+            queries = firsts + rest
+        return queries[:conf.get('max_queries', 12)]
+
+    def warm_up(self, queries=None, progress=None):
+        # ("WARM UP": Runs representative queries through ask(dry_run=True) so
+        #  model kernels, HNSW pages, geo/keyword matrices and lazy imports are
+        #  touched before the first user query. Nothing is cached or enqueued.
+        #  progress(done, total) after each query; per-query failures are
+        #  logged and skipped.
+        #  From: app.py lifespan (warming phase) → To: ask() | *mll)
+        queries   = self.warmup_queries() if queries is None else list(queries)
+        latencies = []
+        failed    = 0
+        for done, query in enumerate(queries, 1):
+            t0 = time.perf_counter()
+            try:
+                self.ask(query, dry_run=True)
+            except Exception as e:
+                failed += 1
+                log.warning("[WARMUP] '%s' failed: %s", query, e)
+            latencies.append(round(1000 * (time.perf_counter() - t0), 1))
+            if progress is not None:
+                progress(done, len(queries))
+        result = {"queries": len(queries), "failed": failed, "ms": latencies,
+                  "first_ms": latencies[0] if latencies else None,
+                  "last_ms": latencies[-1] if latencies else None}
+        log.info("[WARMUP] %s queries (%s failed), first %s ms → last %s ms",
+                 result["queries"], failed, result["first_ms"], result["last_ms"])
+        return result
 
     # MISC HELPERS
     def check_profanity(self, text):
-        return profanity.contains_profanity(text)
+        return self.profanity.contains_profanity(text)
 
     def normalize_query(self, text):
         return text.strip().lower()
@@ -1087,9 +1508,9 @@ class Pipeline:
                 for kw in required_keywords
             )
 
-        if not is_relevant:
-            print(f"[FILTER] ✗ Skipped '{meta.get('place_name', 'Unknown')}' — "
-                  f"no match for keywords: {required_keywords[:5]}")
+        if not is_relevant and log.isEnabledFor(logging.DEBUG):
+            log.debug("[FILTER] ✗ Skipped '%s' — no match for keywords: %s",
+                      meta.get('place_name', 'Unknown'), required_keywords[:5])
 
         return is_relevant
 
@@ -1104,11 +1525,12 @@ class Pipeline:
         # If the user explicitly typed a DIFFERENT specific place in this query,
         # drop the active pin to avoid a multi-place conflict.
         if any(p != active_pin_ctx for p in specific_places_found):
-            print(f"[CONTEXT] User query explicitly mentions another place. Dropping active pin: '{active_pin_ctx}'")
+            log.debug("[CONTEXT] User query explicitly mentions another place. Dropping active pin: '%s'",
+                      active_pin_ctx)
             return specific_places_found, None
 
         if active_pin_ctx not in specific_places_found:
-            print(f"[CONTEXT] Active pin injected: '{active_pin_ctx}'")
+            log.debug("[CONTEXT] Active pin injected: '%s'", active_pin_ctx)
             specific_places_found.append(active_pin_ctx)
 
         return specific_places_found, active_pin_ctx
@@ -1148,7 +1570,7 @@ class Pipeline:
                 where=where_filter
             )
         except Exception as e:
-            print(f"[ARBITRATE] Probe query failed: {e}")
+            log.warning("[ARBITRATE] Probe query failed: %s", e)
             return {'score': -1.0, 'kept': 0, 'top_conf': 0.0, 'town_ratio': 0.0}
 
         docs = results.get('documents', [[]])[0] if results.get('documents') else []
@@ -1314,7 +1736,7 @@ class Pipeline:
             if target_towns:
                 activity_query += f" {target_towns[0].lower()}"
 
-            print(f"[MULTI-ACT] Querying activity='{activity}' → '{activity_query}'")
+            log.debug("[MULTI-ACT] Querying activity='%s' → '%s'", activity, activity_query)
 
             results = self.collection.query(
                 query_texts=[activity_query],
@@ -1323,7 +1745,7 @@ class Pipeline:
             )
 
             if not results['documents'][0]:
-                print(f"[MULTI-ACT] No results for '{activity}'")
+                log.debug("[MULTI-ACT] No results for '%s'", activity)
                 continue
 
             # Collect loose candidates for Gemini pool (no activity filter, conf ≥ browsing_min)
@@ -1351,7 +1773,7 @@ class Pipeline:
                     best_meta = meta
 
             if not best_meta:
-                print(f"[MULTI-ACT] No passing doc for '{activity}'")
+                log.debug("[MULTI-ACT] No passing doc for '%s'", activity)
                 continue
 
             top_confidence = max(top_confidence, best_conf)
@@ -1366,8 +1788,8 @@ class Pipeline:
                     all_locations.append(loc_data)
                     seen_places.add(place_key)
 
-            print(f"[MULTI-ACT] ✓ '{activity}' → "
-                  f"'{best_meta.get('place_name','general')}' conf={best_conf:.3f}")
+            log.debug("[MULTI-ACT] ✓ '%s' → '%s' conf=%.3f",
+                      activity, best_meta.get('place_name','general'), best_conf)
 
         raw_answer = (" ".join(grouped_answers)
                       if grouped_answers else "I don't have information on that.")
@@ -1405,8 +1827,8 @@ class Pipeline:
         - Sparse dataset coverage for days 5+ may repeat activity categories.
         - 'luxury' options are limited on the island; mid-range is the ceiling.
         """
-        print(f"[ITINERARY] Generating {days}-day plan | "
-              f"activities={activities} | group={group_type} | budget={budget}")
+        log.info("[ITINERARY] Generating %s-day plan | activities=%s | group=%s | budget=%s",
+                 days, activities, group_type, budget)
 
         DAY1_SLOTS = [
             ('Morning',   'transport',     'Getting to Catanduanes'),
@@ -1446,7 +1868,7 @@ class Pipeline:
                 exclude_places = set()
             keywords  = self._build_required_keywords([activity_category])
             search_q  = f"{activity_category} catanduanes {extra_hint}".strip()
-            print(f"[ITINERARY] Fetching: '{search_q}'")
+            log.debug("[ITINERARY] Fetching: '%s'", search_q)
             results = self.collection.query(query_texts=[search_q], n_results=20)
             if not results['documents'][0]:
                 return None, None
@@ -1461,7 +1883,7 @@ class Pipeline:
                     continue
                 fact = meta.get('summary_offline', meta.get('answer', ''))
                 if fact:
-                    print(f"[ITINERARY] ✓ '{place_name}' conf={conf:.3f}")
+                    log.debug("[ITINERARY] ✓ '%s' conf=%.3f", place_name, conf)
                     return fact, place_name
             return None, None
 
@@ -1530,13 +1952,19 @@ class Pipeline:
             for p in all_locations
         ]
 
-        print(f"[ITINERARY] Done — {len(itinerary_days)} days, "
-              f"{sum(len(d['slots']) for d in itinerary_days)} slots, "
-              f"{len(formatted_locations)} map pins")
+        log.info("[ITINERARY] Done — %s days, %s slots, %s map pins",
+                 len(itinerary_days), sum(len(d['slots']) for d in itinerary_days),
+                 len(formatted_locations))
 
         return {"itinerary": itinerary_days, "notes": notes,
                 "locations": formatted_locations}
 
+    def _note_tier(self, info):
+        # Tier decision → explain plan and query log.
+        note("tier", info)
+        tag("tier", info["tier"])
+        tag("top_confidence", info["top_confidence"])
+
     # P5 HELPER: THREE-TIER CONFIDENCE FRAMING
     def _apply_confidence_tier(self, raw_answer, top_confidence, is_browsing, entities):
         # ("CONFIDENCE TIER FRAMING": Wraps the raw answer with context-appropriate
@@ -1560,23 +1988,29 @@ class Pipeline:
         """
         # Never modify browsing results or existing "no answer" responses
         if is_browsing:
+            self._note_tier({"tier": "unframed", "reason": "browsing", "top_confidence": round(top_confidence, 3)})
             return raw_answer
         if "don't have information" in raw_answer.lower():
+            self._note_tier({"tier": "unframed", "reason": "no answer", "top_confidence": round(top_confidence, 3)})
             return raw_answer
         if "i'm sorry" in raw_answer.lower() and "don't have" in raw_answer.lower():
+            self._note_tier({"tier": "unframed", "reason": "no answer", "top_confidence": round(top_confidence, 3)})
             return raw_answer
 
         is_budget_query = 'budget' in entities.get('activities', [])
 
         if top_confidence >= self.confidence_t1:
             # T1 — Full confidence, no modification needed
-            print(f"[TIER] T1 ({top_confidence:.3f} >= {self.confidence_t1}) — authoritative answer")
+            log.debug("[TIER] T1 (%.3f >= %s) — authoritative answer",
+                      top_confidence, self.confidence_t1)
+            self._note_tier({"tier": "T1", "top_confidence": round(top_confidence, 3)})
             return raw_answer
 
         elif top_confidence >= self.confidence_t2:
             # T2 — Qualified answer
-            print(f"[TIER] T2 ({top_confidence:.3f}, {self.confidence_t2}–{self.confidence_t1}) "
-                f"— qualified answer")
+            log.debug("[TIER] T2 (%.3f, %s–%s) — qualified answer",
+                      top_confidence, self.confidence_t2, self.confidence_t1)
+            self._note_tier({"tier": "T2", "top_confidence": round(top_confidence, 3)})
             framed = "Based on available records, " + raw_answer
             if is_budget_query:
                 framed += " Please verify prices directly on-site as they may have changed."
@@ -1584,45 +2018,131 @@ class Pipeline:
 
         else:
             # T3 — Hard stop, score too low to trust
-            print(f"[TIER] T3 ({top_confidence:.3f} < {self.confidence_t2}) "
-                f"— hard stop, redirecting")
+            log.debug("[TIER] T3 (%.3f < %s) — hard stop, redirecting",
+                      top_confidence, self.confidence_t2)
+            self._note_tier({"tier": "T3", "top_confidence": round(top_confidence, 3)})
             return ("I don't have reliable information on that yet. "
                     "You may want to ask at the local tourism office in Virac "
                     "or a nearby guide for accurate details.")
 
     # MAIN ASK METHOD — ENTRY POINT FOR ALL QUERIES
-    def ask(self, user_input, active_pin=None):
+    def ask(self, user_input, active_pin=None, explain=False, dry_run=False, enqueue=True,
+            log_query=True):
         # ("ASK METHOD": The single public query interface. Orchestrates the full
         #  pipeline from input validation to response assembly.
-        #  From: Flask/FastAPI server or guide_question() CLI
-        #  → To: returns {answer: str, locations: list} | *mll)
-        start_time = time.time()
+        #  explain=True adds response["explain"] — the query plan (route, probe
+        #  scores, filters, per-stage timings, cache and enqueue decisions).
+        #  dry_run=True runs the full RAG path without side effects: a cache
+        #  hit is ignored, nothing is cached or enqueued (warm_up()).
+        #  enqueue=False caches the answer but skips enhancement (prefill.py).
+        #  log_query=False keeps the call out of the query log (dry runs never
+        #  appear in it).
+        #  From: guide_question() CLI / scripts
+        #  → To: returns {answer, locations, request_id, enhancement_pending} | *mll)
+        response, state = self.ask_front(user_input, active_pin, explain, dry_run, enqueue, log_query)
+        if response is not None:
+            return response
+        return self.ask_back(state)
+
+    def _finish_response(self, response, trace):
+        # ("FINISH RESPONSE": Every ask() return passes here — attaches the
+        #  explain report and hands the query log its record (a dict built
+        #  from the trace + a non-blocking put; the writer thread does the I/O).
+        #  From: ask_front() / ask_back() returns → To: caller, QueryLog | *mll)
+        if trace is None:
+            return response
+        if trace.explain:
+            response["explain"] = trace.report()
+        if self.query_log is not None and trace.logged:
+            self.query_log.emit({
+                **trace.fields,
+                "route":    trace.route,
+                "total_ms": round(trace.elapsed() * 1000, 2),
+                "stages":   {name: round(sec * 1000, 2) for name, (sec, _) in trace.stages.items()},
+                "places":   [p.get("name") for p in response.get("locations") or []],
+                "enhancement_pending": response.get("enhancement_pending", False),
+            })
+        return response
+
+    def ask_front(self, user_input, active_pin=None, explain=False, dry_run=False, enqueue=True,
+                  log_query=True):
+        # ("ASK FRONT HALF": Gate checks + semantic cache lookup — the cheap part.
+        #  Returns (response, None) when it can answer on its own (reject,
+        #  greeting, cache hit) or (None, state) on a cache miss. A stage that
+        #  raises still closes the trace, with route "error".
+        #  From: ask() / app.py fast lane → To: ask_back() on the heavy lane | *mll)
+        try:
+            return self._ask_front(user_input, active_pin, explain, dry_run, enqueue, log_query)
+        except Exception:
+            finish_trace("error")
+            raise
+
+    def ask_back(self, state):
+        # ("ASK BACK HALF": Everything after a cache miss — entity extraction,
+        #  probes, Chroma retrieval, tiering, cache set and enhancer enqueue.
+        #  A stage that raises still closes the trace, with route "error".
+        #  From: ask() / app.py heavy lane with ask_front()'s state
+        #  → To: returns {answer, locations, request_id, enhancement_pending} | *mll)
+        try:
+            return self._ask_back(state)
+        except Exception:
+            finish_trace("error")
+            raise
+
+    def _ask_front(self, user_input, active_pin, explain, dry_run, enqueue, log_query):
+        start_time     = time.time()
+        trace          = start_trace(explain)
+        trace.logged   = log_query and not dry_run
+        trace.measured = not dry_run      # warm-up runs dry; keep it off /metrics
+
+        # request_id ties this answer to its enhancer job so the API can push
+        # the upgraded answer later (see push_hub.py).
+        request_id = uuid.uuid4().hex
 
         # Request-local pin context only (never stored on self to avoid cross-request bleed)
         active_pin_ctx = active_pin.strip() if isinstance(active_pin, str) and active_pin.strip() else None
         if active_pin_ctx:
-            print(f"[CONTEXT] Active pin from frontend: '{active_pin_ctx}'")
+            log.debug("[CONTEXT] Active pin from frontend: '%s'", active_pin_ctx)
+        if trace.logged:
+            trace.tag("request_id", request_id)
+            trace.tag("query", self.normalize_query(user_input))
+            trace.tag("active_pin", active_pin_ctx)
 
         # STEP 1 — GATE CHECKS
         # ("GATE CHECKS": Hard stops before any expensive processing.
-        #  Order: rate limit → profanity → intent validation → greeting.
+        #  Order: profanity → intent validation → greeting. (Per-client rate limiting
+        #  happens in app.py before ask() is called.)
         #  From: ask() entry → To: early return or continue to cache | *mll)
 
-        if not self.limiter.is_allowed():
-            return {"answer": f"Please wait {self.limiter.get_remaining_time()}s.",
-                    "locations": []}
+        with stage("profanity"):
+            is_profane = self.check_profanity(user_input)
+        if is_profane:
+            trace.note("gate", "profanity")
+            trace.tag("gate", "profanity")
+            finish_trace("gate")
+            return self._finish_response(
+                {"answer": "I cannot process that language.", "locations": []}, trace), None
 
-        if self.check_profanity(user_input):
-            return {"answer": "I cannot process that language.", "locations": []}
+        with stage("analyze_query"):
+            analysis = self.controller.analyze_query(user_input)
 
-        analysis = self.controller.analyze_query(user_input)
+        trace.note("intent", {"intent": analysis['intent'], "is_valid": analysis['is_valid'],
+                              "reason": analysis.get('reason')})
 
         if not analysis['is_valid'] or analysis['intent'] == 'nonsense':
-            print(f"[GATEKEEPER] Blocked: {user_input} (Reason: {analysis['reason']})")
-            return {"answer": self.controller.get_nonsense_response(), "locations": []}
+            log.info("[GATEKEEPER] Blocked: %s (Reason: %s)", user_input, analysis['reason'])
+            trace.note("gate", "nonsense")
+            trace.tag("gate", "nonsense")
+            finish_trace("gate")
+            return self._finish_response(
+                {"answer": self.controller.get_nonsense_response(), "locations": []}, trace), None
 
         if analysis['intent'] == 'greeting':
-            return {"answer": self.controller.get_greeting_response(), "locations": []}
+            trace.note("gate", "greeting")
+            trace.tag("gate", "greeting")
+            finish_trace("gate")
+            return self._finish_response(
+                {"answer": self.controller.get_greeting_response(), "locations": []}, trace), None
 
         normalized_base = self.normalize_query(user_input)
         normalized = normalized_base
@@ -1637,19 +2157,66 @@ class Pipeline:
         #  From: gate checks → To: early return (hit) or entity extraction (miss) | *mll)
         requested_count, is_explicit_count = parse_count_from_query(user_input)
         cached = self.semantic_cache.get(normalized, requested_count)
-        if cached:
+        trace.note("cache", {"key": normalized, "requested_count": requested_count,
+                             "outcome": f"hit_{cached[2]}" if cached else "miss",
+                             "dry_run": dry_run})
+        trace.tag("cache", f"hit_{cached[2]}" if cached else "miss")
+        trace.tag("requested_count", requested_count)
+        if cached and not dry_run:
             answer, places, version = cached
-            if version == 'raw':
-                self.enhancer.enqueue(normalized, answer, answer)
-            return {"answer": answer, "locations": places}
+            # A raw answer that is already waiting for the enhancer is not
+            # queued again, so a popular query can't pile up duplicate jobs.
+            skipped = ("already enhanced" if version != 'raw' else
+                       "enqueue disabled" if not enqueue else
+                       "no llm provider" if not self.enhancer.available() else
+                       "already queued" if self.enhancer.is_queued(normalized) else None)
+            queued  = skipped is None
+            if queued:
+                with stage("enqueue"):
+                    self.enhancer.enqueue(normalized, answer, answer, request_id=request_id)
+            trace.note("enqueue", {"queued": queued, "reason": skipped or "raw cache hit"})
+            finish_trace("cache_hit")
+            return self._finish_response(
+                {"answer": answer, "locations": places,
+                 "request_id": request_id, "enhancement_pending": queued}, trace), None
+
+        return None, {
+            "user_input":        user_input,
+            "start_time":        start_time,
+            "request_id":        request_id,
+            "active_pin_ctx":    active_pin_ctx,
+            "normalized_base":   normalized_base,
+            "normalized":        normalized,
+            "query_lower":       query_lower,
+            "requested_count":   requested_count,
+            "is_explicit_count": is_explicit_count,
+            "trace":             trace,
+            "dry_run":           dry_run,
+            "enqueue":           enqueue,
+        }
+
+    def _ask_back(self, state):
+        user_input        = state["user_input"]
+        start_time        = state["start_time"]
+        request_id        = state["request_id"]
+        active_pin_ctx    = state["active_pin_ctx"]
+        normalized_base   = state["normalized_base"]
+        normalized        = state["normalized"]
+        query_lower       = state["query_lower"]
+        requested_count   = state["requested_count"]
+        is_explicit_count = state["is_explicit_count"]
+        trace             = resume_trace(state["trace"])
+        explain           = trace.explain
+        self.follow_active_index()
 
         # STEP 3 — ENTITY EXTRACTION + CONTEXT RESOLUTION
         # ("ENTITY EXTRACTION": Pulls structured intent from the raw query —
         #  places, activities, listing intent, inferred town.
         #  From: cache miss → To: active pin injection, budget override, routing | *mll)
-        entities = self.entity_extractor.extract(user_input)
-        print(f"[ENTITIES] {entities}")
-        print(f"[COUNT] Requested count: {requested_count}")
+        with stage("entity_extract"):
+            entities = self.entity_extractor.extract(user_input)
+        log.debug("[ENTITIES] %s", entities)
+        log.debug("[COUNT] Requested count: %s", requested_count)
 
         # STEP 4 — BUDGET SIGNAL OVERRIDE
         # ("BUDGET OVERRIDE": Detects price-intent keywords and forces activity
@@ -1660,7 +2227,7 @@ class Pipeline:
         if any(re.search(r'\b' + re.escape(sig) + r'\b', query_lower) for sig in BUDGET_SIGNALS):
             if 'budget' not in entities.get('activities', []):
                 entities['activities'] = ['budget']
-                print(f"[ENTITIES] Budget signal detected — overriding activity to ['budget']")
+                log.debug("[ENTITIES] Budget signal detected — overriding activity to ['budget']")
 
         # STEP 5 — CLASSIFY PLACES: TOWNS vs SPECIFIC PLACES
         # ("PLACE CLASSIFICATION": Splits extracted places into municipalities
@@ -1677,7 +2244,7 @@ class Pipeline:
 
         if not target_towns and entities.get('inferred_town'):
             target_towns.append(entities['inferred_town'])
-            print(f"[PIPELINE] Inferred Town: {target_towns[0]}")
+            log.debug("[PIPELINE] Inferred Town: %s", target_towns[0])
 
         # STEP 6 — LISTING / BROWSING DETECTION
         # ("BROWSING DETECTION": Forces browsing mode if a count word/number is in
@@ -1687,7 +2254,7 @@ class Pipeline:
         is_browsing = entities.get('is_listing', False)
         if re.search(r'\b\d+\b', user_input) or any(w in user_input.lower() for w in WORD_NUMBERS):
             is_browsing = True
-            print(f"[PIPELINE] Listing forced ON due to count word/number in query")
+            log.debug("[PIPELINE] Listing forced ON due to count word/number in query")
 
         # STEP 7 — BUILD ACTIVITY KEYWORDS
         # ("ACTIVITY KEYWORDS": Expands activity labels to full synonym set.
@@ -1696,9 +2263,18 @@ class Pipeline:
         required_keywords = []
         if entities.get('activities'):
             required_keywords = self._build_required_keywords(entities['activities'])
-            print(f"[FILTER] Activity filter active. Keywords: {required_keywords}")
+            log.debug("[FILTER] Activity filter active. Keywords: %s", required_keywords)
         else:
-            print(f"[FILTER] No activity filter active — all document types will pass")
+            log.debug("[FILTER] No activity filter active — all document types will pass")
+
+        trace.note("entities", {
+            "places":            entities.get('places', []),
+            "activities":        entities.get('activities', []),
+            "is_listing":        entities.get('is_listing', False),
+            "target_towns":      target_towns,
+            "specific_places":   specific_places_found,
+            "required_keywords": len(required_keywords),
+        })
 
         # ("PIN ARBITRATION": When frontend provides active_pin, evaluate two retrieval paths:
         #  with pin-context vs without pin-context. Choose the stronger retrieval fit.
@@ -1710,39 +2286,45 @@ class Pipeline:
                 list(base_specific_places), active_pin_ctx
             )
             if pin_candidate:
-                with_pin = self._probe_retrieval_path(
-                    user_input=user_input,
-                    entities=entities,
-                    specific_places_found=pin_specific_places,
-                    target_towns=target_towns,
-                    required_keywords=required_keywords,
-                    is_browsing=is_browsing,
-                    active_pin_ctx=pin_candidate
-                )
-                without_pin = self._probe_retrieval_path(
-                    user_input=user_input,
-                    entities=entities,
-                    specific_places_found=base_specific_places,
-                    target_towns=target_towns,
-                    required_keywords=required_keywords,
-                    is_browsing=is_browsing,
-                    active_pin_ctx=None
-                )
-                print(f"[ARBITRATE] with_pin={with_pin} | without_pin={without_pin}")
+                with stage("pin_arbitration"):
+                    with_pin = self._probe_retrieval_path(
+                        user_input=user_input,
+                        entities=entities,
+                        specific_places_found=pin_specific_places,
+                        target_towns=target_towns,
+                        required_keywords=required_keywords,
+                        is_browsing=is_browsing,
+                        active_pin_ctx=pin_candidate
+                    )
+                    without_pin = self._probe_retrieval_path(
+                        user_input=user_input,
+                        entities=entities,
+                        specific_places_found=base_specific_places,
+                        target_towns=target_towns,
+                        required_keywords=required_keywords,
+                        is_browsing=is_browsing,
+                        active_pin_ctx=None
+                    )
+                log.debug("[ARBITRATE] with_pin=%s | without_pin=%s", with_pin, without_pin)
 
                 if with_pin['top_conf'] >= self.specific_min:
                     specific_places_found = pin_specific_places
                     active_pin_ctx = pin_candidate
-                    print("[ARBITRATE] Using active pin context (High Confidence)")
+                    log.debug("[ARBITRATE] Using active pin context (High Confidence)")
                 elif with_pin['score'] > without_pin['score'] + 0.05:
                     specific_places_found = pin_specific_places
                     active_pin_ctx = pin_candidate
-                    print("[ARBITRATE] Using active pin context (Higher Score)")
+                    log.debug("[ARBITRATE] Using active pin context (Higher Score)")
                 else:
                     specific_places_found = base_specific_places
                     active_pin_ctx = None
-                    print("[ARBITRATE] Dropping active pin context for this query")
+                    log.debug("[ARBITRATE] Dropping active pin context for this query")
+                trace.note("pin_arbitration", {"candidate": pin_candidate, "with_pin": with_pin,
+                                               "without_pin": without_pin,
+                                               "used_pin": active_pin_ctx is not None})
             else:
+                trace.note("pin_arbitration", {"candidate": None, "used_pin": False,
+                                               "reason": "active pin not a known place"})
                 specific_places_found = base_specific_places
                 active_pin_ctx = None
         else:
@@ -1772,60 +2354,73 @@ class Pipeline:
         )
         use_multi_activity = False
         if multi_candidate:
-            multi_probe = self._probe_multi_activity_path(entities['activities'], target_towns)
-            listing_probe = self._probe_retrieval_path(
-                user_input=user_input,
-                entities=entities,
-                specific_places_found=specific_places_found,
-                target_towns=target_towns,
-                required_keywords=required_keywords,
-                is_browsing=True,
-                active_pin_ctx=active_pin_ctx
-            )
-            print(f"[ROUTE ARBITRATE] multi={multi_probe} | listing={listing_probe}")
+            with stage("multi_activity_probe"):
+                multi_probe = self._probe_multi_activity_path(entities['activities'], target_towns)
+                listing_probe = self._probe_retrieval_path(
+                    user_input=user_input,
+                    entities=entities,
+                    specific_places_found=specific_places_found,
+                    target_towns=target_towns,
+                    required_keywords=required_keywords,
+                    is_browsing=True,
+                    active_pin_ctx=active_pin_ctx
+                )
+            log.debug("[ROUTE ARBITRATE] multi=%s | listing=%s", multi_probe, listing_probe)
             use_multi_activity = multi_probe['score'] > listing_probe['score'] + 0.05
             if use_multi_activity:
-                print(f"[ROUTE ARBITRATE] Selected MULTI-ACTIVITY route")
+                log.debug("[ROUTE ARBITRATE] Selected MULTI-ACTIVITY route")
             else:
                 is_browsing = True
-                print(f"[ROUTE ARBITRATE] Selected LISTING/BROWSING route")
+                log.debug("[ROUTE ARBITRATE] Selected LISTING/BROWSING route")
+            trace.note("route_arbitration", {"multi": multi_probe, "listing": listing_probe,
+                                             "selected": "multi_activity" if use_multi_activity
+                                                         else "browsing"})
 
         is_multi_activity = multi_candidate and use_multi_activity
         if is_multi_activity:
-            print(f"[PIPELINE] Multi-activity query — activities={entities['activities']}")
+            log.debug("[PIPELINE] Multi-activity query — activities=%s", entities['activities'])
 
         # ── PATH A: MULTI-ACTIVITY ────────────────────────────────────────────
         if is_multi_activity:
             # ("MULTI-ACTIVITY PATH": Delegates to _handle_multi_activity() which
             #  runs one sub-query per intent and merges the results.
             #  From: routing → To: raw_answer, final_locations, gemini_pool | *mll)
-            raw_answer, final_locations, top_rag_confidence, multi_pool = self._handle_multi_activity(
-                activities   = entities['activities'],
-                target_towns = target_towns,
-                user_input   = user_input
-            )
+            route = "multi_activity"
+            with stage("multi_activity_queries"):
+                raw_answer, final_locations, top_rag_confidence, multi_pool = self._handle_multi_activity(
+                    activities   = entities['activities'],
+                    target_towns = target_towns,
+                    user_input   = user_input
+                )
             gemini_pool.extend(multi_pool)
-            print(f"[MULTI-ACT] Gemini pool from sub-queries: {len(multi_pool)} docs")
+            log.debug("[MULTI-ACT] Gemini pool from sub-queries: %s docs", len(multi_pool))
+            trace.note("retrieval", {"activities": entities['activities'], "n_results_per_activity": 15,
+                                     "top_confidence": round(top_rag_confidence, 3),
+                                     "pool": len(multi_pool), "locations": len(final_locations)})
 
         # ── PATH B: MULTI-PLACE ───────────────────────────────────────────────
         elif specific_places_found and len(specific_places_found) > 1:
             # ("MULTI-PLACE PATH": Runs one focused query per named place and
             #  merges answers + pins. Strict exact-match filter on place_name.
             #  From: routing → To: raw_answer, final_locations | *mll)
-            print(f"[MULTI-PLACE] Detected {len(specific_places_found)} places: {specific_places_found}")
+            route = "multi_place"
+            log.debug("[MULTI-PLACE] Detected %s places: %s",
+                      len(specific_places_found), specific_places_found)
 
             all_answers   = []
             all_locations = []
             seen_places   = set()
+            place_plan    = []
 
             for place_name in specific_places_found:
-                print(f"[SEARCH] Querying: '{place_name}'")
+                log.debug("[SEARCH] Querying: '%s'", place_name)
 
-                place_results = self.collection.query(
-                    query_texts=[f"{place_name} location information"],
-                    n_results=3,
-                    where={"place_name": {"$eq": place_name}}
-                )
+                with stage("rag_query"):
+                    place_results = self.collection.query(
+                        query_texts=[f"{place_name} location information"],
+                        n_results=3,
+                        where={"place_name": {"$eq": place_name}}
+                    )
 
                 if place_results['documents'][0]:
                     meta       = place_results['metadatas'][0][0]
@@ -1833,9 +2428,16 @@ class Pipeline:
                     doc_text   = place_results['documents'][0][0]
                     confidence = 1 - place_results['distances'][0][0]
 
-                    print(f"[DEBUG AUDIT MULTI] Found ID: {doc_id}")
-                    print(f"[DEBUG AUDIT MULTI] Meta Name: {meta.get('place_name')} | conf={confidence:.3f}")
-                    print(f"[DEBUG AUDIT MULTI] Raw Text: {doc_text[:50]}...")
+                    log.debug("[DEBUG AUDIT MULTI] Found ID: %s", doc_id)
+                    log.debug("[DEBUG AUDIT MULTI] Meta Name: %s | conf=%.3f",
+                              meta.get('place_name'), confidence)
+                    log.debug("[DEBUG AUDIT MULTI] Raw Text: %s...", doc_text[:50])
+
+                    if explain:
+                        place_plan.append({"place": place_name,
+                                           "retrieved": len(place_results['documents'][0]),
+                                           "top_conf": round(confidence, 3),
+                                           "kept": confidence > self.browsing_min})
 
                     # P2: use config-driven browsing_min (was hardcoded 0.30)
                     if confidence > self.browsing_min:
@@ -1849,6 +2451,11 @@ class Pipeline:
                             if loc_data and loc_data['name'] not in seen_places:
                                 all_locations.append(loc_data)
                                 seen_places.add(loc_data['name'])
+                elif explain:
+                    place_plan.append({"place": place_name, "retrieved": 0, "kept": False})
+
+            trace.note("retrieval", {"n_results": 3, "where": "place_name $eq (per place)",
+                                     "places": place_plan, "threshold": self.browsing_min})
 
             if all_answers:
                 raw_answer      = " ".join(all_answers)
@@ -1872,8 +2479,9 @@ class Pipeline:
             else:
                 n_results = 100 if is_browsing else max(40, scaled_specific_n)
 
-            print(f"[PIPELINE] Mode: {'BROWSING' if is_browsing else 'SPECIFIC'} | "
-                  f"N={n_results} | Target towns: {target_towns}")
+            route = "browsing" if is_browsing else "single"
+            log.debug("[PIPELINE] Mode: %s | N=%s | Target towns: %s",
+                      'BROWSING' if is_browsing else 'SPECIFIC', n_results, target_towns)
 
             # Build ChromaDB where_filter:
             #   specific place → exact match on place_name
@@ -1881,34 +2489,39 @@ class Pipeline:
             #   general        → no filter
             where_filter = self._build_where_filter(specific_places_found, target_towns)
 
-            print(f"[PIPELINE] where_filter: {where_filter}")
+            log.debug("[PIPELINE] where_filter: %s", where_filter)
 
             search_query = user_input
             if active_pin_ctx:
                 search_query += f" {active_pin_ctx}"
             # ── ChromaDB query ────────────────────────────────────────────────
-            results = self.collection.query(
-                query_texts=[search_query],
-                n_results=n_results,
-                where=where_filter
-            )
+            with stage("rag_query"):
+                results = self.collection.query(
+                    query_texts=[search_query],
+                    n_results=n_results,
+                    where=where_filter
+                )
 
             total_raw = len(results['documents'][0]) if results['documents'][0] else 0
-            print(f"[RAG] Raw results from ChromaDB: {total_raw} documents")
+            log.debug("[RAG] Raw results from ChromaDB: %s documents", total_raw)
 
             answers_found   = []
             final_locations = []
             seen_places     = set()
 
+            filter_started = time.perf_counter()
+            debug          = log.isEnabledFor(logging.DEBUG)   # per-doc detail, checked once
+            dropped        = {"place": 0, "activity": 0, "confidence": 0, "location": 0}
             if results['documents'][0]:
                 for i, doc in enumerate(results['documents'][0]):
                     meta           = results['metadatas'][0][i]
                     confidence     = 1 - results['distances'][0][i]
                     place_name_tag = meta.get('place_name', 'N/A')
 
-                    print(f"[RAW DOC {i}] '{place_name_tag}' | conf={confidence:.3f} | "
-                          f"loc={meta.get('location', '?')} | "
-                          f"activities_tag='{meta.get('activities_tag', '')[:25]}'")
+                    if debug:
+                        log.debug("[RAW DOC %s] '%s' | conf=%.3f | loc=%s | activities_tag='%s'",
+                                  i, place_name_tag, confidence, meta.get('location', '?'),
+                                  meta.get('activities_tag', '')[:25])
 
                     # ("GEMINI POOL COLLECTION": Gathers loose candidates for the
                     #  background enhancer — town-scoped, no activity filter.
@@ -1933,40 +2546,49 @@ class Pipeline:
                     #  From: ChromaDB results loop → To: answers_found, final_locations | *mll)
                     if specific_places_found:
                         if meta.get('place_name') not in specific_places_found:
-                            print(f"[FILTER] ✗ Skipped '{place_name_tag}' — not in specific_places_found")
+                            dropped["place"] += 1
+                            if debug:
+                                log.debug("[FILTER] ✗ Skipped '%s' — not in specific_places_found",
+                                          place_name_tag)
                             continue
                     else:
                         if not self._passes_activity_filter(meta, required_keywords,
                                                             strict=is_browsing):
+                            dropped["activity"] += 1
                             continue
                         # P2: replaced hardcoded 0.30/0.40 with config-driven values
                         threshold = self.browsing_min if is_browsing else self.specific_min
                         if confidence < threshold:
-                            print(f"[FILTER] ✗ Skipped '{place_name_tag}' — "
-                                  f"confidence {confidence:.3f} < threshold {threshold}")
+                            dropped["confidence"] += 1
+                            if debug:
+                                log.debug("[FILTER] ✗ Skipped '%s' — confidence %.3f < threshold %s",
+                                          place_name_tag, confidence, threshold)
                             continue
                         if target_towns and meta.get('location') not in target_towns:
-                            print(f"[FILTER] ✗ Skipped '{place_name_tag}' — "
-                                  f"location '{meta.get('location')}' not in {target_towns}")
+                            dropped["location"] += 1
+                            if debug:
+                                log.debug("[FILTER] ✗ Skipped '%s' — location '%s' not in %s",
+                                          place_name_tag, meta.get('location'), target_towns)
                             continue
 
-                    print(f"[FILTER] ✓ Kept '{place_name_tag}'")
+                    if debug:
+                        log.debug("[FILTER] ✓ Kept '%s'", place_name_tag)
 
                     # P4: record confidence of the first kept doc (primary answer source)
                     if top_rag_confidence == 0.0:
                         top_rag_confidence = confidence
-                        print(f"[TIER] Primary doc confidence captured: {confidence:.3f}")
+                        log.debug("[TIER] Primary doc confidence captured: %.3f", confidence)
 
                     place_key = meta.get('place_name', '').strip()
                     if not place_key:
-                        print(f"[FILTER] ✓ Kept (no pin) — general/province-level entry")
+                        log.debug("[FILTER] ✓ Kept (no pin) — general/province-level entry")
                         answers_found.append(meta.get('summary_offline', meta['answer']))
                         continue
 
                     is_general_query = not specific_places_found and not target_towns
                     if is_general_query and answers_found:
-                        print(f"[FILTER] ✓ Kept text only (no pin) — general query, "
-                              f"specific place suppressed")
+                        log.debug("[FILTER] ✓ Kept text only (no pin) — general query, specific "
+                                  "place suppressed")
                         answers_found.append(meta.get('summary_offline', meta['answer']))
                         continue
 
@@ -1980,11 +2602,24 @@ class Pipeline:
                                 final_locations.append(loc_data)
                                 seen_places.add(loc_data['name'])
                             elif not loc_data:
-                                print(f"[GEO] ✗ No coordinates found for '{place_key}' "
-                                      f"— pin will not appear")
-
-            print(f"[PIPELINE] Docs after filtering: {len(answers_found)} | "
-                  f"Locations found: {len(final_locations)}")
+                                log.debug("[GEO] ✗ No coordinates found for '%s' — pin will not appear",
+                                          place_key)
+            record("rag_filter", time.perf_counter() - filter_started)
+
+            log.debug("[PIPELINE] Docs after filtering: %s | Locations found: %s",
+                      len(answers_found), len(final_locations))
+            trace.note("retrieval", {
+                "mode":         "browsing" if is_browsing else "specific",
+                "n_results":    n_results,
+                "where":        where_filter,
+                "search_query": search_query,
+                "retrieved":    total_raw,
+                "dropped":      dropped,
+                "kept":         len(answers_found),
+                "threshold":    (None if specific_places_found
+                                 else self.browsing_min if is_browsing else self.specific_min),
+                "pool":         len(gemini_pool),
+            })
 
             # ── ANSWER ASSEMBLY ───────────────────────────────────────────────
             if not answers_found:
@@ -2017,8 +2652,9 @@ class Pipeline:
                     
                     # 2. Create the curated list for the Text Response (Top N)
                     top_places_for_text = all_ranked_places[:requested_count]
-                    print(f"[BROWSING] Best-conf per place (Top {requested_count}): "
-                          f"{[(n, f'{c:.3f}') for n,(c,_) in top_places_for_text]}")
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug("[BROWSING] Best-conf per place (Top %s): %s", requested_count,
+                                  [(n, f'{c:.3f}') for n,(c,_) in top_places_for_text])
 
                     descriptions = []
                     for name, (conf, _) in top_places_for_text:
@@ -2034,7 +2670,15 @@ class Pipeline:
                             final_locations.append(loc_data)
                             seen_places.add(loc_data['name'])
 
-                    print(f"[BROWSING] Final descriptions ({len(descriptions)}): {descriptions}")
+                    log.debug("[BROWSING] Final descriptions (%s): %s",
+                              len(descriptions), descriptions)
+                    if explain:
+                        trace.note("browsing", {
+                            "ranked":  [(n, round(c, 3)) for n, (c, _) in all_ranked_places[:20]],
+                            "listed":  descriptions,
+                            "pinned":  len(places_to_pin),
+                            "explicit_count": is_explicit_count,
+                        })
 
                     raw_answer = ("Here are some options: " + "; ".join(descriptions) + "."
                                   if descriptions
@@ -2043,8 +2687,8 @@ class Pipeline:
                     # ── SPECIFIC ANSWER ASSEMBLY ──────────────────────────────
                     if len(specific_places_found) == 1:
                         raw_answer = answers_found[0]
-                        print(f"[SPECIFIC] Single place mode — using top result only "
-                              f"(of {len(answers_found)} found)")
+                        log.debug("[SPECIFIC] Single place mode — using top result only (of %s found)",
+                                  len(answers_found))
                     elif len(specific_places_found) > 1:
                         deduped_answers = list(dict.fromkeys(answers_found))
                         raw_answer = " ".join(deduped_answers)
@@ -2064,21 +2708,21 @@ class Pipeline:
                             # Docs passed the filter — use the best one(s)
                             deduped = list(dict.fromkeys(answers_found))
                             raw_answer = deduped[0]
-                            print(f"[SPECIFIC] General info — using top answer "
-                                  f"({len(answers_found)} docs passed filter)")
+                            log.debug("[SPECIFIC] General info — using top answer (%s docs passed filter)",
+                                      len(answers_found))
                         else:
                             # Nothing passed — guess from top RAG result
                             top_name = (results['metadatas'][0][0].get('place_name', '').strip()
                                         if results['metadatas'][0] else '')
                             if top_rag_confidence >= self.confidence_t1 and top_name:
-                                print(f"[SPECIFIC] T1 dominant match '{top_name}' "
-                                      f"({top_rag_confidence:.3f}) — did you mean?")
+                                log.debug("[SPECIFIC] T1 dominant match '%s' (%.3f) — did you mean?",
+                                          top_name, top_rag_confidence)
                                 raw_answer = f"I couldn't find an exact match. Did you mean {top_name}?"
                                 loc_data = self.geo_engine.get_coords(top_name)
                                 if loc_data and loc_data['name'] not in seen_places:
                                     final_locations = [loc_data]
                             else:
-                                print(f"[SPECIFIC] No dominant match — top-5 browsing fallback")
+                                log.debug("[SPECIFIC] No dominant match — top-5 browsing fallback")
                                 ranked = {}
                                 for i, meta in enumerate(results['metadatas'][0]):
                                     pname = meta.get('place_name', '').strip()
@@ -2117,10 +2761,17 @@ class Pipeline:
             and not entities.get('activities')
             and not answers_found  # only truly vague if we found nothing useful
         )
-        if not is_context_query and not is_vague_query:
-            self.semantic_cache.set(normalized, raw_answer, final_locations, requested_count)
+        dry_run = state.get("dry_run", False)
+        if dry_run:
+            log.debug("[CACHE] Dry run — not cached, not enqueued")
+        elif not is_context_query and not is_vague_query:
+            with stage("cache_set"):
+                self.semantic_cache.set(normalized, raw_answer, final_locations, requested_count)
         else:
-            print(f"[CACHE] Skipped caching — context-dependent or vague query")
+            log.debug("[CACHE] Skipped caching — context-dependent or vague query")
+        trace.note("cache_write", {"key": normalized, "stored": not (is_vague_query or dry_run),
+                                   "reason": "dry run" if dry_run else
+                                             "vague query" if is_vague_query else None})
 
         # ("ENHANCER ENQUEUE — FLAT POOL": Sends all collected candidate docs to
         #  Gemini/Groq regardless of confidence score. Tiering was removed because
@@ -2130,19 +2781,29 @@ class Pipeline:
         #  Gemini is better at picking the right doc from a full set than RAG is at
         #  pre-filtering. T1/T2/T3 is retained only for RAG response framing.
         #  From: cache write guard → To: BackgroundEnhancer.enqueue() | *mll)
-        print(f"[ENHANCER] Pool={len(gemini_pool)} docs — sending all to enhancer")
-
-        if not is_context_query and not is_vague_query:
-            self.enhancer.enqueue(
-                normalized, raw_answer, raw_answer,
-                candidates = gemini_pool,
-                rag_tier   = 'ALL',
-                is_browsing = is_browsing,
-                requested_count = requested_count,
-                is_explicit_count = is_explicit_count
-            )
+        log.debug("[ENHANCER] Pool=%s docs — sending all to enhancer", len(gemini_pool))
+
+        has_provider        = self.enhancer.available()
+        enhancement_pending = (not is_context_query and not is_vague_query and not dry_run
+                               and state.get("enqueue", True) and has_provider)
+        if enhancement_pending:
+            with stage("enqueue"):
+                self.enhancer.enqueue(
+                    normalized, raw_answer, raw_answer,
+                    candidates = gemini_pool,
+                    rag_tier   = 'ALL',
+                    is_browsing = is_browsing,
+                    requested_count = requested_count,
+                    is_explicit_count = is_explicit_count,
+                    request_id = request_id
+                )
         else:
-            print(f"[ENHANCER] Skipped enqueue — context/vague query")
+            log.debug("[ENHANCER] Skipped enqueue — vague query, dry run, enqueue disabled or no provider")
+        trace.note("enqueue", {"queued": enhancement_pending, "candidates": len(gemini_pool),
+                               "reason": None if enhancement_pending else
+                                         "dry run" if dry_run else
+                                         "vague query" if is_vague_query else
+                                         "no llm provider" if not has_provider else "enqueue disabled"})
 
 
         # ── SAFETY NET: catch-all pin resolver ────────────────────────────────
@@ -2156,19 +2817,20 @@ class Pipeline:
             answer_lower   = raw_answer.lower()
             net_added      = 0
 
-            for geo_name in self.geo_engine.place_names:          # lowercase list
-                if geo_name in answer_lower and geo_name not in {n.lower() for n in already_pinned}:
-                    loc_data = self.geo_engine.get_coords(geo_name)
-                    if loc_data and loc_data['name'] not in already_pinned:
-                        final_locations.append(loc_data)
-                        already_pinned.add(loc_data['name'])
-                        net_added += 1
+            with stage("safety_net"):                             # one pass over every geo name
+                for geo_name in self.geo_engine.place_names:      # lowercase list
+                    if geo_name in answer_lower and geo_name not in {n.lower() for n in already_pinned}:
+                        loc_data = self.geo_engine.get_coords(geo_name)
+                        if loc_data and loc_data['name'] not in already_pinned:
+                            final_locations.append(loc_data)
+                            already_pinned.add(loc_data['name'])
+                            net_added += 1
 
             if net_added:
-                print(f"[SAFETY NET] Resolved {net_added} extra pin(s) from answer text")
+                log.debug("[SAFETY NET] Resolved %s extra pin(s) from answer text", net_added)
         else:
             # Force locations to empty so the frontend does not redirect
-            print("[SAFETY NET] T3 Fallback detected — wiping locations")
+            log.debug("[SAFETY NET] T3 Fallback detected — wiping locations")
             final_locations = []
 
         # ── Format locations for frontend ─────────────────────────────────────
@@ -2182,11 +2844,14 @@ class Pipeline:
             for p in final_locations
         ]
 
-        print(f"[RESPONSE] Answer: '{raw_answer[:80]}...'")
-        print(f"[RESPONSE] Locations returned: {len(formatted_places)}")
-        print(f"[RESPONSE TIME] {time.time() - start_time:.3f}s")
+        log.debug("[RESPONSE] Answer: '%s...'", raw_answer[:80])
+        log.info("[RESPONSE] route=%s | locations=%s | %.3fs",
+                 route, len(formatted_places), time.time() - start_time)
+        finish_trace(route)
 
-        return {"answer": raw_answer, "locations": formatted_places}
+        return self._finish_response(
+            {"answer": raw_answer, "locations": formatted_places,
+             "request_id": request_id, "enhancement_pending": enhancement_pending}, trace)
 
     # CLI INTERFACE (DEV / TEST)
     def guide_question(self):
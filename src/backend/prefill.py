@@ -0,0 +1,292 @@
+"""
+prefill.py — Semantic cache prefill
+===================================
+Runs a query list through ask() so the semantic cache starts warm after a
+cache wipe, a dataset change or a deploy, instead of at a 0% hit rate.
+
+Sources (cache.prefill.sources, or --sources; most useful first):
+    calibrate       calibrate.py TEST_QUERIES
+    dataset         every dataset.json "input" question
+    <path or glob>  a query log — query_log.py JSONL (.gz too; {"query": ...}
+                    or {"question": ...}) or one query per line; ranked by
+                    how often it was asked
+
+Queries are de-duplicated by their normalized form and run in batches of
+batch_size on `workers` threads. After every batch the outcome of each query
+is written to the resume file (cache.prefill.state_path), so an interrupted
+run picks up where it stopped:
+
+    already in the cache   → skipped ("cached"), no ask() call
+    vague / gated          → remembered ("settled"), not asked again until
+                             dataset.json changes
+    stored / cached        → re-checked against the cache on the next run,
+                             so a wiped cache is refilled
+    failed                 → retried on the next run
+
+Enhancement is off unless --max-enqueue (cache.prefill.max_enqueue) > 0;
+at most that many newly cached answers per run are queued for the LLM
+enhancer, which drains them in the background (the server's worker picks up
+whatever this process leaves in the durable queue).
+
+Usage:
+    python prefill.py                               # config sources
+    python prefill.py --sources calibrate,dataset --max-enqueue 50
+    python prefill.py --sources "state/query_log/queries*.jsonl*" --limit 500
+    python prefill.py --fresh                       # ignore the resume file
+    POST /admin/prefill?sources=calibrate&max_enqueue=0   (running server:
+        202, runs in the background on the /ask admission lane; progress
+        and the final counts under GET /admin/status → "prefill")
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from log_setup import get_logger
+
+log = get_logger("prefill")
+
+BASE_DIR     = Path(__file__).parent
+DATASET_FILE = BASE_DIR / "dataset" / "dataset.json"
+CONFIG       = BASE_DIR / "config" / "config.yaml"
+
+DEFAULT_SOURCES = ["calibrate", "dataset"]
+RETRY           = ("stored", "cached", "failed")   # re-checked on every run
+
+_run_lock = threading.Lock()
+
+
+def _log_queries(path):
+    # One query log file (query_log.py JSONL, optionally .gz) or plain lines.
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                query = entry.get("question") or entry.get("query")
+                if isinstance(query, str):
+                    yield query
+            else:
+                yield line
+
+
+def load_queries(sources, dataset_path=DATASET_FILE):
+    # ("LOAD QUERIES": Query list from each source in order; a query log is
+    #  ranked most-asked first. Duplicates are removed later by prefill().
+    #  From: main() / POST /admin/prefill → To: prefill() | *mll)
+    queries = []
+    for source in sources:
+        if source == "calibrate":
+            from calibrate import TEST_QUERIES
+            queries.extend(q for q, _, _ in TEST_QUERIES)
+        elif source == "dataset":
+            with open(dataset_path, "r", encoding="utf-8") as f:
+                queries.extend(item["input"] for item in json.load(f) if item.get("input"))
+        else:
+            pattern = source if os.path.isabs(source) else str(BASE_DIR / source)
+            paths   = sorted(glob.glob(pattern))
+            if not paths:
+                raise FileNotFoundError(f"No query log matches '{source}'")
+            counts = Counter()
+            for path in paths:
+                counts.update(q.strip() for q in _log_queries(path) if q.strip())
+            queries.extend(q for q, _ in counts.most_common())
+    return queries
+
+
+class PrefillState:
+    # ("PREFILL STATE": Per-query outcomes of earlier runs, keyed by the md5
+    #  of the normalized query. Discarded when dataset.json changes, since
+    #  answers (and which queries are vague) depend on it. Saved atomically.
+    #  From: prefill() → To: cache.prefill.state_path | *mll)
+
+    def __init__(self, path, dataset_hash, fresh=False):
+        self.path         = Path(path)
+        self.dataset_hash = dataset_hash
+        self.queries      = {}
+        if fresh or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if saved.get("dataset_hash") == dataset_hash:
+            self.queries = saved.get("queries", {})
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dataset_hash": self.dataset_hash, "updated_at": time.time(),
+                       "queries": self.queries}, f)
+        os.replace(tmp, self.path)
+
+
+def state_path(config):
+    path = Path(config.get("cache", {}).get("prefill", {}).get("state_path", "state/cache_prefill.json"))
+    return path if path.is_absolute() else BASE_DIR / path
+
+
+def prefill(pipeline, queries, batch_size=16, workers=4, max_enqueue=0, fresh=False,
+            pause_seconds=0.0, progress=None, ask=None):
+    # ("PREFILL": De-duplicates the queries, skips those already cached or
+    #  settled by an earlier run, and asks the rest in parallel batches,
+    #  checkpointing after each batch. Returns outcome counts. `ask` replaces
+    #  pipeline.ask — the server passes one that goes through its admission
+    #  lane, so prefill never adds ask() calls beyond max_in_flight.
+    #  From: main() / POST /admin/prefill → To: Pipeline.ask() → SemanticCache | *mll)
+    from pipeline import parse_count_from_query
+
+    ask = ask or pipeline.ask
+
+    if not _run_lock.acquire(blocking=False):
+        raise RuntimeError("A prefill is already running")
+    try:
+        state = PrefillState(state_path(pipeline.config),
+                             pipeline.dataset_hash(pipeline.dataset_path), fresh)
+        todo, seen = [], set()
+        for query in queries:
+            normalized = pipeline.normalize_query(query)
+            key        = hashlib.md5(normalized.encode("utf-8")).hexdigest()
+            if not normalized or key in seen:
+                continue
+            seen.add(key)
+            todo.append((key, query, normalized))
+
+        counts  = Counter()
+        budget  = {"left": max(0, int(max_enqueue))}
+        lock    = threading.Lock()
+        started = time.perf_counter()
+
+        def run_one(item):
+            # → (outcome, queued); "settled" = skipped on an earlier run's outcome
+            key, query, normalized = item
+            previous = state.queries.get(key)
+            if previous and previous["outcome"] not in RETRY:
+                return "settled", False
+            requested_count, _ = parse_count_from_query(query)
+            if pipeline.semantic_cache.get(normalized, requested_count):
+                return "cached", False
+            with lock:
+                allow = budget["left"] > 0
+                budget["left"] -= allow
+            try:
+                result = ask(query, explain=True, enqueue=allow, log_query=False)
+            except Exception as e:
+                log.warning("[PREFILL] '%s' failed: %s", query, e)
+                result = {}
+            explain = result.get("explain") or {}
+            plan    = explain.get("plan", {})
+            queued  = bool(result.get("enhancement_pending"))
+            if allow and not queued:
+                with lock:
+                    budget["left"] += 1
+            if not result:
+                return "failed", False
+            if explain.get("route") == "cache_hit":
+                return "cached", False
+            if plan.get("cache_write", {}).get("stored"):
+                return "stored", queued
+            return plan.get("gate") or "not_cached", False
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prefill") as pool:
+            for start in range(0, len(todo), batch_size):
+                batch = todo[start:start + batch_size]
+                for (key, query, _), (outcome, queued) in zip(batch, pool.map(run_one, batch)):
+                    counts[outcome]    += 1
+                    counts["enqueued"] += queued
+                    if outcome != "settled":
+                        state.queries[key] = {"query": query, "outcome": outcome, "enqueued": queued,
+                                              "at": round(time.time(), 1)}
+                state.save()
+                done = min(start + batch_size, len(todo))
+                if progress is not None:
+                    progress(done, len(todo))
+                if pause_seconds and done < len(todo):
+                    time.sleep(pause_seconds)
+
+        return {
+            "queries":   len(queries),
+            "unique":    len(todo),
+            "outcomes":  dict(counts),
+            "seconds":   round(time.perf_counter() - started, 2),
+            "cache_size": pipeline.semantic_cache.cache_collection.count(),
+            "state":     str(state.path),
+        }
+    finally:
+        _run_lock.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefill the Pathfinder semantic cache")
+    parser.add_argument("--sources", help="comma-separated: calibrate, dataset, or a query log path/glob")
+    parser.add_argument("--limit", type=int, help="only the first N queries (after ranking)")
+    parser.add_argument("--batch-size", type=int, help="queries per checkpoint")
+    parser.add_argument("--workers", type=int, help="concurrent ask() calls")
+    parser.add_argument("--max-enqueue", type=int, help="enhancer jobs this run may queue (0 = none)")
+    parser.add_argument("--fresh", action="store_true", help="ignore the resume file")
+    args = parser.parse_args()
+
+    print("========================================")
+    print("   PATHFINDER CACHE PREFILL             ")
+    print("========================================")
+
+    from pipeline import Pipeline
+
+    print("⚙️  Initializing Pipeline...")
+    try:
+        pipeline = Pipeline(dataset_path=str(DATASET_FILE), config_path=str(CONFIG))
+    except Exception as e:
+        print(f"Failed to initialize pipeline: {e}")
+        sys.exit(1)
+
+    conf    = pipeline.config.get("cache", {}).get("prefill", {})
+    sources = args.sources.split(",") if args.sources else conf.get("sources", DEFAULT_SOURCES)
+    try:
+        queries = load_queries([s.strip() for s in sources if s.strip()])
+        if args.limit:
+            queries = queries[:args.limit]
+        print(f"📋 {len(queries)} queries from {', '.join(sources)}")
+
+        def report(done, total):
+            print(f"   - {done}/{total}")
+
+        result = prefill(pipeline, queries,
+                         batch_size    = args.batch_size or conf.get("batch_size", 16),
+                         workers       = args.workers or conf.get("workers", 4),
+                         max_enqueue   = conf.get("max_enqueue", 0) if args.max_enqueue is None
+                                         else args.max_enqueue,
+                         fresh         = args.fresh,
+                         pause_seconds = conf.get("pause_seconds", 0.0),
+                         progress      = report)
+        print(f"✅ {result['unique']} unique queries in {result['seconds']}s: {result['outcomes']}")
+        print(f"   - Cache now holds {result['cache_size']} entries (resume file: {result['state']})")
+    except Exception as e:
+        print(f"Prefill failed: {e}")
+        sys.exit(1)
+    finally:
+        pipeline.enhancer.stop()
+
+    print("========================================")
+    print("   DONE. Cache is warm.                 ")
+    print("========================================")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# =============================================================================
+# profiler.py — On-demand profiling of live /ask requests
+# =============================================================================
+# POST /admin/profile opens one profiling window that closes after `seconds`
+# or after `requests` /ask calls have finished, whichever comes first:
+#
+#   mode=sample    a sampler thread reads sys._current_frames() every
+#                  interval_ms, only for threads currently running a profiled
+#                  ask_front()/ask_back() → collapsed stacks (flamegraph.pl,
+#                  speedscope) or a JSON top-frames summary
+#   mode=cprofile  each joined request runs under cProfile; results are merged
+#                  → pstats text (top functions) or a binary .prof file
+#
+# Off by default (config.yaml server.profiling.enabled, env PROFILING_ENABLED).
+# With no window open, ask_endpoint() pays one attribute check (join() → None)
+# and runs the pipeline functions unwrapped.
+#
+# *mll
+# =============================================================================
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+
+MODES = ("sample", "cprofile")
+
+
+class ProfilerBusy(Exception):
+    # Raised when a profiling window is already open; app.py returns 409.
+    pass
+
+
+class ProfileSession:
+    # ("PROFILE SESSION": One profiling window — joined requests, collected
+    #  samples or merged cProfile stats.
+    #  From: RequestProfiler.start() → To: RequestProfiler.finish() result | *mll)
+
+    def __init__(self, mode, seconds, max_requests, interval):
+        self.mode         = mode
+        self.seconds      = seconds
+        self.max_requests = max_requests
+        self.interval     = interval
+        self.started      = time.monotonic()
+        self.ended        = None
+        self.joined       = 0
+        self.completed    = 0
+        self.skipped      = 0      # cprofile: requests run unprofiled (another was being profiled)
+        self.samples      = 0
+        self.stacks       = Counter()
+        self.stats        = None   # pstats.Stats, cprofile mode
+        self.threads      = {}     # thread ident → nesting depth, sample mode
+        self.closed       = False
+        self.done         = threading.Event()
+        self.lock         = threading.Lock()
+        self.cprofile_lock = threading.Lock()
+
+    def join(self):
+        with self.lock:
+            if self.closed or (self.max_requests and self.joined >= self.max_requests):
+                return None
+            self.joined += 1
+            return self
+
+    def leave(self):
+        with self.lock:
+            self.completed += 1
+            if self.max_requests and self.completed >= self.max_requests:
+                self.done.set()
+
+    def wait(self):
+        self.done.wait(self.seconds)
+
+    def wrap(self, fn):
+        runner = self._run_cprofile if self.mode == "cprofile" else self._run_sampled
+
+        def profiled(*args, **kwargs):
+            return runner(fn, args, kwargs)
+        return profiled
+
+    def _run_sampled(self, fn, args, kwargs):
+        ident = threading.get_ident()
+        with self.lock:
+            self.threads[ident] = self.threads.get(ident, 0) + 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self.lock:
+                depth = self.threads.pop(ident) - 1
+                if depth:
+                    self.threads[ident] = depth
+
+    def _run_cprofile(self, fn, args, kwargs):
+        # Only one request is under cProfile at a time: Python 3.12+ allows a
+        # single active profiler per process, and the merged numbers stay
+        # readable. Concurrent requests run unprofiled and are counted.
+        if not self.cprofile_lock.acquire(blocking=False):
+            with self.lock:
+                self.skipped += 1
+            return fn(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(fn, *args, **kwargs)
+            finally:
+                with self.lock:
+                    # A request that outlives the window is dropped; the
+                    # result has already been returned.
+                    if not self.closed:
+                        if self.stats is None:
+                            self.stats = pstats.Stats(profile)
+                        else:
+                            self.stats.add(profile)
+        finally:
+            self.cprofile_lock.release()
+
+    def sample_loop(self, stop_code):
+        # ("SAMPLER": Walks the stack of every thread currently inside a
+        #  profiled call, root first, stopping at the profiler's own frame so
+        #  executor/threading frames do not show up in every stack.
+        #  From: sampler thread → To: self.stacks (collapsed "a;b;c" → count) | *mll)
+        while not self.done.wait(self.interval):
+            with self.lock:
+                idents = list(self.threads)
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            collected = []
+            for ident in idents:
+                frame = frames.get(ident)
+                names = []
+                while frame is not None and frame.f_code is not stop_code:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if names:
+                    names.reverse()
+                    collected.append(";".join(names))
+            del frames
+            with self.lock:
+                if self.closed:
+                    return
+                self.stacks.update(collected)
+                self.samples += len(collected)
+
+    def summary(self):
+        return {
+            "mode":        self.mode,
+            "duration_s":  round((self.ended or time.monotonic()) - self.started, 3),
+            "requests":    self.completed,
+            "skipped":     self.skipped,
+            "samples":     self.samples if self.mode == "sample" else None,
+            "interval_ms": round(self.interval * 1000, 2) if self.mode == "sample" else None,
+        }
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_frames(self, limit=40):
+        # Self samples = frame at the leaf; total = frame anywhere in the stack.
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            names = stack.split(";")
+            self_counts[names[-1]] += count
+            for name in set(names):
+                total_counts[name] += count
+        return [{"frame": name, "self": self_counts[name], "total": count}
+                for name, count in total_counts.most_common(limit)]
+
+    def pstats_text(self, sort="cumulative", limit=40):
+        if self.stats is None:
+            return "No requests were profiled.\n"
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def pstats_dump(self):
+        # Same bytes pstats.Stats.dump_stats() writes; load with pstats.Stats(path).
+        return marshal.dumps(self.stats.stats if self.stats is not None else {})
+
+
+class RequestProfiler:
+    # ("REQUEST PROFILER": Holds at most one open ProfileSession.
+    #  From: app.py lifespan (from_config) → To: ask_endpoint() join(), /admin/profile | *mll)
+
+    def __init__(self, enabled=False, max_seconds=60, interval_ms=5):
+        self.enabled     = enabled
+        self.max_seconds = max_seconds
+        self.interval_ms = interval_ms
+        self._session    = None
+        self._lock       = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        conf    = (config or {}).get('server', {}).get('profiling', {})
+        enabled = os.getenv('PROFILING_ENABLED', str(conf.get('enabled', False)))
+        return cls(
+            enabled     = enabled.lower() in ('1', 'true', 'yes'),
+            max_seconds = conf.get('max_seconds', 60),
+            interval_ms = conf.get('interval_ms', 5),
+        )
+
+    def join(self):
+        # Hot path: a single attribute read while no window is open.
+        session = self._session
+        if session is None:
+            return None
+        return session.join()
+
+    def start(self, mode="sample", seconds=30, requests=None, interval_ms=None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        seconds  = min(max(float(seconds), 0.1), self.max_seconds)
+        interval = max(float(interval_ms or self.interval_ms), 1.0) / 1000.0
+        with self._lock:
+            if self._session is not None:
+                raise ProfilerBusy("a profiling window is already open")
+            session = ProfileSession(mode, seconds, requests or None, interval)
+            self._session = session
+
+        if mode == "sample":
+            stop_code = ProfileSession._run_sampled.__code__
+            threading.Thread(target=session.sample_loop, args=(stop_code,),
+                             name="profile-sampler", daemon=True).start()
+        return session
+
+    def finish(self, session):
+        with session.lock:
+            session.closed = True
+            session.ended  = time.monotonic()
+        session.done.set()
+        with self._lock:
+            if self._session is session:
+                self._session = None
+        return session
+
+    def stats(self):
+        session = self._session
+        return {
+            "enabled":     self.enabled,
+            "active":      session is not None,
+            "max_seconds": self.max_seconds,
+            "session":     session.summary() if session is not None else None,
+        }
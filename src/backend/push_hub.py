@@ -0,0 +1,214 @@
+# =============================================================================
+# push_hub.py — Delivers background-enhanced answers to waiting clients
+# =============================================================================
+# Flow:
+#   /ask returns request_id  →  client opens GET /ask/{request_id}/events (SSE)
+#   BackgroundEnhancer finishes the job  →  publish(request_id, payload)
+#   waiting SSE stream receives the payload and closes
+#
+# publish() is called from the enhancer's worker thread; all bookkeeping is
+# handed to the event loop with call_soon_threadsafe, so no locks are needed
+# and an idle subscriber costs one asyncio future — no thread per connection.
+# Results are kept for ttl_seconds so a client that subscribes after the job
+# already finished still gets it.
+#
+# Under several uvicorn workers the job may be leased by a different process
+# than the one holding the SSE stream (the durable queue is shared). With a
+# PushStore attached (config.yaml push.shared_path) publish() also writes the
+# payload to a shared SQLite file, and while a process has subscribers it
+# polls that file every poll_seconds for the request_ids they wait on.
+#
+# *mll
+# =============================================================================
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from log_setup import get_logger
+
+log = get_logger("push_hub")
+
+
+class PushStore:
+    # ("PUSH STORE": Shared request_id → payload file for all worker processes.
+    #  From: PushHub.publish (put) / PushHub._poll (fetch)
+    #  → To: state/push_results.db | *mll)
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS push_results (
+            request_id TEXT PRIMARY KEY,
+            payload    TEXT NOT NULL,
+            stored_at  REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_push_results_stored_at
+            ON push_results (stored_at);
+    """
+    MAX_IDS = 500   # stay under SQLite's bound-parameter limit
+
+    def __init__(self, path, ttl_seconds=180):
+        self.path        = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._lock       = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(self.SCHEMA)
+
+    def put(self, request_id, payload):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO push_results VALUES (?, ?, ?)",
+                               (request_id, json.dumps(payload), now))
+            self._conn.execute("DELETE FROM push_results WHERE stored_at < ?",
+                               (now - self.ttl_seconds,))
+
+    def fetch(self, request_ids):
+        # → {request_id: payload} for the ids that have a live result.
+        found, cutoff = {}, time.time() - self.ttl_seconds
+        request_ids   = list(request_ids)
+        with self._lock:
+            for i in range(0, len(request_ids), self.MAX_IDS):
+                chunk = request_ids[i:i + self.MAX_IDS]
+                rows  = self._conn.execute(
+                    "SELECT request_id, payload FROM push_results "
+                    f"WHERE stored_at >= ? AND request_id IN ({','.join('?' * len(chunk))})",
+                    (cutoff, *chunk))
+                found.update((request_id, json.loads(payload)) for request_id, payload in rows)
+        return found
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PushHub:
+    # ("PUSH HUB": request_id → result mailbox + set of waiting futures.
+    #  From: app.py lifespan (bind_loop) / BackgroundEnhancer listener (publish)
+    #  → To: /ask/{request_id}/events SSE stream (wait) | *mll)
+
+    def __init__(self, ttl_seconds=180, max_results=50000):
+        self.ttl_seconds  = ttl_seconds
+        self.max_results  = max_results
+        self.loop         = None
+        self.store        = None
+        self.poll_seconds = 0.5
+        self._poller      = None
+        self._results     = OrderedDict()   # request_id → (stored_at, payload), oldest first
+        self._waiters     = {}              # request_id → set[asyncio.Future]
+
+    def bind_loop(self, loop):
+        self.loop = loop
+
+    def attach_store(self, store, poll_seconds=0.5):
+        self.store        = store
+        self.poll_seconds = poll_seconds
+
+    # -- producer side (any thread) --------------------------------------------
+    def publish(self, request_id, payload):
+        # ("PUBLISH": Thread-safe entry point used as an enhancer listener.
+        #  From: BackgroundEnhancer._notify() → To: PushStore.put() for the
+        #  other workers, _deliver() on this process's loop | *mll)
+        if not request_id:
+            return
+        if self.store is not None:
+            try:
+                self.store.put(request_id, payload)
+            except sqlite3.Error as e:
+                log.warning("[PUSH] Shared store write failed for %s: %s", request_id, e)
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._deliver, request_id, payload)
+        except RuntimeError:
+            pass   # loop shutting down
+
+    # -- loop side --------------------------------------------------------------
+    def _deliver(self, request_id, payload):
+        self._prune()
+        self._results[request_id] = (time.time(), payload)
+        self._results.move_to_end(request_id)
+        for fut in self._waiters.pop(request_id, ()):
+            if not fut.done():
+                fut.set_result(payload)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        while self._results:
+            request_id, (stored_at, _) = next(iter(self._results.items()))
+            if stored_at >= cutoff and len(self._results) < self.max_results:
+                break
+            self._results.popitem(last=False)
+
+    async def _poll(self):
+        # ("POLL SHARED STORE": Runs while this process has subscribers; picks
+        #  up results published by the other workers.
+        #  From: wait() → To: _deliver() | *mll)
+        while self._waiters:
+            try:
+                found = await self.loop.run_in_executor(None, self.store.fetch, list(self._waiters))
+            except sqlite3.Error as e:
+                log.warning("[PUSH] Shared store read failed: %s", e)
+                found = {}
+            for request_id, payload in found.items():
+                if request_id in self._waiters:
+                    self._deliver(request_id, payload)
+            if self._waiters:
+                await asyncio.sleep(self.poll_seconds)
+
+    def _ensure_poller(self):
+        if self.store is not None and (self._poller is None or self._poller.done()):
+            self._poller = self.loop.create_task(self._poll())
+
+    async def wait(self, request_id, timeout):
+        # ("WAIT": Returns the payload if/when it arrives, None on timeout.
+        #  From: SSE stream generator in app.py | *mll)
+        hit = self._results.get(request_id)
+        if hit is not None:
+            return hit[1]
+
+        fut = self.loop.create_future()
+        self._waiters.setdefault(request_id, set()).add(fut)
+        self._ensure_poller()
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(request_id)
+            if waiters is not None:
+                waiters.discard(fut)
+                if not waiters:
+                    self._waiters.pop(request_id, None)
+            if not fut.done():
+                fut.cancel()
+
+    def stats(self):
+        return {
+            "stored_results": len(self._results),
+            "subscribers":    sum(len(w) for w in self._waiters.values()),
+            "shared_store":   str(self.store.path) if self.store is not None else None,
+        }
+
+
+def open_push_store(config, base_dir):
+    # ("PUSH STORE FACTORY": config.yaml push.shared_path (relative to the
+    #  backend directory); an empty path keeps pushes in-process only.
+    #  From: app.py lifespan → To: PushHub.attach_store() | *mll)
+    push_cfg = (config or {}).get('push', {})
+    path     = os.getenv('PUSH_STORE_PATH', push_cfg.get('shared_path', 'state/push_results.db'))
+    if not path:
+        return None
+    path = Path(path)
+    if not path.is_absolute():
+        path = Path(base_dir) / path
+    return PushStore(path, ttl_seconds=push_cfg.get('ttl_seconds', 180))
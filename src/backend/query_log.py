@@ -0,0 +1,231 @@
+# =============================================================================
+# query_log.py — Append-only JSONL log of every ask() call
+# =============================================================================
+# One record per request, written by a background thread so ask() only pays
+# for building a small dict and a non-blocking queue put:
+#
+#   {"ts": "2026-10-19T10:36:15.210Z", "request_id": "…",
+#    "query": "hotels in virac", "active_pin": null, "requested_count": null,
+#    "cache": "miss", "route": "browsing", "gate": null,
+#    "tier": "unframed", "top_confidence": 0.71, "total_ms": 41.2,
+#    "stages": {"cache_get": 2.1, "rag_search": 18.4, …},
+#    "places": ["Twin Rock Beach Resort", …], "enhancement_pending": true}
+#
+# Every process (uvicorn worker, prefill.py, …) writes its own live file
+# next to query_log.path (default state/query_log/queries.jsonl):
+# queries.<pid>.jsonl, so no two writers ever append to or rotate the same
+# file. At max_bytes it is rotated into queries-<UTC timestamp>-<pid>.jsonl[.gz];
+# the newest `backups` rotated files (all processes together) are kept. A
+# starting writer also rotates live files left behind by processes that are
+# gone. A full queue drops records (counted in
+# pathfinder_query_log_records_total{outcome="dropped"}) rather than slow
+# ask() down. Warm-up and prefill queries are not logged.
+#
+# Readers: prefill.py (--sources "state/query_log/queries*.jsonl*"),
+# bench/replay.py, threshold tuning. read_records() handles .gz files and
+# merges the per-process files back into timestamp order.
+#
+# *mll
+# =============================================================================
+
+import glob
+import gzip
+import heapq
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from queue import Queue, Empty, Full
+
+from log_setup import get_logger
+from metrics import REGISTRY
+
+log = get_logger("query_log")
+
+# ("QUERY LOG METRICS": Records written / dropped and the writer backlog.
+#  From: QueryLog → To: /metrics | *mll)
+QUERY_LOG_RECORDS = REGISTRY.counter(
+    "pathfinder_query_log_records_total", "Query log records by outcome", ("outcome",))
+QUERY_LOG_QUEUE = REGISTRY.gauge(
+    "pathfinder_query_log_queue_depth", "Query log records waiting for the writer")
+
+
+WRITE_BATCH = 1000   # records per write/flush (and rotation check)
+
+
+def _iso(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts)) + f".{int(ts % 1 * 1000):03d}Z"
+
+
+class QueryLog:
+    # ("QUERY LOG": Bounded queue + daemon writer thread. emit() never blocks;
+    #  the writer drains up to WRITE_BATCH queued records, appends and
+    #  flushes them in one write, then rotates if the file outgrew max_bytes.
+    #  `path` names the log; this process writes <stem>.<pid><suffix> next to it.
+    #  From: open_query_log() → To: Pipeline._finish_response() emit() | *mll)
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, backups=10, compress=True, max_queue=10000):
+        self.base      = Path(path)
+        self.pid       = os.getpid()
+        self.path      = self._live_path(self.pid)
+        self.max_bytes = int(max_bytes)
+        self.backups   = int(backups)
+        self.compress  = compress
+        self._queue    = Queue(maxsize=max_queue)
+        self._file     = None
+        self._stopped  = threading.Event()
+        self.base.parent.mkdir(parents=True, exist_ok=True)
+        QUERY_LOG_QUEUE.set_function(self._queue.qsize)
+        self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+        self._thread.start()
+
+    def emit(self, record):
+        # Called on the request path — O(1), never blocks.
+        record.setdefault("ts", _iso(time.time()))
+        try:
+            self._queue.put_nowait(record)
+        except Full:
+            QUERY_LOG_RECORDS.inc(outcome="dropped")
+
+    def close(self, timeout=2.0):
+        # Flush what is queued and stop the writer (atexit / scripts).
+        self._stopped.set()
+        self._thread.join(timeout=timeout)
+
+    def _live_path(self, pid):
+        return self.base.with_name(f"{self.base.stem}.{pid}{self.base.suffix}")
+
+    def _run(self):
+        try:
+            self._rotate_orphans()
+        except Exception as e:
+            log.warning("[QUERY LOG] Could not rotate orphaned live files: %s", e)
+        while not (self._stopped.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except Empty:
+                continue
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            try:
+                self._write(batch)
+                QUERY_LOG_RECORDS.inc(len(batch), outcome="written")
+            except Exception as e:
+                log.error("[QUERY LOG] Write failed, %s records lost: %s", len(batch), e)
+                QUERY_LOG_RECORDS.inc(len(batch), outcome="failed")
+                self._close_file()
+        self._close_file()
+
+    def _write(self, batch):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch))
+        self._file.flush()
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._close_file()
+            self._rotate(self.path, self.pid)
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+
+    def _rotate_orphans(self):
+        # Live files whose writer process is gone would otherwise never be
+        # rotated (or pruned). Two writers starting together may race for
+        # the same orphan; the loser's os.replace() finds it already moved.
+        prefix = self.base.stem + "."
+        for live in self.base.parent.glob(f"{prefix}*{self.base.suffix}"):
+            pid = live.name[len(prefix):-len(self.base.suffix) or None]
+            if pid.isdigit() and int(pid) != self.pid and not _pid_alive(int(pid)):
+                try:
+                    self._rotate(live, int(pid))
+                except FileNotFoundError:
+                    continue
+
+    def _rotate(self, live, pid):
+        # ("ROTATE": live file → queries-<timestamp>-<pid>.jsonl(.gz); prune
+        #  beyond `backups`. Runs on the writer thread, so emit() never waits
+        #  on it. Only ever called on this process's own live file or an
+        #  orphan, never on another live writer's.
+        #  From: _write() / _rotate_orphans() → To: rotated files read by read_records() | *mll)
+        now     = time.time()
+        stamp   = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)) + f"{int(now % 1 * 1000):03d}"
+        rotated = self.base.with_name(f"{self.base.stem}-{stamp}-{pid}{self.base.suffix}")
+        os.replace(live, rotated)
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            rotated.unlink()
+        old = sorted(glob.glob(str(self.base.with_name(f"{self.base.stem}-*"))))
+        for stale in old[:max(0, len(old) - self.backups)]:
+            try:
+                os.unlink(stale)
+            except FileNotFoundError:
+                pass        # pruned by another writer at the same time
+        log.info("[QUERY LOG] Rotated %s", rotated.name)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True             # exists, owned by another user
+    return True
+
+
+def _read_file(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def _record_ts(record):
+    return (record.get("ts") or "") if isinstance(record, dict) else ""
+
+
+def read_records(pattern):
+    # ("READ RECORDS": Yields records from every file matching the glob in
+    #  "ts" order: each file is already in order (one writer), so the
+    #  per-process files are merged lazily. .gz is read transparently.
+    #  Skips lines that fail to parse (a torn last line after a crash).
+    #  From: prefill.py / bench.replay → To: query dicts | *mll)
+    paths = sorted(glob.glob(str(pattern)), key=os.path.getmtime)
+    yield from heapq.merge(*(_read_file(path) for path in paths), key=_record_ts)
+
+
+def open_query_log(config, base_dir):
+    # ("QUERY LOG FACTORY": config.yaml query_log.* → QueryLog, or None when
+    #  disabled (env QUERY_LOG_ENABLED=0 overrides). Relative paths resolve
+    #  against the backend directory.
+    #  From: Pipeline.__init__ → To: self.query_log | *mll)
+    conf    = (config or {}).get('query_log', {})
+    enabled = os.getenv('QUERY_LOG_ENABLED')
+    if not (conf.get('enabled', False) if enabled is None else enabled.lower() in ('1', 'true', 'yes')):
+        return None
+    path = Path(os.getenv('QUERY_LOG_PATH', conf.get('path', 'state/query_log/queries.jsonl')))
+    if not path.is_absolute():
+        path = Path(base_dir) / path
+    return QueryLog(
+        path,
+        max_bytes = conf.get('max_bytes', 50 * 1024 * 1024),
+        backups   = conf.get('backups', 10),
+        compress  = conf.get('compress', True),
+        max_queue = conf.get('max_queue', 10000),
+    )
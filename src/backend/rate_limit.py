@@ -0,0 +1,216 @@
+# =============================================================================
+# rate_limit.py — Per-client token-bucket rate limiting for the API layer
+# =============================================================================
+# One bucket per client instead of one window for the whole server, so a busy
+# kiosk only throttles itself.
+#
+#   client IP    → the peer address; X-Forwarded-For is only read when the
+#                  peer is one of security.rate_limit.trusted_proxies
+#   client key   → IP + session header (X-Session-Id) if sent, else the IP
+#   buckets      → per client key: capacity = max_request, refilled at
+#                  max_request / period_seconds; per IP: per_ip_max_request
+#                  over the same period, shared by every session from it
+#   check(request) → (allowed, retry_after_seconds)
+#
+# The session header is client-controlled, so it only splits an IP's budget
+# (kiosks behind one NAT do not throttle each other) and never adds to it:
+# rotating the header hits the per-IP bucket first, and no session bucket is
+# created for a request that bucket refuses. Load-test tools skip the limiter
+# with the bypass_token (env RATE_LIMIT_BYPASS_TOKEN) in X-RateLimit-Bypass.
+#
+# Buckets live in a sharded map: key → hash → one of N shards, each with its
+# own lock and OrderedDict. Contention is limited to clients that happen to
+# share a shard, and each shard is kept in least-recently-seen order so idle
+# buckets are evicted from the front in O(evicted) on the next access.
+#
+# Configured via config.yaml security.rate_limit.
+#
+# *mll
+# =============================================================================
+
+import hmac
+import ipaddress
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+
+RATE_LIMIT_DECISIONS = REGISTRY.counter(
+    "pathfinder_rate_limit_decisions_total",
+    "Per-client rate limit decisions on /ask", ("result",))
+RATE_LIMIT_CLIENTS = REGISTRY.gauge(
+    "pathfinder_rate_limit_clients", "Client buckets currently tracked")
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens, updated):
+        self.tokens  = tokens
+        self.updated = updated
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets")
+
+    def __init__(self):
+        self.lock    = threading.Lock()
+        self.buckets = OrderedDict()   # key → _Bucket, least recently seen first
+
+
+class ClientRateLimiter:
+    # ("CLIENT RATE LIMITER": Token bucket per client in a lock-striped map.
+    #  A request costs one token; a full bucket allows a burst of max_request.
+    #  From: app.py lifespan (from_config) → To: POST /ask throttle check | *mll)
+
+    BYPASS_HEADER = "X-RateLimit-Bypass"
+
+    def __init__(self, max_request=6, period_seconds=70, shards=64,
+                 idle_seconds=600, max_clients=100000, per_ip_max_request=None,
+                 client_header="X-Session-Id", trusted_proxies=(), bypass_token=None):
+        per_ip_max_request = per_ip_max_request or max_request * 10
+        self.capacity     = float(max_request)
+        self.refill_rate  = max_request / float(period_seconds)   # tokens per second
+        self.ip_capacity  = float(per_ip_max_request)
+        self.ip_refill    = per_ip_max_request / float(period_seconds)
+        self.client_header   = client_header
+        self.trusted_proxies = [ipaddress.ip_network(p, strict=False) for p in trusted_proxies or ()]
+        self.bypass_token    = bypass_token or None
+        self.idle_seconds = idle_seconds
+        self.shard_cap    = max(1, max_clients // shards)
+        self.shards       = [_Shard() for _ in range(shards)]
+        RATE_LIMIT_CLIENTS.set_function(self.client_count)
+
+    @classmethod
+    def from_config(cls, config):
+        conf = (config or {}).get('security', {}).get('rate_limit', {})
+        return cls(
+            max_request    = conf.get('max_request', 6),
+            period_seconds = conf.get('period_seconds', 70),
+            shards         = conf.get('shards', 64),
+            idle_seconds   = conf.get('idle_seconds', 600),
+            max_clients    = conf.get('max_clients', 100000),
+            per_ip_max_request = conf.get('per_ip_max_request'),
+            client_header      = conf.get('client_header', 'X-Session-Id'),
+            trusted_proxies    = conf.get('trusted_proxies') or (),
+            bypass_token       = os.getenv('RATE_LIMIT_BYPASS_TOKEN', conf.get('bypass_token')),
+        )
+
+    def _shard(self, key):
+        return self.shards[hash(key) % len(self.shards)]
+
+    def _evict(self, shard, now):
+        # Front of the OrderedDict is the least recently seen client. An idle
+        # bucket has fully refilled, so dropping it changes nothing for that client.
+        buckets = shard.buckets
+        cutoff  = now - self.idle_seconds
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if bucket.updated >= cutoff and len(buckets) <= self.shard_cap:
+                break
+            buckets.popitem(last=False)
+
+    def _take(self, key, capacity, refill_rate, now, tokens=1.0):
+        # Takes `tokens` from key's bucket (a negative amount refunds).
+        shard = self._shard(key)
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                bucket = shard.buckets[key] = _Bucket(capacity, now)
+            else:
+                elapsed        = now - bucket.updated
+                bucket.tokens  = min(capacity, bucket.tokens + elapsed * refill_rate)
+                bucket.updated = now
+                shard.buckets.move_to_end(key)
+
+            if bucket.tokens >= tokens:
+                bucket.tokens = min(capacity, bucket.tokens - tokens)
+                allowed, retry_after = True, 0
+            else:
+                allowed     = False
+                retry_after = max(1, int((tokens - bucket.tokens) / refill_rate + 0.999))
+
+            self._evict(shard, now)
+        return allowed, retry_after
+
+    def acquire(self, key, ip_key=None):
+        # ("ACQUIRE": Takes one token from the IP's bucket, then one from the
+        #  client's. Returns (True, 0) when allowed, (False, seconds until a
+        #  token) when not. A refused session gives its IP token back so one
+        #  busy kiosk does not drain the others behind the same NAT.
+        #  From: check() → To: 429 with Retry-After | *mll)
+        now = time.monotonic()
+        if ip_key is not None and ip_key != key:
+            allowed, retry_after = self._take(ip_key, self.ip_capacity, self.ip_refill, now)
+            if allowed:
+                allowed, retry_after = self._take(key, self.capacity, self.refill_rate, now)
+                if not allowed:
+                    self._take(ip_key, self.ip_capacity, self.ip_refill, now, tokens=-1.0)
+        else:
+            allowed, retry_after = self._take(key, self.capacity, self.refill_rate, now)
+
+        RATE_LIMIT_DECISIONS.inc(result="allowed" if allowed else "throttled")
+        return allowed, retry_after
+
+    def check(self, request):
+        # ("CHECK REQUEST": Bypass token, else acquire() on the request's
+        #  client key under its IP bucket.
+        #  From: app.py ask_endpoint() → To: 429 with Retry-After | *mll)
+        if self.bypass_token:
+            token = request.headers.get(self.BYPASS_HEADER) or ""
+            if hmac.compare_digest(token.encode(), self.bypass_token.encode()):
+                RATE_LIMIT_DECISIONS.inc(result="bypassed")
+                return True, 0
+        key, ip_key = client_key(request, self.client_header, self.trusted_proxies)
+        return self.acquire(key, ip_key)
+
+    def client_count(self):
+        return sum(len(shard.buckets) for shard in self.shards)
+
+    def stats(self):
+        return {
+            "clients":        self.client_count(),
+            "shards":         len(self.shards),
+            "max_request":    int(self.capacity),
+            "per_ip_max_request": int(self.ip_capacity),
+            "period_seconds": round(self.capacity / self.refill_rate, 2),
+            "bypass_enabled": self.bypass_token is not None,
+        }
+
+
+def _trusted(address, trusted_proxies):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_ip(request, trusted_proxies=()):
+    # ("CLIENT IP": The peer address. Behind a configured proxy the
+    #  right-most X-Forwarded-For hop that is not itself a trusted proxy —
+    #  anything to its left was written by the client.
+    #  From: client_key() → To: per-IP bucket | *mll)
+    host = request.client.host if request.client else "unknown"
+    if not trusted_proxies or not _trusted(host, trusted_proxies):
+        return host
+    hops = [h.strip() for h in (request.headers.get("X-Forwarded-For") or "").split(",") if h.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else host
+
+
+def client_key(request, header="X-Session-Id", trusted_proxies=()):
+    # ("CLIENT KEY": (client key, IP key). The session header, when the
+    #  frontend sends one, only splits the IP's budget between kiosks behind
+    #  one NAT; without it both keys are the IP.
+    #  From: ClientRateLimiter.check() → To: acquire() | *mll)
+    ip_key  = "ip:" + client_ip(request, trusted_proxies)
+    session = request.headers.get(header) if header else None
+    if session:
+        return ip_key + "|s:" + session[:128], ip_key
+    return ip_key, ip_key
@@ -0,0 +1,99 @@
+# =============================================================================
+# readiness.py — Startup phases and progress for /health and /admin/status
+# =============================================================================
+# app.py builds the pipeline in the background after the server starts
+# listening, so the process answers /health from the first second and
+# reports where it is:
+#
+#   loading   → Pipeline(): imports, model, Chroma, bundle, geo, cache ...
+#   indexing  → rebuild_index() when the collection is empty (docs added)
+#   warming   → server.warmup queries through ask() (torch / HNSW first touch)
+#   ready     → pipeline published; /ask served
+#   failed    → startup raised; error kept for /health
+#
+# progress is {done, total, pct} within the current phase. Phase durations
+# are exported as pathfinder_readiness_phase_seconds{phase} and the current
+# phase as pathfinder_ready (1 once ready).
+#
+# *mll
+# =============================================================================
+
+import threading
+import time
+
+from log_setup import get_logger
+from metrics import REGISTRY
+
+log = get_logger("readiness")
+
+PHASES = ("loading", "indexing", "warming", "ready", "failed")
+
+# ("READINESS METRICS": Time spent in each startup phase + a ready flag.
+#  From: Readiness.enter() → To: /metrics | *mll)
+READINESS_PHASE_SECONDS = REGISTRY.gauge(
+    "pathfinder_readiness_phase_seconds", "Time spent in each readiness phase", ("phase",))
+READY = REGISTRY.gauge("pathfinder_ready", "1 once startup finished and /ask is served")
+
+
+class Readiness:
+    # ("READINESS": Thread-safe current phase + progress. Written by the
+    #  startup task (and the indexing/warm-up progress callbacks), read by
+    #  /health and /admin/status.
+    #  From: app.py lifespan → To: /health, /admin/status | *mll)
+
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self.started   = time.monotonic()
+        self.phase     = "loading"
+        self.entered   = self.started
+        self.done      = 0
+        self.total     = None
+        self.detail    = None
+        self.error     = None
+        self.durations = {}
+        READY.set(0)
+
+    @property
+    def ready(self):
+        return self.phase == "ready"
+
+    def enter(self, phase, total=None, detail=None):
+        if phase not in PHASES:
+            raise ValueError(f"unknown readiness phase '{phase}'")
+        with self._lock:
+            now = time.monotonic()
+            self.durations[self.phase] = round(now - self.entered, 3)
+            READINESS_PHASE_SECONDS.set(now - self.entered, phase=self.phase)
+            log.info("[READINESS] %s done in %.1fs → %s", self.phase, now - self.entered, phase)
+            self.phase, self.entered = phase, now
+            self.done, self.total, self.detail = 0, total, detail
+        READY.set(1 if phase == "ready" else 0)
+
+    def progress(self, done, total=None, detail=None):
+        # Progress callback: progress(done, total) from rebuild / warm-up.
+        with self._lock:
+            self.done = done
+            if total is not None:
+                self.total = total
+            if detail is not None:
+                self.detail = detail
+
+    def fail(self, error):
+        self.error = f"{type(error).__name__}: {error}"
+        self.enter("failed", detail=self.error)
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            pct = round(100.0 * self.done / self.total, 1) if self.total else None
+            return {
+                "phase":     self.phase,
+                "ready":     self.phase == "ready",
+                "progress":  {"done": self.done, "total": self.total, "pct": pct,
+                              "detail": self.detail},
+                "in_phase_s": round(now - self.entered, 3),
+                "elapsed_s": round((self.entered if self.phase in ("ready", "failed") else now)
+                                   - self.started, 3),
+                "phases":    dict(self.durations),
+                "error":     self.error,
+            }
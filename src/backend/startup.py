@@ -0,0 +1,121 @@
+# =============================================================================
+# startup.py — Per-phase cold-start timing and memory report
+# =============================================================================
+# Heavy dependencies (chromadb, sentence_transformers/torch, onnxruntime,
+# better_profanity) are imported inside the phase that first needs them, so
+# each phase's numbers include its own imports:
+#
+#   imports → config → model → chroma_client → bundle → geo → cache →
+#   enhancer → controller → profanity → collection [→ rebuild]
+#
+#   with report.phase("model"):
+#       ...
+#
+# Every phase records wall time and RSS after it (plus the delta), is logged
+# as it ends, and is exported as pathfinder_startup_phase_seconds{phase} /
+# pathfinder_startup_phase_rss_bytes{phase}. summary() is served under
+# /admin/status → "startup" for tracking cold-start regressions; the
+# listener (readiness.py) is told as each phase begins.
+#
+# *mll
+# =============================================================================
+
+import sys
+import time
+from contextlib import contextmanager
+
+from log_setup import get_logger
+from metrics import REGISTRY
+
+log = get_logger("startup")
+
+# Pipeline load phases in order — the "loading" progress total.
+LOAD_PHASES = ("imports", "config", "model", "chroma_client", "bundle", "geo", "cache",
+               "enhancer", "controller", "profanity", "collection")
+
+# ("STARTUP METRICS": Last startup's per-phase duration and RSS.
+#  From: StartupReport.phase() → To: /metrics | *mll)
+STARTUP_PHASE_SECONDS = REGISTRY.gauge(
+    "pathfinder_startup_phase_seconds", "Duration of each startup phase", ("phase",))
+STARTUP_PHASE_RSS = REGISTRY.gauge(
+    "pathfinder_startup_phase_rss_bytes", "Resident set size at the end of each startup phase", ("phase",))
+
+
+def rss_bytes():
+    # Current resident set size; ru_maxrss (peak) where /proc is unavailable.
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def rss_mb():
+    return round(rss_bytes() / (1024 * 1024), 1)
+
+
+class StartupReport:
+    # ("STARTUP REPORT": Ordered list of timed phases for one process start.
+    #  From: app.py lifespan / Pipeline.__init__ → To: logs, /metrics,
+    #  /admin/status | *mll)
+
+    def __init__(self, listener=None):
+        self.listener  = listener       # listener(phase, phases_done) as a phase begins
+        self.started   = time.perf_counter()
+        self.rss_start = rss_bytes()
+        self.phases    = []
+        self.finished  = None
+        self.rss_end   = None
+
+    @contextmanager
+    def phase(self, name):
+        if self.listener is not None:
+            self.listener(name, len(self.phases))
+        t0     = time.perf_counter()
+        before = rss_bytes()
+        error  = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - t0
+            after   = rss_bytes()
+            entry   = {
+                "phase":        name,
+                "ms":           round(1000 * seconds, 1),
+                "rss_mb":       round(after / (1024 * 1024), 1),
+                "rss_delta_mb": round((after - before) / (1024 * 1024), 1),
+            }
+            if error:
+                entry["error"] = error
+            self.phases.append(entry)
+            STARTUP_PHASE_SECONDS.set(seconds, phase=name)
+            STARTUP_PHASE_RSS.set(after, phase=name)
+            log.info("[STARTUP] %-14s %8.1f ms  rss %7.1f MB (%+.1f)",
+                     name, entry["ms"], entry["rss_mb"], entry["rss_delta_mb"])
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        self.rss_end  = rss_bytes()
+        summary = self.summary()
+        log.info("[STARTUP] Ready in %.1f ms, rss %.1f MB — slowest: %s",
+                 summary["total_ms"], summary["rss_mb"],
+                 ", ".join(f"{p['phase']} {p['ms']} ms" for p in
+                           sorted(self.phases, key=lambda p: -p["ms"])[:3]))
+        return summary
+
+    def summary(self):
+        end = self.finished or time.perf_counter()
+        return {
+            "total_ms":     round(1000 * (end - self.started), 1),
+            "rss_start_mb": round(self.rss_start / (1024 * 1024), 1),
+            "rss_mb":       round((self.rss_end or rss_bytes()) / (1024 * 1024), 1),
+            "phases":       list(self.phases),
+        }
@@ -0,0 +1,218 @@
+# =============================================================================
+# tracing.py — Per-query stage timing for the ask() pipeline
+# =============================================================================
+# Each ask() call owns one QueryTrace, held in a contextvar so code deep in
+# the call tree (GeoLookup.get_coords, SemanticCache.get) can time itself
+# without the trace being threaded through every signature:
+#
+#   trace = start_trace()                 ask_front() entry
+#   with stage("cache_get"): ...          any stage, any depth
+#   @timed("geo_lookup")                  whole-method stages
+#   resume_trace(trace)                   ask_back() on another executor thread
+#   finish_trace("browsing")              once the route is known
+#   record_pending("limiter", s)          work done before the trace exists
+#                                         (app.py's rate limiter); the next
+#                                         start_trace() in this context adds it
+#
+# On finish, each stage's accumulated time is observed into
+#   pathfinder_ask_stage_seconds{stage, route}
+# plus the total into pathfinder_ask_seconds{route}, both on GET /metrics.
+# Traces with measured=False (dry runs, i.e. startup warm-up) are finished
+# but not observed, so their cold first-touch latencies stay off /metrics.
+#
+# Stages may nest (geo_lookup runs inside rag_filter), so per-stage numbers
+# are not meant to add up to the total. Outside an active trace (enhancer
+# worker, scripts) stage() is a no-op.
+#
+# Explain mode (ask(..., explain=True) / POST /ask?explain=1):
+#   start_trace(explain=True)             trace.plan collects routing decisions
+#   note("retrieval", {...})              no-op unless the trace is explaining
+#   trace.report()                        {route, total_ms, stages, plan}
+#
+# Query log fields (always on, see query_log.py):
+#   tag("tier", "T1")                     trace.fields → one log record
+#
+# *mll
+# =============================================================================
+
+import contextvars
+import functools
+import time
+
+from metrics import REGISTRY
+
+
+ASK_STAGE_SECONDS = REGISTRY.histogram(
+    "pathfinder_ask_stage_seconds", "Time spent per ask() stage", ("stage", "route"))
+ASK_SECONDS = REGISTRY.histogram(
+    "pathfinder_ask_seconds", "Total ask() time by route", ("route",))
+
+_CURRENT = contextvars.ContextVar("pathfinder_query_trace", default=None)
+_PENDING = contextvars.ContextVar("pathfinder_pending_stages", default=())
+
+
+class QueryTrace:
+    # ("QUERY TRACE": Accumulates {stage: [seconds, calls]} for one query.
+    #  From: start_trace() → To: finish_trace() histograms | *mll)
+
+    def __init__(self, explain=False):
+        self.started  = time.perf_counter()
+        self.stages   = {}
+        self.route    = None
+        self.finished = False
+        self.explain  = explain
+        self.plan     = {}
+        self.fields   = {}      # tag() values for the query log
+        self.logged   = True    # False: keep this query out of the query log
+        self.measured = True    # False: keep this query out of the histograms
+
+    def add(self, name, seconds):
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def timings(self):
+        # Rounded milliseconds per stage, for logs and admin views.
+        return {name: {"ms": round(sec * 1000, 2), "calls": calls}
+                for name, (sec, calls) in self.stages.items()}
+
+    def note(self, key, value):
+        if self.explain:
+            self.plan[key] = value
+
+    def tag(self, key, value):
+        self.fields[key] = value
+
+    def report(self):
+        # ("EXPLAIN REPORT": Query plan returned alongside the answer in
+        #  explain mode — chosen route, per-stage timings and every decision
+        #  recorded with note().
+        #  From: Pipeline._finish_response() → To: ask() response["explain"] | *mll)
+        return {
+            "route":    self.route,
+            "total_ms": round(self.elapsed() * 1000, 2),
+            "stages":   self.timings(),
+            "plan":     self.plan,
+        }
+
+
+class _Stage:
+    __slots__ = ("trace", "name", "t0")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name  = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def start_trace(explain=False):
+    trace   = QueryTrace(explain)
+    pending = _PENDING.get()
+    if pending:
+        for name, seconds in pending:
+            trace.add(name, seconds)
+        trace.started -= sum(seconds for _, seconds in pending)   # part of this query's total
+        _PENDING.set(())
+    _CURRENT.set(trace)
+    return trace
+
+
+def record_pending(name, seconds):
+    # The endpoint's context is copied into the admission lane, so the
+    # stage reaches the trace ask_front() starts on the executor thread.
+    _PENDING.set(_PENDING.get() + ((name, seconds),))
+
+
+def resume_trace(trace):
+    _CURRENT.set(trace)
+    return trace
+
+
+def current_trace():
+    return _CURRENT.get()
+
+
+def stage(name):
+    trace = _CURRENT.get()
+    return _Stage(trace, name) if trace is not None else _NULL_STAGE
+
+
+def record(name, seconds):
+    # For stages that are awkward to wrap in a with-block (long loops).
+    trace = _CURRENT.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+def note(key, value):
+    # Explain-mode annotation from code that has no trace handle.
+    trace = _CURRENT.get()
+    if trace is not None and trace.explain:
+        trace.plan[key] = value
+
+
+def tag(key, value):
+    # Query log field from code that has no trace handle.
+    trace = _CURRENT.get()
+    if trace is not None:
+        trace.fields[key] = value
+
+
+def timed(name):
+    # Decorator form of stage() for methods with several return points.
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _CURRENT.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                trace.add(name, time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+def finish_trace(route):
+    # ("FINISH TRACE": Labels the trace with its route, feeds the histograms
+    #  and detaches it from the context.
+    #  From: ask_front() (gate / cache_hit) or ask_back() → To: /metrics | *mll)
+    trace = _CURRENT.get()
+    if trace is None or trace.finished:
+        return trace
+    trace.route    = route
+    trace.finished = True
+    if trace.measured:
+        for name, (seconds, _) in trace.stages.items():
+            ASK_STAGE_SECONDS.observe(seconds, stage=name, route=route)
+        ASK_SECONDS.observe(trace.elapsed(), route=route)
+    _CURRENT.set(None)
+    return trace
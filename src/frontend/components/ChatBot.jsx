@@ -3,6 +3,20 @@ import Keyboard from 'react-simple-keyboard';
 import 'react-simple-keyboard/build/css/index.css';
 import styles from '../styles/components/ChatBot.module.css';
 
+// Per-tab id so the backend rate-limits each kiosk on its own, even behind one NAT.
+const getSessionId = () => {
+    try {
+        let id = sessionStorage.getItem('pathfinderSessionId');
+        if (!id) {
+            id = (crypto.randomUUID && crypto.randomUUID()) || `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+            sessionStorage.setItem('pathfinderSessionId', id);
+        }
+        return id;
+    } catch {
+        return '';   // no storage: backend falls back to the client IP
+    }
+};
+
 const ChatBot = forwardRef(({
     messages = [],
     setMessages,
@@ -43,6 +57,16 @@ const ChatBot = forwardRef(({
     const keyboardRef = useRef(null);
     const recognitionRef = useRef(null);
     const modalContainerRef = useRef(null);
+    const enhancementStreamsRef = useRef(new Set());
+
+    // Close any open enhancement streams when the chat unmounts
+    useEffect(() => {
+        const streams = enhancementStreamsRef.current;
+        return () => {
+            streams.forEach(source => source.close());
+            streams.clear();
+        };
+    }, []);
 
     // Focus the modal container so it can catch physical keystrokes
     useEffect(() => {
@@ -254,6 +278,34 @@ const ChatBot = forwardRef(({
         }
     };
 
+    // Listen for the background-enhanced version of an answer and swap it in
+    const subscribeToEnhancement = (baseUrl, requestId) => {
+        if (!window.EventSource) return;
+
+        const source = new EventSource(`${baseUrl}/ask/${requestId}/events`);
+        enhancementStreamsRef.current.add(source);
+        const close = () => {
+            source.close();
+            enhancementStreamsRef.current.delete(source);
+        };
+
+        source.addEventListener('enhanced', (event) => {
+            close();
+            const payload = JSON.parse(event.data);
+            if (!payload.answer) return;
+
+            setMessages(prev => prev.map(msg =>
+                msg.requestId === requestId ? { ...msg, content: payload.answer } : msg
+            ));
+            if (onLocationResponse && payload.locations?.length > 0) {
+                onLocationResponse(payload.locations);
+            }
+        });
+        source.addEventListener('unchanged', close);
+        source.addEventListener('timeout', close);
+        source.onerror = close;
+    };
+
     const submitMessage = async (userMessage) => {
         if (!userMessage || loading || !setMessages) return;
 
@@ -266,13 +318,25 @@ const ChatBot = forwardRef(({
 
             const res = await fetch(`${baseUrl}/ask`, {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
+                headers: { 'Content-Type': 'application/json', 'X-Session-Id': getSessionId() },
                 body: JSON.stringify({
                     question: userMessage,
                     active_pin: activePin || null
                 })
             });
 
+            if (res.status === 429) {
+                const retryAfter = res.headers.get('Retry-After') || '10';
+                setMessages(prev => [...prev, { role: 'assistant', content: `Please wait ${retryAfter}s.`, isError: true }]);
+                return;
+            }
+
+            if (res.status === 503 && res.headers.get('Retry-After')) {
+                const retryAfter = res.headers.get('Retry-After');
+                setMessages(prev => [...prev, { role: 'assistant', content: `Lots of visitors right now. Please try again in ${retryAfter}s.`, isError: true }]);
+                return;
+            }
+
             if (!res.ok) {
                 const errorText = await res.text();
                 throw new Error(`Server Error ${res.status}: ${errorText}`);
@@ -280,7 +344,7 @@ const ChatBot = forwardRef(({
 
             const data = await res.json();
 
-            setMessages(prev => [...prev, { role: 'assistant', content: data.answer }]);
+            setMessages(prev => [...prev, { role: 'assistant', content: data.answer, requestId: data.request_id }]);
 
             // -------------- AUTO-PIN LOGIC --------------
             if (data.locations && data.locations.length === 1 && setActivePin) {
@@ -291,6 +355,10 @@ const ChatBot = forwardRef(({
                 onLocationResponse(data.locations);
             }
 
+            if (data.request_id && data.enhancement_pending) {
+                subscribeToEnhancement(baseUrl, data.request_id);
+            }
+
         } catch (error) {
             let errorMsg = 'Something went wrong. Please try again.';
             if (error.message.includes('Failed to fetch')) {
@@ -0,0 +1,39 @@
+# =============================================================================
+# test/backend/conftest.py — Unit tests for the pure-Python backend modules
+# =============================================================================
+# The backend is a flat module directory (src/backend) run from its own
+# folder, so the tests put it on sys.path the same way uvicorn sees it.
+#
+# Usage (from the repo root):
+#   python -m pytest -q test/backend
+#
+# *mll
+# =============================================================================
+
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "src" / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    # A hashing-backend Pipeline on its own copy of dataset.json and Chroma
+    # directory. open_pipeline() sets these env vars; monkeypatch restores them.
+    from bench.fixtures import open_pipeline
+    from pipeline import DATASET_PATH
+
+    monkeypatch.setenv("EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setenv("QUERY_LOG_ENABLED", "0")
+    monkeypatch.delenv("ENHANCER_PROVIDERS", raising=False)
+    monkeypatch.delenv("ENHANCER_QUEUE_PATH", raising=False)
+    dataset = tmp_path / "dataset.json"
+    dataset.write_text(DATASET_PATH.read_text(encoding="utf-8"), encoding="utf-8")
+    pipeline, _ = open_pipeline("hashing", tmp_path, dataset_path=dataset)
+    pipeline.config["rag"].setdefault("rebuild", {})["pause_seconds"] = 0
+    yield pipeline
+    pipeline.enhancer.stop()
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_rejects_with_retry_after_and_returns_every_slot():
+    lane    = AdmissionController(name="test", workers=1, max_queue=1, queue_timeout=0.05, retry_after=7)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.ensure_future(lane.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(lane.run(lambda: "late"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            await lane.run(lambda: "shed")
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await queued
+        release.set()
+        await busy
+        return full.value, timed_out.value
+
+    try:
+        full, timed_out = run(scenario())
+    finally:
+        lane.shutdown()
+    assert (full.reason, full.retry_after) == ("queue_full", 7)
+    assert (timed_out.reason, timed_out.retry_after) == ("queue_timeout", 7)
+    assert lane.waiting == 0 and lane.in_flight == 0
+    assert lane._slots._value == lane.max_in_flight
+
+
+def test_slot_granted_as_the_wait_times_out_is_not_leaked(monkeypatch):
+    import admission
+
+    lane = AdmissionController(name="race", workers=1, max_queue=4, queue_timeout=0.05)
+
+    async def timeout_loses_race(waiters, timeout):
+        lane._slots.release()                 # the slot frees up…
+        await asyncio.shield(next(iter(waiters)))
+        return set(), waiters                 # …but the timeout is reported first
+
+    async def scenario():
+        await lane._acquire()                 # hold the only slot
+        monkeypatch.setattr(admission.asyncio, "wait", timeout_loses_race)
+        with pytest.raises(AdmissionRejected):
+            await lane._acquire()
+        monkeypatch.undo()
+        await asyncio.sleep(0)
+        assert lane._slots._value == 1
+        await asyncio.wait_for(lane._acquire(), 0.5)
+
+    try:
+        run(scenario())
+    finally:
+        lane.shutdown()
+
+
+def test_http_503_carries_retry_after(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+    from rate_limit import ClientRateLimiter
+
+    lane = AdmissionController(name="full", workers=1, max_queue=0, retry_after=3)
+
+    async def saturated(*args, **kwargs):
+        lane._reject("queue_full")
+
+    monkeypatch.setattr(lane, "run", saturated)
+    monkeypatch.setattr(app_module, "pipeline", type("P", (), {"ask_front": None, "ask_back": None})())
+    monkeypatch.setattr(app_module, "rate_limiter", ClientRateLimiter())
+    monkeypatch.setattr(app_module, "fast_lane", lane)
+    try:
+        response = TestClient(app_module.app).post("/ask", json={"question": "beaches in virac"})
+    finally:
+        lane.shutdown()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from bundle import BundleError, BundleIndex, IndexBundle, write_bundle
+
+
+def make_bundle(path, space="cosine", n=50, dim=8, seed=0):
+    rng     = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    towns   = ["virac", "baras", "pandan"]
+    columns = {
+        "municipality": [towns[i % 3] for i in range(n)],
+        "category":     ["beach" if i % 2 else "hotel" for i in range(n)],
+        "rating":       [None if i % 5 == 0 else i for i in range(n)],
+    }
+    tables = {"docs": {"ids": [f"doc{i}" for i in range(n)],
+                       "documents": [f"document {i}" for i in range(n)],
+                       "metadata": columns}}
+    arrays = {"doc_embeddings": vectors.astype(np.float16),
+              "doc_norms":      np.linalg.norm(vectors, axis=1).astype(np.float32)}
+    write_bundle(path, arrays, tables, {"model": "test-model", "space": space, "count": n})
+    return vectors, columns
+
+
+def reference(vectors, space, q, rows, k):
+    stored = vectors.astype(np.float16).astype(np.float64)[rows]
+    if space == "cosine":
+        d = 1 - stored @ q / (np.linalg.norm(stored, axis=1) * np.linalg.norm(q))
+    elif space == "ip":
+        d = 1 - stored @ q
+    else:
+        d = ((stored - q) ** 2).sum(axis=1)
+    return [f"doc{rows[i]}" for i in np.argsort(d, kind="stable")[:k]]
+
+
+@pytest.mark.parametrize("space", ["cosine", "l2", "ip"])
+def test_round_trip_query_with_where(tmp_path, monkeypatch, space):
+    path             = tmp_path / "index.bundle"
+    vectors, columns = make_bundle(path, space)
+    queries          = vectors[[3, 17]] + 0.01
+    bundle           = IndexBundle(path).check(model="test-model")
+    index            = BundleIndex(bundle, lambda texts: queries[:len(texts)])
+    monkeypatch.setattr(BundleIndex, "CHUNK_ROWS", 7)     # several blocks + a ragged tail
+
+    assert index.count() == 50
+    assert bundle.info()["space"] == space
+
+    result = index.query(["a", "b"], n_results=4)
+    for q, ids in zip(queries, result["ids"]):
+        assert ids == reference(vectors, space, q.astype(np.float64), np.arange(50), 4)
+
+    where  = {"$and": [{"municipality": {"$in": ["virac", "baras"]}}, {"category": "beach"}]}
+    rows   = np.array([i for i in range(50)
+                       if columns["municipality"][i] in ("virac", "baras") and columns["category"][i] == "beach"])
+    result = index.query(["a", "b"], n_results=3, where=where)
+    for q, ids, metas in zip(queries, result["ids"], result["metadatas"]):
+        assert ids == reference(vectors, space, q.astype(np.float64), rows, 3)
+        assert all(m["category"] == "beach" and m["municipality"] != "pandan" for m in metas)
+
+    first = result["metadatas"][0]
+    assert all(("rating" in m) == (int(i[3:]) % 5 != 0) for m, i in zip(first, result["ids"][0]))
+
+
+def test_where_operators(tmp_path):
+    path = tmp_path / "index.bundle"
+    vectors, _ = make_bundle(path)
+    index = BundleIndex(IndexBundle(path), lambda texts: vectors[:1])
+
+    def ids(where):
+        return set(index.query(["q"], n_results=50, where=where)["ids"][0])
+
+    assert ids({"municipality": "virac"}) == {f"doc{i}" for i in range(0, 50, 3)}
+    assert ids({"municipality": {"$ne": "virac"}}) == {f"doc{i}" for i in range(50) if i % 3}
+    assert ids({"$or": [{"municipality": "pandan"}, {"category": {"$nin": ["hotel"]}}]}) == \
+        {f"doc{i}" for i in range(50) if i % 3 == 2 or i % 2}
+    assert index.query(["q"], n_results=5, where={"municipality": "nowhere"})["ids"] == [[]]
+    with pytest.raises(ValueError):
+        ids({"rating": {"$gt": 3}})
+
+
+def test_rejects_other_model_and_foreign_files(tmp_path):
+    path = tmp_path / "index.bundle"
+    make_bundle(path)
+    with pytest.raises(BundleError):
+        IndexBundle(path).check(model="another-model")
+    (tmp_path / "junk.bundle").write_bytes(b"not a bundle at all")
+    with pytest.raises(BundleError):
+        IndexBundle(tmp_path / "junk.bundle")
@@ -0,0 +1,63 @@
+import socket
+
+import pytest
+
+import chroma_store
+from chroma_store import ChromaStoreError, claim_serving_store, open_client, server_config, start_server
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    def write(text):
+        path = tmp_path / "config.yaml"
+        path.write_text(text, encoding="utf-8")
+        return path
+    return write
+
+
+@pytest.fixture(autouse=True)
+def release_claims(monkeypatch):
+    monkeypatch.delenv("CHROMA_SERVER", raising=False)
+    yield
+    while chroma_store._claims:
+        chroma_store._claims.pop().close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_embedded_store_is_claimed_by_one_serving_process(tmp_path, config_file):
+    config = config_file("rag: {}\n")
+    assert claim_serving_store(config, tmp_path / "chroma") == tmp_path / "chroma"
+    with pytest.raises(ChromaStoreError, match="already served by pid"):
+        claim_serving_store(config, tmp_path / "chroma")
+
+
+def test_server_mode_needs_no_claim(tmp_path, config_file, monkeypatch):
+    config = config_file("rag:\n  chroma_server: {enabled: true, port: 9000}\n")
+    assert claim_serving_store(config, tmp_path / "chroma") is None
+    assert claim_serving_store(config, tmp_path / "chroma") is None
+
+    monkeypatch.setenv("CHROMA_SERVER", "10.0.0.5:8123")
+    conf = server_config({"rag": {"chroma_server": {"enabled": False, "autostart": False}}})
+    assert (conf["enabled"], conf["host"], conf["port"], conf["autostart"]) == (True, "10.0.0.5", 8123, False)
+
+
+def test_workers_share_collections_through_the_server(tmp_path):
+    port   = free_port()
+    config = {"rag": {"chroma_server": {"enabled": True, "host": "127.0.0.1", "port": port,
+                                        "autostart": False}}}
+    with pytest.raises(ChromaStoreError, match="no Chroma server"):
+        open_client(config, tmp_path / "chroma")
+
+    server = start_server(tmp_path / "chroma", "127.0.0.1", port)
+    try:
+        worker_a, worker_b = open_client(config, tmp_path / "chroma"), open_client(config, tmp_path / "chroma")
+        worker_a.create_collection("query_cache").add(ids=["q1"], embeddings=[[1.0, 0.0]], documents=["hi"])
+        assert worker_b.get_collection("query_cache").get(ids=["q1"])["documents"] == ["hi"]
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+import yaml
+
+from bench.fixtures import open_pipeline
+from llm_providers import LLMProvider, build_providers
+from pipeline import BackgroundEnhancer, CONFIG_PATH
+
+
+class ScriptedProvider(LLMProvider):
+    name = "scripted"
+
+    def __init__(self, reply, available=True):
+        super().__init__("http://127.0.0.1:9", "scripted")
+        self.reply     = reply
+        self.calls     = 0
+        self.called    = threading.Event()
+        self._available = available
+
+    def is_available(self):
+        return self._available
+
+    def complete(self, prompt):
+        self.calls += 1
+        self.called.set()
+        return self.reply
+
+
+class NullCache:
+    def update(self, query, enhanced_answer, places=None):
+        return True
+
+
+@pytest.fixture
+def make_enhancer(tmp_path, monkeypatch):
+    monkeypatch.delenv("ENHANCER_QUEUE_PATH", raising=False)
+    enhancers = []
+
+    def make(reply, available=True, **enhancer_cfg):
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        config["enhancer"].update({"queue_backend": "sqlite", "queue_path": str(tmp_path / "jobs.db"),
+                                   "retry_seconds": 30, **enhancer_cfg})
+        provider = ScriptedProvider(reply, available)
+        enhancer = BackgroundEnhancer("key", NullCache(), config, providers=[provider])
+        enhancers.append(enhancer)
+        return enhancer, provider
+
+    yield make
+    for enhancer in enhancers:
+        enhancer.stop()
+        enhancer.job_queue.close()
+
+
+def run_one_job(enhancer, provider):
+    enhancer.enqueue("beaches in virac", "facts", "raw answer", request_id="r1")
+    enhancer.start()
+    assert provider.called.wait(5)
+    time.sleep(0.2)       # let the worker ack or release
+    enhancer.stop()
+
+
+def test_failing_provider_uses_up_attempts(make_enhancer):
+    enhancer, provider = make_enhancer((None, None))        # error, no Retry-After
+    pushed = []
+    enhancer.add_listener(lambda request_id, payload: pushed.append(payload))
+    run_one_job(enhancer, provider)
+
+    status, attempts, deferrals, not_before = enhancer.job_queue._conn.execute(
+        "SELECT status, attempts, deferrals, not_before FROM enhancer_jobs").fetchone()
+    assert (status, attempts, deferrals) == ("pending", 1, 0)
+    assert not_before > time.time() + 20
+    assert pushed == []
+
+
+def test_failing_provider_gives_up_after_max_attempts(make_enhancer):
+    enhancer, provider = make_enhancer((None, None), max_attempts=2, retry_seconds=0.05)
+    pushed = []
+    enhancer.add_listener(lambda request_id, payload: pushed.append(payload))
+    enhancer.enqueue("beaches in virac", "facts", "raw answer", request_id="r1")
+    enhancer.start()
+    deadline = time.time() + 5
+    while not pushed and time.time() < deadline:
+        time.sleep(0.05)
+    enhancer.stop()
+
+    assert provider.calls == 2
+    assert pushed == [{"status": "unchanged"}]
+    assert enhancer.job_queue.depth() == 0
+
+
+def test_rate_limited_provider_defers_by_retry_after(make_enhancer):
+    enhancer, provider = make_enhancer((None, 90))
+    run_one_job(enhancer, provider)
+
+    not_before = enhancer.job_queue._conn.execute(
+        "SELECT not_before FROM enhancer_jobs").fetchone()[0]
+    assert not_before > time.time() + 80
+
+
+def test_non_answer_is_acked(make_enhancer):
+    enhancer, provider = make_enhancer(("The facts do not mention that place.", None))
+    run_one_job(enhancer, provider)
+
+    assert enhancer.job_queue.depth() == 0
+
+
+def test_keyless_enhancer_drops_queued_jobs(make_enhancer):
+    enhancer, provider = make_enhancer(("unused", None), available=False)
+    pushed = []
+    enhancer.add_listener(lambda request_id, payload: pushed.append(payload))
+    assert not enhancer.available()
+
+    enhancer.enqueue("beaches in virac", "facts", "raw answer", request_id="r1")
+    assert enhancer.is_queued("beaches in virac")
+    enhancer.start()
+    deadline = time.time() + 5
+    while not pushed and time.time() < deadline:
+        time.sleep(0.05)
+    enhancer.stop()
+
+    assert provider.calls == 0
+    assert pushed == [{"status": "unchanged"}]
+    assert enhancer.job_queue.depth() == 0 and not enhancer.is_queued("beaches in virac")
+
+
+@pytest.mark.parametrize("providers", ["gemini,groq", "local"])
+def test_ask_only_promises_enhancements_that_can_happen(tmp_path, monkeypatch, providers):
+    for name in ("GEMINI_API_KEY", "GROQ_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setenv("QUERY_LOG_ENABLED", "0")
+    monkeypatch.delenv("ENHANCER_QUEUE_PATH", raising=False)
+    pipeline, _ = open_pipeline("hashing", tmp_path)
+    pipeline.enhancer.stop()
+    monkeypatch.setenv("ENHANCER_PROVIDERS", providers)   # "local" needs no key
+    pipeline.enhancer.providers = build_providers(pipeline.config, None)
+
+    keyless = providers != "local"
+    miss    = pipeline.ask("beaches in virac", log_query=False)
+    raw_hit = pipeline.ask("beaches in virac", log_query=False)
+    assert miss["enhancement_pending"] is not keyless
+    assert raw_hit["enhancement_pending"] is False          # keyless, or the miss's job is queued
+    assert pipeline.enhancer.job_queue.depth() == (0 if keyless else 1)
@@ -0,0 +1,38 @@
+import chromadb
+
+from hashing_encoder import HashingEncoder
+from index_manager import IndexManager
+from pipeline import encoder_embedding_function
+
+
+def test_pointer_stamp_changes_on_every_swap(tmp_path):
+    client   = chromadb.PersistentClient(path=str(tmp_path))
+    function = encoder_embedding_function(HashingEncoder(dim=64), "hashing-64")
+    manager  = IndexManager(client, function, "knowledge", tmp_path, smoke_query="beaches")
+
+    def fill(collection):
+        collection.add(ids=["doc0", "doc1"], documents=["beaches in virac", "hotels in virac"])
+        return 2
+
+    assert manager.pointer_stamp() is None
+    manager.build(fill)
+    stamp = manager.pointer_stamp()
+    manager.build(fill)
+    assert manager.pointer_stamp() not in (None, stamp)
+
+
+def test_follows_a_swap_made_by_another_process(pipeline):
+    serving = pipeline.collection.name
+    records = pipeline.dataset_records(pipeline.dataset_path)
+
+    def fill(shadow):                     # what a second worker's /admin/rebuild does
+        pipeline._add_records(shadow, records, list(records))
+        return len(records)
+
+    rebuilt = pipeline.index.build(fill).name
+    assert pipeline.collection.name == serving
+
+    pipeline._index_seen = 0.0
+    pipeline.ask("beaches in virac", dry_run=True, enqueue=False, log_query=False)
+    assert pipeline.collection.name == rebuilt
+    assert not pipeline.follow_active_index()    # throttled, and nothing moved since
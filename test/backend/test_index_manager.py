@@ -0,0 +1,65 @@
+import chromadb
+import pytest
+
+from hashing_encoder import HashingEncoder
+from index_manager import IndexManager, IndexValidationError, active_collection_name
+from pipeline import encoder_embedding_function
+
+DOCS = {f"doc{i}": f"{kind} number {i} in virac" for i, kind in
+        enumerate(["beaches", "hotels", "waterfalls", "restaurants"] * 3)}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    client   = chromadb.PersistentClient(path=str(tmp_path))
+    function = encoder_embedding_function(HashingEncoder(dim=64), "hashing-64")
+    return IndexManager(client, function, "knowledge", tmp_path, smoke_query="beaches")
+
+
+def fill_with(docs):
+    def fill(collection):
+        if docs:
+            collection.add(ids=list(docs), documents=list(docs.values()))
+        return len(docs)
+    return fill
+
+
+def generation_names(manager):
+    return sorted(c if isinstance(c, str) else c.name for c in manager.client.list_collections())
+
+
+def test_build_swaps_pointer_and_prunes_old_generations(manager, tmp_path):
+    assert manager.open_active().name == "knowledge"          # fresh install: empty base collection
+
+    first  = manager.build(fill_with(DOCS)).name
+    second = manager.build(fill_with(DOCS)).name
+    assert manager.pointer() | {"swapped_at": None} == {"active": second, "previous": first,
+                                                        "swapped_at": None}
+    assert active_collection_name(tmp_path, "knowledge") == second
+
+    third = manager.build(fill_with(DOCS)).name
+    assert generation_names(manager) == sorted([second, third])   # base + first dropped
+    assert manager.open_active().count() == len(DOCS)
+
+
+def test_failed_validation_keeps_the_active_generation(manager):
+    active = manager.build(fill_with(DOCS)).name
+    with pytest.raises(IndexValidationError):
+        manager.build(fill_with({}))
+    with pytest.raises(IndexValidationError):
+        manager.build(lambda collection: len(DOCS) + 5)          # fewer docs than expected
+    assert manager.active_name() == active
+    assert generation_names(manager) == [active]                  # failed shadows dropped
+
+
+def test_rollback_and_manifest(manager):
+    with pytest.raises(IndexValidationError):
+        manager.rollback()
+    first  = manager.build(fill_with(DOCS)).name
+    second = manager.build(fill_with(DOCS)).name
+    manager.save_manifest(second, "abc", len(DOCS))
+
+    assert manager.rollback().name == first
+    assert manager.pointer()["previous"] == second
+    assert manager.manifest(second)["dataset_hash"] == "abc"
+    assert manager.stats()["active"] == first and manager.stats()["synced"] is None
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+from queue import Empty
+
+import pytest
+
+from job_queue import MemoryJobQueue, SqliteJobQueue
+
+
+def make_queue(path, **kwargs):
+    return SqliteJobQueue(path, **kwargs)
+
+
+def dead_pid():
+    # A pid that existed a moment ago and is certainly gone now.
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_lease_ack_release(tmp_path):
+    queue = make_queue(tmp_path / "jobs.db", max_attempts=2)
+    queue.put({"candidates": ["a"], "timestamp": 1.0})
+    queue.put({"candidates": ["b"], "timestamp": 2.0})
+
+    first = queue.get(timeout=0.1)
+    assert first["candidates"] == ["a"] and first["_attempts"] == 0
+    queue.release(first)
+    again = queue.get(timeout=0.1)
+    assert again["_job_id"] == first["_job_id"] and again["_attempts"] == 1
+
+    second = queue.get(timeout=0.1)
+    assert second["candidates"] == ["b"]
+    queue.ack(second)
+    assert queue.depth() == 1
+
+    queue.release(again)                 # second failure hits max_attempts
+    assert queue.depth() == 0
+    with pytest.raises(Empty):
+        queue.get(timeout=0.05)
+
+
+def test_restart_resumes_own_and_orphaned_leases(tmp_path):
+    path  = tmp_path / "jobs.db"
+    queue = make_queue(path)
+    queue.put({"candidates": ["mine"]})
+    queue.put({"candidates": ["orphan"]})
+    mine   = queue.get(timeout=0.1)
+    orphan = queue.get(timeout=0.1)
+    queue._conn.execute("UPDATE enhancer_jobs SET lease_owner=? WHERE id=?",
+                        (f"{queue.owner.rpartition(':')[0]}:{dead_pid()}", orphan["_job_id"]))
+    queue.close()
+
+    restarted = make_queue(path)
+    resumed   = {restarted.get(timeout=0.1)["_job_id"], restarted.get(timeout=0.1)["_job_id"]}
+    assert resumed == {mine["_job_id"], orphan["_job_id"]}
+
+
+def test_restart_keeps_live_peer_leases(tmp_path):
+    path  = tmp_path / "jobs.db"
+    queue = make_queue(path)
+    queue.put({"candidates": ["peer"]})
+    queue.put({"candidates": ["remote"]})
+    peer   = queue.get(timeout=0.1)
+    remote = queue.get(timeout=0.1)
+    host   = queue.owner.rpartition(":")[0]
+    queue._conn.execute("UPDATE enhancer_jobs SET lease_owner=? WHERE id=?",
+                        (f"{host}:{os.getppid()}", peer["_job_id"]))
+    queue._conn.execute("UPDATE enhancer_jobs SET lease_owner=? WHERE id=?",
+                        ("other-host:1", remote["_job_id"]))
+
+    other = make_queue(path)
+    with pytest.raises(Empty):
+        other.get(timeout=0.05)
+    assert other.depth() == 2
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    path  = tmp_path / "jobs.db"
+    queue = make_queue(path)
+    queue.put({"candidates": ["slow"]})
+    job = queue.get(timeout=0.1)
+    queue._conn.execute("UPDATE enhancer_jobs SET lease_owner='other-host:1', leased_at=0 WHERE id=?",
+                        (job["_job_id"],))
+
+    other = make_queue(path, lease_seconds=60)
+    assert other.get(timeout=0.1)["_job_id"] == job["_job_id"]
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+def test_counted_retry_is_delayed_and_tracks_queries(tmp_path, backend):
+    queue = (make_queue(tmp_path / "jobs.db", max_attempts=2) if backend == "sqlite"
+             else MemoryJobQueue(max_attempts=2))
+    queue.put({"query": "beaches in virac"})
+    assert queue.has_job("beaches in virac") and not queue.has_job("falls in bato")
+
+    job = queue.get(timeout=0.1)
+    assert queue.has_job("beaches in virac")          # leased jobs still count
+    queue.release(job, retry_after=0.2, count_attempt=True)
+    with pytest.raises(Empty):
+        queue.get(timeout=0.05)
+    job = queue.get(timeout=1)
+    assert job["_attempts"] == 1
+
+    queue.release(job, retry_after=0.2, count_attempt=True)   # hits max_attempts
+    assert queue.depth() == 0 and not queue.has_job("beaches in virac")
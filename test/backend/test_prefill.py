@@ -0,0 +1,77 @@
+import threading
+import time
+
+from admission import AdmissionController
+
+
+class FakeCache:
+    def __init__(self):
+        self.stored = set()
+        self.cache_collection = self
+
+    def get(self, normalized, requested_count=None):
+        return None
+
+    def count(self):
+        return len(self.stored)
+
+
+class FakePipeline:
+    # Just what prefill() touches; ask() records how many calls overlap.
+    def __init__(self, tmp_path):
+        self.config         = {"cache": {"prefill": {"state_path": str(tmp_path / "prefill.json"),
+                                                     "workers": 4, "batch_size": 4}}}
+        self.dataset_path   = None
+        self.semantic_cache = FakeCache()
+        self.lock           = threading.Lock()
+        self.running        = 0
+        self.peak           = 0
+
+    def normalize_query(self, query):
+        return query.lower()
+
+    def dataset_hash(self, path):
+        return "fixed"
+
+    def ask(self, query, **kwargs):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+            self.semantic_cache.stored.add(query)
+        return {"explain": {"plan": {"cache_write": {"stored": True}}}}
+
+
+def test_admin_prefill_runs_in_background_on_the_ask_lane(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+
+    async def no_pipeline_startup():
+        pass
+
+    queries = tmp_path / "queries.txt"
+    queries.write_text("\n".join(f"question {i}" for i in range(12)), encoding="utf-8")
+    pipeline = FakePipeline(tmp_path)
+    lane     = AdmissionController(name="ask", workers=1, max_queue=1, queue_timeout=0.01, retry_after=0.01)
+    monkeypatch.setattr(app_module, "start_pipeline", no_pipeline_startup)
+    monkeypatch.setattr(app_module, "claim_serving_store", lambda *args: None)
+    monkeypatch.setattr(app_module, "pipeline", pipeline)
+    monkeypatch.setattr(app_module, "ask_lane", lane)
+    monkeypatch.setattr(app_module, "prefill_run", {"state": "idle"})
+
+    with TestClient(app_module.app) as client:
+        started = client.post("/admin/prefill", params={"sources": str(queries)})
+        assert started.status_code == 202 and started.json()["queries"] == 12
+        assert client.post("/admin/prefill", params={"sources": str(queries)}).status_code == 409
+
+        deadline = time.time() + 10
+        while app_module.prefill_run["state"] == "running" and time.time() < deadline:
+            time.sleep(0.05)
+        run = dict(app_module.prefill_run)
+
+    assert run["state"] == "done" and run["done"] == run["total"] == 12
+    assert run["result"]["outcomes"] == {"stored": 12, "enqueued": 0}
+    assert pipeline.peak == 1                      # the lane's max_in_flight, not prefill.workers
@@ -0,0 +1,59 @@
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from push_hub import PushHub, PushStore
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "src" / "backend"
+
+
+def hub_on(path, poll_seconds=0.02, ttl_seconds=180):
+    hub = PushHub(ttl_seconds=ttl_seconds)
+    hub.attach_store(PushStore(path, ttl_seconds=ttl_seconds), poll_seconds=poll_seconds)
+    return hub
+
+
+def test_waiter_gets_result_published_by_another_hub(tmp_path):
+    publisher, subscriber = hub_on(tmp_path / "push.db"), hub_on(tmp_path / "push.db")
+
+    async def scenario():
+        publisher.bind_loop(asyncio.get_running_loop())
+        subscriber.bind_loop(asyncio.get_running_loop())
+        waiting = asyncio.ensure_future(subscriber.wait("req-1", 2))
+        await asyncio.sleep(0.05)
+        publisher.publish("req-1", {"status": "enhanced", "answer": "hi"})
+        return await waiting, subscriber.stats()
+
+    payload, stats = asyncio.run(scenario())
+    assert payload == {"status": "enhanced", "answer": "hi"}
+    assert stats["subscribers"] == 0
+
+
+def test_late_subscriber_gets_result_from_another_process(tmp_path):
+    path   = tmp_path / "push.db"
+    script = ("from push_hub import PushHub, PushStore\n"
+              "hub = PushHub()\n"
+              f"hub.attach_store(PushStore({str(path)!r}))\n"
+              "hub.publish('req-2', {'status': 'unchanged'})\n")
+    subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, check=True)
+
+    subscriber = hub_on(path)
+
+    async def scenario():
+        subscriber.bind_loop(asyncio.get_running_loop())
+        return await subscriber.wait("req-2", 2)
+
+    assert asyncio.run(scenario()) == {"status": "unchanged"}
+
+
+def test_expired_results_are_not_delivered(tmp_path):
+    store = PushStore(tmp_path / "push.db", ttl_seconds=0.05)
+    store.put("old", {"status": "enhanced"})
+    time.sleep(0.1)
+    assert store.fetch(["old"]) == {}
+
+    store.put("new", {"status": "enhanced"})
+    rows = store._conn.execute("SELECT request_id FROM push_results").fetchall()
+    assert rows == [("new",)]
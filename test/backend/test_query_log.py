@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import time
+
+from query_log import QueryLog, read_records
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def wait_written(log, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        files = list(log.base.parent.glob("queries*"))
+        if sum(len(list(read_records(str(f)))) for f in files) >= count:
+            return
+        time.sleep(0.02)
+    raise AssertionError("records not written")
+
+
+def test_each_writer_rotates_only_its_own_file(tmp_path):
+    base   = tmp_path / "queries.jsonl"
+    first  = QueryLog(base, max_bytes=300, backups=50, compress=True)
+    second = QueryLog(base, max_bytes=300, backups=50, compress=False)
+    other  = os.getppid()                                       # another live process
+    second.pid, second.path = other, second._live_path(other)
+    for i in range(40):
+        (first if i % 2 else second).emit({"ts": f"2026-10-19T10:00:{i:02d}.000Z", "query": f"q{i}"})
+    first.close()
+    second.close()
+
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert any(n.endswith(f"-{os.getpid()}.jsonl.gz") for n in names)
+    assert any(n.endswith(f"-{other}.jsonl") for n in names)
+    records = list(read_records(str(tmp_path / "queries*.jsonl*")))
+    assert [r["query"] for r in records] == [f"q{i}" for i in range(40)]
+
+
+def test_orphaned_live_file_is_rotated_and_old_backups_pruned(tmp_path):
+    base   = tmp_path / "queries.jsonl"
+    orphan = tmp_path / f"queries.{dead_pid()}.jsonl"
+    orphan.write_text(json.dumps({"ts": "2026-10-19T09:00:00.000Z", "query": "left behind"}) + "\n")
+    for i in range(3):
+        (tmp_path / f"queries-20260101T00000{i}000-1.jsonl.gz").write_bytes(gzip.compress(b""))
+
+    log = QueryLog(base, backups=2)
+    log.emit({"query": "new"})
+    wait_written(log, 2)
+    log.close()
+
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert not orphan.exists()
+    assert len([n for n in names if n.startswith("queries-")]) == 2
+    assert [r["query"] for r in read_records(str(tmp_path / "queries*.jsonl*"))] == ["left behind", "new"]
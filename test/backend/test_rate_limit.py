@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from rate_limit import ClientRateLimiter, client_ip
+
+
+def request(host, headers=None):
+    return SimpleNamespace(client=SimpleNamespace(host=host), headers=headers or {})
+
+
+def test_rotating_session_header_hits_the_per_ip_cap():
+    limiter = ClientRateLimiter(max_request=2, period_seconds=60, per_ip_max_request=5)
+    allowed = [limiter.check(request("203.0.113.7", {"X-Session-Id": f"s{i}"}))[0]
+               for i in range(50)]
+    assert sum(allowed) == 5
+    assert limiter.client_count() == 1 + 5      # no bucket for refused sessions
+
+    other_ip = limiter.check(request("203.0.113.8", {"X-Session-Id": "s0"}))
+    assert other_ip == (True, 0)
+
+
+def test_sessions_split_an_ip_budget():
+    limiter = ClientRateLimiter(max_request=2, period_seconds=60, per_ip_max_request=10)
+    kiosk_a = [limiter.check(request("198.51.100.1", {"X-Session-Id": "a"}))[0] for _ in range(4)]
+    kiosk_b = [limiter.check(request("198.51.100.1", {"X-Session-Id": "b"}))[0] for _ in range(2)]
+    assert kiosk_a == [True, True, False, False]
+    assert kiosk_b == [True, True]
+
+
+def test_throttled_request_reports_retry_after():
+    limiter = ClientRateLimiter(max_request=1, period_seconds=30)
+    assert limiter.check(request("192.0.2.1")) == (True, 0)
+    allowed, retry_after = limiter.check(request("192.0.2.1"))
+    assert not allowed and 1 <= retry_after <= 30
+
+
+def test_forwarded_for_only_trusted_from_configured_proxies():
+    spoofed = {"X-Forwarded-For": "1.2.3.4"}
+    assert client_ip(request("203.0.113.7", spoofed)) == "203.0.113.7"
+
+    limiter = ClientRateLimiter(trusted_proxies=["10.0.0.0/8"])
+    proxied = {"X-Forwarded-For": "1.2.3.4, 203.0.113.9, 10.0.0.2"}
+    assert client_ip(request("10.0.0.1", proxied), limiter.trusted_proxies) == "203.0.113.9"
+    assert client_ip(request("203.0.113.7", proxied), limiter.trusted_proxies) == "203.0.113.7"
+
+
+def test_bypass_token():
+    limiter = ClientRateLimiter(max_request=1, period_seconds=60, bypass_token="bench")
+    for _ in range(5):
+        assert limiter.check(request("192.0.2.1", {"X-RateLimit-Bypass": "bench"})) == (True, 0)
+    assert limiter.check(request("192.0.2.1", {"X-RateLimit-Bypass": "wrong"}))[0]
+    assert not limiter.check(request("192.0.2.1", {"X-RateLimit-Bypass": "wrong"}))[0]
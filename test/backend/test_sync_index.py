@@ -0,0 +1,20 @@
+import json
+
+NEW_RECORD = {"input": "Where can I rent a kayak in Virac?", "output": "Ask at the Virac port.",
+              "title": "Kayak rental", "topic": "activities", "location": "Virac",
+              "summary_offline": "Kayaks can be rented near the Virac port.", "activities": ["kayaking"]}
+
+
+def test_sync_index_adds_and_deletes_only_the_difference(pipeline):
+    assert pipeline.sync_index()["unchanged"]
+    before  = pipeline.dataset_records(pipeline.dataset_path)
+    records = json.loads(open(pipeline.dataset_path, encoding="utf-8").read())
+    with open(pipeline.dataset_path, "w", encoding="utf-8") as f:
+        json.dump(records[3:] + [NEW_RECORD], f)
+    after = pipeline.dataset_records(pipeline.dataset_path)
+
+    result = pipeline.sync_index()
+    assert result["added"] == len(set(after) - set(before)) == 1
+    assert result["deleted"] == len(set(before) - set(after)) > 0
+    assert set(pipeline.collection.get(include=[])["ids"]) == set(after)
+    assert pipeline.sync_index()["unchanged"]
@@ -0,0 +1,81 @@
+import pytest
+
+from pipeline import Pipeline
+from tracing import (ASK_SECONDS, ASK_STAGE_SECONDS, current_trace, finish_trace, resume_trace,
+                     stage, start_trace)
+
+
+class BrokenPipeline:
+    def _ask_front(self, user_input, *args):
+        start_trace()
+        with stage("intent"):
+            raise RuntimeError("controller down")
+
+    def _ask_back(self, state):
+        resume_trace(state["trace"])
+        with stage("entity_extract"):
+            raise RuntimeError("extractor down")
+
+
+def test_failing_front_stage_finishes_trace_as_error():
+    with pytest.raises(RuntimeError):
+        Pipeline.ask_front(BrokenPipeline(), "beaches in virac")
+    assert current_trace() is None
+
+
+def test_failing_back_stage_finishes_trace_as_error():
+    trace = start_trace()
+    resume_trace(None)              # ask_back runs on another executor thread
+    with pytest.raises(RuntimeError):
+        Pipeline.ask_back(BrokenPipeline(), {"trace": trace})
+    assert trace.finished and trace.route == "error"
+    assert "entity_extract" in trace.stages
+    assert current_trace() is None
+
+
+def test_unmeasured_trace_stays_off_the_histograms():
+    trace = start_trace()
+    trace.measured = False            # what ask(dry_run=True) — warm-up — sets
+    with stage("warmup_probe"):
+        pass
+    finish_trace("warmup_route")
+    assert trace.finished and trace.route == "warmup_route"
+    assert "warmup_route" not in ASK_SECONDS.snapshot()
+    assert not any("warmup_probe" in key for key in ASK_STAGE_SECONDS.snapshot())
+
+    start_trace()
+    with stage("warmup_probe"):
+        pass
+    finish_trace("warmup_route")
+    assert "warmup_route" in ASK_SECONDS.snapshot()
+
+
+def test_limiter_is_timed_as_an_ask_stage(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+    from admission import AdmissionController
+    from rate_limit import ClientRateLimiter
+
+    seen = []
+
+    def ask_front(question, active_pin, explain):
+        trace = start_trace()
+        seen.append(dict(trace.stages))
+        finish_trace("fake")
+        return {"answer": "ok", "locations": []}, None
+
+    lane = AdmissionController(name="fast", workers=1)
+    monkeypatch.setattr(app_module, "pipeline", type("P", (), {"ask_front": staticmethod(ask_front),
+                                                                "ask_back": None})())
+    monkeypatch.setattr(app_module, "rate_limiter", ClientRateLimiter(max_request=1, period_seconds=60))
+    monkeypatch.setattr(app_module, "fast_lane", lane)
+    client = TestClient(app_module.app)
+    try:
+        assert client.post("/ask", json={"question": "beaches in virac"}).status_code == 200
+        assert client.post("/ask", json={"question": "beaches in virac"}).status_code == 429
+    finally:
+        lane.shutdown()
+
+    assert list(seen[0]) == ["limiter"]
+    assert {"limiter,fake", "limiter,rate_limited"} <= set(ASK_STAGE_SECONDS.snapshot())